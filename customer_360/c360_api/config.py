@@ -31,6 +31,8 @@ class Settings(BaseSettings):
     # Data pipeline settings
     c360_data_path: str = Field(default="../c360_mock_data", description="Path to C360 mock data")
     pipeline_path: str = Field(default="../c360_spark_processing", description="Path to Spark processing pipeline")
+    c360_export_parquet: Optional[str] = Field(default=None, description="Parquet export of customer_analytics_c360 (default: <pipeline_path>/data/export)")
+    c360_streaming_snapshot: Optional[str] = Field(default=None, description="Delta files of streaming_profile.py (default: <pipeline_path>/data/streaming)")
     cache_ttl_minutes: int = Field(default=30, description="Cache TTL in minutes")
     
     # Spark settings
@@ -4,18 +4,41 @@ Handles Spark connection and data querying for the C360 pipeline
 """
 
 import os
+import re
 import subprocess
+import sys
 import tempfile
 from datetime import datetime, timedelta
 from pathlib import Path
 import pandas as pd
-from typing import List, Dict, Any, Optional
+import pyarrow.parquet as pq
+from typing import List, Dict, Any, Optional, Callable, Tuple
 from pyspark.sql import SparkSession
 from pyspark.sql.functions import *
 import structlog
 
+from config import settings
+from product_rollup import ProductRollup
+from scoring import HealthScoreModel, SCORE_INPUT_COLUMNS
+from similarity import CustomerSimilarityIndex, SIMILARITY_INPUT_COLUMNS
+from sketches import SegmentSketches, SKETCH_INPUT_COLUMNS, DEFAULT_PERCENTILES
+
 logger = structlog.get_logger(__name__)
 
+# Marker rows separating the result sets of a multi-query spark-sql run
+RESULT_MARKER_COLUMN = "c360_result"
+RESULT_MARKER_PREFIX = "__c360_result__:"
+
+# Delta files of the streaming snapshot, as written by streaming_profile.py;
+# each row carries the id of the micro-batch that last updated the customer
+STREAMING_DELTA_FILE = re.compile(r"delta-(\d+)\.parquet")
+STREAMING_BATCH_COLUMN = "batch_id"
+
+
+def _records(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Default result formatter: DataFrame rows as dicts"""
+    return df.to_dict('records')
+
 
 class C360DataManager:
     """
@@ -27,7 +50,9 @@ class C360DataManager:
                  spark_app_name: str = "C360_API",
                  c360_data_path: str = "../c360_mock_data",
                  pipeline_path: str = "../c360_spark_processing",
-                 cache_ttl_minutes: int = 30):
+                 cache_ttl_minutes: int = 30,
+                 export_parquet_path: Optional[str] = None,
+                 streaming_snapshot_path: Optional[str] = None):
         """
         Initialize the C360 Data Manager
         
@@ -36,14 +61,27 @@ class C360DataManager:
             c360_data_path: Path to the mock CSV data
             pipeline_path: Path to the Spark processing pipeline
             cache_ttl_minutes: Cache time-to-live in minutes
+            export_parquet_path: Parquet file the pipeline exports customer_analytics_c360 to
+            streaming_snapshot_path: Delta files of streaming_profile.py, applied over the export
         """
         self.spark_app_name = spark_app_name
         self.c360_data_path = Path(c360_data_path)
         self.pipeline_path = Path(pipeline_path)
         self.cache_ttl = timedelta(minutes=cache_ttl_minutes)
+        self.export_parquet_path = Path(export_parquet_path) if export_parquet_path else \
+            self.pipeline_path / "data" / "export" / "customer_analytics_c360.parquet"
+        self.streaming_snapshot_path = Path(streaming_snapshot_path) if streaming_snapshot_path else \
+            self.pipeline_path / "data" / "streaming" / "customer_analytics_c360"
         self.spark: Optional[SparkSession] = None
         self._cache: Dict[str, Dict[str, Any]] = {}
         self._last_pipeline_run: Optional[datetime] = None
+        # Incremented on every successful pipeline run; cached results are tied to it
+        self._snapshot_version: int = 0
+        # Category/cost rollup over the raw sales files, refreshed with the pipeline
+        self.product_rollup = ProductRollup(self.c360_data_path)
+        # In-memory structures derived from one snapshot:
+        # name -> ((snapshot_version, newest streaming batch), object)
+        self._snapshot_artifacts: Dict[str, Tuple[Tuple[int, Optional[int]], Any]] = {}
         
     def get_spark_session(self) -> SparkSession:
         """Get or create Spark session"""
@@ -95,22 +133,37 @@ class C360DataManager:
             if not pipeline_file.exists():
                 raise FileNotFoundError(f"Pipeline file not found: {pipeline_file}")
             
-            # Change to the pipeline directory
+            # Resolved before changing to the pipeline directory
+            data_path = str(self.c360_data_path.resolve())
+            export_path = str(self.export_parquet_path.resolve())
             original_cwd = os.getcwd()
             os.chdir(self.pipeline_path)
             
             try:
-                # Run spark-sql command
+                # Refresh the Parquet sources read by the pipeline (no-op when unchanged)
+                ingest = subprocess.run([sys.executable, "ingest.py", "--data-dir", data_path],
+                                        capture_output=True, text=True, timeout=300)
+                if ingest.returncode != 0:
+                    logger.error("Parquet ingest failed",
+                               stdout=ingest.stdout,
+                               stderr=ingest.stderr)
+                    return False
+
+                # Run the pipeline and export customer_analytics_c360 to Parquet
                 result = subprocess.run([
-                    "spark-sql", 
-                    "-f", "c360_consolidated_pipeline.sql",
-                    "--silent"
+                    sys.executable, "pipeline_runner.py",
+                    "--skip-ingest",
+                    "--no-counts",
+                    "--export-parquet", export_path
                 ], capture_output=True, text=True, timeout=300)
                 
                 if result.returncode == 0:
                     self._last_pipeline_run = datetime.now()
+                    self._snapshot_version += 1
                     self._cache.clear()  # Clear cache after pipeline refresh
-                    logger.info("C360 pipeline completed successfully")
+                    self._refresh_product_rollup()
+                    logger.info("C360 pipeline completed successfully",
+                              snapshot_version=self._snapshot_version)
                     return True
                 else:
                     logger.error("Pipeline failed", 
@@ -128,6 +181,205 @@ class C360DataManager:
             logger.error("Pipeline execution failed", error=str(e))
             return False
     
+    def _refresh_product_rollup(self):
+        """Update the product rollup; a failure keeps serving the previous state"""
+        try:
+            self.product_rollup.refresh()
+        except Exception as e:
+            logger.error("Product rollup refresh failed", error=str(e))
+
+    @property
+    def snapshot_version(self) -> int:
+        """Version of the pipeline output currently served"""
+        return self._snapshot_version
+
+    def _ensure_pipeline_fresh(self):
+        """Run the pipeline if it never ran or its output is older than the cache TTL"""
+        if not self._last_pipeline_run or \
+           datetime.now() - self._last_pipeline_run > self.cache_ttl:
+            logger.info("Running pipeline before query execution")
+            if not self.run_c360_pipeline():
+                raise RuntimeError("Failed to run C360 pipeline")
+
+    def _get_cached(self, cache_key: str) -> Optional[pd.DataFrame]:
+        """Return cached results for the current snapshot, if still fresh"""
+        cached_data = self._cache.get(cache_key)
+        if cached_data is None:
+            return None
+        if cached_data['snapshot_version'] != self._snapshot_version:
+            return None
+        if datetime.now() - cached_data['timestamp'] >= self.cache_ttl:
+            return None
+        return pd.DataFrame(cached_data['data'])
+
+    def _set_cached(self, cache_key: str, df: pd.DataFrame):
+        """Cache query results for the current snapshot"""
+        self._cache[cache_key] = {
+            'data': df.to_dict('records'),
+            'timestamp': datetime.now(),
+            'snapshot_version': self._snapshot_version
+        }
+
+    def streaming_batches(self) -> List[int]:
+        """Batch ids of the delta files of the streaming snapshot, in order"""
+        if not self.streaming_snapshot_path.is_dir():
+            return []
+        return sorted(int(m.group(1)) for m in map(STREAMING_DELTA_FILE.fullmatch,
+                                                    os.listdir(self.streaming_snapshot_path)) if m)
+
+    def _get_snapshot_artifact(self, name: str,
+                               build: Callable[[List[int]], Any]) -> Tuple[Any, Optional[int]]:
+        """
+        Return an in-memory structure derived from the current snapshot, and
+        the newest streaming batch it includes
+
+        It is built on first use after each pipeline refresh or streaming
+        micro-batch and then reused until the next one. build gets the
+        streaming batches to read.
+        """
+        self._ensure_pipeline_fresh()
+        for attempt in range(2):
+            batches = self.streaming_batches()
+            version = (self._snapshot_version, batches[-1] if batches else None)
+            artifact = self._snapshot_artifacts.get(name)
+            if artifact is not None and artifact[0] == version:
+                break
+            started = datetime.now()
+            try:
+                artifact = (version, build(batches))
+            except FileNotFoundError:
+                # The streaming pipeline compacted the delta files while they were read
+                if attempt:
+                    raise
+                continue
+            self._snapshot_artifacts[name] = artifact
+            logger.info("Snapshot artifact built",
+                      name=name,
+                      snapshot_version=self._snapshot_version,
+                      streaming_batch=version[1],
+                      build_seconds=(datetime.now() - started).total_seconds())
+            break
+        return artifact[1], artifact[0][1]
+
+    def load_profile_columns(self, columns: List[str], batches: Optional[List[int]] = None) -> pd.DataFrame:
+        """
+        Read the given customer_analytics_c360 columns for every customer
+
+        The columns come typed from the pipeline's Parquet export, so no
+        spark-sql process is started and no text output is parsed. Customers
+        the streaming pipeline updated since get their row from the latest
+        delta file, by batch id, instead of the exported one.
+
+        Args:
+            columns: Columns to read
+            batches: Streaming batches to apply; all current ones by default
+        """
+        read = list(dict.fromkeys(["customer_id"] + columns))
+        profiles = pq.read_table(self.export_parquet_path, columns=read).to_pandas()
+        if batches is None:
+            batches = self.streaming_batches()
+        if not batches:
+            return profiles[columns]
+        deltas = pd.concat([
+            pq.read_table(self.streaming_snapshot_path / f"delta-{batch:010d}.parquet",
+                          columns=read + [STREAMING_BATCH_COLUMN]).to_pandas()
+            for batch in batches
+        ], ignore_index=True)
+        # A compacted file holds rows of several batches, so the column decides
+        latest = deltas.sort_values(STREAMING_BATCH_COLUMN, kind="stable") \
+            .drop_duplicates("customer_id", keep="last")
+        unchanged = profiles[~profiles["customer_id"].isin(latest["customer_id"])]
+        return pd.concat([unchanged[columns], latest[columns]], ignore_index=True)
+
+    @staticmethod
+    def _parse_result_sets(stdout: str) -> Dict[str, pd.DataFrame]:
+        """
+        Split spark-sql output into one DataFrame per marked result set
+
+        Each result set is preceded by a marker row; output printed before
+        the first marker (e.g. the pipeline's own summary queries) is ignored.
+        """
+        blocks: Dict[str, List[List[str]]] = {}
+        current: Optional[List[List[str]]] = None
+        lines = stdout.split('\n')
+        i = 0
+        while i < len(lines):
+            line = lines[i].rstrip('\r')
+            next_line = lines[i + 1].strip() if i + 1 < len(lines) else ""
+            if line.strip() == RESULT_MARKER_COLUMN and next_line.startswith(RESULT_MARKER_PREFIX):
+                # Header row of the marker query, the marker itself follows
+                i += 1
+                continue
+            if line.strip().startswith(RESULT_MARKER_PREFIX):
+                current = blocks.setdefault(line.strip()[len(RESULT_MARKER_PREFIX):], [])
+            elif current is not None and line.strip():
+                # This assumes tab-separated output from spark-sql
+                current.append(line.split('\t'))
+            i += 1
+
+        frames = {}
+        for key, data in blocks.items():
+            if data:
+                frames[key] = pd.DataFrame(data[1:], columns=data[0])
+            else:
+                frames[key] = pd.DataFrame()
+        return frames
+
+    def _run_spark_sql_batch(self, queries: Dict[str, str], timeout: int = 120) -> Dict[str, pd.DataFrame]:
+        """
+        Execute several queries in a single spark-sql run
+
+        The pipeline is loaded once and every query runs against the same
+        views, so all results come from one consistent snapshot.
+
+        Args:
+            queries: Mapping of result key to SQL query
+            timeout: Timeout in seconds for the spark-sql process
+
+        Returns:
+            Mapping of result key to pandas DataFrame
+        """
+        statements = []
+        for key, query in queries.items():
+            statements.append(f"SELECT '{RESULT_MARKER_PREFIX}{key}' AS {RESULT_MARKER_COLUMN};")
+            statements.append(f"{query.strip().rstrip(';')};")
+
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.sql', delete=False) as f:
+            # Load the pipeline, then run the queries; spark-sql only recognizes
+            # "source" at the very start of a command, so nothing precedes it
+            full_query = f"""source {self.pipeline_path}/c360_consolidated_pipeline.sql;
+
+            {chr(10).join(statements)}
+            """
+            f.write(full_query)
+            temp_sql_file = f.name
+
+        try:
+            # Change to pipeline directory for relative paths to work
+            original_cwd = os.getcwd()
+            os.chdir(self.pipeline_path)
+
+            # Execute queries
+            result = subprocess.run([
+                "spark-sql",
+                "-f", temp_sql_file,
+                "--hiveconf", "hive.cli.print.header=true",
+                "--silent"
+            ], capture_output=True, text=True, timeout=timeout)
+
+            if result.returncode != 0:
+                raise RuntimeError(f"Query execution failed: {result.stderr}")
+
+            frames = self._parse_result_sets(result.stdout)
+            missing = [key for key in queries if key not in frames]
+            if missing:
+                raise RuntimeError(f"No result returned for: {', '.join(missing)}")
+            return frames
+
+        finally:
+            os.chdir(original_cwd)
+            os.unlink(temp_sql_file)
+
     def query_spark_sql(self, query: str, cache_key: Optional[str] = None) -> pd.DataFrame:
         """
         Execute a Spark SQL query and return results as pandas DataFrame
@@ -140,81 +392,27 @@ class C360DataManager:
             pandas DataFrame with query results
         """
         # Check cache first
-        if cache_key and cache_key in self._cache:
-            cached_data = self._cache[cache_key]
-            if datetime.now() - cached_data['timestamp'] < self.cache_ttl:
+        if cache_key:
+            cached_df = self._get_cached(cache_key)
+            if cached_df is not None:
                 logger.debug("Returning cached results", cache_key=cache_key)
-                return pd.DataFrame(cached_data['data'])
+                return cached_df
         
         try:
             # Ensure pipeline has been run recently
-            if not self._last_pipeline_run or \
-               datetime.now() - self._last_pipeline_run > self.cache_ttl:
-                logger.info("Running pipeline before query execution")
-                if not self.run_c360_pipeline():
-                    raise RuntimeError("Failed to run C360 pipeline")
-            
-            # Execute query using spark-sql
-            with tempfile.NamedTemporaryFile(mode='w', suffix='.sql', delete=False) as f:
-                # Add pipeline setup and query
-                full_query = f"""
-                -- Load C360 pipeline
-                source {self.pipeline_path}/c360_consolidated_pipeline.sql;
-                
-                -- Execute user query
-                {query};
-                """
-                f.write(full_query)
-                temp_sql_file = f.name
-            
-            try:
-                # Change to pipeline directory for relative paths to work
-                original_cwd = os.getcwd()
-                os.chdir(self.pipeline_path)
-                
-                # Execute query
-                result = subprocess.run([
-                    "spark-sql", 
-                    "-f", temp_sql_file,
-                    "--silent"
-                ], capture_output=True, text=True, timeout=120)
-                
-                if result.returncode != 0:
-                    raise RuntimeError(f"Query execution failed: {result.stderr}")
-                
-                # Parse results (this is a simplified approach)
-                # In production, you'd want more robust result parsing
-                lines = result.stdout.strip().split('\n')
-                if not lines or not lines[0]:
-                    return pd.DataFrame()
-                
-                # Convert to DataFrame (simplified parsing)
-                # This assumes tab-separated output from spark-sql
-                data = []
-                for line in lines:
-                    if line.strip():
-                        data.append(line.split('\t'))
-                
-                if data:
-                    df = pd.DataFrame(data[1:], columns=data[0] if len(data) > 1 else None)
-                else:
-                    df = pd.DataFrame()
-                
-                # Cache results
-                if cache_key:
-                    self._cache[cache_key] = {
-                        'data': df.to_dict('records'),
-                        'timestamp': datetime.now()
-                    }
-                
-                logger.info("Query executed successfully", 
-                          rows=len(df), 
-                          cache_key=cache_key)
-                return df
-                
-            finally:
-                os.chdir(original_cwd)
-                os.unlink(temp_sql_file)
+            self._ensure_pipeline_fresh()
+
+            result_key = cache_key or "query"
+            df = self._run_spark_sql_batch({result_key: query})[result_key]
+
+            # Cache results
+            if cache_key:
+                self._set_cached(cache_key, df)
+
+            logger.info("Query executed successfully", 
+                      rows=len(df), 
+                      cache_key=cache_key)
+            return df
                 
         except subprocess.TimeoutExpired:
             logger.error("Query execution timed out")
@@ -222,9 +420,13 @@ class C360DataManager:
         except Exception as e:
             logger.error("Query execution failed", error=str(e))
             raise
-    
-    def get_customer_health_overview(self) -> List[Dict[str, Any]]:
-        """Get customer health distribution overview"""
+
+    # ------------------------------------------------------------------
+    # Named analytics: each one is a SQL builder returning (cache_key, query)
+    # and a formatter turning the result DataFrame into the response payload
+    # ------------------------------------------------------------------
+
+    def _sql_customer_health_overview(self) -> Tuple[str, str]:
         query = """
         SELECT 
             customer_status,
@@ -236,8 +438,10 @@ class C360DataManager:
         GROUP BY customer_status
         ORDER BY customer_count DESC
         """
-        df = self.query_spark_sql(query, cache_key="customer_health_overview")
-        
+        return "customer_health_overview", query
+
+    @staticmethod
+    def _format_customer_health_overview(df: pd.DataFrame) -> List[Dict[str, Any]]:
         # Convert DataFrame to records and ensure proper data types for JSON serialization
         records = df.to_dict('records')
         for record in records:
@@ -252,9 +456,10 @@ class C360DataManager:
                 record['avg_transactions'] = float(record['avg_transactions'])
         
         return records
-    
-    def get_churn_risk_customers(self, min_lifetime_value: float = 1000, limit: int = 50) -> List[Dict[str, Any]]:
-        """Get high-value customers at risk of churn"""
+
+    def _sql_churn_risk_customers(self, min_lifetime_value: float = 1000, limit: int = 50) -> Tuple[str, str]:
+        min_lifetime_value = float(min_lifetime_value)
+        limit = int(limit)
         query = f"""
         SELECT 
             customer_id,
@@ -275,11 +480,9 @@ class C360DataManager:
         ORDER BY total_spent DESC
         LIMIT {limit}
         """
-        df = self.query_spark_sql(query, cache_key=f"churn_risk_{min_lifetime_value}_{limit}")
-        return df.to_dict('records')
-    
-    def get_loyalty_program_metrics(self) -> List[Dict[str, Any]]:
-        """Get loyalty program effectiveness metrics"""
+        return f"churn_risk_{min_lifetime_value}_{limit}", query
+
+    def _sql_loyalty_program_metrics(self) -> Tuple[str, str]:
         query = """
         SELECT 
             loyalty_tier,
@@ -292,11 +495,9 @@ class C360DataManager:
         GROUP BY loyalty_tier
         ORDER BY avg_lifetime_value DESC
         """
-        df = self.query_spark_sql(query, cache_key="loyalty_program_metrics")
-        return df.to_dict('records')
-    
-    def get_digital_engagement_analysis(self) -> List[Dict[str, Any]]:
-        """Get digital engagement analysis by generation"""
+        return "loyalty_program_metrics", query
+
+    def _sql_digital_engagement_analysis(self) -> Tuple[str, str]:
         query = """
         SELECT 
             generation_segment,
@@ -309,11 +510,10 @@ class C360DataManager:
         GROUP BY generation_segment
         ORDER BY app_adoption_rate_pct DESC
         """
-        df = self.query_spark_sql(query, cache_key="digital_engagement_analysis")
-        return df.to_dict('records')
-    
-    def get_cross_sell_opportunities(self, limit: int = 50) -> List[Dict[str, Any]]:
-        """Get cross-sell and upsell opportunities"""
+        return "digital_engagement_analysis", query
+
+    def _sql_cross_sell_opportunities(self, limit: int = 50) -> Tuple[str, str]:
+        limit = int(limit)
         query = f"""
         SELECT 
             customer_id,
@@ -332,11 +532,9 @@ class C360DataManager:
         ORDER BY total_spent DESC
         LIMIT {limit}
         """
-        df = self.query_spark_sql(query, cache_key=f"cross_sell_opportunities_{limit}")
-        return df.to_dict('records')
-    
-    def get_customer_lifetime_value_analysis(self) -> List[Dict[str, Any]]:
-        """Get customer lifetime value analysis by segment"""
+        return f"cross_sell_opportunities_{limit}", query
+
+    def _sql_customer_lifetime_value(self) -> Tuple[str, str]:
         query = """
         SELECT 
             value_segment,
@@ -348,11 +546,38 @@ class C360DataManager:
         GROUP BY value_segment
         ORDER BY avg_lifetime_value DESC
         """
-        df = self.query_spark_sql(query, cache_key="customer_lifetime_value_analysis")
-        return df.to_dict('records')
-    
-    def get_rfm_segmentation(self) -> List[Dict[str, Any]]:
-        """Get RFM segmentation matrix"""
+        return "customer_lifetime_value_analysis", query
+
+    @staticmethod
+    def _format_customer_segmentation(df: pd.DataFrame) -> List[Dict[str, Any]]:
+        # Transform the lifetime value data to match the segmentation model
+        segmentation_data = []
+        for record in df.to_dict('records'):
+            segmentation_data.append({
+                "segment_name": record["value_segment"],
+                "customer_count": record["customer_count"],
+                "avg_lifetime_value": record["avg_lifetime_value"],
+                "avg_health_score": 3.0,  # Placeholder - would calculate from actual data
+                "churn_risk_percentage": 25.0  # Placeholder - would calculate from actual data
+            })
+        return segmentation_data
+
+    def _sql_revenue_analysis(self) -> Tuple[str, str]:
+        query = """
+        SELECT 
+            customer_segment,
+            COUNT(*) as customer_count,
+            SUM(total_spent) as total_revenue,
+            AVG(total_spent) as avg_revenue_per_customer,
+            (SUM(total_spent) * 100.0 / 
+                (SELECT SUM(total_spent) FROM customer_analytics_c360)) as percentage_of_total_revenue
+        FROM customer_analytics_c360
+        GROUP BY customer_segment
+        ORDER BY total_revenue DESC
+        """
+        return "revenue_analysis", query
+
+    def _sql_rfm_segmentation(self) -> Tuple[str, str]:
         query = """
         SELECT 
             recency_score,
@@ -373,11 +598,46 @@ class C360DataManager:
         GROUP BY recency_score, frequency_score, monetary_score
         ORDER BY recency_score DESC, frequency_score DESC, monetary_score DESC
         """
-        df = self.query_spark_sql(query, cache_key="rfm_segmentation")
-        return df.to_dict('records')
-    
-    def get_data_product_health_check(self) -> Dict[str, Any]:
-        """Get data product health check information"""
+        return "rfm_segmentation", query
+
+    def _sql_support_insights(self) -> Tuple[str, str]:
+        query = """
+        SELECT 
+            support_satisfaction_level,
+            COUNT(*) as customer_count,
+            ROUND(AVG(total_support_tickets), 1) as avg_tickets_per_customer,
+            ROUND(AVG(avg_satisfaction), 2) as avg_satisfaction_score,
+            SUM(urgent_support_tickets) as total_urgent_tickets,
+            ROUND(AVG(total_spent), 2) as avg_customer_value
+        FROM customer_analytics_c360
+        WHERE total_support_tickets > 0
+        GROUP BY support_satisfaction_level
+        ORDER BY avg_customer_value DESC
+        """
+        return "support_insights", query
+
+    def _sql_lifecycle_analysis(self) -> Tuple[str, str]:
+        query = """
+        SELECT 
+            customer_tenure_segment,
+            COUNT(*) as customer_count,
+            ROUND(AVG(total_transactions), 1) as avg_transactions,
+            ROUND(AVG(total_spent), 2) as avg_total_spent,
+            ROUND(AVG(customer_health_score), 2) as avg_health_score,
+            SUM(CASE WHEN customer_status = 'Active' THEN 1 ELSE 0 END) as active_customers
+        FROM customer_analytics_c360
+        GROUP BY customer_tenure_segment
+        ORDER BY 
+            CASE customer_tenure_segment
+                WHEN 'New (0-30 days)' THEN 1
+                WHEN 'Recent (31-90 days)' THEN 2
+                WHEN 'Established (3-12 months)' THEN 3
+                WHEN 'Veteran (1+ years)' THEN 4
+            END
+        """
+        return "lifecycle_analysis", query
+
+    def _sql_data_product_health_check(self) -> Tuple[str, str]:
         query = """
         SELECT 
             COUNT(*) as total_customers_processed,
@@ -389,9 +649,237 @@ class C360DataManager:
             MAX(profile_created_at) as last_profile_update
         FROM customer_analytics_c360
         """
-        df = self.query_spark_sql(query, cache_key="data_product_health_check")
+        return "data_product_health_check", query
+
+    @staticmethod
+    def _format_single_record(df: pd.DataFrame) -> Dict[str, Any]:
         return df.to_dict('records')[0] if len(df) > 0 else {}
 
+    def _analytics_catalog(self) -> Dict[str, Tuple[Callable[..., Tuple[str, str]], Callable[[pd.DataFrame], Any]]]:
+        """Named analytics available to the getters and the batch endpoint"""
+        return {
+            "customer_health_overview": (self._sql_customer_health_overview, self._format_customer_health_overview),
+            "churn_risk_customers": (self._sql_churn_risk_customers, _records),
+            "loyalty_program_metrics": (self._sql_loyalty_program_metrics, _records),
+            "customer_segmentation": (self._sql_customer_lifetime_value, self._format_customer_segmentation),
+            "digital_engagement_analysis": (self._sql_digital_engagement_analysis, _records),
+            "cross_sell_opportunities": (self._sql_cross_sell_opportunities, _records),
+            "customer_lifetime_value": (self._sql_customer_lifetime_value, _records),
+            "revenue_analysis": (self._sql_revenue_analysis, _records),
+            "rfm_segmentation": (self._sql_rfm_segmentation, _records),
+            "support_insights": (self._sql_support_insights, _records),
+            "lifecycle_analysis": (self._sql_lifecycle_analysis, _records),
+            "data_product_health_check": (self._sql_data_product_health_check, self._format_single_record),
+        }
+
+    def run_analytic(self, name: str, **params) -> Any:
+        """Run a single named analytic and return its formatted result"""
+        build_query, format_result = self._analytics_catalog()[name]
+        cache_key, query = build_query(**params)
+        return format_result(self.query_spark_sql(query, cache_key=cache_key))
+
+    def get_analytics_batch(self, requests: List[Tuple[str, Dict[str, Any]]]) -> Dict[str, Any]:
+        """
+        Run several named analytics against one consistent snapshot
+
+        Cached results of the current snapshot are reused; all the missing
+        ones are computed together in a single spark-sql run.
+
+        Args:
+            requests: List of (analytic name, parameters) pairs
+
+        Returns:
+            Dict with the snapshot version and one result entry per request,
+            in request order
+        """
+        catalog = self._analytics_catalog()
+        self._ensure_pipeline_fresh()
+        snapshot_version = self._snapshot_version
+
+        planned = []
+        missing_queries: Dict[str, str] = {}
+        cached_frames: Dict[str, pd.DataFrame] = {}
+        for name, params in requests:
+            entry = {"name": name, "cache_key": None, "error": None}
+            try:
+                build_query, _ = catalog[name]
+                cache_key, query = build_query(**params)
+                entry["cache_key"] = cache_key
+                cached_df = self._get_cached(cache_key)
+                if cached_df is not None:
+                    cached_frames[cache_key] = cached_df
+                else:
+                    missing_queries[cache_key] = query
+            except (KeyError, TypeError, ValueError) as e:
+                entry["error"] = f"Invalid analytic request: {e}"
+            planned.append(entry)
+
+        computed_frames: Dict[str, pd.DataFrame] = {}
+        engine_error = None
+        if missing_queries:
+            try:
+                computed_frames = self._run_spark_sql_batch(missing_queries)
+                for cache_key, df in computed_frames.items():
+                    self._set_cached(cache_key, df)
+            except subprocess.TimeoutExpired:
+                engine_error = "Query execution timed out"
+            except Exception as e:
+                engine_error = str(e)
+            if engine_error:
+                logger.error("Batch query execution failed", error=engine_error)
+
+        results = []
+        for entry in planned:
+            result = {"name": entry["name"], "cache_hit": False, "data": None, "error": entry["error"]}
+            cache_key = entry["cache_key"]
+            if result["error"] is None:
+                if cache_key in cached_frames:
+                    df = cached_frames[cache_key]
+                    result["cache_hit"] = True
+                elif cache_key in computed_frames:
+                    df = computed_frames[cache_key]
+                else:
+                    df = None
+                    result["error"] = engine_error or "No result returned"
+                if df is not None:
+                    try:
+                        _, format_result = catalog[entry["name"]]
+                        result["data"] = format_result(df)
+                    except Exception as e:
+                        result["error"] = f"Failed to format result: {e}"
+            results.append(result)
+
+        logger.info("Analytics batch executed",
+                  snapshot_version=snapshot_version,
+                  requested=len(requests),
+                  computed=len(missing_queries),
+                  cached=len(cached_frames))
+        return {
+            "snapshot_version": snapshot_version,
+            "computed_count": len(computed_frames),
+            "cached_count": len(cached_frames),
+            "results": results
+        }
+
+    def get_customer_health_overview(self) -> List[Dict[str, Any]]:
+        """Get customer health distribution overview"""
+        return self.run_analytic("customer_health_overview")
+    
+    def get_churn_risk_customers(self, min_lifetime_value: float = 1000, limit: int = 50) -> List[Dict[str, Any]]:
+        """Get high-value customers at risk of churn"""
+        return self.run_analytic("churn_risk_customers", min_lifetime_value=min_lifetime_value, limit=limit)
+    
+    def get_loyalty_program_metrics(self) -> List[Dict[str, Any]]:
+        """Get loyalty program effectiveness metrics"""
+        return self.run_analytic("loyalty_program_metrics")
+
+    def get_customer_segmentation(self) -> List[Dict[str, Any]]:
+        """Get customer segmentation derived from the lifetime value segments"""
+        return self.run_analytic("customer_segmentation")
+    
+    def get_digital_engagement_analysis(self) -> List[Dict[str, Any]]:
+        """Get digital engagement analysis by generation"""
+        return self.run_analytic("digital_engagement_analysis")
+    
+    def get_cross_sell_opportunities(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """Get cross-sell and upsell opportunities"""
+        return self.run_analytic("cross_sell_opportunities", limit=limit)
+    
+    def get_customer_lifetime_value_analysis(self) -> List[Dict[str, Any]]:
+        """Get customer lifetime value analysis by segment"""
+        return self.run_analytic("customer_lifetime_value")
+
+    def get_revenue_analysis(self) -> List[Dict[str, Any]]:
+        """Get revenue analysis by customer segment"""
+        return self.run_analytic("revenue_analysis")
+    
+    def get_rfm_segmentation(self) -> List[Dict[str, Any]]:
+        """Get RFM segmentation matrix"""
+        return self.run_analytic("rfm_segmentation")
+
+    def get_support_insights(self) -> List[Dict[str, Any]]:
+        """Get customer support satisfaction insights"""
+        return self.run_analytic("support_insights")
+
+    def get_lifecycle_analysis(self) -> List[Dict[str, Any]]:
+        """Get customer lifecycle stage analysis"""
+        return self.run_analytic("lifecycle_analysis")
+    
+    def get_category_insights(self) -> List[Dict[str, Any]]:
+        """Get product category performance from the product rollup"""
+        return self.product_rollup.get_category_insights()
+
+    def get_profitability_metrics(self) -> List[Dict[str, Any]]:
+        """Get profitability per loyalty tier from the product rollup"""
+        return self.product_rollup.get_profitability_metrics()
+    
+    def get_health_score_what_if(self, weights: Dict[str, float]) -> Dict[str, Any]:
+        """Rescore customer_health_score with custom component weights"""
+        model, streaming_batch = self._get_snapshot_artifact(
+            "health_score_model",
+            lambda batches: HealthScoreModel(self.load_profile_columns(SCORE_INPUT_COLUMNS, batches)))
+        result = model.what_if(weights)
+        result["snapshot_version"] = self._snapshot_version
+        result["streaming_batch_id"] = streaming_batch
+        return result
+    
+    def get_similar_customers(self, customer_id: str, k: int = 50,
+                              approximate: Optional[bool] = None) -> Dict[str, Any]:
+        """
+        Get the k customers most similar to the given one
+
+        Raises:
+            KeyError: If the customer is not in the current snapshot
+        """
+        index, streaming_batch = self._get_snapshot_artifact(
+            "customer_similarity_index",
+            lambda batches: CustomerSimilarityIndex(self.load_profile_columns(SIMILARITY_INPUT_COLUMNS, batches)))
+        result = index.similar(customer_id, k=k, approximate=approximate)
+        result["snapshot_version"] = self._snapshot_version
+        result["streaming_batch_id"] = streaming_batch
+        return result
+    
+    def _get_segment_sketches(self) -> Tuple[SegmentSketches, Optional[int]]:
+        return self._get_snapshot_artifact(
+            "segment_sketches",
+            lambda batches: SegmentSketches(self.load_profile_columns(SKETCH_INPUT_COLUMNS, batches)))
+
+    def get_metric_distribution(self, metric: str, segment_by: str,
+                                percentiles: List[float] = DEFAULT_PERCENTILES,
+                                bins: int = 20) -> Dict[str, Any]:
+        """Get percentiles and a histogram of a metric per segment from sketches"""
+        sketches, streaming_batch = self._get_segment_sketches()
+        segments = sketches.distribution(metric, segment_by, percentiles=percentiles, bins=bins)
+        return {
+            "metric": metric,
+            "segment_by": segment_by,
+            "snapshot_version": self._snapshot_version,
+            "streaming_batch_id": streaming_batch,
+            "segments": segments
+        }
+
+    def get_distinct_counts(self, segment_by: str) -> Dict[str, Any]:
+        """Get estimated distinct customers, cities and states per segment"""
+        sketches, streaming_batch = self._get_segment_sketches()
+        return {
+            "segment_by": segment_by,
+            "snapshot_version": self._snapshot_version,
+            "streaming_batch_id": streaming_batch,
+            "relative_error": sketches.relative_error,
+            "segments": sketches.distinct_counts(segment_by)
+        }
+    
+    def get_data_product_health_check(self) -> Dict[str, Any]:
+        """Get data product health check information"""
+        return self.run_analytic("data_product_health_check")
+
 
-# Global instance
-c360_data_manager = C360DataManager()
+# Global instance, configured from the environment (e.g. C360_DATA_PATH)
+c360_data_manager = C360DataManager(
+    spark_app_name=settings.spark_app_name,
+    c360_data_path=settings.c360_data_path,
+    pipeline_path=settings.pipeline_path,
+    cache_ttl_minutes=settings.cache_ttl_minutes,
+    export_parquet_path=settings.c360_export_parquet,
+    streaming_snapshot_path=settings.c360_streaming_snapshot,
+)
@@ -16,6 +16,7 @@ import structlog
 # Import our models and database manager
 from models import *
 from database import c360_data_manager
+from sketches import DEFAULT_PERCENTILES
 
 # Configure structured logging
 structlog.configure(
@@ -236,19 +237,7 @@ async def get_customer_segmentation():
     segments, lifetime value, and churn risk patterns.
     """
     try:
-        # This would be a more complex query combining multiple dimensions
-        data = c360_data_manager.get_customer_lifetime_value_analysis()
-        
-        # Transform the data to match our segmentation model
-        segmentation_data = []
-        for record in data:
-            segmentation_data.append({
-                "segment_name": record["value_segment"],
-                "customer_count": record["customer_count"],
-                "avg_lifetime_value": record["avg_lifetime_value"],
-                "avg_health_score": 3.0,  # Placeholder - would calculate from actual data
-                "churn_risk_percentage": 25.0  # Placeholder - would calculate from actual data
-            })
+        segmentation_data = c360_data_manager.get_customer_segmentation()
         
         return [CustomerSegmentation(**record) for record in segmentation_data]
     except Exception as e:
@@ -304,28 +293,11 @@ async def get_category_insights():
     
     **Use Case**: Analyze product category performance, customer preferences,
     and cross-category purchasing patterns for inventory and merchandising decisions.
+    Built from transaction items, product costs and inventory when the pipeline refreshes.
     """
     try:
-        # This would require joining with product transaction data
-        # For now, returning placeholder data structure
-        placeholder_data = [
-            {
-                "category": "Electronics",
-                "customer_count": 45,
-                "avg_order_value": 299.99,
-                "total_revenue": 13499.55,
-                "repeat_purchase_rate": 0.35
-            },
-            {
-                "category": "Fashion",
-                "customer_count": 38,
-                "avg_order_value": 149.99,
-                "total_revenue": 5699.62,
-                "repeat_purchase_rate": 0.42
-            }
-        ]
-        
-        return [ProductCategoryInsights(**record) for record in placeholder_data]
+        data = c360_data_manager.get_category_insights()
+        return [ProductCategoryInsights(**record) for record in data]
     except Exception as e:
         handle_database_error("get_category_insights", e)
 
@@ -362,23 +334,7 @@ async def get_revenue_analysis():
     for financial reporting and strategic planning.
     """
     try:
-        # This would require a more complex query aggregating revenue by segment
-        # Placeholder implementation using existing customer data
-        query = """
-        SELECT 
-            customer_segment,
-            COUNT(*) as customer_count,
-            SUM(total_spent) as total_revenue,
-            AVG(total_spent) as avg_revenue_per_customer,
-            (SUM(total_spent) * 100.0 / 
-                (SELECT SUM(total_spent) FROM customer_analytics_c360)) as percentage_of_total_revenue
-        FROM customer_analytics_c360
-        GROUP BY customer_segment
-        ORDER BY total_revenue DESC
-        """
-        
-        df = c360_data_manager.query_spark_sql(query, cache_key="revenue_analysis")
-        data = df.to_dict('records')
+        data = c360_data_manager.get_revenue_analysis()
         
         return [RevenueAnalysis(**record) for record in data]
     except Exception as e:
@@ -410,28 +366,12 @@ async def get_profitability_metrics():
     Get customer profitability metrics
     
     **Use Case**: Profitability analysis across customer tiers for
-    cost optimization and margin improvement initiatives.
+    cost optimization and margin improvement initiatives. Margins use the primary
+    supplier cost; cost to serve is the average shipping cost per customer.
     """
     try:
-        # Placeholder implementation - would require cost data integration
-        placeholder_data = [
-            {
-                "customer_tier": "Platinum",
-                "customer_count": 8,
-                "total_revenue": 4500.50,
-                "avg_profit_margin": 0.35,
-                "cost_to_serve": 125.00
-            },
-            {
-                "customer_tier": "Gold",
-                "customer_count": 5,
-                "total_revenue": 2800.75,
-                "avg_profit_margin": 0.28,
-                "cost_to_serve": 85.00
-            }
-        ]
-        
-        return [ProfitabilityMetrics(**record) for record in placeholder_data]
+        data = c360_data_manager.get_profitability_metrics()
+        return [ProfitabilityMetrics(**record) for record in data]
     except Exception as e:
         handle_database_error("get_profitability_metrics", e)
 
@@ -451,22 +391,7 @@ async def get_support_insights():
     satisfaction trends, and proactive intervention opportunities.
     """
     try:
-        query = """
-        SELECT 
-            support_satisfaction_level,
-            COUNT(*) as customer_count,
-            ROUND(AVG(total_support_tickets), 1) as avg_tickets_per_customer,
-            ROUND(AVG(avg_satisfaction), 2) as avg_satisfaction_score,
-            SUM(urgent_support_tickets) as total_urgent_tickets,
-            ROUND(AVG(total_spent), 2) as avg_customer_value
-        FROM customer_analytics_c360
-        WHERE total_support_tickets > 0
-        GROUP BY support_satisfaction_level
-        ORDER BY avg_customer_value DESC
-        """
-        
-        df = c360_data_manager.query_spark_sql(query, cache_key="support_insights")
-        data = df.to_dict('records')
+        data = c360_data_manager.get_support_insights()
         
         return [CustomerSupportInsights(**record) for record in data]
     except Exception as e:
@@ -484,27 +409,7 @@ async def get_lifecycle_analysis():
     for onboarding optimization and retention strategy development.
     """
     try:
-        query = """
-        SELECT 
-            customer_tenure_segment,
-            COUNT(*) as customer_count,
-            ROUND(AVG(total_transactions), 1) as avg_transactions,
-            ROUND(AVG(total_spent), 2) as avg_total_spent,
-            ROUND(AVG(customer_health_score), 2) as avg_health_score,
-            SUM(CASE WHEN customer_status = 'Active' THEN 1 ELSE 0 END) as active_customers
-        FROM customer_analytics_c360
-        GROUP BY customer_tenure_segment
-        ORDER BY 
-            CASE customer_tenure_segment
-                WHEN 'New (0-30 days)' THEN 1
-                WHEN 'Recent (31-90 days)' THEN 2
-                WHEN 'Established (3-12 months)' THEN 3
-                WHEN 'Veteran (1+ years)' THEN 4
-            END
-        """
-        
-        df = c360_data_manager.query_spark_sql(query, cache_key="lifecycle_analysis")
-        data = df.to_dict('records')
+        data = c360_data_manager.get_lifecycle_analysis()
         
         return [CustomerLifecycleAnalysis(**record) for record in data]
     except Exception as e:
@@ -562,6 +467,168 @@ async def get_customer_profiles(
         handle_database_error("get_customer_profiles", e)
 
 
+# Response model used to validate each analytic of a batch
+BATCH_RESULT_MODELS = {
+    AnalyticsName.CUSTOMER_HEALTH_OVERVIEW: CustomerHealthOverview,
+    AnalyticsName.CHURN_RISK_CUSTOMERS: ChurnRiskCustomer,
+    AnalyticsName.LOYALTY_PROGRAM_METRICS: LoyaltyProgramMetrics,
+    AnalyticsName.CUSTOMER_SEGMENTATION: CustomerSegmentation,
+    AnalyticsName.DIGITAL_ENGAGEMENT_ANALYSIS: DigitalEngagementAnalysis,
+    AnalyticsName.CROSS_SELL_OPPORTUNITIES: CrossSellOpportunity,
+    AnalyticsName.CUSTOMER_LIFETIME_VALUE: CustomerLifetimeValue,
+    AnalyticsName.REVENUE_ANALYSIS: RevenueAnalysis,
+    AnalyticsName.RFM_SEGMENTATION: RFMSegmentation,
+    AnalyticsName.SUPPORT_INSIGHTS: CustomerSupportInsights,
+    AnalyticsName.LIFECYCLE_ANALYSIS: CustomerLifecycleAnalysis,
+}
+
+
+@app.post("/analytics/batch",
+          response_model=BatchAnalyticsResponse,
+          tags=["Analytics"])
+async def get_analytics_batch(request: BatchAnalyticsRequest):
+    """
+    Compute several named analytics in one call
+    
+    **Use Case**: Dashboards loading many widgets at once (health overview,
+    loyalty metrics, RFM, lifecycle, ...) get all results from the same
+    pipeline snapshot in a single round trip. Results not already cached
+    are computed together in one Spark SQL pass.
+    
+    A failing analytic does not fail the batch: its entry carries the error.
+    """
+    aliases = [item.alias or item.name.value for item in request.analytics]
+    if len(set(aliases)) != len(aliases):
+        raise HTTPException(status_code=422, detail="Duplicate analytic name or alias in batch, set distinct aliases")
+    
+    try:
+        batch = c360_data_manager.get_analytics_batch(
+            [(item.name.value, item.params) for item in request.analytics]
+        )
+    except Exception as e:
+        handle_database_error("get_analytics_batch", e)
+    
+    results = {}
+    for alias, item, result in zip(aliases, request.analytics, batch["results"]):
+        data = result["data"]
+        error = result["error"]
+        model = BATCH_RESULT_MODELS.get(item.name)
+        if error is None and model is not None:
+            try:
+                data = [model(**record).model_dump(mode="json") for record in data]
+            except Exception as e:
+                data, error = None, f"Invalid result for {item.name.value}: {e}"
+        results[alias] = BatchAnalyticsResult(
+            name=item.name,
+            success=error is None,
+            cache_hit=result["cache_hit"],
+            data=data,
+            error=error
+        )
+    
+    return BatchAnalyticsResponse(
+        snapshot_version=batch["snapshot_version"],
+        computed_count=batch["computed_count"],
+        cached_count=batch["cached_count"],
+        results=results
+    )
+
+
+@app.post("/analytics/health-score/what-if",
+          response_model=HealthScoreWhatIfResponse,
+          tags=["Analytics"])
+async def get_health_score_what_if(weights: HealthScoreWeights):
+    """
+    Recompute customer health scores with custom component weights
+    
+    **Use Case**: Marketing tries different weightings of recency, frequency,
+    monetary value and app engagement without editing the pipeline SQL.
+    Returns health band counts and segment averages next to the baseline
+    computed with the pipeline weights (equal RFM weights, no engagement).
+    
+    The score inputs are loaded once per pipeline refresh; each call only
+    rescores in memory.
+    """
+    try:
+        result = c360_data_manager.get_health_score_what_if(weights.model_dump())
+        return HealthScoreWhatIfResponse(**result)
+    except Exception as e:
+        handle_database_error("get_health_score_what_if", e)
+
+
+@app.get("/customers/{customer_id}/similar",
+         response_model=SimilarCustomersResponse,
+         tags=["Analytics"])
+async def get_similar_customers(
+    customer_id: str,
+    k: int = Query(50, ge=1, le=500, description="Number of similar customers"),
+    approximate: Optional[bool] = Query(None, description="Use the approximate index (default: only for large customer bases)")
+):
+    """
+    Find lookalike customers
+    
+    **Use Case**: Seed audiences for campaigns from a known good customer
+    instead of exporting CSVs and computing similarities offline.
+    
+    Customers are compared on their numeric C360 attributes (RFM scores,
+    spend, loyalty, app engagement, support history) using cosine similarity
+    of standardized feature vectors built once per pipeline refresh.
+    """
+    try:
+        result = c360_data_manager.get_similar_customers(customer_id, k=k, approximate=approximate)
+        return SimilarCustomersResponse(**result)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Customer {customer_id} not found")
+    except Exception as e:
+        handle_database_error("get_similar_customers", e)
+
+
+@app.get("/analytics/distributions/{metric}",
+         response_model=MetricDistributionResponse,
+         tags=["Analytics"])
+async def get_metric_distribution(
+    metric: DistributionMetric,
+    segment_by: SegmentDimension = Query(SegmentDimension.CUSTOMER_SEGMENT, description="Segment dimension"),
+    percentiles: List[float] = Query(list(DEFAULT_PERCENTILES), description="Percentiles to estimate, between 0 and 1"),
+    bins: int = Query(20, ge=1, le=200, description="Number of histogram bins")
+):
+    """
+    Get percentiles and a histogram of a metric for every segment
+    
+    **Use Case**: Lifetime value and health score distributions for the
+    dashboard without shipping every customer row to the client.
+    
+    Estimated from t-digests built once per pipeline refresh, so the cost of
+    a query does not depend on the number of customers. The "All" segment
+    covers every customer.
+    """
+    if any(q < 0 or q > 1 for q in percentiles):
+        raise HTTPException(status_code=422, detail="Percentiles must be between 0 and 1")
+    try:
+        result = c360_data_manager.get_metric_distribution(
+            metric.value, segment_by.value, percentiles=percentiles, bins=bins)
+        return MetricDistributionResponse(**result)
+    except Exception as e:
+        handle_database_error("get_metric_distribution", e)
+
+
+@app.get("/analytics/distinct-counts",
+         response_model=DistinctCountsResponse,
+         tags=["Analytics"])
+async def get_distinct_counts(
+    segment_by: SegmentDimension = Query(SegmentDimension.CUSTOMER_SEGMENT, description="Segment dimension")
+):
+    """
+    Get estimated distinct customers, cities and states for every segment
+    
+    Estimated from HyperLogLog sketches built once per pipeline refresh.
+    """
+    try:
+        result = c360_data_manager.get_distinct_counts(segment_by.value)
+        return DistinctCountsResponse(**result)
+    except Exception as e:
+        handle_database_error("get_distinct_counts", e)
+
 # ============================================================================
 # ERROR HANDLERS
 # ============================================================================
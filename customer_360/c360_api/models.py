@@ -6,8 +6,8 @@ Data models for API requests and responses
 from datetime import datetime, date
 from decimal import Decimal
 from enum import Enum
-from typing import List, Optional, Union
-from pydantic import BaseModel, Field
+from typing import Dict, List, Optional, Union
+from pydantic import BaseModel, Field, model_validator
 
 
 # ============================================================================
@@ -52,6 +52,40 @@ class Channel(str, Enum):
     STORE = "store"
 
 
+class AnalyticsName(str, Enum):
+    """Named analytics that can be requested through the batch endpoint"""
+    CUSTOMER_HEALTH_OVERVIEW = "customer_health_overview"
+    CHURN_RISK_CUSTOMERS = "churn_risk_customers"
+    LOYALTY_PROGRAM_METRICS = "loyalty_program_metrics"
+    CUSTOMER_SEGMENTATION = "customer_segmentation"
+    DIGITAL_ENGAGEMENT_ANALYSIS = "digital_engagement_analysis"
+    CROSS_SELL_OPPORTUNITIES = "cross_sell_opportunities"
+    CUSTOMER_LIFETIME_VALUE = "customer_lifetime_value"
+    REVENUE_ANALYSIS = "revenue_analysis"
+    RFM_SEGMENTATION = "rfm_segmentation"
+    SUPPORT_INSIGHTS = "support_insights"
+    LIFECYCLE_ANALYSIS = "lifecycle_analysis"
+    DATA_PRODUCT_HEALTH_CHECK = "data_product_health_check"
+
+
+class DistributionMetric(str, Enum):
+    """Metrics with server-side distribution sketches"""
+    LIFETIME_VALUE = "lifetime_value"
+    TOTAL_SPENT = "total_spent"
+    AVG_ORDER_VALUE = "avg_order_value"
+    CUSTOMER_HEALTH_SCORE = "customer_health_score"
+    APP_ENGAGEMENT_SCORE = "app_engagement_score"
+    DAYS_SINCE_REGISTRATION = "days_since_registration"
+
+
+class SegmentDimension(str, Enum):
+    """Columns distribution sketches are partitioned by"""
+    CUSTOMER_SEGMENT = "customer_segment"
+    LOYALTY_TIER = "loyalty_tier"
+    CUSTOMER_STATUS = "customer_status"
+    GENERATION_SEGMENT = "generation_segment"
+
+
 # ============================================================================
 # BASE CUSTOMER MODELS
 # ============================================================================
@@ -177,6 +211,9 @@ class ProductCategoryInsights(BaseModel):
     avg_order_value: float  # Changed from Decimal to float for JSON serialization
     total_revenue: float  # Changed from Decimal to float for JSON serialization
     repeat_purchase_rate: float
+    units_sold: Optional[int] = None
+    gross_margin: Optional[float] = None
+    stock_on_hand: Optional[int] = None
 
 
 # ============================================================================
@@ -306,6 +343,158 @@ class PaginationParams(BaseModel):
     page_size: int = Field(50, ge=1, le=1000, description="Items per page")
 
 
+class AnalyticsRequestItem(BaseModel):
+    """One named analytic in a batch request"""
+    name: AnalyticsName
+    params: dict = Field(default_factory=dict, description="Parameters of the analytic, e.g. {\"limit\": 10}")
+    alias: Optional[str] = Field(None, description="Key of this result in the response (defaults to the name)")
+
+
+class BatchAnalyticsRequest(BaseModel):
+    """Batch of named analytics computed against one snapshot"""
+    analytics: List[AnalyticsRequestItem] = Field(..., min_length=1, max_length=20)
+
+
+class HealthScoreWeights(BaseModel):
+    """Component weights of a what-if customer_health_score"""
+    recency: float = Field(1.0, ge=0, description="Weight of the recency score")
+    frequency: float = Field(1.0, ge=0, description="Weight of the frequency score")
+    monetary: float = Field(1.0, ge=0, description="Weight of the monetary score")
+    engagement: float = Field(0.0, ge=0, description="Weight of the app engagement score (rescaled to 1-5)")
+
+    @model_validator(mode="after")
+    def check_positive_total(self):
+        if self.recency + self.frequency + self.monetary + self.engagement <= 0:
+            raise ValueError("At least one weight must be positive")
+        return self
+
+
+# ============================================================================
+# BATCH RESPONSE MODELS
+# ============================================================================
+
+class BatchAnalyticsResult(BaseModel):
+    """Result of one analytic in a batch"""
+    name: AnalyticsName
+    success: bool
+    cache_hit: bool = False
+    data: Union[List[dict], dict, None] = None
+    error: Optional[str] = None
+
+
+class BatchAnalyticsResponse(BaseModel):
+    """Combined response of a batch of analytics"""
+    snapshot_version: int = Field(..., description="Pipeline snapshot all results were computed from")
+    computed_count: int = Field(..., description="Number of queries computed in this request")
+    cached_count: int = Field(..., description="Number of results served from cache")
+    results: Dict[str, BatchAnalyticsResult] = Field(..., description="Results keyed by alias or analytic name")
+    timestamp: datetime = Field(default_factory=datetime.now)
+
+
+# ============================================================================
+# WHAT-IF RESPONSE MODELS
+# ============================================================================
+
+class HealthBandCount(BaseModel):
+    """Customers per health band under the what-if and the pipeline weights"""
+    band: str
+    customer_count: int
+    baseline_count: int
+
+
+class SegmentHealthScore(BaseModel):
+    """Average health score of a customer segment"""
+    customer_segment: str
+    customer_count: int
+    avg_health_score: float
+    baseline_avg_health_score: float
+
+
+class HealthScoreWhatIfResponse(BaseModel):
+    """Health scores recomputed with custom weights"""
+    weights: HealthScoreWeights
+    snapshot_version: int
+    streaming_batch_id: Optional[int] = Field(None, description="Newest streaming micro-batch applied over the snapshot")
+    customer_count: int
+    avg_health_score: float
+    customers_changed_band: int = Field(..., description="Customers whose health band differs from the baseline")
+    bands: List[HealthBandCount]
+    segments: List[SegmentHealthScore]
+    compute_ms: float = Field(..., description="Time spent rescoring, in milliseconds")
+    timestamp: datetime = Field(default_factory=datetime.now)
+
+
+# ============================================================================
+# LOOKALIKE RESPONSE MODELS
+# ============================================================================
+
+class SimilarCustomer(BaseModel):
+    """A customer close to the reference customer in C360 feature space"""
+    customer_id: str
+    similarity: float = Field(..., ge=-1.0, le=1.0, description="Cosine similarity of the feature vectors")
+    customer_segment: Optional[str] = None
+    loyalty_tier: Optional[str] = None
+
+
+class SimilarCustomersResponse(BaseModel):
+    """Lookalike customers of a reference customer"""
+    customer_id: str
+    k: int
+    method: str = Field(..., description="exact or approximate")
+    snapshot_version: int
+    streaming_batch_id: Optional[int] = Field(None, description="Newest streaming micro-batch applied over the snapshot")
+    similar: List[SimilarCustomer]
+    timestamp: datetime = Field(default_factory=datetime.now)
+
+
+# ============================================================================
+# DISTRIBUTION RESPONSE MODELS
+# ============================================================================
+
+class HistogramBin(BaseModel):
+    """Estimated number of customers in [lower, upper)"""
+    lower: float
+    upper: float
+    count: int
+
+
+class SegmentDistribution(BaseModel):
+    """Approximate distribution of a metric within one segment"""
+    segment: str
+    count: int
+    min: Optional[float] = None
+    max: Optional[float] = None
+    mean: Optional[float] = None
+    percentiles: Dict[str, Optional[float]] = Field(..., description="Estimated percentiles keyed p50, p90, ...")
+    histogram: List[HistogramBin]
+
+
+class MetricDistributionResponse(BaseModel):
+    """Per-segment distribution of a metric, estimated from t-digests"""
+    metric: DistributionMetric
+    segment_by: SegmentDimension
+    snapshot_version: int
+    streaming_batch_id: Optional[int] = Field(None, description="Newest streaming micro-batch applied over the snapshot")
+    segments: List[SegmentDistribution]
+    timestamp: datetime = Field(default_factory=datetime.now)
+
+
+class SegmentDistinctCounts(BaseModel):
+    """Estimated distinct values per column within one segment"""
+    segment: str
+    distinct: Dict[str, int]
+
+
+class DistinctCountsResponse(BaseModel):
+    """Per-segment distinct counts, estimated from HyperLogLog sketches"""
+    segment_by: SegmentDimension
+    snapshot_version: int
+    streaming_batch_id: Optional[int] = Field(None, description="Newest streaming micro-batch applied over the snapshot")
+    relative_error: float = Field(..., description="Typical relative error of the estimates")
+    segments: List[SegmentDistinctCounts]
+    timestamp: datetime = Field(default_factory=datetime.now)
+
+
 # ============================================================================
 # CONFIGURATION MODELS
 # ============================================================================
@@ -0,0 +1,338 @@
+"""
+Customer Analytics C360 API - Product and Cost Rollup
+Category and profitability aggregates built from the raw sales CSVs at refresh time
+"""
+
+import hashlib
+import io
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple
+
+import pandas as pd
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+# Number of bytes hashed just before the processed offset to detect rewrites
+TAIL_CHECK_BYTES = 4096
+
+# Dimensions baked into the rollup state; any change forces a full rebuild
+STATE_DIMENSIONS = ("products/products.csv", "products/product_suppliers.csv")
+
+# Inputs applied when summarizing only; they are simply reloaded when changed
+SUMMARY_INPUTS = ("products/inventory.csv", "customer/loyalty_program.csv",
+                  "logistics/shipments.csv")
+
+ITEMS_FILE = "sales/transaction_items.csv"
+TRANSACTIONS_FILE = "sales/transactions.csv"
+
+STATE_COLUMNS = ["category", "transaction_id", "customer_id",
+                 "units", "revenue", "cogs"]
+
+
+@dataclass
+class AppendCursor:
+    """Read position in an append-only CSV file"""
+    offset: int = 0
+    tail_digest: str = ""
+    header: Optional[List[str]] = None
+
+
+def _file_fingerprint(path: Path) -> Tuple[int, int]:
+    """Cheap change detector: (size, modification time)"""
+    stat = path.stat()
+    return stat.st_size, stat.st_mtime_ns
+
+
+def _tail_digest(handle, offset: int) -> str:
+    """Hash of the bytes just before offset"""
+    start = max(0, offset - TAIL_CHECK_BYTES)
+    handle.seek(start)
+    return hashlib.sha256(handle.read(offset - start)).hexdigest()
+
+
+def read_appended_rows(path: Path, cursor: AppendCursor) -> Tuple[pd.DataFrame, AppendCursor, bool]:
+    """
+    Read the rows appended to a CSV file since the cursor position
+
+    The file is treated as append-only as long as it did not shrink and the
+    bytes before the previous offset are unchanged; otherwise it is read
+    from the start.
+
+    Returns:
+        (new rows, updated cursor, True if the whole file was read)
+    """
+    with open(path, "rb") as handle:
+        size = handle.seek(0, io.SEEK_END)
+        appended = (cursor.header is not None
+                    and 0 < cursor.offset <= size
+                    and _tail_digest(handle, cursor.offset) == cursor.tail_digest)
+
+        if appended:
+            handle.seek(cursor.offset)
+            chunk = handle.read()
+            # Only consume complete lines; a partially written row is read next time
+            end = chunk.rfind(b"\n") + 1
+            chunk = chunk[:end]
+            rows = pd.read_csv(io.BytesIO(chunk), names=cursor.header, header=None) \
+                if chunk.strip() else pd.DataFrame(columns=cursor.header)
+            offset = cursor.offset + end
+        else:
+            handle.seek(0)
+            chunk = handle.read()
+            end = chunk.rfind(b"\n") + 1
+            chunk = chunk[:end]
+            rows = pd.read_csv(io.BytesIO(chunk))
+            offset = end
+
+        new_cursor = AppendCursor(offset=offset,
+                                  tail_digest=_tail_digest(handle, offset),
+                                  header=list(rows.columns))
+    return rows, new_cursor, not appended
+
+
+class ProductRollup:
+    """
+    Category and cost rollup over transaction items
+
+    The state is kept at (category, transaction) grain with units, revenue and
+    cost of goods. When only new transaction items (and transactions) were
+    appended since the last refresh, just those rows are parsed, joined and
+    merged into the state; a change to products or supplier costs rebuilds it.
+    Items whose transaction is not known yet are held back and retried on the
+    next refresh.
+    """
+
+    def __init__(self, c360_data_path: Path):
+        self.data_path = Path(c360_data_path)
+        self._state: Optional[pd.DataFrame] = None
+        self._pending_items: Optional[pd.DataFrame] = None
+        self._items_cursor = AppendCursor()
+        self._transactions_cursor = AppendCursor()
+        self._transactions: Optional[pd.DataFrame] = None
+        self._seen_transaction_ids = pd.Index([])
+        self._product_costs: Optional[pd.DataFrame] = None
+        self._dimension_fingerprints: Dict[str, Tuple[int, int]] = {}
+        self._summary_fingerprints: Dict[str, Tuple[int, int]] = {}
+        self._summary_frames: Dict[str, pd.DataFrame] = {}
+        self._category_insights: Optional[List[Dict[str, Any]]] = None
+        self._profitability: Optional[List[Dict[str, Any]]] = None
+        self.last_refresh_mode: Optional[str] = None
+
+    @property
+    def is_built(self) -> bool:
+        return self._state is not None
+
+    def refresh(self) -> str:
+        """
+        Bring the rollup up to date with the CSV files
+
+        Returns:
+            "full", "incremental" or "unchanged"
+        """
+        dimension_fingerprints = {
+            name: _file_fingerprint(self.data_path / name) for name in STATE_DIMENSIONS
+        }
+        if self._state is None or dimension_fingerprints != self._dimension_fingerprints:
+            self._product_costs = self._load_product_costs()
+            self._dimension_fingerprints = dimension_fingerprints
+            self._reset_state()
+
+        transactions, self._transactions_cursor, transactions_reset = read_appended_rows(
+            self.data_path / TRANSACTIONS_FILE, self._transactions_cursor)
+        if transactions_reset:
+            # Rewritten transactions (e.g. status updates) invalidate the state
+            self._reset_state(keep_transactions_cursor=True)
+            self._seen_transaction_ids = pd.Index(transactions["transaction_id"])
+            self._transactions = self._prepare_transactions(transactions)
+        elif not transactions.empty:
+            self._seen_transaction_ids = self._seen_transaction_ids.append(
+                pd.Index(transactions["transaction_id"]))
+            self._transactions = pd.concat(
+                [self._transactions, self._prepare_transactions(transactions)])
+
+        items, self._items_cursor, items_reset = read_appended_rows(
+            self.data_path / ITEMS_FILE, self._items_cursor)
+        if items_reset:
+            self._state = pd.DataFrame(columns=STATE_COLUMNS)
+            self._pending_items = None
+        mode = "full" if items_reset else "incremental"
+
+        if self._pending_items is not None and not self._pending_items.empty:
+            items = pd.concat([self._pending_items, items], ignore_index=True)
+        increment, self._pending_items = self._aggregate_items(items)
+
+        if mode == "incremental" and increment.empty and not self._summaries_changed():
+            self.last_refresh_mode = "unchanged"
+            return self.last_refresh_mode
+
+        if self._state.empty:
+            self._state = increment
+        elif not increment.empty:
+            self._state = pd.concat([self._state, increment], ignore_index=True) \
+                .groupby(["category", "transaction_id", "customer_id"], as_index=False) \
+                [["units", "revenue", "cogs"]].sum()
+
+        self._load_summary_inputs()
+        self._category_insights = self._summarize_categories()
+        self._profitability = self._summarize_profitability()
+        self.last_refresh_mode = mode
+        logger.info("Product rollup refreshed",
+                   mode=mode,
+                   new_items=len(items),
+                   pending_items=len(self._pending_items),
+                   state_rows=len(self._state))
+        return mode
+
+    def _reset_state(self, keep_transactions_cursor: bool = False):
+        """Drop the aggregated state so the next read starts from scratch"""
+        self._state = pd.DataFrame(columns=STATE_COLUMNS)
+        self._pending_items = None
+        self._items_cursor = AppendCursor()
+        if not keep_transactions_cursor:
+            self._transactions_cursor = AppendCursor()
+            self._transactions = None
+            self._seen_transaction_ids = pd.Index([])
+
+    def _load_product_costs(self) -> pd.DataFrame:
+        """Category and unit cost per product, preferring the primary supplier price"""
+        products = pd.read_csv(self.data_path / "products/products.csv",
+                               usecols=["product_id", "category", "cost"])
+        suppliers = pd.read_csv(self.data_path / "products/product_suppliers.csv",
+                                usecols=["product_id", "is_primary", "cost_price"])
+        primary = suppliers[suppliers["is_primary"].astype(str).str.lower() == "true"] \
+            .drop_duplicates("product_id").set_index("product_id")["cost_price"]
+        products["unit_cost"] = products["product_id"].map(primary).fillna(products["cost"])
+        return products.set_index("product_id")[["category", "unit_cost"]]
+
+    @staticmethod
+    def _prepare_transactions(transactions: pd.DataFrame) -> pd.DataFrame:
+        """Completed transactions indexed by id"""
+        completed = transactions[transactions["status"] == "completed"]
+        return completed.set_index("transaction_id")[["customer_id"]]
+
+    def _aggregate_items(self, items: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Aggregate transaction items to (category, transaction) grain
+
+        Returns:
+            (aggregated rows, items whose transaction is not loaded yet)
+        """
+        if items.empty:
+            return pd.DataFrame(columns=STATE_COLUMNS), items
+        known = items["transaction_id"].isin(self._transactions.index)
+        # Items of non-completed transactions are dropped, unknown ones retried later
+        pending = items[~items["transaction_id"].isin(self._seen_transaction_ids)]
+        items = items[known]
+
+        joined = items.join(self._product_costs, on="product_id", how="inner") \
+            .join(self._transactions, on="transaction_id", how="inner")
+        joined["units"] = joined["quantity"]
+        joined["revenue"] = joined["line_total"] - joined["discount_applied"].fillna(0)
+        joined["cogs"] = joined["quantity"] * joined["unit_cost"]
+        aggregated = joined.groupby(["category", "transaction_id", "customer_id"], as_index=False) \
+            [["units", "revenue", "cogs"]].sum()
+        return aggregated, pending
+
+    def _summaries_changed(self) -> bool:
+        return any(
+            _file_fingerprint(self.data_path / name) != self._summary_fingerprints.get(name)
+            for name in SUMMARY_INPUTS
+        )
+
+    def _load_summary_inputs(self):
+        for name in SUMMARY_INPUTS:
+            fingerprint = _file_fingerprint(self.data_path / name)
+            if fingerprint != self._summary_fingerprints.get(name):
+                self._summary_frames[name] = pd.read_csv(self.data_path / name)
+                self._summary_fingerprints[name] = fingerprint
+
+    def _summarize_categories(self) -> List[Dict[str, Any]]:
+        state = self._state
+        if state.empty:
+            return []
+        by_category = state.groupby("category").agg(
+            customer_count=("customer_id", "nunique"),
+            order_count=("transaction_id", "nunique"),
+            units_sold=("units", "sum"),
+            total_revenue=("revenue", "sum"),
+            total_cost=("cogs", "sum"),
+        )
+        orders_per_customer = state.groupby(["category", "customer_id"])["transaction_id"].nunique()
+        repeat_customers = (orders_per_customer >= 2).groupby(level="category").sum()
+
+        inventory = self._summary_frames["products/inventory.csv"]
+        inventory = inventory.join(self._product_costs["category"], on="product_id", how="inner")
+        stock_on_hand = (inventory["stock_quantity"] - inventory["reserved_quantity"]) \
+            .groupby(inventory["category"]).sum()
+
+        by_category["avg_order_value"] = by_category["total_revenue"] / by_category["order_count"]
+        by_category["repeat_purchase_rate"] = repeat_customers / by_category["customer_count"]
+        by_category["gross_margin"] = (
+            (by_category["total_revenue"] - by_category["total_cost"]) / by_category["total_revenue"]
+        ).where(by_category["total_revenue"] > 0, 0.0)
+        by_category["stock_on_hand"] = stock_on_hand.reindex(by_category.index).fillna(0)
+
+        by_category = by_category.sort_values("total_revenue", ascending=False).reset_index()
+        return [
+            {
+                "category": row.category,
+                "customer_count": int(row.customer_count),
+                "avg_order_value": round(float(row.avg_order_value), 2),
+                "total_revenue": round(float(row.total_revenue), 2),
+                "repeat_purchase_rate": round(float(row.repeat_purchase_rate), 4),
+                "units_sold": int(row.units_sold),
+                "gross_margin": round(float(row.gross_margin), 4),
+                "stock_on_hand": int(row.stock_on_hand),
+            }
+            for row in by_category.itertuples()
+        ]
+
+    def _summarize_profitability(self) -> List[Dict[str, Any]]:
+        state = self._state
+        if state.empty:
+            return []
+        per_customer = state.groupby("customer_id")[["revenue", "cogs"]].sum()
+
+        shipments = self._summary_frames["logistics/shipments.csv"]
+        shipping = shipments[["transaction_id", "shipping_cost"]] \
+            .join(self._transactions, on="transaction_id", how="inner") \
+            .groupby("customer_id")["shipping_cost"].sum()
+        per_customer["shipping_cost"] = shipping.reindex(per_customer.index).fillna(0)
+        per_customer["margin"] = (
+            (per_customer["revenue"] - per_customer["cogs"]) / per_customer["revenue"]
+        ).where(per_customer["revenue"] > 0, 0.0)
+
+        loyalty = self._summary_frames["customer/loyalty_program.csv"] \
+            .drop_duplicates("customer_id").set_index("customer_id")["loyalty_tier"]
+        per_customer["customer_tier"] = loyalty.reindex(per_customer.index).fillna("None")
+
+        by_tier = per_customer.groupby("customer_tier").agg(
+            customer_count=("revenue", "size"),
+            total_revenue=("revenue", "sum"),
+            avg_profit_margin=("margin", "mean"),
+            cost_to_serve=("shipping_cost", "mean"),
+        ).sort_values("total_revenue", ascending=False).reset_index()
+        return [
+            {
+                "customer_tier": row.customer_tier,
+                "customer_count": int(row.customer_count),
+                "total_revenue": round(float(row.total_revenue), 2),
+                "avg_profit_margin": round(float(row.avg_profit_margin), 4),
+                "cost_to_serve": round(float(row.cost_to_serve), 2),
+            }
+            for row in by_tier.itertuples()
+        ]
+
+    def get_category_insights(self) -> List[Dict[str, Any]]:
+        """Category performance rows, highest revenue first"""
+        if self._category_insights is None:
+            self.refresh()
+        return self._category_insights
+
+    def get_profitability_metrics(self) -> List[Dict[str, Any]]:
+        """Profitability rows per loyalty tier, highest revenue first"""
+        if self._profitability is None:
+            self.refresh()
+        return self._profitability
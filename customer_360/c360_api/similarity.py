@@ -0,0 +1,193 @@
+"""
+Customer Analytics C360 API - Lookalike Customers
+k-nearest-neighbour search over normalized C360 feature vectors
+"""
+
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+import pandas as pd
+
+# Numeric customer_analytics_c360 columns making up the feature vector
+FEATURE_COLUMNS = [
+    "recency_score", "frequency_score", "monetary_score",
+    "total_transactions", "total_spent", "avg_order_value",
+    "transactions_last_90d", "spent_last_90d", "channels_used",
+    "lifetime_value", "points_balance", "redemption_rate",
+    "days_since_registration", "age_years",
+    "total_app_sessions", "total_session_minutes", "app_engagement_score",
+    "unique_device_types",
+    "total_support_tickets", "urgent_support_tickets", "avg_satisfaction",
+]
+
+# Heavy-tailed amounts and counts, compressed with log1p before scaling
+LOG_SCALED_COLUMNS = {
+    "total_transactions", "total_spent", "avg_order_value",
+    "transactions_last_90d", "spent_last_90d", "lifetime_value",
+    "points_balance", "total_app_sessions", "total_session_minutes",
+    "app_engagement_score", "total_support_tickets",
+}
+
+# Descriptive columns returned with each match
+CONTEXT_COLUMNS = ["customer_segment", "loyalty_tier"]
+
+SIMILARITY_INPUT_COLUMNS = ["customer_id"] + CONTEXT_COLUMNS + FEATURE_COLUMNS
+
+# Below this size the exact search is fast enough to be the default
+APPROXIMATE_INDEX_MIN_CUSTOMERS = 200_000
+
+
+def build_feature_matrix(profiles: pd.DataFrame) -> np.ndarray:
+    """
+    Turn the profile columns into a contiguous float32 matrix of unit rows
+
+    Missing values take the column median, heavy-tailed columns are log
+    scaled, every column is standardized and each row L2-normalized so a
+    dot product is the cosine similarity.
+    """
+    features = profiles[FEATURE_COLUMNS].apply(pd.to_numeric, errors="coerce")
+    features = features.fillna(features.median()).fillna(0.0)
+    for column in LOG_SCALED_COLUMNS:
+        features[column] = np.log1p(features[column].clip(lower=0))
+
+    matrix = features.to_numpy(dtype=np.float32)
+    std = matrix.std(axis=0)
+    matrix = (matrix - matrix.mean(axis=0)) / np.where(std > 0, std, 1.0)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    matrix /= np.where(norms > 0, norms, 1.0)
+    return np.ascontiguousarray(matrix, dtype=np.float32)
+
+
+def _top_k(similarities: np.ndarray, k: int) -> np.ndarray:
+    """Positions of the k largest values, best first"""
+    if k >= len(similarities):
+        return np.argsort(-similarities)
+    top = np.argpartition(-similarities, k - 1)[:k]
+    return top[np.argsort(-similarities[top])]
+
+
+class InvertedFileIndex:
+    """
+    Approximate cosine search: rows bucketed by their nearest k-means centroid
+
+    A query scans only the buckets of its n_probe closest centroids.
+    """
+
+    def __init__(self, matrix: np.ndarray, n_lists: Optional[int] = None,
+                 n_iterations: int = 10, sample_size: int = 100_000, seed: int = 42):
+        n_rows = matrix.shape[0]
+        self.n_lists = n_lists or max(1, int(np.sqrt(n_rows)))
+        rng = np.random.default_rng(seed)
+
+        sample = matrix[rng.choice(n_rows, size=min(n_rows, sample_size), replace=False)]
+        centroids = sample[rng.choice(len(sample), size=min(self.n_lists, len(sample)), replace=False)]
+        for _ in range(n_iterations):
+            assignment = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.column_stack([
+                np.bincount(assignment, weights=sample[:, j], minlength=len(centroids))
+                for j in range(sample.shape[1])
+            ]).astype(np.float32)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            # Spherical k-means: keep empty centroids where they are
+            centroids = np.where(norms > 0, sums / np.where(norms > 0, norms, 1.0), centroids)
+        self.centroids = np.ascontiguousarray(centroids, dtype=np.float32)
+        self.n_lists = len(self.centroids)
+
+        # CSR layout: rows sorted by list, offsets[i]:offsets[i + 1] is list i
+        assignment = self._assign(matrix)
+        self.order = np.argsort(assignment, kind="stable")
+        self.offsets = np.searchsorted(assignment[self.order], np.arange(self.n_lists + 1))
+
+    def _assign(self, matrix: np.ndarray, chunk_size: int = 262_144) -> np.ndarray:
+        return np.concatenate([
+            np.argmax(matrix[start:start + chunk_size] @ self.centroids.T, axis=1)
+            for start in range(0, matrix.shape[0], chunk_size)
+        ]) if matrix.shape[0] else np.empty(0, dtype=np.intp)
+
+    def candidates(self, query: np.ndarray, n_probe: int) -> np.ndarray:
+        """Row positions in the n_probe lists closest to the query"""
+        lists = _top_k(self.centroids @ query, min(n_probe, self.n_lists))
+        return np.concatenate([self.order[self.offsets[i]:self.offsets[i + 1]] for i in lists])
+
+
+class CustomerSimilarityIndex:
+    """
+    Feature vectors of every customer for lookalike search
+
+    Built once per pipeline snapshot. The exact search is one matrix-vector
+    product over all customers; the approximate index is built along with it
+    for large customer bases and on first use otherwise.
+    """
+
+    def __init__(self, profiles: pd.DataFrame, n_probe: int = 8):
+        self.customer_ids = profiles["customer_id"].astype(str).to_numpy()
+        self._positions = pd.Index(self.customer_ids)
+        context = profiles[CONTEXT_COLUMNS].reset_index(drop=True).astype(object)
+        self._context = context.where(context.notna(), None)
+        self.matrix = build_feature_matrix(profiles)
+        self.n_probe = n_probe
+        self._approximate_index: Optional[InvertedFileIndex] = None
+        if self.customer_count >= APPROXIMATE_INDEX_MIN_CUSTOMERS:
+            # Large bases default to the index, build it with the snapshot
+            self._approximate_index = InvertedFileIndex(self.matrix)
+
+    @property
+    def customer_count(self) -> int:
+        return int(self.matrix.shape[0])
+
+    @property
+    def approximate_index(self) -> InvertedFileIndex:
+        if self._approximate_index is None:
+            self._approximate_index = InvertedFileIndex(self.matrix)
+        return self._approximate_index
+
+    def similar(self, customer_id: str, k: int = 50,
+                approximate: Optional[bool] = None) -> Dict[str, Any]:
+        """
+        Find the k customers closest to the given one
+
+        Args:
+            customer_id: Reference customer
+            k: Number of neighbours to return
+            approximate: Use the approximate index; by default only for
+                customer bases of APPROXIMATE_INDEX_MIN_CUSTOMERS or more
+
+        Raises:
+            KeyError: If the customer is unknown
+        """
+        if customer_id not in self._positions:
+            raise KeyError(customer_id)
+        position = self._positions.get_loc(customer_id)
+        query = self.matrix[position]
+        if approximate is None:
+            approximate = self.customer_count >= APPROXIMATE_INDEX_MIN_CUSTOMERS
+
+        if approximate:
+            candidates = self.approximate_index.candidates(query, self.n_probe)
+            candidates = candidates[candidates != position]
+            similarities = self.matrix[candidates] @ query
+            top = _top_k(similarities, k)
+            neighbours, scores = candidates[top], similarities[top]
+        else:
+            similarities = self.matrix @ query
+            similarities[position] = -np.inf
+            top = _top_k(similarities, min(k, self.customer_count - 1))
+            neighbours, scores = top, similarities[top]
+
+        context = self._context.iloc[neighbours]
+        similar: List[Dict[str, Any]] = [
+            {
+                "customer_id": self.customer_ids[row],
+                "similarity": round(float(score), 4),
+                "customer_segment": segment,
+                "loyalty_tier": tier,
+            }
+            for row, score, segment, tier in zip(
+                neighbours, scores, context["customer_segment"], context["loyalty_tier"])
+        ]
+        return {
+            "customer_id": customer_id,
+            "k": k,
+            "method": "approximate" if approximate else "exact",
+            "similar": similar,
+        }
@@ -99,6 +99,75 @@ class C360APITester:
         for endpoint, name in endpoints:
             self._test_endpoint(endpoint, name)
     
+    def test_batch_endpoint(self):
+        """Test the multi-analytics batch endpoint"""
+        print("\n📦 Testing Batch Analytics Endpoint:")
+        
+        payload = {
+            "analytics": [
+                {"name": "customer_health_overview"},
+                {"name": "loyalty_program_metrics"},
+                {"name": "rfm_segmentation"},
+                {"name": "lifecycle_analysis"},
+                {"name": "cross_sell_opportunities", "params": {"limit": 5}, "alias": "top_cross_sell"}
+            ]
+        }
+        try:
+            start_time = time.time()
+            response = self.session.post(f"{self.base_url}/analytics/batch", json=payload, timeout=60)
+            duration = time.time() - start_time
+            
+            if response.status_code == 200:
+                data = response.json()
+                results = data.get('results', {})
+                succeeded = len([r for r in results.values() if r.get('success')])
+                print(f"   ✅ Batch Analytics: {succeeded}/{len(results)} analytics "
+                      f"(snapshot v{data.get('snapshot_version')}, "
+                      f"{data.get('computed_count')} computed, {data.get('cached_count')} cached, {duration:.1f}s)")
+                for alias, result in results.items():
+                    if not result.get('success'):
+                        print(f"      ⚠️  {alias}: {result.get('error')}")
+            else:
+                print(f"   ❌ Batch Analytics: HTTP {response.status_code} ({duration:.1f}s)")
+        except requests.exceptions.RequestException as e:
+            print(f"   ❌ Batch Analytics: Request failed - {e}")
+    
+    def test_what_if_endpoint(self):
+        """Test the health score what-if endpoint"""
+        print("\n🎚️  Testing Health Score What-If Endpoint:")
+        
+        payload = {"recency": 2.0, "frequency": 1.0, "monetary": 1.0, "engagement": 1.0}
+        try:
+            start_time = time.time()
+            response = self.session.post(f"{self.base_url}/analytics/health-score/what-if", json=payload, timeout=60)
+            duration = time.time() - start_time
+            
+            if response.status_code == 200:
+                data = response.json()
+                print(f"   ✅ Health Score What-If: {data.get('customer_count')} customers rescored in "
+                      f"{data.get('compute_ms')}ms, {data.get('customers_changed_band')} changed band ({duration:.1f}s)")
+            else:
+                print(f"   ❌ Health Score What-If: HTTP {response.status_code} ({duration:.1f}s)")
+        except requests.exceptions.RequestException as e:
+            print(f"   ❌ Health Score What-If: Request failed - {e}")
+    
+    def test_similar_customers_endpoint(self):
+        """Test the lookalike customers endpoint"""
+        print("\n👯 Testing Similar Customers Endpoint:")
+        self._test_endpoint("/customers/CUST001/similar?k=5", "Similar Customers")
+    
+    def test_distribution_endpoints(self):
+        """Test the sketch-based distribution endpoints"""
+        print("\n📊 Testing Distribution Endpoints:")
+        endpoints = [
+            ("/analytics/distributions/lifetime_value?segment_by=loyalty_tier", "Lifetime Value Distribution"),
+            ("/analytics/distributions/customer_health_score?bins=10", "Health Score Distribution"),
+            ("/analytics/distinct-counts?segment_by=customer_segment", "Distinct Counts")
+        ]
+        
+        for endpoint, name in endpoints:
+            self._test_endpoint(endpoint, name)
+    
     def _test_endpoint(self, endpoint: str, name: str):
         """Test a single endpoint"""
         try:
@@ -225,6 +294,10 @@ class C360APITester:
         self.test_finance_endpoints()
         self.test_customer_success_endpoints()
         self.test_analytics_endpoints()
+        self.test_batch_endpoint()
+        self.test_what_if_endpoint()
+        self.test_similar_customers_endpoint()
+        self.test_distribution_endpoints()
         self.test_admin_endpoints()
         
         # Business use case demonstrations
@@ -1,109 +1,880 @@
-import pandas as pd
-import numpy as np
-from datetime import datetime, timedelta
-import uuid
+"""
+C360 mock data generator
+
+Generates every c360_mock_data domain (customer, products, sales, logistics)
+with the same files and columns, at any scale. Rows are built with vectorized
+NumPy and Arrow operations:
+
+- reference tables (suppliers, products, locations, inventory) are generated
+  once; customers and everything that hangs off them are generated in shards
+- every shard has its own seed, so the output does not depend on the number
+  of worker processes
+- identifiers are numbered globally from per-shard row counts computed up
+  front, so every foreign key points to a generated row
+- activity is skewed like real data: Pareto-distributed purchase frequency,
+  Zipf product popularity and heavy-tailed ticket and session counts
+- each worker writes its shard as Parquet and CSV part files; the CSV parts
+  are then concatenated behind a single header, so memory stays bounded by
+  the shard size
+
+Usage: python generate_mock_data.py --customers 10000000 --transactions-per-customer 10 --workers 8
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import time
+from dataclasses import dataclass, field
+from multiprocessing import Pool
 from pathlib import Path
+from typing import List, Dict, Tuple, Optional
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+
+MOCK_DATA_DIR = Path(__file__).resolve().parents[3] / "c360_mock_data"
+DEFAULT_OUTPUT_DIR = MOCK_DATA_DIR / "generated"
+
+# CSV file of each table, relative to the output directory (same as c360_mock_data)
+TABLE_PATHS = {
+    "customers": "customer/customers.csv",
+    "loyalty_program": "customer/loyalty_program.csv",
+    "support_tickets": "customer/support_tickets.csv",
+    "app_usage": "customer/app_usage.csv",
+    "suppliers": "products/suppliers.csv",
+    "products": "products/products.csv",
+    "product_suppliers": "products/product_suppliers.csv",
+    "inventory": "products/inventory.csv",
+    "transactions": "sales/transactions.csv",
+    "transaction_items": "sales/transaction_items.csv",
+    "regional_sales": "sales/regional_sales.csv",
+    "warehouse_locations": "logistics/warehouse_locations.csv",
+    "shipments": "logistics/shipments.csv",
+    "tracking_events": "logistics/tracking_events.csv",
+}
+REFERENCE_TABLES = ["suppliers", "products", "product_suppliers", "warehouse_locations", "inventory"]
+SHARDED_TABLES = ["customers", "loyalty_program", "support_tickets", "app_usage",
+                  "transactions", "transaction_items", "shipments", "tracking_events"]
+# Sharded tables numbered globally, and their id prefixes
+NUMBERED_TABLES = {"customers": "CUST", "transactions": "TXN", "transaction_items": "ITM",
+                   "support_tickets": "TKT", "app_usage": "USG"}
+
+# Time window of the generated activity
+HISTORY_START = np.datetime64("2019-01-01T00:00:00", "s")
+HISTORY_END = np.datetime64("2024-06-30T23:59:59", "s")
+YEAR_START = np.datetime64("2024-01-01T00:00:00", "s")
+APP_LAUNCH = np.datetime64("2022-01-01T00:00:00", "s")
+BIRTH_START = np.datetime64("1950-01-01", "D")
+BIRTH_END = np.datetime64("2005-12-31", "D")
+HISTORY_DAYS = int((HISTORY_END.astype("datetime64[D]") - HISTORY_START.astype("datetime64[D]")).astype(int)) + 1
+HOUR = np.timedelta64(3600, "s")
+
+FIRST_NAMES = ["Sarah", "Michael", "Emily", "David", "Jessica", "James", "Amanda", "Robert",
+               "Lisa", "Daniel", "Maria", "Kevin", "Laura", "Chris", "Nina", "Omar"]
+LAST_NAMES = ["Johnson", "Chen", "Rodriguez", "Thompson", "Williams", "Garcia", "Miller", "Davis",
+              "Martinez", "Lee", "Walker", "Patel", "Nguyen", "Brown", "Wilson", "Kim"]
+STREETS = ["Main St", "Oak Ave", "Pine St", "Cedar Ln", "Maple Dr", "Elm St", "Park Blvd", "Lake Rd"]
+# (region id, region name, states)
+REGIONS = [("RGN001", "Pacific Northwest", ["WA", "OR"]), ("RGN002", "California", ["CA"]),
+           ("RGN003", "Mountain", ["CO", "AZ", "NV"]), ("RGN004", "Texas", ["TX"]),
+           ("RGN005", "Southeast", ["FL", "GA", "TN"]), ("RGN006", "Midwest", ["IL", "MI"]),
+           ("RGN007", "Northeast", ["MA", "ME"])]
+# (city, state, zip prefix)
+LOCATIONS = [("Seattle", "WA", 981), ("Portland", "OR", 972), ("San Francisco", "CA", 941),
+             ("Los Angeles", "CA", 900), ("Denver", "CO", 802), ("Austin", "TX", 787),
+             ("Miami", "FL", 331), ("Chicago", "IL", 606), ("Boston", "MA", 21),
+             ("Phoenix", "AZ", 850), ("Las Vegas", "NV", 891), ("Nashville", "TN", 372),
+             ("Atlanta", "GA", 303), ("Detroit", "MI", 482), ("Portland", "ME", 41)]
+LOCATION_REGIONS = np.array([next(i for i, (_, _, states) in enumerate(REGIONS) if state in states)
+                             for _, state, _ in LOCATIONS])
+
+SEGMENTS = (["Premium", "Standard", "Basic"], [0.25, 0.45, 0.30])
+CHANNELS = (["online", "store", "mobile"], [0.45, 0.30, 0.25])
+LOYALTY_TIERS = ["Bronze", "Silver", "Gold", "Platinum"]
+TIER_THRESHOLDS = [1000.0, 3000.0, 7500.0]  # lifetime value needed for Silver, Gold, Platinum
+POINTS_PER_DOLLAR = np.array([1.0, 1.25, 1.5, 2.0])
+PAYMENT_METHODS = (["credit_card", "debit_card", "cash", "paypal", "apple_pay", "google_pay"],
+                   [0.40, 0.20, 0.10, 0.12, 0.10, 0.08])
+TRANSACTION_STATUSES = (["completed", "pending", "cancelled"], [0.95, 0.03, 0.02])
+TAX_RATE = 0.08
+
+# category -> (subcategories, median price)
+CATEGORIES = {
+    "Electronics": (["Audio", "Computer", "Wearables"], 120.0),
+    "Apparel": (["Shirts", "Outerwear", "Scarves"], 45.0),
+    "Footwear": (["Athletic", "Casual"], 90.0),
+    "Home & Kitchen": (["Drinkware", "Appliances", "Cutlery"], 40.0),
+    "Beauty": (["Skincare", "Aromatherapy"], 25.0),
+    "Sports & Fitness": (["Equipment"], 60.0),
+    "Accessories": (["Wallets", "Eyewear", "Backpacks"], 55.0),
+    "Home & Garden": (["Gardening", "Lighting"], 35.0),
+    "Health & Nutrition": (["Supplements"], 30.0),
+    "Toys & Games": (["Board Games"], 28.0),
+}
+SUBCATEGORIES = [(category, subcategory, price)
+                 for category, (subcategories, price) in CATEGORIES.items() for subcategory in subcategories]
+BRANDS = ["SoundTech", "RunFast", "BasicWear", "HydroLife", "TechGuard", "ZenFlow", "BrewMaster",
+          "WarmCoat", "GamePro", "PureGlow", "CraftLeather", "HomeComfort", "FitLife", "ChefPro",
+          "StyleVision", "GreenThumb", "TechDesk", "Adventure"]
+COLORS = ["Black", "White", "Blue", "Red", "Gray", "Green", "Brown", "Silver"]
+SIZES = ["One Size", "S", "M", "L", "XL", "10"]
+PACKAGE_DIMENSIONS = ["20x15x8 cm", "25x20x10 cm", "30x25x15 cm", "40x30x20 cm", "N/A"]
+PRODUCT_STATUSES = (["active", "seasonal", "discontinued"], [0.93, 0.05, 0.02])
+SUPPLIER_NAMES = (["Tech", "Global", "Prime", "Pacific", "Summit", "Urban", "Green", "Nova"],
+                  ["Components Inc", "Textiles Ltd", "Goods Co", "Supply LLC", "Manufacturing", "Trading Co"])
+SUPPLIER_COUNTRIES = (["USA", "Canada", "Mexico", "China", "Vietnam", "Germany"],
+                      [0.45, 0.10, 0.10, 0.20, 0.10, 0.05])
+
+TICKET_CATEGORIES = (["product", "billing", "shipping", "account", "technical"], [0.30, 0.22, 0.25, 0.15, 0.08])
+TICKET_PRIORITIES = (["low", "medium", "high", "urgent"], [0.30, 0.42, 0.20, 0.08])
+TICKET_STATUSES = (["resolved", "in_progress", "open"], [0.88, 0.06, 0.06])
+TICKET_CHANNELS = (["email", "phone", "chat", "store"], [0.30, 0.25, 0.30, 0.15])
+SATISFACTION_WEIGHTS = [0.05, 0.10, 0.20, 0.35, 0.30]
+DEVICE_TYPES = ["ios", "android", "web"]
+APP_VERSIONS = (["3.0.5", "3.1.8", "3.2.0", "3.2.1"], [0.10, 0.25, 0.30, 0.35])
+# Negative binomial dispersion of ticket and session counts: lower is heavier-tailed
+COUNT_DISPERSION = 0.4
+
+CARRIERS = ["UPS", "FedEx", "USPS"]
+SERVICE_LEVELS = (["standard", "expedited", "overnight"], [0.60, 0.30, 0.10])
+TRANSIT_DAYS = np.array([5, 2, 1])
+SHIPPING_BASE_COST = np.array([8.5, 15.0, 29.0])
+# Tracking event types with their description and carrier status codes
+EVENT_TYPES = ["picked_up", "in_transit", "out_for_delivery", "delivered"]
+EVENT_DESCRIPTIONS = ["Package picked up from origin", "In transit to next facility",
+                      "Out for delivery", "Delivered to recipient"]
+IN_TRANSIT_STATUSES = ["DP", "AR"]
+EVENT_STATUSES = ["IP", None, "OFD", "DL"]
+
+# Reference tables come from their own random stream, past any shard number
+REFERENCE_SHARD = 1 << 31
+
+
+@dataclass
+class GeneratorConfig:
+    """Scale, skew, seed and output settings of a generation run"""
+    customers: int = 1000
+    transactions_per_customer: float = 5.0
+    items_per_transaction: float = 2.0
+    tickets_per_customer: float = 1.2
+    sessions_per_customer: float = 8.0
+    app_adoption: float = 0.6
+    products: int = 500
+    suppliers: int = 40
+    warehouses: int = 5
+    stores: int = 15
+    spend_alpha: float = 1.8  # Pareto tail index of purchase frequency: lower is more skewed
+    product_skew: float = 1.1  # Zipf exponent of product popularity
+    shard_size: int = 50_000
+    seed: int = 42
+    output_dir: Path = DEFAULT_OUTPUT_DIR
+    formats: Tuple[str, ...] = ("csv", "parquet")
+    workers: int = field(default_factory=lambda: os.cpu_count() or 1)
+    references: Optional["ReferenceData"] = None
+
+    @property
+    def shards(self) -> int:
+        return -(-self.customers // self.shard_size)
+
+    def shard_range(self, shard: int) -> Tuple[int, int]:
+        start = shard * self.shard_size
+        return start, min(start + self.shard_size, self.customers)
+
+
+@dataclass
+class ReferenceData:
+    """What shard generation needs from the reference tables"""
+    product_ids: pa.Array
+    product_prices: np.ndarray
+    product_weights: np.ndarray
+    product_popularity: np.ndarray
+    store_ids: pa.Array
+    warehouse_ids: pa.Array
+    warehouse_cities: pa.Array
+
+
+@dataclass
+class ShardPlan:
+    """Global numbering offsets of one shard and the zero-padded id widths"""
+    shard: int
+    offsets: Dict[str, int]
+    widths: Dict[str, int]
+
+
+def _rng(config: GeneratorConfig, shard: int, stream: int) -> np.random.Generator:
+    return np.random.default_rng([config.seed, shard, stream])
+
+
+def _heavy_tail_counts(rng: np.random.Generator, mean, size: int) -> np.ndarray:
+    """Negative binomial counts: most rows get few, a long tail gets many"""
+    return rng.negative_binomial(COUNT_DISPERSION, COUNT_DISPERSION / (COUNT_DISPERSION + np.asarray(mean)), size)
+
+
+def _shard_counts(config: GeneratorConfig, shard: int) -> Dict[str, np.ndarray]:
+    """Rows per parent of every numbered child table of a shard"""
+    rng = _rng(config, shard, 0)
+    start, end = config.shard_range(shard)
+    n = end - start
+    # Pareto activity with mean 1: a small share of customers makes most purchases
+    alpha = config.spend_alpha
+    activity = (rng.pareto(alpha, n) + 1) * (alpha - 1) / alpha
+    transactions = rng.poisson(config.transactions_per_customer * activity)
+    app_user = rng.random(n) < config.app_adoption
+    sessions_per_user = config.sessions_per_customer / max(config.app_adoption, 1e-9)
+    return {
+        "customers": np.ones(n, dtype=np.int64),
+        "transactions": transactions,
+        "transaction_items": 1 + rng.poisson(max(config.items_per_transaction - 1, 0), int(transactions.sum())),
+        "support_tickets": _heavy_tail_counts(rng, config.tickets_per_customer, n),
+        "app_usage": np.where(app_user, _heavy_tail_counts(rng, sessions_per_user, n), 0),
+    }
 
-def generate_customer_data(num_customers=1000):
-    np.random.seed(42)
-    
-    # Generate basic customer data
-    customer_ids = [str(uuid.uuid4()) for _ in range(num_customers)]
-    first_names = ['John', 'Jane', 'Michael', 'Emily', 'David', 'Sarah', 'James', 'Emma']
-    last_names = ['Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Garcia', 'Miller', 'Davis']
-    
-    customers = pd.DataFrame({
-        'customer_id': customer_ids,
-        'first_name': np.random.choice(first_names, num_customers),
-        'last_name': np.random.choice(last_names, num_customers),
-        'email': [f"{fn.lower()}.{ln.lower()}@example.com" for fn, ln in zip(
-            np.random.choice(first_names, num_customers),
-            np.random.choice(last_names, num_customers))],
-        'phone': [f"+1-555-{np.random.randint(100, 999)}-{np.random.randint(1000, 9999)}" 
-                 for _ in range(num_customers)],
-        'address': [f"{np.random.randint(100, 9999)} Main St" for _ in range(num_customers)],
-        'city': np.random.choice(['New York', 'Los Angeles', 'Chicago', 'Houston', 'Phoenix'], num_customers),
-        'state': np.random.choice(['NY', 'CA', 'IL', 'TX', 'AZ'], num_customers),
-        'country': 'USA',
-        'signup_date': [datetime.now() - timedelta(days=np.random.randint(1, 1000)) 
-                       for _ in range(num_customers)]
+
+def _shard_totals(args: Tuple[GeneratorConfig, int]) -> Dict[str, int]:
+    return {name: int(counts.sum()) for name, counts in _shard_counts(*args).items()}
+
+
+def _ids(prefix: str, numbers: np.ndarray, width: int) -> pa.Array:
+    digits = pc.utf8_lpad(pc.cast(pa.array(numbers), pa.string()), width=width, padding="0")
+    return pc.binary_join_element_wise(prefix, digits, "")
+
+
+def _text(values: np.ndarray) -> pa.Array:
+    return pc.cast(pa.array(values), pa.string())
+
+
+def _pick(rng: np.random.Generator, choices: Tuple[List[str], List[float]], size: int) -> pa.Array:
+    values, weights = choices
+    return pa.array(values).take(pa.array(rng.choice(len(values), size, p=weights)))
+
+
+def _take(values: List[str], indices: np.ndarray) -> pa.Array:
+    return pa.array(values).take(pa.array(indices))
+
+
+def _uniform_times(rng: np.random.Generator, start, end, size: int) -> np.ndarray:
+    """Uniform datetimes in [start, end], start and end scalars or arrays"""
+    start = np.asarray(start, dtype="datetime64[s]")
+    span = np.maximum((np.asarray(end, dtype="datetime64[s]") - start).astype(np.int64), 0)
+    return start + (rng.random(size) * span).astype("timedelta64[s]")
+
+
+def _money(values: np.ndarray) -> np.ndarray:
+    return np.round(values, 2)
+
+
+def _null_where(values: np.ndarray, missing: np.ndarray) -> pa.Array:
+    return pa.array(values, mask=missing)
+
+
+def _repeat_index(counts: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Parent index of every child row and its position among its siblings"""
+    parent = np.repeat(np.arange(len(counts)), counts)
+    starts = np.cumsum(counts) - counts
+    return parent, np.arange(len(parent)) - starts[parent]
+
+
+# ============================================================================
+# Reference tables
+# ============================================================================
+
+def generate_reference_tables(config: GeneratorConfig) -> Tuple[Dict[str, pa.Table], ReferenceData]:
+    """Suppliers, products, locations and inventory, shared by every shard"""
+    rng = _rng(config, REFERENCE_SHARD, 0)
+    suppliers = _generate_suppliers(rng, config.suppliers)
+    products, popularity = _generate_products(rng, config)
+    locations = _generate_locations(rng, config)
+    product_suppliers = _generate_product_suppliers(rng, products, config.suppliers)
+    inventory = _generate_inventory(rng, products, locations)
+
+    is_store = pc.equal(locations["location_type"], "store")
+    warehouses = locations.filter(pc.invert(is_store))
+    references = ReferenceData(
+        product_ids=products["product_id"].combine_chunks(),
+        product_prices=products["price"].to_numpy(),
+        product_weights=products["weight_kg"].to_numpy(),
+        product_popularity=popularity,
+        store_ids=locations.filter(is_store)["location_id"].combine_chunks(),
+        warehouse_ids=warehouses["location_id"].combine_chunks(),
+        warehouse_cities=pc.binary_join_element_wise(warehouses["city"], warehouses["state"], " ").combine_chunks(),
+    )
+    tables = {"suppliers": suppliers, "products": products, "product_suppliers": product_suppliers,
+              "warehouse_locations": locations, "inventory": inventory}
+    return tables, references
+
+
+def _generate_suppliers(rng: np.random.Generator, n: int) -> pa.Table:
+    prefixes, suffixes = SUPPLIER_NAMES
+    numbers = np.arange(1, n + 1)
+    first = _take(FIRST_NAMES, rng.integers(0, len(FIRST_NAMES), n))
+    last = _take(LAST_NAMES, rng.integers(0, len(LAST_NAMES), n))
+    location = rng.integers(0, len(LOCATIONS), n)
+    cities, states, _ = zip(*LOCATIONS)
+    return pa.table({
+        "supplier_id": _ids("SUP", numbers, 3),
+        "supplier_name": pc.binary_join_element_wise(
+            _take(prefixes, numbers % len(prefixes)), _take(suffixes, (numbers // len(prefixes)) % len(suffixes)), " "),
+        "contact_person": pc.binary_join_element_wise(first, last, " "),
+        "email": pc.binary_join_element_wise(pc.utf8_lower(first), ".", pc.utf8_lower(last), "@",
+                                             _ids("supplier", numbers, 3), ".com", ""),
+        "phone": _ids("+1-555-", 2000 + numbers, 4),
+        "address": pc.binary_join_element_wise(_text(rng.integers(100, 10_000, n)),
+                                               _take(STREETS, rng.integers(0, len(STREETS), n)),
+                                               _take(list(cities), location), _take(list(states), location), " "),
+        "country": _pick(rng, SUPPLIER_COUNTRIES, n),
+        "payment_terms": _take(["Net 30", "Net 45", "Net 60"], rng.integers(0, 3, n)),
+        "quality_rating": pa.array(np.round(rng.uniform(3.0, 5.0, n), 1)),
     })
-    
-    return customers, customer_ids
-
-def generate_transaction_data(customer_ids, num_transactions=5000):
-    transaction_ids = [str(uuid.uuid4()) for _ in range(num_transactions)]
-    
-    transactions = pd.DataFrame({
-        'transaction_id': transaction_ids,
-        'customer_id': np.random.choice(customer_ids, num_transactions),
-        'transaction_date': [datetime.now() - timedelta(days=np.random.randint(1, 365)) 
-                           for _ in range(num_transactions)],
-        'total_amount': np.random.uniform(10, 1000, num_transactions).round(2),
-        'payment_method': np.random.choice(['credit_card', 'debit_card', 'paypal'], num_transactions),
-        'status': np.random.choice(['completed', 'pending', 'failed'], num_transactions, 
-                                 p=[0.95, 0.03, 0.02])
+
+
+def _generate_products(rng: np.random.Generator, config: GeneratorConfig) -> Tuple[pa.Table, np.ndarray]:
+    n = config.products
+    kind = rng.integers(0, len(SUBCATEGORIES), n)
+    categories, subcategories, median_prices = (np.array(column) for column in zip(*SUBCATEGORIES))
+    brand = _take(BRANDS, rng.integers(0, len(BRANDS), n))
+    price = np.floor(rng.lognormal(np.log(median_prices[kind].astype(float)), 0.5)) + 0.99
+    catalog_start, catalog_end = np.datetime64("2020-01-01", "D"), np.datetime64("2024-06-01", "D")
+    created = catalog_start + rng.integers(0, (catalog_end - catalog_start).astype(int), n)
+    # Zipf popularity over a random ranking of the products
+    ranks = rng.permutation(n) + 1
+    popularity = 1.0 / ranks ** config.product_skew
+    table = pa.table({
+        "product_id": _ids("PRD", np.arange(1, n + 1), max(3, len(str(n)))),
+        "product_name": pc.binary_join_element_wise(brand, _take(list(subcategories), kind),
+                                                    _text(rng.integers(100, 1000, n)), " "),
+        "category": _take(list(categories), kind),
+        "subcategory": _take(list(subcategories), kind),
+        "brand": brand,
+        "price": pa.array(price),
+        "cost": pa.array(_money(price * rng.uniform(0.4, 0.65, n))),
+        "weight_kg": pa.array(np.round(rng.lognormal(np.log(0.6), 0.8, n), 3)),
+        "dimensions": _take(PACKAGE_DIMENSIONS, rng.integers(0, len(PACKAGE_DIMENSIONS), n)),
+        "color": _take(COLORS, rng.integers(0, len(COLORS), n)),
+        "size": _take(SIZES, rng.integers(0, len(SIZES), n)),
+        "created_date": pa.array(created),
+        "status": _pick(rng, PRODUCT_STATUSES, n),
     })
-    
-    return transactions, transaction_ids
-
-def generate_transaction_items(transaction_ids, num_items=10000):
-    product_ids = ['P001', 'P002', 'P003', 'P004', 'P005']
-    product_prices = {
-        'P001': 999.99,  # Laptop
-        'P002': 699.99,  # Smartphone
-        'P003': 199.99,  # Headphones
-        'P004': 499.99,  # Tablet
-        'P005': 299.99   # Smartwatch
+    return table, popularity / popularity.sum()
+
+
+def _generate_product_suppliers(rng: np.random.Generator, products: pa.Table, n_suppliers: int) -> pa.Table:
+    n = products.num_rows
+    per_product = np.minimum(1 + rng.binomial(2, 0.5, n), n_suppliers)
+    product, position = _repeat_index(per_product)
+    supplier = (rng.integers(0, n_suppliers, n)[product] + position) % n_suppliers
+    cost = products["cost"].to_numpy()[product]
+    return pa.table({
+        "product_id": products["product_id"].take(pa.array(product)),
+        "supplier_id": _ids("SUP", supplier + 1, 3),
+        "is_primary": pa.array(position == 0),
+        "cost_price": pa.array(_money(cost * rng.uniform(0.95, 1.08, len(product)))),
+        "lead_time_days": pa.array(rng.integers(7, 46, len(product)).astype(np.int32)),
+    })
+
+
+def _generate_locations(rng: np.random.Generator, config: GeneratorConfig) -> pa.Table:
+    n = config.warehouses + config.stores
+    is_store = np.arange(n) >= config.warehouses
+    number = np.where(is_store, np.arange(n) - config.warehouses, np.arange(n)) + 1
+    location = np.arange(n) % len(LOCATIONS)
+    cities, states, _ = (list(column) for column in zip(*LOCATIONS))
+    kind = np.where(is_store, 2, np.where(np.arange(n) == 0, 0, 1))
+    city = _take(cities, location)
+    return pa.table({
+        "location_id": pc.if_else(pa.array(is_store), _ids("ST", number, 3), _ids("WH", number, 3)),
+        "location_name": pc.binary_join_element_wise(
+            city, _take(["Distribution Center", "Warehouse", "Store"], kind), " "),
+        "location_type": _take(["distribution_center", "warehouse", "store"], kind),
+        "address": pc.binary_join_element_wise(_text(rng.integers(100, 10_000, n)),
+                                               _take(STREETS, rng.integers(0, len(STREETS), n)), " "),
+        "city": city,
+        "state": _take(states, location),
+        "country": pa.array(np.full(n, "USA")),
+        "capacity_cubic_meters": pa.array(np.where(
+            is_store, rng.integers(500, 2000, n), np.where(kind == 0, 50_000, rng.integers(20_000, 40_000, n)))
+            .astype(np.int32)),
+        "manager_name": pc.binary_join_element_wise(
+            _take(FIRST_NAMES, rng.integers(0, len(FIRST_NAMES), n)),
+            _take(LAST_NAMES, rng.integers(0, len(LAST_NAMES), n)), " "),
+    })
+
+
+def _generate_inventory(rng: np.random.Generator, products: pa.Table, locations: pa.Table) -> pa.Table:
+    """Every product in every warehouse, and in about a third of the stores"""
+    n_products, n_locations = products.num_rows, locations.num_rows
+    is_store = pc.equal(locations["location_type"], "store").to_numpy(zero_copy_only=False)
+    product = np.repeat(np.arange(n_products), n_locations)
+    location = np.tile(np.arange(n_locations), n_products)
+    keep = ~is_store[location] | (rng.random(len(location)) < 0.3)
+    product, location = product[keep], location[keep]
+    n = len(product)
+    stock = np.maximum(rng.lognormal(np.where(is_store[location], np.log(25), np.log(150)), 0.6), 0).astype(np.int32)
+    last_updated = _uniform_times(rng, HISTORY_END - 72 * HOUR, HISTORY_END, n)
+    return pa.table({
+        "inventory_id": _ids("INV", np.arange(1, n + 1), max(3, len(str(n)))),
+        "product_id": products["product_id"].take(pa.array(product)),
+        "location_id": locations["location_id"].take(pa.array(location)),
+        "stock_quantity": pa.array(stock),
+        "reserved_quantity": pa.array(rng.binomial(stock, 0.15).astype(np.int32)),
+        "reorder_point": pa.array((stock * 0.3).astype(np.int32)),
+        "max_stock_level": pa.array((stock * 2 + 10).astype(np.int32)),
+        "last_updated": pa.array(last_updated),
+    })
+
+
+# ============================================================================
+# Sharded tables
+# ============================================================================
+
+def generate_customers(config: GeneratorConfig, plan: ShardPlan) -> Tuple[pa.Table, Dict[str, np.ndarray]]:
+    """Customers of a shard, plus the attributes their activity depends on"""
+    rng = _rng(config, plan.shard, 1)
+    start, end = config.shard_range(plan.shard)
+    n = end - start
+    numbers = np.arange(start + 1, end + 1)
+    first = _take(FIRST_NAMES, rng.integers(0, len(FIRST_NAMES), n))
+    last = _take(LAST_NAMES, rng.integers(0, len(LAST_NAMES), n))
+    location = rng.integers(0, len(LOCATIONS), n)
+    cities, states, zip_prefixes = (np.array(column) for column in zip(*LOCATIONS))
+    zips = zip_prefixes[location] * 100 + rng.integers(1, 100, n)
+    registration = _uniform_times(rng, HISTORY_START, HISTORY_END - 30 * 24 * HOUR, n)
+    channel = rng.choice(len(CHANNELS[0]), n, p=CHANNELS[1])
+
+    table = pa.table({
+        "customer_id": _ids("CUST", numbers, plan.widths["customers"]),
+        "first_name": first,
+        "last_name": last,
+        "email": pc.binary_join_element_wise(pc.utf8_lower(first), ".", pc.utf8_lower(last),
+                                             _text(numbers), "@email.com", ""),
+        "phone": _ids("+1-555-", rng.integers(0, 10_000, n), 4),
+        "date_of_birth": pa.array(BIRTH_START + rng.integers(0, (BIRTH_END - BIRTH_START).astype(int), n)),
+        "gender": _take(["F", "M"], rng.integers(0, 2, n)),
+        "registration_date": pa.array(registration),
+        "customer_segment": _pick(rng, SEGMENTS, n),
+        "preferred_channel": _take(CHANNELS[0], channel),
+        "address_line1": pc.binary_join_element_wise(_text(rng.integers(100, 10_000, n)),
+                                                     _take(STREETS, rng.integers(0, len(STREETS), n)), " "),
+        "city": pa.array(cities[location]),
+        "state": pa.array(states[location]),
+        "zip_code": pc.utf8_lpad(_text(zips), width=5, padding="0"),
+        "country": pa.array(np.full(n, "USA")),
+    })
+    return table, {"registration": registration, "location": location, "channel": channel}
+
+
+def generate_sales(config: GeneratorConfig, plan: ShardPlan, counts: Dict[str, np.ndarray],
+                   customers: pa.Table, attributes: Dict[str, np.ndarray]):
+    """
+    Transactions of the shard's customers, their items, shipments and tracking events
+
+    Also returns each customer's completed spend, which loyalty is derived
+    from, and the shard's contribution to the regional daily sales.
+    """
+    rng = _rng(config, plan.shard, 2)
+    refs = config.references
+    owner, _ = _repeat_index(counts["transactions"])
+    parent, _ = _repeat_index(counts["transaction_items"])
+    n_transactions, n_items = len(owner), len(parent)
+    transaction_numbers = plan.offsets["transactions"] + 1 + np.arange(n_transactions)
+    transaction_ids = _ids("TXN", transaction_numbers, plan.widths["transactions"])
+
+    # Items first: transaction amounts are the sums of their lines
+    product = rng.choice(len(refs.product_prices), n_items, p=refs.product_popularity)
+    quantity = rng.geometric(0.6, n_items).astype(np.int32)
+    unit_price = refs.product_prices[product]
+    line_total = _money(quantity * unit_price)
+    discount = _money(np.where(rng.random(n_items) < 0.1, line_total * 0.1, 0.0))
+    items = pa.table({
+        "item_id": _ids("ITM", plan.offsets["transaction_items"] + 1 + np.arange(n_items),
+                        plan.widths["transaction_items"]),
+        "transaction_id": transaction_ids.take(pa.array(parent)),
+        "product_id": refs.product_ids.take(pa.array(product)),
+        "quantity": pa.array(quantity),
+        "unit_price": pa.array(unit_price),
+        "line_total": pa.array(line_total),
+        "discount_applied": pa.array(discount),
+    })
+
+    subtotal = _money(np.bincount(parent, weights=line_total, minlength=n_transactions))
+    discount_amount = _money(np.bincount(parent, weights=discount, minlength=n_transactions))
+    tax = _money(subtotal * TAX_RATE)
+    total = _money(subtotal + tax - discount_amount)
+    # Customers mostly buy through their preferred channel
+    channel = np.where(rng.random(n_transactions) < 0.6, attributes["channel"][owner],
+                       rng.choice(len(CHANNELS[0]), n_transactions, p=CHANNELS[1]))
+    is_store = channel == CHANNELS[0].index("store")
+    store = refs.store_ids.take(pa.array(rng.integers(0, len(refs.store_ids), n_transactions)))
+    status = rng.choice(len(TRANSACTION_STATUSES[0]), n_transactions, p=TRANSACTION_STATUSES[1])
+    transaction_date = _uniform_times(rng, attributes["registration"][owner], HISTORY_END, n_transactions)
+    transactions = pa.table({
+        "transaction_id": transaction_ids,
+        "customer_id": customers["customer_id"].take(pa.array(owner)),
+        "transaction_date": pa.array(transaction_date),
+        "channel": _take(CHANNELS[0], channel),
+        "store_id": pc.if_else(pa.array(is_store), store, pa.scalar(None, pa.string())),
+        "payment_method": _pick(rng, PAYMENT_METHODS, n_transactions),
+        "subtotal": pa.array(subtotal),
+        "tax_amount": pa.array(tax),
+        "discount_amount": pa.array(discount_amount),
+        "total_amount": pa.array(total),
+        "currency": pa.array(np.full(n_transactions, "USD")),
+        "status": _take(TRANSACTION_STATUSES[0], status),
+    })
+
+    # Online and mobile orders that were not cancelled are shipped
+    shipped = np.flatnonzero(~is_store & (status != TRANSACTION_STATUSES[0].index("cancelled")))
+    weight = np.bincount(parent, weights=quantity * refs.product_weights[product], minlength=n_transactions)
+    shipments, events = _generate_shipments(
+        rng, refs, plan, shipped, transaction_ids, transaction_numbers, transaction_date, weight,
+        customers, owner)
+    completed = status == TRANSACTION_STATUSES[0].index("completed")
+    sales = {
+        "transactions": transactions,
+        "transaction_items": items,
+        "shipments": shipments,
+        "tracking_events": events,
     }
-    
-    # Generate random product IDs
-    selected_products = np.random.choice(product_ids, num_items)
-    
-    items = pd.DataFrame({
-        'item_id': [str(uuid.uuid4()) for _ in range(num_items)],
-        'transaction_id': np.random.choice(transaction_ids, num_items),
-        'product_id': selected_products,
-        'quantity': np.random.randint(1, 5, num_items),
-        'unit_price': [product_prices[p] for p in selected_products]
+    spend = {
+        "total": np.bincount(owner[completed], weights=total[completed], minlength=customers.num_rows),
+        "ytd": np.bincount(owner[completed & (transaction_date >= YEAR_START)],
+                           weights=total[completed & (transaction_date >= YEAR_START)],
+                           minlength=customers.num_rows),
+    }
+    regional = _regional_partials(attributes["location"][owner[completed]],
+                                  transaction_date[completed], total[completed])
+    return sales, spend, regional
+
+
+def _generate_shipments(rng: np.random.Generator, refs: ReferenceData, plan: ShardPlan, shipped: np.ndarray,
+                        transaction_ids: pa.Array, transaction_numbers: np.ndarray, transaction_date: np.ndarray,
+                        weight: np.ndarray, customers: pa.Table, owner: np.ndarray) -> Tuple[pa.Table, pa.Table]:
+    """One shipment per shipped transaction, numbered after it, and its tracking events"""
+    n = len(shipped)
+    width = plan.widths["transactions"]
+    level = rng.choice(len(SERVICE_LEVELS[0]), n, p=SERVICE_LEVELS[1])
+    origin = rng.integers(0, len(refs.warehouse_ids), n)
+    ship_date = transaction_date[shipped].astype("datetime64[D]") + rng.integers(0, 3, n)
+    estimated = ship_date + TRANSIT_DAYS[level]
+    actual = np.maximum(estimated + rng.integers(-1, 3, n), ship_date + 1)
+    delivered = actual <= HISTORY_END.astype("datetime64[D]")
+    package_weight = np.round(weight[shipped] + 0.1, 2)
+    destination = pa.array(owner[shipped])
+    destination_city = pc.binary_join_element_wise(
+        customers["city"].take(destination), customers["state"].take(destination), " ")
+    shipment_numbers = transaction_numbers[shipped]
+    shipments = pa.table({
+        "shipment_id": _ids("SHP", shipment_numbers, width),
+        "transaction_id": transaction_ids.take(pa.array(shipped)),
+        "tracking_number": _ids("1Z", rng.integers(0, 10 ** 16, n), 16),
+        "carrier": _take(CARRIERS, rng.integers(0, len(CARRIERS), n)),
+        "service_level": _take(SERVICE_LEVELS[0], level),
+        "origin_location": refs.warehouse_ids.take(pa.array(origin)),
+        "destination_address": pc.binary_join_element_wise(
+            customers["address_line1"].take(destination), destination_city, " "),
+        "weight_kg": pa.array(package_weight),
+        "dimensions": _take(PACKAGE_DIMENSIONS[:-1], rng.integers(0, len(PACKAGE_DIMENSIONS) - 1, n)),
+        "ship_date": pa.array(ship_date),
+        "estimated_delivery": pa.array(estimated),
+        "actual_delivery": _null_where(actual, ~delivered),
+        "delivery_status": _take(["in_transit", "delivered"], delivered.astype(np.int64)),
+        "shipping_cost": pa.array(_money(SHIPPING_BASE_COST[level] + 0.75 * package_weight)),
+    })
+
+    # picked_up, one to three in_transit scans, then out_for_delivery and delivered once delivered
+    hops = rng.integers(1, 4, n)
+    shipment, position = _repeat_index(1 + hops + 2 * delivered)
+    n_events = len(shipment)
+    kind = np.where(position == 0, 0, np.where(position <= hops[shipment], 1, position - hops[shipment] + 1))
+    first_scan = ship_date.astype("datetime64[s]") + 8 * HOUR
+    last_scan = np.where(delivered, actual, np.minimum(ship_date + hops, HISTORY_END.astype("datetime64[D]")))
+    last_scan = np.maximum(last_scan.astype("datetime64[s]") + 17 * HOUR, first_scan + HOUR)
+    progress = position / np.maximum(hops[shipment] + 2 * delivered[shipment], 1)
+    span = (last_scan - first_scan).astype(np.int64)[shipment]
+    timestamp = first_scan[shipment] + (progress * span).astype("timedelta64[s]")
+    hub = _take([f"{city} {state}" for city, state, _ in LOCATIONS], rng.integers(0, len(LOCATIONS), n_events))
+    origin_city = refs.warehouse_cities.take(pa.array(origin[shipment]))
+    location = pc.if_else(pa.array(kind == 0), origin_city,
+                          pc.if_else(pa.array(kind == 1), hub, destination_city.take(pa.array(shipment))))
+    status_codes = pc.if_else(pa.array(kind == 1),
+                              _take(IN_TRANSIT_STATUSES, position % 2),
+                              _take(EVENT_STATUSES, kind))
+    events = pa.table({
+        "event_id": _ids("EVT", shipment_numbers[shipment] * 100 + position, width + 2),
+        "shipment_id": shipments["shipment_id"].take(pa.array(shipment)),
+        "event_timestamp": pa.array(timestamp),
+        "event_type": _take(EVENT_TYPES, kind),
+        "location": location,
+        "description": _take(EVENT_DESCRIPTIONS, kind),
+        "carrier_status": status_codes,
+    })
+    return shipments, events
+
+
+def _regional_partials(location: np.ndarray, transaction_date: np.ndarray, total: np.ndarray) -> np.ndarray:
+    """Revenue and order count per region and day, as a (2, regions * days) array"""
+    day = (transaction_date.astype("datetime64[D]") - HISTORY_START.astype("datetime64[D]")).astype(np.int64)
+    key = LOCATION_REGIONS[location] * HISTORY_DAYS + day
+    size = len(REGIONS) * HISTORY_DAYS
+    return np.stack([np.bincount(key, weights=total, minlength=size), np.bincount(key, minlength=size)])
+
+
+def generate_loyalty(config: GeneratorConfig, plan: ShardPlan, customers: pa.Table,
+                     attributes: Dict[str, np.ndarray], spend: Dict[str, np.ndarray]) -> pa.Table:
+    """Loyalty accounts whose tier and points follow each customer's spend"""
+    rng = _rng(config, plan.shard, 3)
+    n = customers.num_rows
+    lifetime_value = _money(spend["total"] * rng.uniform(1.0, 1.3, n) + rng.gamma(2.0, 40.0, n))
+    tier = np.searchsorted(TIER_THRESHOLDS, lifetime_value, side="right")
+    earned = (spend["ytd"] * POINTS_PER_DOLLAR[tier]).astype(np.int32)
+    redeemed = (earned * rng.uniform(0.0, 0.6, n)).astype(np.int32)
+    carried = rng.gamma(1.5, 400.0, n).astype(np.int32)
+    registered = attributes["registration"].astype("datetime64[D]")
+    tier_start = np.maximum(HISTORY_END.astype("datetime64[D]") - rng.integers(30, 900, n), registered)
+    return pa.table({
+        "customer_id": customers["customer_id"],
+        "loyalty_tier": _take(LOYALTY_TIERS, tier),
+        "points_balance": pa.array(earned - redeemed + carried),
+        "points_earned_ytd": pa.array(earned),
+        "points_redeemed_ytd": pa.array(redeemed),
+        "tier_start_date": pa.array(tier_start),
+        "lifetime_value": pa.array(lifetime_value),
+    })
+
+
+def generate_support_tickets(config: GeneratorConfig, plan: ShardPlan, counts: Dict[str, np.ndarray],
+                             customers: pa.Table, attributes: Dict[str, np.ndarray]) -> pa.Table:
+    rng = _rng(config, plan.shard, 4)
+    owner, _ = _repeat_index(counts["support_tickets"])
+    n = len(owner)
+    created = _uniform_times(rng, attributes["registration"][owner], HISTORY_END, n)
+    status = rng.choice(len(TICKET_STATUSES[0]), n, p=TICKET_STATUSES[1])
+    resolved = status == TICKET_STATUSES[0].index("resolved")
+    resolution = (rng.gamma(1.5, 16.0, n) * 3600).astype("timedelta64[s]")
+    satisfaction = rng.choice(5, n, p=SATISFACTION_WEIGHTS).astype(np.int32) + 1
+    return pa.table({
+        "ticket_id": _ids("TKT", plan.offsets["support_tickets"] + 1 + np.arange(n), plan.widths["support_tickets"]),
+        "customer_id": customers["customer_id"].take(pa.array(owner)),
+        "created_date": pa.array(created),
+        "resolved_date": _null_where(created + resolution, ~resolved),
+        "category": _pick(rng, TICKET_CATEGORIES, n),
+        "priority": _pick(rng, TICKET_PRIORITIES, n),
+        "status": _take(TICKET_STATUSES[0], status),
+        "channel": _pick(rng, TICKET_CHANNELS, n),
+        # Unresolved tickets and some resolved ones have no survey answer
+        "satisfaction_score": _null_where(satisfaction, ~resolved | (rng.random(n) < 0.15)),
     })
-    
-    items['total_price'] = items['quantity'] * items['unit_price']
-    return items
-
-def generate_loyalty_data(customer_ids):
-    loyalty = pd.DataFrame({
-        'customer_id': customer_ids,
-        'membership_level': np.random.choice(['Bronze', 'Silver', 'Gold', 'Platinum'], len(customer_ids),
-                                           p=[0.4, 0.3, 0.2, 0.1]),
-        'points_balance': np.random.randint(0, 50000, len(customer_ids)),
-        'join_date': [datetime.now() - timedelta(days=np.random.randint(1, 500)) 
-                     for _ in range(len(customer_ids))],
-        'last_points_update': [datetime.now() - timedelta(days=np.random.randint(1, 30)) 
-                             for _ in range(len(customer_ids))]
+
+
+def generate_app_usage(config: GeneratorConfig, plan: ShardPlan, counts: Dict[str, np.ndarray],
+                       customers: pa.Table, attributes: Dict[str, np.ndarray]) -> pa.Table:
+    rng = _rng(config, plan.shard, 5)
+    owner, _ = _repeat_index(counts["app_usage"])
+    n = len(owner)
+    # Each app user mostly uses one device
+    device = np.where(rng.random(n) < 0.8, rng.integers(0, len(DEVICE_TYPES), customers.num_rows)[owner],
+                      rng.integers(0, len(DEVICE_TYPES), n))
+    start = _uniform_times(rng, np.maximum(attributes["registration"][owner], APP_LAUNCH), HISTORY_END, n)
+    duration = (1 + rng.gamma(2.0, 10.0, n)).astype(np.int32)
+    pages = (1 + rng.poisson(duration * 0.4)).astype(np.int32)
+    return pa.table({
+        "usage_id": _ids("USG", plan.offsets["app_usage"] + 1 + np.arange(n), plan.widths["app_usage"]),
+        "customer_id": customers["customer_id"].take(pa.array(owner)),
+        "session_date": pa.array(start.astype("datetime64[D]")),
+        "session_start": pa.array(start),
+        "session_duration_minutes": pa.array(duration),
+        "pages_viewed": pa.array(pages),
+        "actions_taken": pa.array(rng.binomial(pages, 0.6).astype(np.int32)),
+        "device_type": _take(DEVICE_TYPES, device),
+        "app_version": _pick(rng, APP_VERSIONS, n),
+    })
+
+
+def generate_shard(config: GeneratorConfig, plan: ShardPlan) -> Tuple[Dict[str, pa.Table], np.ndarray]:
+    """Every sharded table of one shard, and its regional sales partials"""
+    counts = _shard_counts(config, plan.shard)
+    customers, attributes = generate_customers(config, plan)
+    sales, spend, regional = generate_sales(config, plan, counts, customers, attributes)
+    tables = {
+        "customers": customers,
+        "loyalty_program": generate_loyalty(config, plan, customers, attributes, spend),
+        "support_tickets": generate_support_tickets(config, plan, counts, customers, attributes),
+        "app_usage": generate_app_usage(config, plan, counts, customers, attributes),
+        **sales,
+    }
+    return tables, regional
+
+
+def build_regional_sales(partials: np.ndarray) -> pa.Table:
+    """Daily completed revenue and orders per region, from the summed shard partials"""
+    revenue, orders = partials
+    key = np.flatnonzero(orders)
+    region, day = np.divmod(key, HISTORY_DAYS)
+    region_ids, region_names, _ = (list(column) for column in zip(*REGIONS))
+    return pa.table({
+        "region_id": _take(region_ids, region),
+        "region_name": _take(region_names, region),
+        "country": pa.array(np.full(len(key), "USA")),
+        "sales_date": pa.array(HISTORY_START.astype("datetime64[D]") + day),
+        "total_revenue": pa.array(_money(revenue[key])),
+        "total_transactions": pa.array(orders[key].astype(np.int32)),
+        "average_order_value": pa.array(_money(revenue[key] / orders[key])),
     })
-    
-    return loyalty
-
-def main():
-    # Create mock data directory structure
-    mock_data_dir = Path('../../c360_mock_data')
-    (mock_data_dir / 'customer').mkdir(parents=True, exist_ok=True)
-    (mock_data_dir / 'sales').mkdir(parents=True, exist_ok=True)
-    
-    # Generate data
-    customers, customer_ids = generate_customer_data()
-    transactions, transaction_ids = generate_transaction_data(customer_ids)
-    items = generate_transaction_items(transaction_ids)
-    loyalty = generate_loyalty_data(customer_ids)
-    
-    # Save data
-    customers.to_csv(mock_data_dir / 'customer/customers.csv', index=False)
-    transactions.to_csv(mock_data_dir / 'sales/transactions.csv', index=False)
-    items.to_csv(mock_data_dir / 'sales/transaction_items.csv', index=False)
-    loyalty.to_csv(mock_data_dir / 'customer/loyalty_program.csv', index=False)
-    
-    print("Mock data generated successfully!")
+
+
+# ============================================================================
+# Output
+# ============================================================================
+
+def _parts_dir(config: GeneratorConfig) -> Path:
+    return Path(config.output_dir) / "_parts"
+
+
+def _write_part(config: GeneratorConfig, name: str, table: pa.Table, part: int):
+    """Write one part of a table; only part 0 carries the CSV header"""
+    if "parquet" in config.formats:
+        parquet_dir = Path(config.output_dir) / "parquet" / name
+        parquet_dir.mkdir(parents=True, exist_ok=True)
+        pq.write_table(_parquet_types(table), parquet_dir / f"part-{part:05d}.parquet")
+    if "csv" in config.formats:
+        csv_dir = _parts_dir(config) / name
+        csv_dir.mkdir(parents=True, exist_ok=True)
+        pa_csv.write_csv(table, csv_dir / f"part-{part:05d}.csv",
+                         pa_csv.WriteOptions(include_header=part == 0,
+                                             quoting_style="none", quoting_header="none"))
+
+
+def _write_shard(args: Tuple[GeneratorConfig, ShardPlan]) -> Tuple[Dict[str, int], np.ndarray]:
+    """Worker: generate one shard and write its part files"""
+    config, plan = args
+    tables, regional = generate_shard(config, plan)
+    for name, table in tables.items():
+        _write_part(config, name, table, plan.shard)
+    return {name: table.num_rows for name, table in tables.items()}, regional
+
+
+def _parquet_types(table: pa.Table) -> pa.Table:
+    """Timestamps as UTC-adjusted so Spark reads them as TIMESTAMP, like ingest.py output"""
+    fields = [pa.field(f.name, pa.timestamp("us", tz="UTC")) if pa.types.is_timestamp(f.type) else f
+              for f in table.schema]
+    return table.cast(pa.schema(fields))
+
+
+def _assemble_csv(config: GeneratorConfig, name: str):
+    """Concatenate the CSV parts of a table, then rename the file into place"""
+    target = Path(config.output_dir) / TABLE_PATHS[name]
+    target.parent.mkdir(parents=True, exist_ok=True)
+    staging = target.with_name(f"{target.name}.tmp")
+    with open(staging, "wb") as out:
+        for part in sorted((_parts_dir(config) / name).glob("part-*.csv")):
+            with open(part, "rb") as f:
+                shutil.copyfileobj(f, out, length=16 << 20)
+    os.replace(staging, target)
+
+
+def generate(config: GeneratorConfig) -> Dict[str, int]:
+    """Generate every table and assemble the outputs; returns row counts per table"""
+    output_dir = Path(config.output_dir)
+    shutil.rmtree(_parts_dir(config), ignore_errors=True)
+    for name in TABLE_PATHS:
+        shutil.rmtree(output_dir / "parquet" / name, ignore_errors=True)
+
+    reference_tables, config.references = generate_reference_tables(config)
+    rows = {name: 0 for name in TABLE_PATHS}
+    for name, table in reference_tables.items():
+        _write_part(config, name, table, 0)
+        rows[name] = table.num_rows
+
+    with Pool(processes=min(config.workers, config.shards)) as pool:
+        # Pass 1: row counts of every shard give the global id offsets
+        totals = pool.map(_shard_totals, [(config, shard) for shard in range(config.shards)])
+        offsets = {name: np.concatenate([[0], np.cumsum([t[name] for t in totals])]) for name in NUMBERED_TABLES}
+        widths = {name: max(3, len(str(int(offsets[name][-1])))) for name in NUMBERED_TABLES}
+        plans = [ShardPlan(shard, {name: int(offsets[name][shard]) for name in NUMBERED_TABLES}, widths)
+                 for shard in range(config.shards)]
+
+        # Pass 2: generate and write the shards, at most one per worker in memory
+        regional = np.zeros((2, len(REGIONS) * HISTORY_DAYS))
+        started = time.perf_counter()
+        for done, (counts, partials) in enumerate(
+                pool.imap_unordered(_write_shard, [(config, plan) for plan in plans]), 1):
+            for name, count in counts.items():
+                rows[name] += count
+            regional += partials
+            print(f"   shard {done}/{config.shards} done, {rows['transactions']:,} transactions "
+                  f"in {time.perf_counter() - started:.1f}s")
+
+    regional_sales = build_regional_sales(regional)
+    _write_part(config, "regional_sales", regional_sales, 0)
+    rows["regional_sales"] = regional_sales.num_rows
+
+    if "csv" in config.formats:
+        for name in TABLE_PATHS:
+            _assemble_csv(config, name)
+        shutil.rmtree(_parts_dir(config), ignore_errors=True)
+    return rows
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    defaults = GeneratorConfig()
+    parser = argparse.ArgumentParser(description="Generate C360 mock data at scale")
+    parser.add_argument("--customers", type=int, default=defaults.customers)
+    parser.add_argument("--transactions-per-customer", type=float, default=defaults.transactions_per_customer)
+    parser.add_argument("--items-per-transaction", type=float, default=defaults.items_per_transaction)
+    parser.add_argument("--tickets-per-customer", type=float, default=defaults.tickets_per_customer)
+    parser.add_argument("--sessions-per-customer", type=float, default=defaults.sessions_per_customer)
+    parser.add_argument("--app-adoption", type=float, default=defaults.app_adoption,
+                        help="Share of customers using the app")
+    parser.add_argument("--products", type=int, default=defaults.products)
+    parser.add_argument("--suppliers", type=int, default=defaults.suppliers)
+    parser.add_argument("--warehouses", type=int, default=defaults.warehouses)
+    parser.add_argument("--stores", type=int, default=defaults.stores)
+    parser.add_argument("--spend-alpha", type=float, default=defaults.spend_alpha,
+                        help="Pareto tail index of purchase frequency (> 1, lower is more skewed)")
+    parser.add_argument("--product-skew", type=float, default=defaults.product_skew,
+                        help="Zipf exponent of product popularity (0 is uniform)")
+    parser.add_argument("--shard-size", type=int, default=defaults.shard_size, help="Customers generated per shard")
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--workers", type=int, default=defaults.workers)
+    parser.add_argument("--output-dir", type=Path, default=DEFAULT_OUTPUT_DIR)
+    parser.add_argument("--formats", nargs="+", choices=["csv", "parquet"], default=["csv", "parquet"])
+    args = parser.parse_args(argv)
+    if args.spend_alpha <= 1:
+        parser.error("--spend-alpha must be greater than 1")
+    if args.warehouses < 1 or args.stores < 1:
+        parser.error("--warehouses and --stores must be at least 1")
+
+    config = GeneratorConfig(
+        customers=args.customers,
+        transactions_per_customer=args.transactions_per_customer,
+        items_per_transaction=args.items_per_transaction,
+        tickets_per_customer=args.tickets_per_customer,
+        sessions_per_customer=args.sessions_per_customer,
+        app_adoption=args.app_adoption,
+        products=args.products,
+        suppliers=args.suppliers,
+        warehouses=args.warehouses,
+        stores=args.stores,
+        spend_alpha=args.spend_alpha,
+        product_skew=args.product_skew,
+        shard_size=args.shard_size,
+        seed=args.seed,
+        output_dir=args.output_dir,
+        formats=tuple(args.formats),
+        workers=args.workers,
+    )
+    started = time.perf_counter()
+    print(f"Generating {config.customers:,} customers in {config.shards} shards "
+          f"with {config.workers} workers into {config.output_dir}")
+    rows = generate(config)
+    for name, count in rows.items():
+        print(f"   ✓ {name}: {count:,} rows")
+    print(f"Mock data generated in {time.perf_counter() - started:.1f}s")
+    return 0
+
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
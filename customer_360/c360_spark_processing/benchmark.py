@@ -0,0 +1,465 @@
+#!/usr/bin/env python3
+"""
+Customer Analytics C360 - End-to-End Benchmark
+Measures how refresh time and API latency grow with the data size. For each
+scale it generates the mock data, runs the pipeline (ingest, SQL steps,
+export), starts the API on that data and drives its endpoints with concurrent
+clients. Stage times, peak memory and p50/p99 latencies are written to a
+versioned JSON file per run, so runs can be compared over time.
+
+Usage: python benchmark.py [--scales 10k 100k 1m 10m] [--clients 8] [--results-dir benchmarks]
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+
+import requests
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+API_DIR = SCRIPT_DIR.parent / "c360_api"
+GENERATOR = SCRIPT_DIR.parent / "c360_dashboard" / "src" / "c360_dashboard" / "generate_mock_data.py"
+DEFAULT_RESULTS_DIR = SCRIPT_DIR / "benchmarks"
+DEFAULT_WORK_DIR = SCRIPT_DIR / "data" / "benchmark"
+
+# Bumped whenever the layout of the result file changes
+RESULT_SCHEMA_VERSION = 1
+DEFAULT_SCALES = ["10k", "100k", "1m", "10m"]
+
+# Read endpoints driven by the clients; {customer_id} is a generated customer
+API_ENDPOINTS = [
+    "/marketing/customer-health-overview",
+    "/marketing/churn-risk-customers?min_lifetime_value=1000&limit=50",
+    "/marketing/loyalty-program-metrics",
+    "/marketing/customer-segmentation",
+    "/product/digital-engagement-analysis",
+    "/product/cross-sell-opportunities?limit=50",
+    "/finance/customer-lifetime-value",
+    "/finance/revenue-analysis",
+    "/finance/rfm-segmentation",
+    "/customer-success/support-insights",
+    "/customer-success/lifecycle-analysis",
+    "/analytics/customer-profiles?limit=100",
+    "/analytics/distributions/lifetime_value?segment_by=loyalty_tier",
+    "/analytics/distinct-counts",
+    "/customers/{customer_id}/similar?k=20",
+]
+
+
+def parse_scale(value: str) -> int:
+    """Number of customers of a scale such as 10k, 1m or 250000"""
+    multipliers = {"k": 1_000, "m": 1_000_000}
+    value = value.strip().lower()
+    if value and value[-1] in multipliers:
+        return int(float(value[:-1]) * multipliers[value[-1]])
+    return int(value)
+
+
+def percentile(sorted_values: List[float], q: float) -> Optional[float]:
+    """Linearly interpolated percentile (q in 0..100) of already sorted values"""
+    if not sorted_values:
+        return None
+    rank = (len(sorted_values) - 1) * q / 100
+    low = int(rank)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (rank - low)
+
+
+class PeakMemorySampler:
+    """
+    Samples the resident memory of a process and all its descendants
+
+    The pipeline's memory lives mostly in the JVM started by PySpark or
+    spark-sql, a grandchild of the measured process, so the whole process
+    tree is summed rather than reading the rusage of the direct child.
+    Reads /proc; elsewhere the peak is reported as None.
+    """
+
+    def __init__(self, pid: int, interval: float = 0.2):
+        self.pid = pid
+        self.interval = interval
+        self.peak_bytes: Optional[int] = None
+        self._page_size = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _tree_rss(self) -> int:
+        parents: Dict[int, int] = {}
+        rss: Dict[int, int] = {}
+        for stat_path in Path("/proc").glob("[0-9]*/stat"):
+            try:
+                # Fields after the parenthesized command name: state, ppid, ... rss is the 22nd
+                fields = stat_path.read_text().rsplit(")", 1)[1].split()
+            except (OSError, IndexError):
+                continue
+            pid = int(stat_path.parent.name)
+            parents[pid] = int(fields[1])
+            rss[pid] = int(fields[21]) * self._page_size
+        tree = {self.pid}
+        grew = True
+        while grew:
+            children = {pid for pid, ppid in parents.items() if ppid in tree} - tree
+            tree |= children
+            grew = bool(children)
+        return sum(rss.get(pid, 0) for pid in tree)
+
+    def _run(self):
+        while not self._stop.is_set():
+            current = self._tree_rss()
+            self.peak_bytes = max(self.peak_bytes or 0, current)
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        if Path("/proc/self/stat").exists():
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+
+def run_measured(name: str, command: List[str], log_path: Path, cwd: Path = SCRIPT_DIR,
+                 env: Optional[Dict[str, str]] = None, timeout: Optional[float] = None) -> Dict[str, Any]:
+    """Run one stage as a subprocess, measuring wall time and peak memory"""
+    log_path.parent.mkdir(parents=True, exist_ok=True)
+    started = time.perf_counter()
+    with open(log_path, "w") as log:
+        process = subprocess.Popen(command, cwd=cwd, env=env, stdout=log, stderr=subprocess.STDOUT)
+        with PeakMemorySampler(process.pid) as sampler:
+            try:
+                returncode = process.wait(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                returncode = process.wait()
+    result = {
+        "status": "success" if returncode == 0 else "failed",
+        "seconds": round(time.perf_counter() - started, 3),
+        "peak_rss_bytes": sampler.peak_bytes,
+        "log": str(log_path),
+    }
+    print(f"   {'✓' if returncode == 0 else '❌'} {name}: {result['seconds']}s, "
+          f"peak {_format_bytes(result['peak_rss_bytes'])}")
+    return result
+
+
+def _format_bytes(value: Optional[int]) -> str:
+    return "n/a" if value is None else f"{value / (1 << 20):,.0f} MB"
+
+
+def _first_customer_id(data_dir: Path) -> str:
+    with open(data_dir / "customer" / "customers.csv") as f:
+        f.readline()
+        return f.readline().split(",", 1)[0]
+
+
+class ApiLoadDriver:
+    """
+    Drives the API endpoints with concurrent clients
+
+    Each endpoint is first requested once, which measures its cold latency
+    (the first request of a snapshot runs the underlying query). Clients
+    then cycle through the endpoints, each starting at a different one.
+    """
+
+    def __init__(self, base_url: str, endpoints: List[str], clients: int = 8,
+                 requests_per_client: int = 50, timeout: float = 600):
+        self.base_url = base_url.rstrip("/")
+        self.endpoints = endpoints
+        self.clients = clients
+        self.requests_per_client = requests_per_client
+        self.timeout = timeout
+
+    def _request(self, session: requests.Session, endpoint: str) -> tuple:
+        started = time.perf_counter()
+        try:
+            ok = session.get(f"{self.base_url}{endpoint}", timeout=self.timeout).status_code == 200
+        except requests.exceptions.RequestException:
+            ok = False
+        return endpoint, (time.perf_counter() - started) * 1000, ok
+
+    def _client(self, client: int) -> List[tuple]:
+        with requests.Session() as session:
+            return [self._request(session, self.endpoints[(client + i) % len(self.endpoints)])
+                    for i in range(self.requests_per_client)]
+
+    def run(self) -> Dict[str, Any]:
+        with requests.Session() as session:
+            cold = {endpoint: self._request(session, endpoint) for endpoint in self.endpoints}
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.clients) as executor:
+            samples = [s for client in executor.map(self._client, range(self.clients)) for s in client]
+        elapsed = time.perf_counter() - started
+
+        latencies = sorted(latency for _, latency, ok in samples if ok)
+        endpoints = {}
+        for endpoint in self.endpoints:
+            own = sorted(latency for name, latency, ok in samples if name == endpoint and ok)
+            endpoints[endpoint] = {
+                "cold_ms": round(cold[endpoint][1], 1),
+                "cold_ok": cold[endpoint][2],
+                "p50_ms": _round(percentile(own, 50)),
+                "p99_ms": _round(percentile(own, 99)),
+                "errors": sum(1 for name, _, ok in samples if name == endpoint and not ok),
+            }
+        return {
+            "clients": self.clients,
+            "requests": len(samples),
+            "errors": sum(1 for _, _, ok in samples if not ok),
+            "seconds": round(elapsed, 3),
+            "throughput_rps": round(len(samples) / elapsed, 1) if elapsed else None,
+            "latency_ms": {
+                "p50": _round(percentile(latencies, 50)),
+                "p95": _round(percentile(latencies, 95)),
+                "p99": _round(percentile(latencies, 99)),
+                "max": _round(latencies[-1] if latencies else None),
+            },
+            "endpoints": endpoints,
+        }
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return None if value is None else round(value, 1)
+
+
+class C360Benchmark:
+    """Runs every stage at each scale and collects the measurements"""
+
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.run_id = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.work_dir = args.work_dir.resolve() / self.run_id
+
+    def _generate(self, customers: int, data_dir: Path, logs: Path) -> Dict[str, Any]:
+        return run_measured("generate", [
+            sys.executable, str(GENERATOR),
+            "--customers", str(customers),
+            "--transactions-per-customer", str(self.args.transactions_per_customer),
+            "--workers", str(self.args.workers),
+            "--formats", "csv",
+            "--output-dir", str(data_dir),
+        ], logs / "generate.log")
+
+    def _ingest(self, data_dir: Path, logs: Path) -> Dict[str, Any]:
+        """Forced, so identical data regenerated at the same scale is still converted"""
+        return run_measured("ingest", [
+            sys.executable, "ingest.py", "--data-dir", str(data_dir), "--force",
+        ], logs / "ingest.log")
+
+    def _pipeline(self, scale_dir: Path, logs: Path) -> Dict[str, Any]:
+        """SQL steps and export in one runner process; per-step times come from its report"""
+        report_dir = scale_dir / "reports"
+        runner = ["dag_runner.py", "--max-parallel", str(self.args.max_parallel)] \
+            if self.args.runner == "dag" else ["pipeline_runner.py"]
+        result = run_measured("pipeline", [
+            sys.executable, *runner,
+            "--skip-ingest",
+            "--report-dir", str(report_dir),
+            "--export-parquet", str(scale_dir / "export" / "customer_analytics_c360.parquet"),
+        ], logs / "pipeline.log")
+        reports = sorted(report_dir.glob("pipeline_run_*.json"))
+        if not reports:
+            return result
+        with open(reports[-1]) as f:
+            report = json.load(f)
+        result["report"] = str(reports[-1])
+        result["stages"] = {
+            "sql_seconds": report["total_seconds"],
+            "export_seconds": (report.get("export") or {}).get("seconds"),
+        }
+        result["steps"] = [{"index": s["index"], "name": s["name"], "kind": s["kind"],
+                            "wall_seconds": s["wall_seconds"], "output_rows": s["output_rows"]}
+                           for s in report["steps"]]
+        return result
+
+    def _api(self, data_dir: Path, logs: Path) -> Dict[str, Any]:
+        """Start the API on the scale's data, wait until it serves, then drive it"""
+        base_url = f"http://127.0.0.1:{self.args.api_port}"
+        env = dict(os.environ, C360_DATA_PATH=str(data_dir), PIPELINE_PATH=str(SCRIPT_DIR))
+        started = time.perf_counter()
+        with open(logs / "api.log", "w") as log:
+            server = subprocess.Popen(
+                [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1",
+                 "--port", str(self.args.api_port), "--log-level", "warning"],
+                cwd=API_DIR, env=env, stdout=log, stderr=subprocess.STDOUT)
+            try:
+                with PeakMemorySampler(server.pid) as sampler:
+                    # Startup runs the pipeline and /health queries the data product
+                    load_seconds = self._wait_until_healthy(base_url, server)
+                    result = {"status": "failed", "serving_load_seconds": load_seconds}
+                    print(f"   {'✓' if load_seconds is not None else '❌'} serving store load: {load_seconds}s")
+                    if load_seconds is not None:
+                        customer_id = _first_customer_id(data_dir)
+                        endpoints = [e.format(customer_id=customer_id) for e in API_ENDPOINTS]
+                        result.update(ApiLoadDriver(base_url, endpoints, self.args.clients,
+                                                    self.args.requests_per_client).run())
+                        # Failed requests are counted, not fatal: the latencies are still measured
+                        result["status"] = "success"
+            finally:
+                server.terminate()
+                try:
+                    server.wait(timeout=60)
+                except subprocess.TimeoutExpired:
+                    server.kill()
+        result["peak_rss_bytes"] = sampler.peak_bytes
+        result["total_seconds"] = round(time.perf_counter() - started, 3)
+        result["log"] = str(logs / "api.log")
+        if "latency_ms" in result:
+            latency = result["latency_ms"]
+            print(f"   {'✓' if result['errors'] == 0 else '⚠️'} api: {result['requests']} requests, "
+                  f"p50 {latency['p50']}ms, p99 {latency['p99']}ms, {result['errors']} errors, "
+                  f"peak {_format_bytes(result['peak_rss_bytes'])}")
+        return result
+
+    def _wait_until_healthy(self, base_url: str, server: subprocess.Popen) -> Optional[float]:
+        """Seconds until /health succeeds; None if the API exits, times out or reports unhealthy"""
+        started = time.perf_counter()
+        deadline = started + self.args.api_startup_timeout
+        while time.perf_counter() < deadline and server.poll() is None:
+            try:
+                response = requests.get(f"{base_url}/health", timeout=self.args.api_startup_timeout)
+            except requests.exceptions.RequestException:
+                # Not accepting connections until the startup pipeline run is over
+                time.sleep(1)
+                continue
+            return round(time.perf_counter() - started, 3) if response.status_code == 200 else None
+        return None
+
+    def run_scale(self, name: str, customers: int) -> Dict[str, Any]:
+        print(f"📏 Scale {name}: {customers:,} customers")
+        scale_dir = self.work_dir / name
+        data_dir = scale_dir / "data"
+        logs = scale_dir / "logs"
+        result: Dict[str, Any] = {"scale": name, "customers": customers, "status": "success", "stages": {}}
+        stages = [("generate", lambda: self._generate(customers, data_dir, logs)),
+                  ("ingest", lambda: self._ingest(data_dir, logs)),
+                  ("pipeline", lambda: self._pipeline(scale_dir, logs))]
+        if not self.args.skip_api:
+            stages.append(("api", lambda: self._api(data_dir, logs)))
+        try:
+            for stage, run in stages:
+                result["stages"][stage] = run()
+                if result["stages"][stage]["status"] != "success":
+                    result["status"] = "failed"
+                    break
+        finally:
+            if not self.args.keep_data:
+                shutil.rmtree(data_dir, ignore_errors=True)
+        return result
+
+    def run(self) -> Dict[str, Any]:
+        started_at = datetime.now()
+        scales = []
+        for name in self.args.scales:
+            scale = self.run_scale(name, parse_scale(name))
+            scales.append(scale)
+            if scale["status"] != "success":
+                # Larger scales need more of whatever just ran out
+                print(f"❌ Scale {name} failed, skipping larger scales")
+                break
+        return {
+            "schema_version": RESULT_SCHEMA_VERSION,
+            "run_id": self.run_id,
+            "started_at": started_at.isoformat(),
+            "finished_at": datetime.now().isoformat(),
+            "git": _git_revision(),
+            "host": _host_info(),
+            "parameters": {
+                "scales": self.args.scales,
+                "transactions_per_customer": self.args.transactions_per_customer,
+                "runner": self.args.runner,
+                "max_parallel": self.args.max_parallel if self.args.runner == "dag" else None,
+                "clients": None if self.args.skip_api else self.args.clients,
+                "requests_per_client": None if self.args.skip_api else self.args.requests_per_client,
+            },
+            "status": "success" if all(s["status"] == "success" for s in scales)
+            and len(scales) == len(self.args.scales) else "failed",
+            "scales": scales,
+        }
+
+
+def _git_revision() -> Dict[str, Any]:
+    """Commit the benchmark ran against, so results map to code versions"""
+    def git(*command):
+        return subprocess.run(["git", *command], cwd=SCRIPT_DIR, capture_output=True, text=True).stdout.strip()
+    try:
+        return {"commit": git("rev-parse", "HEAD") or None, "dirty": bool(git("status", "--porcelain", "."))}
+    except OSError:
+        return {"commit": None, "dirty": None}
+
+
+def _host_info() -> Dict[str, Any]:
+    memory = None
+    try:
+        with open("/proc/meminfo") as f:
+            memory = int(f.readline().split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        from pyspark import __version__ as spark_version
+    except ImportError:
+        spark_version = None
+    return {
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "spark": spark_version,
+        "cpus": os.cpu_count(),
+        "memory_bytes": memory,
+    }
+
+
+def write_results(results: Dict[str, Any], results_dir: Path) -> Path:
+    results_dir.mkdir(parents=True, exist_ok=True)
+    results_path = results_dir / f"c360_benchmark_{results['run_id']}.json"
+    with open(results_path, "w") as f:
+        json.dump(results, f, indent=2)
+    return results_path
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the C360 pipeline and API at several data sizes")
+    parser.add_argument("--scales", nargs="+", default=DEFAULT_SCALES,
+                        help="Customer counts to run, smallest first (e.g. 10k 100k 1m)")
+    parser.add_argument("--transactions-per-customer", type=float, default=10)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Data generator processes")
+    parser.add_argument("--runner", choices=["sequential", "dag"], default="sequential",
+                        help="Pipeline runner: pipeline_runner.py or dag_runner.py")
+    parser.add_argument("--max-parallel", type=int, default=4, help="Parallel steps of the DAG runner")
+    parser.add_argument("--clients", type=int, default=8, help="Concurrent API clients")
+    parser.add_argument("--requests-per-client", type=int, default=50)
+    parser.add_argument("--api-port", type=int, default=8765)
+    parser.add_argument("--api-startup-timeout", type=float, default=3600,
+                        help="Seconds to wait for the API to load the data and report healthy")
+    parser.add_argument("--skip-api", action="store_true", help="Only benchmark data generation and the pipeline")
+    parser.add_argument("--work-dir", type=Path, default=DEFAULT_WORK_DIR, help="Generated data and run logs")
+    parser.add_argument("--keep-data", action="store_true", help="Keep the generated data of each scale")
+    parser.add_argument("--results-dir", type=Path, default=DEFAULT_RESULTS_DIR,
+                        help="Directory of the versioned JSON results")
+    args = parser.parse_args(argv)
+    try:
+        args.scales = sorted(args.scales, key=parse_scale)
+    except ValueError as e:
+        parser.error(f"invalid scale: {e}")
+
+    print(f"🚀 C360 benchmark at scales {', '.join(args.scales)}")
+    results = C360Benchmark(args).run()
+    results_path = write_results(results, args.results_dir.resolve())
+    print(f"{'✅' if results['status'] == 'success' else '❌'} Benchmark {results['status']}, "
+          f"results: {results_path}")
+    return 0 if results["status"] == "success" else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,72 +1,60 @@
 -- Customer Analytics C360 Data Product - Consolidated Pipeline
 -- Description: Complete pipeline running in a single Spark session
--- Usage: spark-sql -f c360_consolidated_pipeline.sql
+-- Usage: python ingest.py && spark-sql -f c360_consolidated_pipeline.sql
 
 -- =============================================================================
--- STEP 1: CREATE RAW DATA VIEWS (CSV LOADING)
+-- STEP 1: CREATE RAW DATA VIEWS (PARQUET LOADING)
 -- =============================================================================
+-- ingest.py converts the CSV files of ../c360_mock_data to typed Parquet
+-- (schemas in source_schemas.py) and reruns only when a source file changes
 
 -- Customer raw data
 CREATE OR REPLACE TEMPORARY VIEW customers_raw
-USING CSV
+USING PARQUET
 OPTIONS (
-  path "../c360_mock_data/customer/customers.csv",
-  header "true",
-  inferSchema "true"
+  path "data/parquet/customers"
 );
 
 -- Loyalty program raw data
 CREATE OR REPLACE TEMPORARY VIEW loyalty_program_raw
-USING CSV
+USING PARQUET
 OPTIONS (
-  path "../c360_mock_data/customer/loyalty_program.csv",
-  header "true",
-  inferSchema "true"
+  path "data/parquet/loyalty_program"
 );
 
 -- Transaction raw data
 CREATE OR REPLACE TEMPORARY VIEW transactions_raw
-USING CSV
+USING PARQUET
 OPTIONS (
-  path "../c360_mock_data/sales/transactions.csv",
-  header "true",
-  inferSchema "true"
+  path "data/parquet/transactions"
 );
 
 -- Transaction items raw data
 CREATE OR REPLACE TEMPORARY VIEW transaction_items_raw
-USING CSV
+USING PARQUET
 OPTIONS (
-  path "../c360_mock_data/sales/transaction_items.csv",
-  header "true",
-  inferSchema "true"
+  path "data/parquet/transaction_items"
 );
 
 -- Products raw data
 CREATE OR REPLACE TEMPORARY VIEW products_raw
-USING CSV
+USING PARQUET
 OPTIONS (
-  path "../c360_mock_data/products/products.csv",
-  header "true",
-  inferSchema "true"
+  path "data/parquet/products"
 );
 
 -- Support tickets raw data
 CREATE OR REPLACE TEMPORARY VIEW support_tickets_raw
-USING CSV
+USING PARQUET
 OPTIONS (
-  path "../c360_mock_data/customer/support_tickets.csv",
-  header "true",
-  inferSchema "true"
+  path "data/parquet/support_tickets"
 );
 
 -- App usage raw data
 CREATE OR REPLACE TEMPORARY VIEW app_usage_raw
-USING CSV
+USING PARQUET
 OPTIONS (
-  path "../c360_mock_data/customer/app_usage.csv",
-  header "true",
-  inferSchema "true"
+  path "data/parquet/app_usage"
 );
 
 -- =============================================================================
@@ -304,62 +292,63 @@ SELECT
 FROM src_customers c
 INNER JOIN transaction_summary ts ON c.customer_id = ts.customer_id;
 
+-- Per-customer transaction totals, recency and 90-day activity
+-- (pipeline_runner.py --incremental builds this view from Parquet state)
+CREATE OR REPLACE TEMPORARY VIEW int_customer_transactions_summary AS
+SELECT 
+    customer_id,
+    COUNT(DISTINCT transaction_id) as total_transactions,
+    SUM(total_amount) as total_spent,
+    AVG(total_amount) as avg_order_value,
+    MIN(transaction_date) as first_purchase_date,
+    MAX(transaction_date) as last_purchase_date,
+    COUNT(DISTINCT channel) as channels_used,
+    COUNT(DISTINCT DATE(transaction_date)) as shopping_days,
+    SUM(CASE WHEN used_preferred_channel = 1 THEN 1 ELSE 0 END) as preferred_channel_usage,
+    -- Category and brand diversity
+    AVG(unique_categories) as avg_categories_per_order,
+    AVG(unique_brands) as avg_brands_per_order,
+    SUM(items_purchased) as total_items_purchased,
+    -- Recent activity (last 90 days)
+    COUNT(CASE WHEN DATEDIFF(CURRENT_DATE(), DATE(transaction_date)) <= 90 THEN 1 END) as transactions_last_90d,
+    SUM(CASE WHEN DATEDIFF(CURRENT_DATE(), DATE(transaction_date)) <= 90 THEN total_amount ELSE 0 END) as spent_last_90d
+FROM int_customer_transactions
+GROUP BY customer_id;
+
+-- Per-customer support summary
+CREATE OR REPLACE TEMPORARY VIEW int_customer_support_summary AS
+SELECT 
+    customer_id,
+    COUNT(*) as total_tickets,
+    COUNT(CASE WHEN status = 'resolved' THEN 1 END) as resolved_tickets,
+    AVG(CASE WHEN satisfaction_score IS NOT NULL THEN satisfaction_score END) as avg_satisfaction,
+    MAX(CAST(created_date AS TIMESTAMP)) as last_ticket_date,
+    COUNT(CASE WHEN priority = 'urgent' THEN 1 END) as urgent_tickets
+FROM support_tickets_raw
+GROUP BY customer_id;
+
+-- Per-customer app usage summary (streaming_profile.py keeps the same columns in streaming state)
+CREATE OR REPLACE TEMPORARY VIEW int_customer_app_usage_summary AS
+SELECT 
+    customer_id,
+    COUNT(*) as total_sessions,
+    SUM(session_duration_minutes) as total_session_minutes,
+    AVG(session_duration_minutes) as avg_session_duration,
+    SUM(pages_viewed) as total_pages_viewed,
+    SUM(actions_taken) as total_actions_taken,
+    MAX(CAST(session_date AS DATE)) as last_app_use_date,
+    COUNT(DISTINCT device_type) as unique_device_types,
+    -- Engagement score based on activity
+    (SUM(session_duration_minutes) * 0.3 + SUM(pages_viewed) * 0.4 + SUM(actions_taken) * 0.3) as engagement_score
+FROM app_usage_raw
+GROUP BY customer_id;
+
 -- =============================================================================
 -- STEP 4: CREATE FACT TABLE
 -- =============================================================================
 
 -- Customer 360 Profile Fact Table
 CREATE OR REPLACE TEMPORARY VIEW fct_customer_360_profile AS
-WITH support_summary AS (
-    SELECT 
-        customer_id,
-        COUNT(*) as total_tickets,
-        COUNT(CASE WHEN status = 'resolved' THEN 1 END) as resolved_tickets,
-        AVG(CASE WHEN satisfaction_score IS NOT NULL THEN satisfaction_score END) as avg_satisfaction,
-        MAX(CAST(created_date AS TIMESTAMP)) as last_ticket_date,
-        COUNT(CASE WHEN priority = 'urgent' THEN 1 END) as urgent_tickets
-    FROM support_tickets_raw
-    GROUP BY customer_id
-),
-
-app_usage_summary AS (
-    SELECT 
-        customer_id,
-        COUNT(*) as total_sessions,
-        SUM(session_duration_minutes) as total_session_minutes,
-        AVG(session_duration_minutes) as avg_session_duration,
-        SUM(pages_viewed) as total_pages_viewed,
-        SUM(actions_taken) as total_actions_taken,
-        MAX(CAST(session_date AS DATE)) as last_app_use_date,
-        COUNT(DISTINCT device_type) as unique_device_types,
-        -- Engagement score based on activity
-        (SUM(session_duration_minutes) * 0.3 + SUM(pages_viewed) * 0.4 + SUM(actions_taken) * 0.3) as engagement_score
-    FROM app_usage_raw
-    GROUP BY customer_id
-),
-
-transaction_metrics AS (
-    SELECT 
-        customer_id,
-        COUNT(DISTINCT transaction_id) as total_transactions,
-        SUM(total_amount) as total_spent,
-        AVG(total_amount) as avg_order_value,
-        MIN(transaction_date) as first_purchase_date,
-        MAX(transaction_date) as last_purchase_date,
-        COUNT(DISTINCT channel) as channels_used,
-        COUNT(DISTINCT DATE(transaction_date)) as shopping_days,
-        SUM(CASE WHEN used_preferred_channel = 1 THEN 1 ELSE 0 END) as preferred_channel_usage,
-        -- Category and brand diversity
-        AVG(unique_categories) as avg_categories_per_order,
-        AVG(unique_brands) as avg_brands_per_order,
-        SUM(items_purchased) as total_items_purchased,
-        -- Recent activity (last 90 days)
-        COUNT(CASE WHEN DATEDIFF(CURRENT_DATE(), DATE(transaction_date)) <= 90 THEN 1 END) as transactions_last_90d,
-        SUM(CASE WHEN DATEDIFF(CURRENT_DATE(), DATE(transaction_date)) <= 90 THEN total_amount ELSE 0 END) as spent_last_90d
-    FROM int_customer_transactions
-    GROUP BY customer_id
-)
-
 SELECT 
     -- Customer identifiers and demographics
     c.customer_id,
@@ -453,9 +442,9 @@ SELECT
 
 FROM src_customers c
 LEFT JOIN src_loyalty_program lp ON c.customer_id = lp.customer_id
-LEFT JOIN transaction_metrics tm ON c.customer_id = tm.customer_id  
-LEFT JOIN support_summary ss ON c.customer_id = ss.customer_id
-LEFT JOIN app_usage_summary aus ON c.customer_id = aus.customer_id;
+LEFT JOIN int_customer_transactions_summary tm ON c.customer_id = tm.customer_id  
+LEFT JOIN int_customer_support_summary ss ON c.customer_id = ss.customer_id
+LEFT JOIN int_customer_app_usage_summary aus ON c.customer_id = aus.customer_id;
 
 -- =============================================================================
 -- STEP 5: CREATE FINAL DATA PRODUCT VIEW
@@ -590,77 +579,6 @@ LIMIT 5;
 -- =============================================================================
 -- STEP 7: EXPORT RESULTS FOR DASHBOARD
 -- =============================================================================
-
--- Save the customer analytics view to a single CSV file for the dashboard
-CREATE OR REPLACE TEMPORARY VIEW customer_analytics_export AS
-SELECT * FROM customer_analytics_c360;
-
--- Drop existing export table if it exists
-DROP TABLE IF EXISTS customer_analytics_c360_export;
-
--- Create external table to control the output format
-CREATE EXTERNAL TABLE customer_analytics_c360_export (
-    -- Include all columns from the view
-    customer_id STRING,
-    first_name STRING,
-    last_name STRING,
-    email STRING,
-    customer_segment STRING,
-    preferred_channel STRING,
-    generation_segment STRING,
-    age_years DOUBLE,
-    city STRING,
-    state STRING,
-    country STRING,
-    days_since_registration INT,
-    customer_tenure_segment STRING,
-    loyalty_tier STRING,
-    points_balance INT,
-    lifetime_value DOUBLE,
-    value_segment STRING,
-    redemption_rate DOUBLE,
-    total_transactions INT,
-    total_spent DOUBLE,
-    avg_order_value DOUBLE,
-    first_purchase_date TIMESTAMP,
-    last_purchase_date TIMESTAMP,
-    channels_used INT,
-    shopping_days INT,
-    transactions_last_90d INT,
-    spent_last_90d DOUBLE,
-    customer_status STRING,
-    recency_score INT,
-    frequency_score INT,
-    monetary_score INT,
-    customer_health_score DOUBLE,
-    total_app_sessions INT,
-    total_session_minutes INT,
-    avg_session_duration DOUBLE,
-    app_engagement_score DOUBLE,
-    last_app_use_date DATE,
-    unique_device_types INT,
-    total_support_tickets INT,
-    resolved_support_tickets INT,
-    avg_satisfaction DOUBLE,
-    last_ticket_date TIMESTAMP,
-    urgent_support_tickets INT,
-    support_satisfaction_level STRING,
-    is_app_user INT,
-    is_digital_native INT,
-    has_urgent_issues INT,
-    churn_risk_flag INT,
-    satisfaction_risk_flag INT,
-    channel_expansion_opportunity INT,
-    tier_upgrade_opportunity INT,
-    app_adoption_opportunity INT,
-    profile_created_at TIMESTAMP,
-    view_accessed_at TIMESTAMP
-)
-ROW FORMAT DELIMITED
-FIELDS TERMINATED BY ','
-STORED AS TEXTFILE
-LOCATION '/Users/jerome/Documents/Code/flink_project_demos/c360_dashboard/data/export';
-
--- Export the data
-INSERT OVERWRITE TABLE customer_analytics_c360_export
-SELECT * FROM customer_analytics_export;
\ No newline at end of file
+-- The export is not part of this script: pipeline_runner.py (or run_pipeline.sh)
+-- writes customer_analytics_c360 to one Parquet file and, optionally, one CSV
+-- file for the dashboard, each renamed into place once complete (export.py)
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+Customer Analytics C360 - DAG Pipeline Runner
+Runs the modular SQL files (sources, dimensions, intermediates, facts, views)
+as a dependency graph inferred from the relations each statement creates and
+reads. Independent steps run concurrently in one SparkSession, each file in
+its own FAIR scheduler pool, so the critical path sets the total runtime.
+
+Usage: python dag_runner.py [--max-parallel 4] [--report-dir reports] [--dry-run]
+       [--cache-level NONE|MEMORY_AND_DISK|...]
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Set
+
+from export import add_export_arguments
+from incremental import add_incremental_arguments, incremental_view_builders
+from sql_script import SqlStatement, parse_file
+from view_cache import add_cache_arguments
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+DEFAULT_REPORT_DIR = SCRIPT_DIR / "reports"
+
+# Discovery order of the layer directories, same as run_c360_pipeline.sh
+LAYERS = ["sources", "dimensions", "intermediates", "facts", "views"]
+
+
+@dataclass
+class DagNode:
+    """A statement of the graph and the statements it must wait for"""
+    statement: SqlStatement
+    layer: str
+    pool: str
+    depends_on: Set[int] = field(default_factory=set)
+
+    @property
+    def index(self) -> int:
+        return self.statement.index
+
+
+def discover_statements(root: Path = SCRIPT_DIR) -> List[tuple]:
+    """(layer, statement) pairs of every SQL file under the layer directories"""
+    discovered = []
+    for layer in LAYERS:
+        layer_dir = Path(root) / layer
+        if not layer_dir.is_dir():
+            continue
+        for sql_file in sorted(layer_dir.glob("*.sql")):
+            for statement in parse_file(sql_file, start_index=len(discovered) + 1):
+                discovered.append((layer, statement))
+    return discovered
+
+
+def build_dag(discovered: List[tuple]) -> Dict[int, DagNode]:
+    """
+    Resolve each reference to the statement that creates the relation
+
+    A reference resolves to the closest earlier statement targeting the
+    relation, or to a later one when the file defining it comes afterwards.
+    Statements targeting the same relation run in discovery order.
+    Relations nobody creates (catalog tables) add no edge.
+    """
+    nodes: Dict[int, DagNode] = {}
+    producers: Dict[str, List[int]] = {}
+    for layer, statement in discovered:
+        pool = Path(statement.origin).stem if statement.origin else layer
+        nodes[statement.index] = DagNode(statement, layer, pool)
+        if statement.target:
+            producers.setdefault(statement.target, []).append(statement.index)
+
+    for node in nodes.values():
+        statement = node.statement
+        if statement.target:
+            earlier = [i for i in producers[statement.target] if i < node.index]
+            if earlier:
+                node.depends_on.add(earlier[-1])
+        for name in statement.references:
+            candidates = producers.get(name)
+            if not candidates:
+                continue
+            earlier = [i for i in candidates if i < node.index]
+            node.depends_on.add(earlier[-1] if earlier else candidates[0])
+
+    topological_levels(nodes)  # raises on cycles
+    return nodes
+
+
+def topological_levels(nodes: Dict[int, DagNode]) -> List[List[int]]:
+    """Groups of statements whose dependencies are all in earlier groups"""
+    remaining = {index: set(node.depends_on) for index, node in nodes.items()}
+    levels = []
+    while remaining:
+        ready = sorted(index for index, deps in remaining.items() if not deps)
+        if not ready:
+            cycle = ", ".join(nodes[index].statement.label for index in sorted(remaining))
+            raise ValueError(f"Dependency cycle between: {cycle}")
+        levels.append(ready)
+        for index in ready:
+            del remaining[index]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+    return levels
+
+
+def critical_path(nodes: Dict[int, DagNode], durations: Dict[int, float]) -> List[int]:
+    """Longest chain of dependent steps by measured duration"""
+    finish: Dict[int, float] = {}
+    previous: Dict[int, Optional[int]] = {}
+    for level in topological_levels(nodes):
+        for index in level:
+            deps = [dep for dep in nodes[index].depends_on if dep in finish]
+            slowest = max(deps, key=lambda dep: finish[dep], default=None)
+            previous[index] = slowest
+            finish[index] = durations.get(index, 0.0) + (finish[slowest] if slowest is not None else 0.0)
+    if not finish:
+        return []
+    path = [max(finish, key=finish.get)]
+    while previous[path[-1]] is not None:
+        path.append(previous[path[-1]])
+    return path[::-1]
+
+
+class DagRunner:
+    """
+    Schedules the graph on a thread pool sharing one SparkSession
+
+    Each step is measured by PipelineRunner.run_statement; the scheduler
+    pool and job group are thread-local properties, so concurrent steps get
+    separate FAIR pools and separately attributed stage metrics.
+    """
+
+    def __init__(self, spark, nodes: Dict[int, DagNode], max_parallel: int = 4, count_rows: bool = True,
+                 view_builders: Optional[Dict[str, Any]] = None, view_cache: Optional[Any] = None):
+        from pipeline_runner import PipelineRunner
+
+        self.spark = spark
+        self.nodes = nodes
+        self.max_parallel = max_parallel
+        self.runner = PipelineRunner(spark, count_rows=count_rows, view_builders=view_builders,
+                                     view_cache=view_cache)
+        self.run_id = self.runner.run_id
+
+    def _run_node(self, node: DagNode, run_started: float) -> Dict[str, Any]:
+        self.spark.sparkContext.setLocalProperty("spark.scheduler.pool", node.pool)
+        started = time.perf_counter() - run_started
+        step = self.runner.run_statement(node.statement)
+        step.update({
+            "layer": node.layer,
+            "pool": node.pool,
+            "depends_on": sorted(node.depends_on),
+            "started_offset": round(started, 3),
+            "finished_offset": round(time.perf_counter() - run_started, 3),
+        })
+        return step
+
+    def run(self, stop_on_error: bool = True) -> Dict[str, Any]:
+        started_at = datetime.now()
+        run_started = time.perf_counter()
+        pending = {index: set(node.depends_on) for index, node in self.nodes.items()}
+        steps: Dict[int, Dict[str, Any]] = {}
+        failed = False
+
+        with ThreadPoolExecutor(max_workers=self.max_parallel, thread_name_prefix="c360-dag") as executor:
+            running = {}
+            while pending or running:
+                if not (failed and stop_on_error):
+                    for index in sorted(i for i, deps in pending.items() if not deps):
+                        del pending[index]
+                        running[executor.submit(self._run_node, self.nodes[index], run_started)] = index
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index = running.pop(future)
+                    step = steps[index] = future.result()
+                    print(f"  [{index:>2}] {self.nodes[index].statement.label:<40} {step['status']:<8} "
+                          f"{step['started_offset']:>7.3f}s → {step['finished_offset']:>7.3f}s  "
+                          f"pool={step['pool']}  rows={step['output_rows']}")
+                    if step["status"] == "failed":
+                        failed = True
+                        continue
+                    for deps in pending.values():
+                        deps.discard(index)
+        self.spark.sparkContext.setLocalProperty("spark.scheduler.pool", None)
+
+        # Steps never started: a dependency failed or the run stopped early
+        skipped = sorted(pending)
+        durations = {index: step["wall_seconds"] for index, step in steps.items()}
+        path = critical_path(self.nodes, durations)
+        ordered = [steps[index] for index in sorted(steps)]
+        return {
+            "run_id": self.run_id,
+            "mode": "dag",
+            "started_at": started_at.isoformat(),
+            "finished_at": datetime.now().isoformat(),
+            "total_seconds": round(time.perf_counter() - run_started, 3),
+            "spark_version": self.spark.version,
+            "max_parallel": self.max_parallel,
+            "status": "failed" if failed or skipped else "success",
+            "steps": ordered,
+            "skipped": [self.nodes[index].statement.label for index in skipped],
+            "critical_path": [self.nodes[index].statement.label for index in path],
+            "totals": {
+                "wall_seconds": round(sum(durations.values()), 3),
+                "critical_path_seconds": round(sum(durations.get(index, 0.0) for index in path), 3),
+                "shuffle_read_bytes": sum(s["shuffle_read_bytes"] for s in ordered),
+                "shuffle_write_bytes": sum(s["shuffle_write_bytes"] for s in ordered),
+            },
+        }
+
+
+def print_plan(nodes: Dict[int, DagNode]):
+    for depth, level in enumerate(topological_levels(nodes)):
+        print(f"  Level {depth}:")
+        for index in level:
+            node = nodes[index]
+            deps = ", ".join(nodes[dep].statement.label for dep in sorted(node.depends_on)) or "-"
+            print(f"    [{index:>2}] {node.statement.label:<40} pool={node.pool:<28} after: {deps}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run the modular C360 SQL files as a parallel DAG")
+    parser.add_argument("--root", type=Path, default=SCRIPT_DIR, help="Directory holding the layer folders")
+    parser.add_argument("--max-parallel", type=int, default=4, help="Maximum steps running at once")
+    parser.add_argument("--report-dir", type=Path, default=DEFAULT_REPORT_DIR, help="Directory of the JSON run reports")
+    parser.add_argument("--no-counts", action="store_true", help="Do not materialize views to count their rows")
+    parser.add_argument("--continue-on-error", action="store_true",
+                        help="Keep running the steps that do not depend on a failed one")
+    parser.add_argument("--skip-ingest", action="store_true", help="Do not refresh the Parquet sources first")
+    parser.add_argument("--data-dir", type=Path, help="Mock CSV data directory to ingest (default: ../c360_mock_data)")
+    parser.add_argument("--dry-run", action="store_true", help="Print the inferred graph without running it")
+    add_incremental_arguments(parser)
+    add_export_arguments(parser)
+    add_cache_arguments(parser)
+    args = parser.parse_args(argv)
+
+    root = args.root.resolve()
+    report_dir = args.report_dir.resolve()
+    nodes = build_dag(discover_statements(root))
+    print(f"🚀 DAG of {len(nodes)} statements from {root}")
+    print_plan(nodes)
+    if args.dry_run:
+        return 0
+
+    from ingest import ParquetIngest, DEFAULT_DATA_DIR
+    from pipeline_runner import (create_spark_session, run_export, write_report, create_view_cache,
+                                 finish_view_cache, report_cache_saving)
+
+    data_dir = (args.data_dir or DEFAULT_DATA_DIR).resolve()
+    args.export_parquet = args.export_parquet.resolve()
+    args.export_csv = args.export_csv.resolve() if args.export_csv else None
+    # Relative data paths in the scripts are relative to the layer root
+    os.chdir(root)
+    spark = create_spark_session("C360_DAG_Runner", {"spark.scheduler.mode": "FAIR"})
+    try:
+        ingested = []
+        if not args.skip_ingest:
+            ingested = ParquetIngest(data_dir).run(lambda: spark)
+            for result in ingested:
+                print(f"   ✓ ingested {result['name']}: {result['rows']} rows in {result['seconds']}s")
+        view_builders = incremental_view_builders(args)
+        statements = [nodes[index].statement for index in sorted(nodes)]
+        view_cache = create_view_cache(spark, statements, args)
+        runner = DagRunner(spark, nodes, max_parallel=args.max_parallel, count_rows=not args.no_counts,
+                           view_builders=view_builders, view_cache=view_cache)
+        report = runner.run(stop_on_error=not args.continue_on_error)
+        report["pipeline"] = str(root)
+        report["ingest"] = ingested
+        report["export"] = run_export(spark, report, args)
+        report["cache"] = finish_view_cache(view_cache)
+    finally:
+        spark.stop()
+
+    report["count_rows"] = not args.no_counts
+    report_cache_saving(report, report_dir)
+    report_path = write_report(report, report_dir)
+    totals = report["totals"]
+    print(f"   Critical path: {' → '.join(report['critical_path'])}")
+    print(f"   Sum of steps {totals['wall_seconds']}s, critical path {totals['critical_path_seconds']}s")
+    print(f"{'✅' if report['status'] == 'success' else '❌'} Pipeline {report['status']} "
+          f"in {report['total_seconds']}s, report: {report_path}")
+    return 0 if report["status"] == "success" else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
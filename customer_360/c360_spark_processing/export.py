@@ -0,0 +1,83 @@
+"""
+Customer Analytics C360 - Export Stage
+Writes the final data product as one named Parquet file and, optionally, one
+CSV file. Each file is written next to its destination and renamed into
+place, so readers only ever see a complete file.
+"""
+
+import argparse
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+EXPORT_TABLE = "customer_analytics_c360"
+DEFAULT_PARQUET_PATH = SCRIPT_DIR / "data" / "export" / f"{EXPORT_TABLE}.parquet"
+DASHBOARD_CSV_PATH = SCRIPT_DIR.parent / "c360_dashboard" / "data" / f"{EXPORT_TABLE}.csv"
+
+CSV_OPTIONS = {
+    "header": "true",
+    "timestampFormat": "yyyy-MM-dd HH:mm:ss.SSSSSS",
+    "dateFormat": "yyyy-MM-dd",
+}
+
+
+def write_single_file(df, fmt: str, target: Path, options: Optional[Dict[str, str]] = None) -> Path:
+    """
+    Write a DataFrame as exactly one file at target, replacing it atomically
+
+    Spark writes a directory of part files; the DataFrame is coalesced to one
+    partition and written to a staging directory in the target's folder. The
+    single part file is then renamed over the target, which is atomic on the
+    same filesystem. The _SUCCESS marker confirms the write committed, so no
+    waiting or polling is needed.
+    """
+    target = Path(target).resolve()
+    target.parent.mkdir(parents=True, exist_ok=True)
+    staging = target.with_name(f"{target.name}.staging-{os.getpid()}")
+    shutil.rmtree(staging, ignore_errors=True)
+    try:
+        df.coalesce(1).write.format(fmt).options(**(options or {})).mode("overwrite").save(str(staging))
+        if not (staging / "_SUCCESS").exists():
+            raise RuntimeError(f"Export to {staging} did not commit")
+        parts = sorted(staging.glob("part-*"))
+        if len(parts) != 1:
+            raise RuntimeError(f"Expected one part file in {staging}, found {len(parts)}")
+        os.replace(parts[0], target)
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+    return target
+
+
+def export_data_product(spark, parquet_path: Path = DEFAULT_PARQUET_PATH,
+                        csv_path: Optional[Path] = None,
+                        table: str = EXPORT_TABLE) -> Dict[str, Any]:
+    """
+    Export a table of the session to Parquet and optionally CSV
+
+    The table is computed once for the Parquet file; the CSV is written from
+    that file rather than recomputing the pipeline.
+    """
+    started = time.perf_counter()
+    parquet_file = write_single_file(spark.table(table), "parquet", parquet_path)
+    exported = spark.read.parquet(str(parquet_file))
+    result = {
+        "table": table,
+        "rows": exported.count(),
+        "parquet": str(parquet_file),
+        "csv": None,
+    }
+    if csv_path:
+        result["csv"] = str(write_single_file(exported, "csv", csv_path, CSV_OPTIONS))
+    result["seconds"] = round(time.perf_counter() - started, 3)
+    return result
+
+
+def add_export_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--export-parquet", type=Path, default=DEFAULT_PARQUET_PATH,
+                        help="Parquet file the data product is exported to")
+    parser.add_argument("--export-csv", type=Path, nargs="?", const=DASHBOARD_CSV_PATH, default=None,
+                        help="Also export the data product to this CSV file (default: the dashboard's)")
+    parser.add_argument("--skip-export", action="store_true", help="Do not export the data product")
@@ -1,75 +1,9 @@
 -- Fact: Customer 360 Profile
 -- Description: Comprehensive customer profile combining all domains for C360 analytics
--- Dependencies: src_customers, src_loyalty_program, int_customer_transactions, support_tickets, app_usage
-
--- Create temporary views for support and app usage data
-CREATE OR REPLACE TEMPORARY VIEW support_tickets_raw
-USING CSV
-OPTIONS (
-  path "../c360_mock_data/customer/support_tickets.csv",
-  header "true",
-  inferSchema "true"
-);
-
-CREATE OR REPLACE TEMPORARY VIEW app_usage_raw
-USING CSV
-OPTIONS (
-  path "../c360_mock_data/customer/app_usage.csv",
-  header "true",
-  inferSchema "true"
-);
+-- Dependencies: src_customers, src_loyalty_program, int_customer_transactions_summary,
+--               int_customer_support_summary, int_customer_app_usage_summary
 
 CREATE OR REPLACE TEMPORARY VIEW fct_customer_360_profile AS
-WITH support_summary AS (
-    SELECT 
-        customer_id,
-        COUNT(*) as total_tickets,
-        COUNT(CASE WHEN status = 'resolved' THEN 1 END) as resolved_tickets,
-        AVG(CASE WHEN satisfaction_score IS NOT NULL THEN satisfaction_score END) as avg_satisfaction,
-        MAX(CAST(created_date AS TIMESTAMP)) as last_ticket_date,
-        COUNT(CASE WHEN priority = 'urgent' THEN 1 END) as urgent_tickets
-    FROM support_tickets_raw
-    GROUP BY customer_id
-),
-
-app_usage_summary AS (
-    SELECT 
-        customer_id,
-        COUNT(*) as total_sessions,
-        SUM(session_duration_minutes) as total_session_minutes,
-        AVG(session_duration_minutes) as avg_session_duration,
-        SUM(pages_viewed) as total_pages_viewed,
-        SUM(actions_taken) as total_actions_taken,
-        MAX(CAST(session_date AS DATE)) as last_app_use_date,
-        COUNT(DISTINCT device_type) as unique_device_types,
-        -- Engagement score based on activity
-        (SUM(session_duration_minutes) * 0.3 + SUM(pages_viewed) * 0.4 + SUM(actions_taken) * 0.3) as engagement_score
-    FROM app_usage_raw
-    GROUP BY customer_id
-),
-
-transaction_metrics AS (
-    SELECT 
-        customer_id,
-        COUNT(DISTINCT transaction_id) as total_transactions,
-        SUM(total_amount) as total_spent,
-        AVG(total_amount) as avg_order_value,
-        MIN(transaction_date) as first_purchase_date,
-        MAX(transaction_date) as last_purchase_date,
-        COUNT(DISTINCT channel) as channels_used,
-        COUNT(DISTINCT DATE(transaction_date)) as shopping_days,
-        SUM(CASE WHEN used_preferred_channel = 1 THEN 1 ELSE 0 END) as preferred_channel_usage,
-        -- Category and brand diversity
-        AVG(unique_categories) as avg_categories_per_order,
-        AVG(unique_brands) as avg_brands_per_order,
-        SUM(items_purchased) as total_items_purchased,
-        -- Recent activity (last 90 days)
-        COUNT(CASE WHEN DATEDIFF(CURRENT_DATE(), DATE(transaction_date)) <= 90 THEN 1 END) as transactions_last_90d,
-        SUM(CASE WHEN DATEDIFF(CURRENT_DATE(), DATE(transaction_date)) <= 90 THEN total_amount ELSE 0 END) as spent_last_90d
-    FROM int_customer_transactions
-    GROUP BY customer_id
-)
-
 SELECT 
     -- Customer identifiers and demographics
     c.customer_id,
@@ -163,6 +97,6 @@ SELECT
 
 FROM src_customers c
 LEFT JOIN src_loyalty_program lp ON c.customer_id = lp.customer_id
-LEFT JOIN transaction_metrics tm ON c.customer_id = tm.customer_id  
-LEFT JOIN support_summary ss ON c.customer_id = ss.customer_id
-LEFT JOIN app_usage_summary aus ON c.customer_id = aus.customer_id;
+LEFT JOIN int_customer_transactions_summary tm ON c.customer_id = tm.customer_id  
+LEFT JOIN int_customer_support_summary ss ON c.customer_id = ss.customer_id
+LEFT JOIN int_customer_app_usage_summary aus ON c.customer_id = aus.customer_id;
@@ -0,0 +1,218 @@
+"""
+Customer Analytics C360 - Incremental Transaction Summary
+Builds the int_customer_transactions_summary view from per-customer aggregate
+state kept in Parquet. Each run merges only the transactions newer than the
+last high-watermark into the state; only the 90-day activity, which moves with
+the current date, is recomputed, from the last 90 days of transactions.
+
+The transaction history is assumed append-only: rows changed or arriving at
+or before the watermark are not picked up until a full refresh.
+"""
+
+import argparse
+import json
+import shutil
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, Optional, Callable
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+DEFAULT_STATE_DIR = SCRIPT_DIR / "data" / "state" / "customer_transactions_summary"
+SUMMARY_VIEW = "int_customer_transactions_summary"
+TRANSACTIONS_VIEW = "int_customer_transactions"
+STATE_VIEW = "customer_transactions_state"
+WATERMARK_NAME = "_watermark.json"
+
+# Bumped when the state columns change; older state is rebuilt from scratch
+STATE_VERSION = 1
+
+# Additive per-customer aggregates of a set of transactions. Distinct channels
+# are kept as a set; distinct shopping days can be added because a new batch
+# only overlaps the state on the day of the customer's last purchase.
+BATCH_AGGREGATES = """
+SELECT
+    customer_id,
+    COUNT(DISTINCT transaction_id) as total_transactions,
+    SUM(total_amount) as total_spent,
+    COUNT(total_amount) as amount_count,
+    MIN(transaction_date) as first_purchase_date,
+    MAX(transaction_date) as last_purchase_date,
+    COLLECT_SET(channel) as channels,
+    COUNT(DISTINCT DATE(transaction_date)) as shopping_days,
+    SUM(CASE WHEN used_preferred_channel = 1 THEN 1 ELSE 0 END) as preferred_channel_usage,
+    SUM(unique_categories) as sum_unique_categories,
+    COUNT(unique_categories) as category_count,
+    SUM(unique_brands) as sum_unique_brands,
+    COUNT(unique_brands) as brand_count,
+    SUM(items_purchased) as total_items_purchased
+FROM {source}
+{where}
+GROUP BY customer_id
+"""
+
+# Sums stay NULL only when both sides are, like SUM over no values
+_SUM_COLUMNS = ["total_spent", "sum_unique_categories", "sum_unique_brands", "total_items_purchased"]
+_COUNT_COLUMNS = ["total_transactions", "amount_count", "preferred_channel_usage", "category_count", "brand_count"]
+
+MERGE_STATE = """
+SELECT
+    COALESCE(s.customer_id, b.customer_id) as customer_id,
+    {counts},
+    {sums},
+    LEAST(s.first_purchase_date, b.first_purchase_date) as first_purchase_date,
+    GREATEST(s.last_purchase_date, b.last_purchase_date) as last_purchase_date,
+    ARRAY_UNION(COALESCE(s.channels, CAST(ARRAY() AS ARRAY<STRING>)),
+                COALESCE(b.channels, CAST(ARRAY() AS ARRAY<STRING>))) as channels,
+    COALESCE(s.shopping_days, 0) + COALESCE(b.shopping_days, 0)
+        - CASE WHEN DATE(s.last_purchase_date) = DATE(b.first_purchase_date) THEN 1 ELSE 0 END as shopping_days
+FROM {state} s
+FULL OUTER JOIN {batch} b ON s.customer_id = b.customer_id
+""".format(
+    counts=",\n    ".join(f"COALESCE(s.{c}, 0) + COALESCE(b.{c}, 0) as {c}" for c in _COUNT_COLUMNS),
+    sums=",\n    ".join(f"CASE WHEN s.{c} IS NULL THEN b.{c} WHEN b.{c} IS NULL THEN s.{c} "
+                        f"ELSE s.{c} + b.{c} END as {c}" for c in _SUM_COLUMNS),
+    state="{state}", batch="{batch}",
+)
+
+# Same columns as the full recomputation in intermediates/int_customer_transactions_summary.sql
+SUMMARY_FROM_STATE = f"""
+CREATE OR REPLACE TEMPORARY VIEW {SUMMARY_VIEW} AS
+WITH recent_activity AS (
+    SELECT
+        customer_id,
+        COUNT(*) as transactions_last_90d,
+        SUM(total_amount) as spent_last_90d
+    FROM {TRANSACTIONS_VIEW}
+    WHERE transaction_date >= CAST(DATE_SUB(CURRENT_DATE(), 90) AS TIMESTAMP)
+    GROUP BY customer_id
+)
+SELECT
+    s.customer_id,
+    s.total_transactions,
+    s.total_spent,
+    s.total_spent / NULLIF(s.amount_count, 0) as avg_order_value,
+    s.first_purchase_date,
+    s.last_purchase_date,
+    CAST(SIZE(s.channels) AS BIGINT) as channels_used,
+    s.shopping_days,
+    s.preferred_channel_usage,
+    s.sum_unique_categories / NULLIF(s.category_count, 0) as avg_categories_per_order,
+    s.sum_unique_brands / NULLIF(s.brand_count, 0) as avg_brands_per_order,
+    s.total_items_purchased,
+    COALESCE(r.transactions_last_90d, 0) as transactions_last_90d,
+    COALESCE(r.spent_last_90d, 0) as spent_last_90d
+FROM {STATE_VIEW} s
+LEFT JOIN recent_activity r ON s.customer_id = r.customer_id
+"""
+
+
+class IncrementalTransactionSummary:
+    """
+    Keeps the per-customer transaction aggregates in sync with the history
+
+    The watermark file records the latest transaction_date merged, the number
+    of transactions merged and the state version. The transactions view must
+    be defined in the session; the watermark filter is pushed down to the
+    Parquet scan of the transactions, so a run reads the new rows, plus the
+    last 90 days for the rolling metrics.
+    """
+
+    def __init__(self, state_dir: Path = DEFAULT_STATE_DIR, full_refresh: bool = False):
+        self.state_dir = Path(state_dir)
+        self.watermark_path = self.state_dir.with_name(f"{self.state_dir.name}{WATERMARK_NAME}")
+        self.full_refresh = full_refresh
+
+    def _read_watermark(self) -> Optional[Dict[str, Any]]:
+        if not self.watermark_path.exists():
+            return None
+        with open(self.watermark_path) as f:
+            return json.load(f)
+
+    def load_watermark(self) -> Optional[Dict[str, Any]]:
+        """The last merge, or None when the state must be rebuilt"""
+        watermark = self._read_watermark()
+        if self.full_refresh or watermark is None or not self.state_dir.exists():
+            return None
+        if watermark.get("state_version") != STATE_VERSION:
+            return None
+        return watermark
+
+    def _save_watermark(self, watermark: Dict[str, Any]):
+        tmp_path = self.watermark_path.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(watermark, f, indent=2)
+        tmp_path.replace(self.watermark_path)
+
+    def _write_state(self, df):
+        """Write the new state next to the current one, then swap the directories"""
+        tmp_dir = self.state_dir.with_name(f"{self.state_dir.name}.tmp")
+        old_dir = self.state_dir.with_name(f"{self.state_dir.name}.old")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        shutil.rmtree(old_dir, ignore_errors=True)
+        df.write.mode("overwrite").parquet(str(tmp_dir))
+        if self.state_dir.exists():
+            self.state_dir.rename(old_dir)
+        tmp_dir.rename(self.state_dir)
+        shutil.rmtree(old_dir, ignore_errors=True)
+
+    def refresh(self, spark) -> Dict[str, Any]:
+        """Merge the new transactions into the state and define the summary view"""
+        started = time.perf_counter()
+        previous = self.load_watermark()
+        where = ""
+        if previous is not None and previous["watermark"] is not None:
+            where = f"WHERE transaction_date > TIMESTAMP '{previous['watermark']}'"
+        batch = spark.sql(BATCH_AGGREGATES.format(source=TRANSACTIONS_VIEW, where=where)).cache()
+        batch.createOrReplaceTempView("customer_transactions_batch")
+        # The watermark is rendered by Spark so it parses back in the session time zone
+        customers, merged_transactions, watermark = spark.sql(
+            "SELECT COUNT(*), COALESCE(SUM(total_transactions), 0), CAST(MAX(last_purchase_date) AS STRING) "
+            "FROM customer_transactions_batch").first()
+
+        if previous is not None and merged_transactions == 0:
+            mode = "unchanged"
+        else:
+            mode = "full" if previous is None else "incremental"
+            if previous is None:
+                state = batch
+            else:
+                spark.read.parquet(str(self.state_dir)).createOrReplaceTempView("customer_transactions_previous")
+                state = spark.sql(MERGE_STATE.format(state="customer_transactions_previous",
+                                                     batch="customer_transactions_batch"))
+            self.state_dir.parent.mkdir(parents=True, exist_ok=True)
+            self._write_state(state)
+            self._save_watermark({
+                "state_version": STATE_VERSION,
+                "watermark": watermark or (previous or {}).get("watermark"),
+                "transactions": (previous or {}).get("transactions", 0) + merged_transactions,
+                "updated_at": datetime.now().isoformat(),
+            })
+        batch.unpersist()
+
+        spark.read.parquet(str(self.state_dir)).createOrReplaceTempView(STATE_VIEW)
+        spark.sql(SUMMARY_FROM_STATE)
+        current = self._read_watermark()
+        return {
+            "mode": mode,
+            "previous_watermark": previous["watermark"] if previous else None,
+            "watermark": current["watermark"],
+            "merged_transactions": merged_transactions,
+            "customers_updated": customers if mode != "unchanged" else 0,
+            "state_transactions": current["transactions"],
+            "seconds": round(time.perf_counter() - started, 3),
+        }
+
+
+def add_incremental_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--incremental", action="store_true",
+                        help=f"Build {SUMMARY_VIEW} from Parquet state, merging only new transactions")
+    parser.add_argument("--full-refresh", action="store_true",
+                        help="With --incremental, rebuild the state from the whole history")
+
+
+def incremental_view_builders(args: argparse.Namespace) -> Dict[str, Callable[[Any], Dict[str, Any]]]:
+    """View builders for PipelineRunner: none unless --incremental was given"""
+    if not args.incremental:
+        return {}
+    return {SUMMARY_VIEW: IncrementalTransactionSummary(full_refresh=args.full_refresh).refresh}
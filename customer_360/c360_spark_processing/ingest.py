@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Customer Analytics C360 - Parquet Ingest Stage
+Converts the mock CSV sources to typed Parquet once, using the declared
+schemas, and again only when a source file changes
+
+Usage: python ingest.py [--data-dir ../c360_mock_data] [--output-dir data/parquet] [--force]
+"""
+
+import argparse
+import hashlib
+import json
+import shutil
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Callable
+
+from source_schemas import RAW_SOURCES, RawSource
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+DEFAULT_DATA_DIR = SCRIPT_DIR.parent / "c360_mock_data"
+DEFAULT_OUTPUT_DIR = SCRIPT_DIR / "data" / "parquet"
+MANIFEST_NAME = "_ingest_manifest.json"
+
+
+def _sha256(path: Path, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _schema_hash(source: RawSource) -> str:
+    return hashlib.sha256(source.ddl.encode()).hexdigest()[:16]
+
+
+class ParquetIngest:
+    """
+    Keeps one Parquet dataset per raw source in sync with its CSV file
+
+    A manifest records the size, modification time and content hash of each
+    converted file plus the schema used. A source is converted again when
+    its content or declared schema changed or its output is missing; a file
+    that was only touched is recognized by its hash and skipped.
+    """
+
+    def __init__(self, data_dir: Path = DEFAULT_DATA_DIR, output_dir: Path = DEFAULT_OUTPUT_DIR):
+        self.data_dir = Path(data_dir)
+        self.output_dir = Path(output_dir)
+        self.manifest_path = self.output_dir / MANIFEST_NAME
+        self.manifest: Dict[str, Dict[str, Any]] = self._load_manifest()
+
+    def _load_manifest(self) -> Dict[str, Dict[str, Any]]:
+        if self.manifest_path.exists():
+            with open(self.manifest_path) as f:
+                return json.load(f)
+        return {}
+
+    def _save_manifest(self):
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.manifest_path.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(self.manifest, f, indent=2)
+        tmp_path.replace(self.manifest_path)
+
+    def output_path(self, source: RawSource) -> Path:
+        return self.output_dir / source.name
+
+    def is_stale(self, source: RawSource) -> bool:
+        """True if the Parquet copy of the source must be (re)built"""
+        entry = self.manifest.get(source.name)
+        csv_path = self.data_dir / source.csv_path
+        if entry is None or not self.output_path(source).exists():
+            return True
+        if entry.get("schema_hash") != _schema_hash(source):
+            return True
+        stat = csv_path.stat()
+        if entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+            return False
+        if entry["sha256"] == _sha256(csv_path):
+            # Touched but unchanged: remember the new timestamp, keep the data
+            entry["size"], entry["mtime_ns"] = stat.st_size, stat.st_mtime_ns
+            return False
+        return True
+
+    def stale_sources(self, force: bool = False) -> List[RawSource]:
+        stale = [source for source in RAW_SOURCES.values() if force or self.is_stale(source)]
+        self._save_manifest()
+        return stale
+
+    def convert(self, spark, source: RawSource) -> Dict[str, Any]:
+        """Write the Parquet copy of one source, replacing the previous one"""
+        csv_path = self.data_dir / source.csv_path
+        target = self.output_path(source)
+        tmp_target = target.with_name(f"{source.name}.tmp")
+        old_target = target.with_name(f"{source.name}.old")
+        shutil.rmtree(tmp_target, ignore_errors=True)
+        shutil.rmtree(old_target, ignore_errors=True)
+
+        # Hash and stat before reading so a concurrent change is picked up next run
+        stat = csv_path.stat()
+        sha256 = _sha256(csv_path)
+        started = time.perf_counter()
+        spark.read \
+            .schema(source.ddl) \
+            .option("header", "true") \
+            .option("mode", "FAILFAST") \
+            .csv(str(csv_path)) \
+            .write \
+            .mode("overwrite") \
+            .parquet(str(tmp_target))
+        rows = spark.read.parquet(str(tmp_target)).count()
+
+        # Swap directories so readers never see a partially written dataset
+        if target.exists():
+            target.rename(old_target)
+        tmp_target.rename(target)
+        shutil.rmtree(old_target, ignore_errors=True)
+
+        self.manifest[source.name] = {
+            "source": str(csv_path),
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha256": sha256,
+            "schema_hash": _schema_hash(source),
+            "rows": rows,
+            "ingested_at": datetime.now().isoformat(),
+        }
+        self._save_manifest()
+        return {"name": source.name, "rows": rows, "seconds": round(time.perf_counter() - started, 3)}
+
+    def run(self, spark_factory: Callable[[], Any], force: bool = False) -> List[Dict[str, Any]]:
+        """
+        Convert the stale sources
+
+        The Spark session is only requested when at least one source needs it.
+        """
+        stale = self.stale_sources(force)
+        if not stale:
+            return []
+        spark = spark_factory()
+        return [self.convert(spark, source) for source in stale]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Convert the C360 CSV sources to typed Parquet")
+    parser.add_argument("--data-dir", type=Path, default=DEFAULT_DATA_DIR, help="Mock CSV data directory")
+    parser.add_argument("--output-dir", type=Path, default=DEFAULT_OUTPUT_DIR, help="Parquet output directory")
+    parser.add_argument("--force", action="store_true", help="Convert every source even if unchanged")
+    args = parser.parse_args(argv)
+
+    ingest = ParquetIngest(args.data_dir, args.output_dir)
+    sessions = []
+
+    def spark_factory():
+        from pyspark.sql import SparkSession
+        spark = SparkSession.builder.appName("C360_Parquet_Ingest").getOrCreate()
+        spark.sparkContext.setLogLevel("WARN")
+        sessions.append(spark)
+        return spark
+
+    try:
+        converted = ingest.run(spark_factory, force=args.force)
+    finally:
+        for spark in sessions:
+            spark.stop()
+
+    if not converted:
+        print("✅ Parquet sources up to date")
+    for result in converted:
+        print(f"   ✓ {result['name']}: {result['rows']} rows in {result['seconds']}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,26 @@
+-- Intermediate: Per-customer app usage summary
+-- Description: Sessions, time spent and engagement score per customer.
+--              streaming_profile.py keeps the same columns in streaming state
+-- Dependencies: app_usage
+
+-- Create temporary view for app usage data
+CREATE OR REPLACE TEMPORARY VIEW app_usage_raw
+USING PARQUET
+OPTIONS (
+  path "data/parquet/app_usage"
+);
+
+CREATE OR REPLACE TEMPORARY VIEW int_customer_app_usage_summary AS
+SELECT 
+    customer_id,
+    COUNT(*) as total_sessions,
+    SUM(session_duration_minutes) as total_session_minutes,
+    AVG(session_duration_minutes) as avg_session_duration,
+    SUM(pages_viewed) as total_pages_viewed,
+    SUM(actions_taken) as total_actions_taken,
+    MAX(CAST(session_date AS DATE)) as last_app_use_date,
+    COUNT(DISTINCT device_type) as unique_device_types,
+    -- Engagement score based on activity
+    (SUM(session_duration_minutes) * 0.3 + SUM(pages_viewed) * 0.4 + SUM(actions_taken) * 0.3) as engagement_score
+FROM app_usage_raw
+GROUP BY customer_id;
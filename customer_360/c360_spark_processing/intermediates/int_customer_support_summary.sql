@@ -0,0 +1,21 @@
+-- Intermediate: Per-customer support summary
+-- Description: Ticket counts, resolution and satisfaction per customer
+-- Dependencies: support_tickets
+
+-- Create temporary view for support tickets data
+CREATE OR REPLACE TEMPORARY VIEW support_tickets_raw
+USING PARQUET
+OPTIONS (
+  path "data/parquet/support_tickets"
+);
+
+CREATE OR REPLACE TEMPORARY VIEW int_customer_support_summary AS
+SELECT 
+    customer_id,
+    COUNT(*) as total_tickets,
+    COUNT(CASE WHEN status = 'resolved' THEN 1 END) as resolved_tickets,
+    AVG(CASE WHEN satisfaction_score IS NOT NULL THEN satisfaction_score END) as avg_satisfaction,
+    MAX(CAST(created_date AS TIMESTAMP)) as last_ticket_date,
+    COUNT(CASE WHEN priority = 'urgent' THEN 1 END) as urgent_tickets
+FROM support_tickets_raw
+GROUP BY customer_id;
@@ -4,11 +4,9 @@
 
 -- Create temporary view for transaction items data
 CREATE OR REPLACE TEMPORARY VIEW transaction_items_raw
-USING CSV
+USING PARQUET
 OPTIONS (
-  path "../c360_mock_data/sales/transaction_items.csv",
-  header "true",
-  inferSchema "true"
+  path "data/parquet/transaction_items"
 );
 
 CREATE OR REPLACE TEMPORARY VIEW int_customer_transactions AS
@@ -0,0 +1,26 @@
+-- Intermediate: Per-customer transaction totals, recency and 90-day activity
+-- Description: Full recomputation over the whole transaction history.
+--              pipeline_runner.py --incremental builds the same view from
+--              Parquet state instead (see incremental.py)
+-- Dependencies: int_customer_transactions
+
+CREATE OR REPLACE TEMPORARY VIEW int_customer_transactions_summary AS
+SELECT 
+    customer_id,
+    COUNT(DISTINCT transaction_id) as total_transactions,
+    SUM(total_amount) as total_spent,
+    AVG(total_amount) as avg_order_value,
+    MIN(transaction_date) as first_purchase_date,
+    MAX(transaction_date) as last_purchase_date,
+    COUNT(DISTINCT channel) as channels_used,
+    COUNT(DISTINCT DATE(transaction_date)) as shopping_days,
+    SUM(CASE WHEN used_preferred_channel = 1 THEN 1 ELSE 0 END) as preferred_channel_usage,
+    -- Category and brand diversity
+    AVG(unique_categories) as avg_categories_per_order,
+    AVG(unique_brands) as avg_brands_per_order,
+    SUM(items_purchased) as total_items_purchased,
+    -- Recent activity (last 90 days)
+    COUNT(CASE WHEN DATEDIFF(CURRENT_DATE(), DATE(transaction_date)) <= 90 THEN 1 END) as transactions_last_90d,
+    SUM(CASE WHEN DATEDIFF(CURRENT_DATE(), DATE(transaction_date)) <= 90 THEN total_amount ELSE 0 END) as spent_last_90d
+FROM int_customer_transactions
+GROUP BY customer_id;
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+Customer Analytics C360 - Instrumented Pipeline Runner
+Runs a pipeline script statement by statement in one SparkSession and writes
+a JSON run report with wall time, row counts and shuffle bytes per step.
+Stale Parquet sources are ingested first in the same session and the data
+product is exported as single Parquet/CSV files at the end.
+
+Usage: python pipeline_runner.py [--sql c360_consolidated_pipeline.sql] [--report-dir reports]
+       [--data-dir ../c360_mock_data] [--incremental [--full-refresh]]
+       [--export-parquet PATH] [--export-csv PATH] [--cache-level NONE|MEMORY_AND_DISK|...]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Callable
+
+from pyspark.sql import SparkSession
+
+from export import EXPORT_TABLE, add_export_arguments, export_data_product
+from incremental import add_incremental_arguments, incremental_view_builders
+from ingest import ParquetIngest, DEFAULT_DATA_DIR
+from sql_script import SqlStatement, parse_file
+from view_cache import (ViewCache, add_cache_arguments, view_cache_from_args, find_baseline, measure_saving,
+                        EXPORT_CONSUMER)
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+DEFAULT_PIPELINE = SCRIPT_DIR / "c360_consolidated_pipeline.sql"
+DEFAULT_REPORT_DIR = SCRIPT_DIR / "reports"
+
+
+def create_spark_session(app_name: str = "C360_Pipeline_Runner",
+                         extra_config: Optional[Dict[str, str]] = None) -> SparkSession:
+    """Session equivalent to the spark-sql CLI, with Hive support"""
+    builder = SparkSession.builder \
+        .appName(app_name) \
+        .config("spark.sql.adaptive.enabled", "true") \
+        .config("spark.sql.adaptive.coalescePartitions.enabled", "true")
+    for key, value in (extra_config or {}).items():
+        builder = builder.config(key, value)
+    spark = builder.enableHiveSupport().getOrCreate()
+    spark.sparkContext.setLogLevel("WARN")
+    return spark
+
+
+class StageMetricsCollector:
+    """
+    Reads stage metrics of a job group from Spark's status store
+
+    The status store is fed by the listener bus, which is drained before
+    reading so every finished stage of the step is accounted for.
+    """
+
+    def __init__(self, spark: SparkSession):
+        self._sc = spark.sparkContext._jsc.sc()
+
+    def collect(self, job_group: str) -> Dict[str, int]:
+        self._sc.listenerBus().waitUntilEmpty()
+        store = self._sc.statusStore()
+        totals = {"jobs": 0, "stages": 0, "input_records": 0, "input_bytes": 0,
+                  "shuffle_read_bytes": 0, "shuffle_write_bytes": 0}
+        jobs = store.jobsList(None)
+        for i in range(jobs.size()):
+            job = jobs.apply(i)
+            group = job.jobGroup()
+            if not group.isDefined() or group.get() != job_group:
+                continue
+            totals["jobs"] += 1
+            stage_ids = job.stageIds()
+            for j in range(stage_ids.size()):
+                stage = store.lastStageAttempt(stage_ids.apply(j))
+                if stage.status().toString() == "SKIPPED":
+                    continue
+                totals["stages"] += 1
+                totals["input_records"] += stage.inputRecords()
+                totals["input_bytes"] += stage.inputBytes()
+                totals["shuffle_read_bytes"] += stage.shuffleReadBytes()
+                totals["shuffle_write_bytes"] += stage.shuffleWriteBytes()
+        return totals
+
+
+class PipelineRunner:
+    """
+    Executes pipeline statements in sequence and measures each of them
+
+    Views are lazy, so each view step is materialized with a COUNT(*) to
+    attribute its cost. A step's time includes recomputing the uncached
+    views it reads; with a view_cache, the views read by several steps are
+    cached when defined and unpersisted after their last reader.
+
+    view_builders maps a view name to a function defining that view in the
+    session instead of the statement's SQL (e.g. from incremental state);
+    what the function returns is added to the step as "builder".
+    """
+
+    def __init__(self, spark: SparkSession, count_rows: bool = True,
+                 view_builders: Optional[Dict[str, Callable[[SparkSession], Dict[str, Any]]]] = None,
+                 view_cache: Optional[ViewCache] = None):
+        self.spark = spark
+        self.count_rows = count_rows
+        self.view_builders = view_builders or {}
+        self.view_cache = view_cache
+        self.metrics = StageMetricsCollector(spark)
+        self.row_counts: Dict[str, int] = {}
+        self.run_id = datetime.now().strftime("%Y%m%d_%H%M%S")
+
+    def run_statement(self, statement: SqlStatement) -> Dict[str, Any]:
+        job_group = f"c360-{self.run_id}-step-{statement.index}"
+        self.spark.sparkContext.setJobGroup(job_group, statement.label)
+        step = {
+            "index": statement.index,
+            "kind": statement.kind,
+            "name": statement.target,
+            "references": sorted(statement.references),
+            "statement": statement.preview,
+            "status": "success",
+            "error": None,
+            "input_rows": None,
+            "output_rows": None,
+        }
+
+        started = time.perf_counter()
+        try:
+            builder = self.view_builders.get(statement.target) if statement.kind == "view" else None
+            if builder:
+                step["builder"] = builder(self.spark)
+            else:
+                df = self.spark.sql(statement.sql)
+            cached = self.view_cache.materialize(statement) if self.view_cache else None
+            if cached:
+                step["cache"] = cached
+            if statement.kind == "view" and self.count_rows:
+                step["output_rows"] = cached["rows"] if cached else self.spark.table(statement.target).count()
+                self.row_counts[statement.target] = step["output_rows"]
+            elif statement.kind == "query":
+                step["output_rows"] = len(df.collect())
+        except Exception as e:
+            step["status"] = "failed"
+            step["error"] = str(e).split("\n")[0]
+        if self.view_cache:
+            step["unpersisted"] = self.view_cache.release(statement.index)
+        step["wall_seconds"] = round(time.perf_counter() - started, 3)
+
+        step.update(self.metrics.collect(job_group))
+        # Rows fed in: the counted relations read, or the records scanned from files
+        known_inputs = [self.row_counts[name] for name in statement.references if name in self.row_counts]
+        if statement.references and len(known_inputs) == len(statement.references):
+            step["input_rows"] = sum(known_inputs)
+        elif statement.source_path:
+            step["input_rows"] = step["input_records"]
+        return step
+
+    def run(self, statements: List[SqlStatement], stop_on_error: bool = True) -> Dict[str, Any]:
+        started_at = datetime.now()
+        started = time.perf_counter()
+        steps = []
+        for statement in statements:
+            step = self.run_statement(statement)
+            steps.append(step)
+            print(f"  [{step['index']:>2}] {statement.label:<45} {step['status']:<8} "
+                  f"{step['wall_seconds']:>8.3f}s  rows={step['output_rows']}  "
+                  f"shuffle={step['shuffle_read_bytes'] + step['shuffle_write_bytes']}B")
+            if step["status"] == "failed" and stop_on_error:
+                break
+        self.spark.sparkContext.setJobGroup("", "")
+
+        return {
+            "run_id": self.run_id,
+            "started_at": started_at.isoformat(),
+            "finished_at": datetime.now().isoformat(),
+            "total_seconds": round(time.perf_counter() - started, 3),
+            "spark_version": self.spark.version,
+            "status": "failed" if any(s["status"] == "failed" for s in steps) else "success",
+            "steps": steps,
+            "totals": {
+                "wall_seconds": round(sum(s["wall_seconds"] for s in steps), 3),
+                "shuffle_read_bytes": sum(s["shuffle_read_bytes"] for s in steps),
+                "shuffle_write_bytes": sum(s["shuffle_write_bytes"] for s in steps),
+            },
+        }
+
+
+def write_report(report: Dict[str, Any], report_dir: Path) -> Path:
+    report_dir.mkdir(parents=True, exist_ok=True)
+    report_path = report_dir / f"pipeline_run_{report['run_id']}.json"
+    with open(report_path, "w") as f:
+        json.dump(report, f, indent=2)
+    return report_path
+
+
+def run_export(spark: SparkSession, report: Dict[str, Any], args: argparse.Namespace) -> Optional[Dict[str, Any]]:
+    """Export the data product after a successful run; a failed export fails the run"""
+    if args.skip_export or report["status"] != "success":
+        return None
+    try:
+        result = export_data_product(spark, args.export_parquet, args.export_csv)
+    except Exception as e:
+        report["status"] = "failed"
+        print(f"   ❌ export failed: {str(e).split(chr(10))[0]}")
+        return {"status": "failed", "error": str(e).split("\n")[0]}
+    for path in (result["parquet"], result["csv"]):
+        if path:
+            print(f"   ✓ exported {result['rows']} rows to {path}")
+    return result
+
+
+def create_view_cache(spark: SparkSession, statements: List[SqlStatement],
+                      args: argparse.Namespace) -> Optional[ViewCache]:
+    """The cache of the views several steps read; the export reads the data product last"""
+    final_reads = [] if args.skip_export else [EXPORT_TABLE]
+    return view_cache_from_args(spark, statements, args, final_reads=final_reads)
+
+
+def finish_view_cache(view_cache: Optional[ViewCache]) -> Optional[Dict[str, Any]]:
+    """Release the views kept for the export and summarize the cache"""
+    if view_cache is None:
+        return None
+    view_cache.release(EXPORT_CONSUMER)
+    view_cache.release_all()
+    report = view_cache.report()
+    cached = [view for view in report["views"] if view["materialize_seconds"] is not None]
+    if cached:
+        print(f"   ✓ cached {len(cached)} views ({report['storage_level']}): "
+              f"{', '.join(view['name'] for view in cached)}; "
+              f"{report['materialize_seconds']}s to compute and store")
+    return report
+
+
+def report_cache_saving(report: Dict[str, Any], report_dir: Path) -> Optional[Dict[str, Any]]:
+    """Measure the cache's saving against the latest uncached run, if there is one"""
+    if not report.get("cache") or not any(v["materialize_seconds"] is not None for v in report["cache"]["views"]):
+        return None
+    baseline = find_baseline(report_dir, report)
+    if baseline is None:
+        print("   ⚠️  no uncached run to compare with: run once with --cache-level NONE to measure the saving")
+        return None
+    saving = measure_saving(report, baseline)
+    print(f"   ✓ cache saved {saving['saved_seconds']}s net on the steps using it "
+          f"({saving['baseline_seconds']}s uncached in run {saving['baseline_run_id']}, "
+          f"{saving['cached_seconds']}s cached)")
+    report["cache"]["saving"] = saving
+    return saving
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run the C360 pipeline with per-step metrics")
+    parser.add_argument("--sql", type=Path, default=DEFAULT_PIPELINE, help="Pipeline SQL script")
+    parser.add_argument("--report-dir", type=Path, default=DEFAULT_REPORT_DIR, help="Directory of the JSON run reports")
+    parser.add_argument("--no-counts", action="store_true", help="Do not materialize views to count their rows")
+    parser.add_argument("--continue-on-error", action="store_true", help="Keep running after a failed step")
+    parser.add_argument("--skip-ingest", action="store_true", help="Do not refresh the Parquet sources first")
+    parser.add_argument("--data-dir", type=Path, default=DEFAULT_DATA_DIR, help="Mock CSV data directory to ingest")
+    add_incremental_arguments(parser)
+    add_export_arguments(parser)
+    add_cache_arguments(parser)
+    args = parser.parse_args(argv)
+
+    data_dir = args.data_dir.resolve()
+    sql_path = args.sql.resolve()
+    report_dir = args.report_dir.resolve()
+    args.export_parquet = args.export_parquet.resolve()
+    args.export_csv = args.export_csv.resolve() if args.export_csv else None
+    statements = parse_file(sql_path)
+    # Relative data paths in the scripts are relative to the script directory
+    os.chdir(sql_path.parent)
+
+    print(f"🚀 Running {sql_path.name}: {len(statements)} statements")
+    spark = create_spark_session()
+    try:
+        ingested = []
+        if not args.skip_ingest:
+            ingested = ParquetIngest(data_dir).run(lambda: spark)
+            for result in ingested:
+                print(f"   ✓ ingested {result['name']}: {result['rows']} rows in {result['seconds']}s")
+        view_builders = incremental_view_builders(args)
+        view_cache = create_view_cache(spark, statements, args)
+        runner = PipelineRunner(spark, count_rows=not args.no_counts,
+                                view_builders=view_builders, view_cache=view_cache)
+        report = runner.run(statements, stop_on_error=not args.continue_on_error)
+        report["pipeline"] = str(sql_path)
+        report["ingest"] = ingested
+        report["export"] = run_export(spark, report, args)
+        report["cache"] = finish_view_cache(view_cache)
+    finally:
+        spark.stop()
+
+    report["count_rows"] = not args.no_counts
+    report_cache_saving(report, report_dir)
+    report_path = write_report(report, report_dir)
+    print(f"{'✅' if report['status'] == 'success' else '❌'} Pipeline {report['status']} "
+          f"in {report['total_seconds']}s, report: {report_path}")
+    return 0 if report["status"] == "success" else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -38,6 +38,14 @@ if [ ! -d "../c360_mock_data" ]; then
     exit 1
 fi
 
+# Convert the CSV sources to typed Parquet; only changed files are converted again
+echo "📦 Refreshing Parquet sources..."
+python3 ingest.py || {
+    echo "❌ Error: Parquet ingest failed"
+    exit 1
+}
+echo ""
+
 echo "Working directory: $SCRIPT_DIR"
 echo "Mock data location: ../c360_mock_data"
 echo "Execution mode: $([ "$SEPARATE_SESSIONS" = true ] && echo "Separate Sessions" || echo "Single Session")"
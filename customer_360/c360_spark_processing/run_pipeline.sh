@@ -1,23 +1,18 @@
 #!/bin/bash
 
-# Get the absolute path to the project root
-PROJECT_ROOT="/Users/jerome/Documents/Code/flink_project_demos"
-DASHBOARD_DATA="$PROJECT_ROOT/c360_dashboard/data"
+# Run the consolidated C360 pipeline and export the data product for the dashboard
+# Usage: ./run_pipeline.sh [extra pipeline_runner.py options]
 
-# Clean up any existing export data
-rm -rf "$DASHBOARD_DATA/export"
-rm -f "$DASHBOARD_DATA/customer_analytics_c360.csv"
+set -e
 
-# Run the Spark SQL pipeline
-cd "$PROJECT_ROOT/c360_spark_processing"
-spark-sql -f c360_consolidated_pipeline.sql
+# Paths are relative to this script; override the export targets with
+# C360_EXPORT_PARQUET and C360_EXPORT_CSV
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+DASHBOARD_DATA="$SCRIPT_DIR/../c360_dashboard/data"
+EXPORT_PARQUET="${C360_EXPORT_PARQUET:-$SCRIPT_DIR/data/export/customer_analytics_c360.parquet}"
+EXPORT_CSV="${C360_EXPORT_CSV:-$DASHBOARD_DATA/customer_analytics_c360.csv}"
 
-# Wait for the export to complete
-sleep 2
-
-# Find the exported part file and rename it
-export_file=$(find "$DASHBOARD_DATA/export" -name "*.csv" -o -name "part-*")
-if [ -n "$export_file" ]; then
-    mv "$export_file" "$DASHBOARD_DATA/customer_analytics_c360.csv"
-    rm -rf "$DASHBOARD_DATA/export"
-fi
\ No newline at end of file
+# Refresh the Parquet sources (no-op when the CSV files are unchanged), run the
+# pipeline and write each export file atomically once the pipeline succeeded
+cd "$SCRIPT_DIR"
+python3 pipeline_runner.py --export-parquet "$EXPORT_PARQUET" --export-csv "$EXPORT_CSV" "$@"
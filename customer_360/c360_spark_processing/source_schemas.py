@@ -0,0 +1,72 @@
+"""
+Customer Analytics C360 - Raw Source Schemas
+Declared schemas of the mock CSV files read by the pipeline
+
+Types follow the casts applied by the src_*.sql views (dates, timestamps,
+numeric amounts); identifiers and codes such as zip codes stay strings.
+"""
+
+from dataclasses import dataclass
+from typing import Dict
+
+
+@dataclass(frozen=True)
+class RawSource:
+    """A CSV file under c360_mock_data and the schema it is read with"""
+    name: str
+    csv_path: str  # relative to the mock data directory
+    ddl: str
+
+
+RAW_SOURCES: Dict[str, RawSource] = {source.name: source for source in [
+    RawSource(
+        name="customers",
+        csv_path="customer/customers.csv",
+        ddl="customer_id STRING, first_name STRING, last_name STRING, email STRING, "
+            "phone STRING, date_of_birth DATE, gender STRING, registration_date TIMESTAMP, "
+            "customer_segment STRING, preferred_channel STRING, address_line1 STRING, "
+            "city STRING, state STRING, zip_code STRING, country STRING",
+    ),
+    RawSource(
+        name="loyalty_program",
+        csv_path="customer/loyalty_program.csv",
+        ddl="customer_id STRING, loyalty_tier STRING, points_balance INT, "
+            "points_earned_ytd INT, points_redeemed_ytd INT, tier_start_date DATE, "
+            "lifetime_value DOUBLE",
+    ),
+    RawSource(
+        name="transactions",
+        csv_path="sales/transactions.csv",
+        ddl="transaction_id STRING, customer_id STRING, transaction_date TIMESTAMP, "
+            "channel STRING, store_id STRING, payment_method STRING, subtotal DOUBLE, "
+            "tax_amount DOUBLE, discount_amount DOUBLE, total_amount DOUBLE, "
+            "currency STRING, status STRING",
+    ),
+    RawSource(
+        name="transaction_items",
+        csv_path="sales/transaction_items.csv",
+        ddl="item_id STRING, transaction_id STRING, product_id STRING, quantity INT, "
+            "unit_price DOUBLE, line_total DOUBLE, discount_applied DOUBLE",
+    ),
+    RawSource(
+        name="products",
+        csv_path="products/products.csv",
+        ddl="product_id STRING, product_name STRING, category STRING, subcategory STRING, "
+            "brand STRING, price DOUBLE, cost DOUBLE, weight_kg DOUBLE, dimensions STRING, "
+            "color STRING, size STRING, created_date DATE, status STRING",
+    ),
+    RawSource(
+        name="support_tickets",
+        csv_path="customer/support_tickets.csv",
+        ddl="ticket_id STRING, customer_id STRING, created_date TIMESTAMP, "
+            "resolved_date TIMESTAMP, category STRING, priority STRING, status STRING, "
+            "channel STRING, satisfaction_score INT",
+    ),
+    RawSource(
+        name="app_usage",
+        csv_path="customer/app_usage.csv",
+        ddl="usage_id STRING, customer_id STRING, session_date DATE, "
+            "session_start TIMESTAMP, session_duration_minutes INT, pages_viewed INT, "
+            "actions_taken INT, device_type STRING, app_version STRING",
+    ),
+]}
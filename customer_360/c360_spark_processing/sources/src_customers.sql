@@ -2,11 +2,10 @@
 -- Description: Core customer information including demographics and registration details
 -- Data Owner: Customer Experience/CRM Team
 -- Create temporary view for raw customer data
-CREATE
-OR REPLACE TEMPORARY VIEW customers_raw USING CSV OPTIONS (
-  PATH "../ c360_mock_data / customer / customers.csv ",
-  header " TRUE ",
-  inferSchema " TRUE "
+CREATE OR REPLACE TEMPORARY VIEW customers_raw
+USING PARQUET
+OPTIONS (
+  path "data/parquet/customers"
 );
 
 -- Create enriched customer view with deduplication
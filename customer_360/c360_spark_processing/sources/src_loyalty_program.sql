@@ -4,11 +4,9 @@
 
 -- Create temporary view for raw loyalty data
 CREATE OR REPLACE TEMPORARY VIEW loyalty_program_raw
-USING CSV
+USING PARQUET
 OPTIONS (
-  path "../c360_mock_data/customer/loyalty_program.csv",
-  header "true",
-  inferSchema "true"
+  path "data/parquet/loyalty_program"
 );
 
 -- Create enriched loyalty program view
@@ -4,11 +4,9 @@
 
 -- Create temporary view for raw product data
 CREATE OR REPLACE TEMPORARY VIEW products_raw
-USING CSV
+USING PARQUET
 OPTIONS (
-  path "../c360_mock_data/products/products.csv",
-  header "true",
-  inferSchema "true"
+  path "data/parquet/products"
 );
 
 -- Create enriched products view
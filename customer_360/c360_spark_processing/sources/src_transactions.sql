@@ -4,11 +4,9 @@
 
 -- Create temporary view for raw transaction data
 CREATE OR REPLACE TEMPORARY VIEW transactions_raw
-USING CSV
+USING PARQUET
 OPTIONS (
-  path "../c360_mock_data/sales/transactions.csv",
-  header "true",
-  inferSchema "true"
+  path "data/parquet/transactions"
 );
 
 -- Create enriched transactions view
@@ -0,0 +1,135 @@
+"""
+Customer Analytics C360 - SQL Script Parsing
+Splits Spark SQL pipeline files into statements and describes what each one
+creates and reads
+"""
+
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Optional, Set
+
+VIEW_PATTERN = re.compile(
+    r"^CREATE\s+(?:OR\s+REPLACE\s+)?(?:GLOBAL\s+)?(?:TEMPORARY\s+|TEMP\s+)?VIEW\s+"
+    r"(?:IF\s+NOT\s+EXISTS\s+)?([\w.]+)", re.IGNORECASE)
+TABLE_PATTERN = re.compile(
+    r"^CREATE\s+(?:OR\s+REPLACE\s+)?(?:EXTERNAL\s+)?TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?([\w.]+)",
+    re.IGNORECASE)
+INSERT_PATTERN = re.compile(r"^INSERT\s+(?:INTO|OVERWRITE)\s+(?:TABLE\s+)?([\w.]+)", re.IGNORECASE)
+DROP_PATTERN = re.compile(r"^DROP\s+(?:TABLE|VIEW)\s+(?:IF\s+EXISTS\s+)?([\w.]+)", re.IGNORECASE)
+QUERY_PATTERN = re.compile(r"^(?:SELECT|WITH)\b", re.IGNORECASE)
+FILE_SOURCE_PATTERN = re.compile(r"\bUSING\s+(CSV|PARQUET|JSON|ORC)\b", re.IGNORECASE)
+PATH_OPTION_PATTERN = re.compile(r"""\bpath\s+['"]([^'"]+)['"]""", re.IGNORECASE)
+
+REFERENCE_PATTERN = re.compile(r"\b(?:FROM|JOIN)\s+([A-Za-z_][\w.]*)", re.IGNORECASE)
+CTE_PATTERN = re.compile(r"(?:\bWITH|,)\s*([A-Za-z_]\w*)\s+AS\s*\(", re.IGNORECASE)
+LITERAL_PATTERN = re.compile(r"'[^']*'|\"[^\"]*\"")
+
+
+@dataclass
+class SqlStatement:
+    """One statement of a pipeline script"""
+    index: int
+    sql: str
+    kind: str  # view, table, insert, drop, query or other
+    target: Optional[str] = None
+    references: Set[str] = field(default_factory=set)
+    source_path: Optional[str] = None  # file read by a USING CSV/PARQUET view
+    origin: Optional[str] = None  # file the statement came from
+
+    @property
+    def label(self) -> str:
+        return f"{self.kind}:{self.target}" if self.target else f"{self.kind}:{self.index}"
+
+    @property
+    def preview(self) -> str:
+        return " ".join(self.sql.split())[:120]
+
+
+def strip_comments(sql: str) -> str:
+    """Remove -- and /* */ comments, leaving quoted strings untouched"""
+    result = []
+    i, length = 0, len(sql)
+    quote = None
+    while i < length:
+        char = sql[i]
+        if quote:
+            result.append(char)
+            if char == quote:
+                quote = None
+            i += 1
+        elif char in ("'", '"', "`"):
+            quote = char
+            result.append(char)
+            i += 1
+        elif sql.startswith("--", i):
+            end = sql.find("\n", i)
+            i = length if end == -1 else end
+        elif sql.startswith("/*", i):
+            end = sql.find("*/", i + 2)
+            i = length if end == -1 else end + 2
+        else:
+            result.append(char)
+            i += 1
+    return "".join(result)
+
+
+def split_statements(sql: str) -> List[str]:
+    """Split a script on semicolons outside quoted strings"""
+    statements, current = [], []
+    quote = None
+    for char in strip_comments(sql):
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in ("'", '"', "`"):
+            quote = char
+        elif char == ";":
+            statements.append("".join(current).strip())
+            current = []
+            continue
+        current.append(char)
+    statements.append("".join(current).strip())
+    return [statement for statement in statements if statement]
+
+
+def mask_literals(sql: str) -> str:
+    """Blank the content of '...' and "..." literals so it is not matched as SQL"""
+    return LITERAL_PATTERN.sub(lambda match: match.group(0)[0] * 2, sql)
+
+
+def find_references(sql: str) -> Set[str]:
+    """Relations read by a statement, excluding its own CTE names"""
+    sql = mask_literals(sql)
+    ctes = {name.lower() for name in CTE_PATTERN.findall(sql)}
+    return {name.lower() for name in REFERENCE_PATTERN.findall(sql)} - ctes
+
+
+def parse_statement(index: int, sql: str, origin: Optional[str] = None) -> SqlStatement:
+    statement = SqlStatement(index=index, sql=sql, kind="other", origin=origin)
+    for kind, pattern in (("view", VIEW_PATTERN), ("table", TABLE_PATTERN),
+                          ("insert", INSERT_PATTERN), ("drop", DROP_PATTERN)):
+        match = pattern.match(sql)
+        if match:
+            statement.kind, statement.target = kind, match.group(1).lower()
+            break
+    else:
+        if QUERY_PATTERN.match(sql):
+            statement.kind = "query"
+
+    if statement.kind != "drop":
+        statement.references = find_references(sql) - {statement.target}
+    if FILE_SOURCE_PATTERN.search(sql):
+        path = PATH_OPTION_PATTERN.search(sql)
+        statement.source_path = path.group(1).strip() if path else None
+    return statement
+
+
+def parse_script(sql: str, origin: Optional[str] = None, start_index: int = 1) -> List[SqlStatement]:
+    return [parse_statement(start_index + i, statement, origin)
+            for i, statement in enumerate(split_statements(sql))]
+
+
+def parse_file(path: Path, start_index: int = 1) -> List[SqlStatement]:
+    path = Path(path)
+    return parse_script(path.read_text(), origin=str(path), start_index=start_index)
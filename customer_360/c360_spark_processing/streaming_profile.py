@@ -0,0 +1,485 @@
+#!/usr/bin/env python3
+"""
+Customer Analytics C360 - Streaming Profile Pipeline
+Structured Streaming variant of the transactions → fct_customer_360_profile
+chain. New transaction and app-usage CSV files are read from a landing
+directory as they arrive, per-customer aggregates are kept in streaming state,
+and each micro-batch writes the profiles of the customers it touched as one
+delta file of the streaming snapshot of customer_analytics_c360.
+
+The snapshot is a directory of delta-<batch id>.parquet files, each holding
+the profiles updated by one micro-batch, so a batch costs the customers it
+updated rather than all of them. The profile of a customer is its row of the
+latest batch (read_snapshot). Once --compact-every files have accumulated,
+they are merged into one file with the latest row of each customer. The batch
+export is left alone: the snapshot has its own directory, and the API applies
+it over the export with pyarrow, without Spark.
+
+The state replaces int_customer_transactions_summary and
+int_customer_app_usage_summary; the fact and the data product view run
+unchanged from their SQL files on top of it. Customers, loyalty and support
+are static inputs loaded once at start-up.
+
+Differences with the batch pipeline:
+- transaction_id is assumed unique, so transactions are counted, not
+  deduplicated; the item-level columns (avg_categories_per_order,
+  avg_brands_per_order, total_items_purchased) are left NULL since line items
+  are not streamed. Neither is used by the data product.
+- The 90-day activity and the recency columns are computed when a customer is
+  updated; profiles of customers without new events keep the values of their
+  last update until the next batch run.
+- Files must be moved into the landing directory complete (write elsewhere,
+  then rename); names starting with "_" or "." are ignored.
+
+Usage: python streaming_profile.py [--seed] [--available-now] [--trigger-seconds 10]
+       [--landing-dir data/landing] [--checkpoint-dir data/streaming/checkpoint]
+       [--snapshot data/streaming/customer_analytics_c360] [--compact-every 100]
+"""
+
+import argparse
+import os
+import re
+import shutil
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Iterator, List, Optional, Set, Dict
+
+import pandas as pd
+from pyspark.sql import SparkSession, DataFrame
+from pyspark.sql.functions import col, lit, row_number
+from pyspark.sql.streaming import StreamingQuery
+from pyspark.sql.streaming.state import GroupState, GroupStateTimeout
+from pyspark.sql.window import Window
+
+from dag_runner import discover_statements
+from export import EXPORT_TABLE, write_single_file
+from ingest import ParquetIngest, DEFAULT_DATA_DIR
+from pipeline_runner import create_spark_session
+from source_schemas import RAW_SOURCES
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+DEFAULT_LANDING_DIR = SCRIPT_DIR / "data" / "landing"
+DEFAULT_CHECKPOINT_DIR = SCRIPT_DIR / "data" / "streaming" / "checkpoint"
+DEFAULT_SNAPSHOT_DIR = SCRIPT_DIR / "data" / "streaming" / EXPORT_TABLE
+DEFAULT_COMPACT_EVERY = 100
+BATCH_COLUMN = "batch_id"
+DELTA_FILE = re.compile(r"delta-(\d+)\.parquet")
+TRANSACTIONS_SUMMARY = "int_customer_transactions_summary"
+APP_USAGE_SUMMARY = "int_customer_app_usage_summary"
+STATIC_CUSTOMERS = "streaming_static_customers"
+PROFILE_VIEWS = ["fct_customer_360_profile", EXPORT_TABLE]
+STREAMED_SOURCES = ["transactions", "app_usage"]
+RECENT_DAYS = 90
+
+ROCKSDB_PROVIDER = "org.apache.spark.sql.execution.streaming.state.RocksDBStateStoreProvider"
+
+# Transactions and app sessions are unioned into one event stream per customer
+TRANSACTION_EVENTS = [
+    "customer_id", "'transaction' as kind",
+    "transaction_date as event_ts", "DATE(transaction_date) as event_date",
+    "total_amount as amount", "channel",
+    "CASE WHEN preferred_channel = channel THEN 1 ELSE 0 END as preferred",
+    "CAST(NULL AS INT) as session_minutes", "CAST(NULL AS INT) as pages_viewed",
+    "CAST(NULL AS INT) as actions_taken", "CAST(NULL AS STRING) as device_type",
+]
+
+SESSION_EVENTS = [
+    "customer_id", "'session' as kind",
+    "session_start as event_ts", "session_date as event_date",
+    "CAST(NULL AS DOUBLE) as amount", "CAST(NULL AS STRING) as channel", "0 as preferred",
+    "session_duration_minutes as session_minutes", "pages_viewed",
+    "actions_taken", "device_type",
+]
+
+# Columns of both summaries; they are cast to the batch views' types on write
+OUTPUT_SCHEMA = (
+    "customer_id STRING, total_transactions BIGINT, total_spent DOUBLE, avg_order_value DOUBLE, "
+    "first_purchase_date TIMESTAMP, last_purchase_date TIMESTAMP, channels_used BIGINT, "
+    "shopping_days BIGINT, preferred_channel_usage BIGINT, avg_categories_per_order DOUBLE, "
+    "avg_brands_per_order DOUBLE, total_items_purchased BIGINT, transactions_last_90d BIGINT, "
+    "spent_last_90d DOUBLE, total_sessions BIGINT, total_session_minutes BIGINT, "
+    "avg_session_duration DOUBLE, total_pages_viewed BIGINT, total_actions_taken BIGINT, "
+    "last_app_use_date DATE, unique_device_types BIGINT, engagement_score DOUBLE"
+)
+
+STATE_SCHEMA = (
+    "total_transactions BIGINT, total_spent DOUBLE, amount_count BIGINT, "
+    "first_purchase_us BIGINT, last_purchase_us BIGINT, channels ARRAY<STRING>, "
+    "shopping_days ARRAY<DATE>, preferred_channel_usage BIGINT, recent_days ARRAY<DATE>, "
+    "recent_transactions ARRAY<BIGINT>, recent_spent ARRAY<DOUBLE>, total_sessions BIGINT, "
+    "total_session_minutes BIGINT, minutes_count BIGINT, total_pages_viewed BIGINT, "
+    "total_actions_taken BIGINT, last_app_use_date DATE, device_types ARRAY<STRING>"
+)
+
+
+def _add(total, values: pd.Series, cast=float):
+    """SUM semantics: NULL only while no value has been seen"""
+    values = values.dropna()
+    if values.empty:
+        return total
+    # Nullable integer columns arrive as float64; BIGINT state must get ints back
+    return (total or 0) + cast(values.sum())
+
+
+@dataclass
+class ProfileState:
+    """
+    Per-customer aggregates kept in the streaming state
+
+    Fields follow STATE_SCHEMA. Distinct channels, shopping days and devices
+    are kept as sets; the 90-day activity is kept per day and pruned, so the
+    state of a customer stays bounded by their distinct days.
+    """
+    total_transactions: int = 0
+    total_spent: Optional[float] = None
+    amount_count: int = 0
+    first_purchase_us: Optional[int] = None
+    last_purchase_us: Optional[int] = None
+    channels: Set[str] = field(default_factory=set)
+    shopping_days: Set[date] = field(default_factory=set)
+    preferred_channel_usage: int = 0
+    recent: Dict[date, List] = field(default_factory=dict)  # day -> [transactions, spent]
+    total_sessions: int = 0
+    total_session_minutes: Optional[int] = None
+    minutes_count: int = 0
+    total_pages_viewed: Optional[int] = None
+    total_actions_taken: Optional[int] = None
+    last_app_use_date: Optional[date] = None
+    device_types: Set[str] = field(default_factory=set)
+
+    @classmethod
+    def from_state(cls, state: GroupState) -> "ProfileState":
+        if not state.exists:
+            return cls()
+        (total_transactions, total_spent, amount_count, first_purchase_us, last_purchase_us, channels,
+         shopping_days, preferred_channel_usage, recent_days, recent_transactions, recent_spent,
+         total_sessions, total_session_minutes, minutes_count, total_pages_viewed, total_actions_taken,
+         last_app_use_date, device_types) = state.get
+        return cls(
+            total_transactions, total_spent, amount_count, first_purchase_us, last_purchase_us,
+            set(channels), set(shopping_days), preferred_channel_usage,
+            {day: [count, spent] for day, count, spent in zip(recent_days, recent_transactions, recent_spent)},
+            total_sessions, total_session_minutes, minutes_count, total_pages_viewed, total_actions_taken,
+            last_app_use_date, set(device_types),
+        )
+
+    def to_state(self) -> tuple:
+        days = sorted(self.recent)
+        return (
+            self.total_transactions, self.total_spent, self.amount_count, self.first_purchase_us,
+            self.last_purchase_us, sorted(self.channels), sorted(self.shopping_days),
+            self.preferred_channel_usage, days, [self.recent[day][0] for day in days],
+            [self.recent[day][1] for day in days], self.total_sessions, self.total_session_minutes,
+            self.minutes_count, self.total_pages_viewed, self.total_actions_taken, self.last_app_use_date,
+            sorted(self.device_types),
+        )
+
+    def add_transactions(self, events: pd.DataFrame, since: date):
+        if events.empty:
+            return
+        self.total_transactions += len(events)
+        self.total_spent = _add(self.total_spent, events["amount"])
+        self.amount_count += int(events["amount"].count())
+        # Epoch micros of the session-local wall time, as handed over by Arrow
+        first_us = pd.Timestamp(events["event_ts"].min()).value // 1000
+        last_us = pd.Timestamp(events["event_ts"].max()).value // 1000
+        self.first_purchase_us = first_us if self.first_purchase_us is None else min(self.first_purchase_us, first_us)
+        self.last_purchase_us = last_us if self.last_purchase_us is None else max(self.last_purchase_us, last_us)
+        self.channels.update(events["channel"].dropna())
+        self.shopping_days.update(events["event_date"].dropna())
+        self.preferred_channel_usage += int(events["preferred"].sum())
+        recent = events[events["event_date"] >= since]
+        for day, group in recent.groupby("event_date"):
+            counts = self.recent.setdefault(day, [0, 0.0])
+            counts[0] += len(group)
+            counts[1] += float(group["amount"].sum())
+
+    def add_sessions(self, events: pd.DataFrame):
+        if events.empty:
+            return
+        self.total_sessions += len(events)
+        self.total_session_minutes = _add(self.total_session_minutes, events["session_minutes"], int)
+        self.minutes_count += int(events["session_minutes"].count())
+        self.total_pages_viewed = _add(self.total_pages_viewed, events["pages_viewed"], int)
+        self.total_actions_taken = _add(self.total_actions_taken, events["actions_taken"], int)
+        last_day = events["event_date"].dropna().max() if events["event_date"].notna().any() else None
+        if last_day is not None:
+            self.last_app_use_date = last_day if self.last_app_use_date is None else max(self.last_app_use_date, last_day)
+        self.device_types.update(events["device_type"].dropna())
+
+    def prune_recent(self, since: date):
+        self.recent = {day: counts for day, counts in self.recent.items() if day >= since}
+
+    def summary(self, customer_id: str, since: date) -> dict:
+        """One row of OUTPUT_SCHEMA, with the same expressions as the batch summaries"""
+        def timestamp(us):
+            return None if us is None else pd.Timestamp(us, unit="us")
+        recent = [counts for day, counts in self.recent.items() if day >= since]
+        engagement = None
+        if None not in (self.total_session_minutes, self.total_pages_viewed, self.total_actions_taken):
+            engagement = (self.total_session_minutes * 0.3 + self.total_pages_viewed * 0.4
+                          + self.total_actions_taken * 0.3)
+        return {
+            "customer_id": customer_id,
+            "total_transactions": self.total_transactions,
+            "total_spent": self.total_spent,
+            "avg_order_value": self.total_spent / self.amount_count if self.amount_count else None,
+            "first_purchase_date": timestamp(self.first_purchase_us),
+            "last_purchase_date": timestamp(self.last_purchase_us),
+            "channels_used": len(self.channels),
+            "shopping_days": len(self.shopping_days),
+            "preferred_channel_usage": self.preferred_channel_usage,
+            "avg_categories_per_order": None,
+            "avg_brands_per_order": None,
+            "total_items_purchased": None,
+            "transactions_last_90d": sum(counts[0] for counts in recent),
+            "spent_last_90d": sum(counts[1] for counts in recent),
+            "total_sessions": self.total_sessions,
+            "total_session_minutes": self.total_session_minutes,
+            "avg_session_duration": self.total_session_minutes / self.minutes_count if self.minutes_count else None,
+            "total_pages_viewed": self.total_pages_viewed,
+            "total_actions_taken": self.total_actions_taken,
+            "last_app_use_date": self.last_app_use_date,
+            "unique_device_types": len(self.device_types),
+            "engagement_score": engagement,
+        }
+
+
+def update_profile(key: tuple, batches: Iterator[pd.DataFrame], state: GroupState) -> Iterator[pd.DataFrame]:
+    """applyInPandasWithState function: fold the new events of one customer into its state"""
+    since = date.today() - timedelta(days=RECENT_DAYS)
+    profile = ProfileState.from_state(state)
+    for events in batches:
+        profile.add_transactions(events[events["kind"] == "transaction"], since)
+        profile.add_sessions(events[events["kind"] == "session"])
+    profile.prune_recent(since)
+    state.update(profile.to_state())
+    yield pd.DataFrame([profile.summary(key[0], since)])
+
+
+def delta_path(snapshot_dir: Path, batch_id: int) -> Path:
+    return snapshot_dir / f"delta-{batch_id:010d}.parquet"
+
+
+def delta_batches(snapshot_dir: Path) -> List[int]:
+    """Batch ids of the delta files of a snapshot, in order"""
+    if not snapshot_dir.is_dir():
+        return []
+    return sorted(int(m.group(1)) for m in map(DELTA_FILE.fullmatch, os.listdir(snapshot_dir)) if m)
+
+
+def _latest_rows(spark: SparkSession, snapshot_dir: Path, batches: List[int]) -> DataFrame:
+    """The row of each customer from the latest of these batches that updated it, with its batch id"""
+    deltas = spark.read.parquet(*[str(delta_path(snapshot_dir, b)) for b in batches])
+    latest = Window.partitionBy("customer_id").orderBy(col(BATCH_COLUMN).desc())
+    return deltas.withColumn("_latest", row_number().over(latest)).where("_latest = 1").drop("_latest")
+
+
+def read_snapshot(spark: SparkSession, snapshot_dir: Path = DEFAULT_SNAPSHOT_DIR) -> DataFrame:
+    """The current profiles of a streaming snapshot, one row per customer"""
+    snapshot_dir = Path(snapshot_dir)
+    return _latest_rows(spark, snapshot_dir, delta_batches(snapshot_dir)).drop(BATCH_COLUMN)
+
+
+class StreamingProfilePipeline:
+    """
+    Keeps the customer_analytics_c360 snapshot current from landed files
+
+    The static views are defined and cached once in the session. The streaming
+    query must then be started from the same session: its micro-batches run
+    the fact and data product SQL in a clone of it, restricted to the
+    customers whose state changed.
+    """
+
+    def __init__(self, spark: SparkSession, landing_dir: Path = DEFAULT_LANDING_DIR,
+                 checkpoint_dir: Path = DEFAULT_CHECKPOINT_DIR, snapshot_dir: Path = DEFAULT_SNAPSHOT_DIR,
+                 root: Path = SCRIPT_DIR, compact_every: int = DEFAULT_COMPACT_EVERY):
+        self.spark = spark
+        self.landing_dir = Path(landing_dir)
+        self.checkpoint_dir = Path(checkpoint_dir)
+        self.snapshot_dir = Path(snapshot_dir)
+        self.compact_every = compact_every
+        self.profile_statements = []
+        for _, statement in discover_statements(root):
+            if statement.target in PROFILE_VIEWS:
+                self.profile_statements.append(statement)
+            else:
+                spark.sql(statement.sql)
+        # The streamed summaries are written with the types of their batch views
+        self.summary_schemas = {name: spark.table(name).schema for name in [TRANSACTIONS_SUMMARY, APP_USAGE_SUMMARY]}
+        self.customers = spark.table("src_customers").cache()
+        # Micro-batches run in a clone of the session, which sees the views defined before start
+        self.customers.createOrReplaceTempView(STATIC_CUSTOMERS)
+        for name in ["src_loyalty_program", "int_customer_support_summary"]:
+            spark.table(name).cache()
+
+    def landing_path(self, source: str) -> Path:
+        return self.landing_dir / source
+
+    def _read_landing(self, source: str) -> DataFrame:
+        path = self.landing_path(source)
+        path.mkdir(parents=True, exist_ok=True)
+        return self.spark.readStream \
+            .schema(RAW_SOURCES[source].ddl) \
+            .option("header", "true") \
+            .option("mode", "FAILFAST") \
+            .option("pathGlobFilter", "*.csv") \
+            .csv(str(path))
+
+    def events(self) -> DataFrame:
+        """Completed transactions of known customers and app sessions, as one stream"""
+        transactions = self._read_landing("transactions") \
+            .where("status = 'completed'") \
+            .join(self.customers.select("customer_id", "preferred_channel"), "customer_id") \
+            .selectExpr(*TRANSACTION_EVENTS)
+        sessions = self._read_landing("app_usage").selectExpr(*SESSION_EVENTS)
+        return transactions.unionByName(sessions)
+
+    def compact(self, spark: SparkSession, batch_id: int):
+        """
+        Merge the files of the batches before batch_id into the latest of them
+
+        The file of batch_id is left out, so that a replay of the batch still
+        finds earlier files and writes a delta. Rows keep the batch id they
+        were written with: a failure before the merged files are removed
+        leaves duplicates that read_snapshot resolves.
+        """
+        older = [b for b in delta_batches(self.snapshot_dir) if b < batch_id]
+        merged = _latest_rows(spark, self.snapshot_dir, older)
+        write_single_file(merged, "parquet", delta_path(self.snapshot_dir, older[-1]))
+        for batch in older[:-1]:
+            delta_path(self.snapshot_dir, batch).unlink(missing_ok=True)
+
+    def write_batch(self, updates: DataFrame, batch_id: int):
+        """foreachBatch sink: write the profiles of the updated customers as the delta file of the batch"""
+        started = time.perf_counter()
+        spark = updates.sparkSession
+        updates = updates.cache()
+        updated = updates.count()
+        # A replayed batch rewrites its own file, so only earlier files count
+        written = [b for b in delta_batches(self.snapshot_dir) if b < batch_id]
+        full = not written
+        if updated == 0 and not full:
+            updates.unpersist()
+            return
+
+        for name, where in [(TRANSACTIONS_SUMMARY, "total_transactions > 0"), (APP_USAGE_SUMMARY, "total_sessions > 0")]:
+            updates.where(where) \
+                .select(*[col(f.name).cast(f.dataType) for f in self.summary_schemas[name]]) \
+                .createOrReplaceTempView(name)
+        # The first file holds every customer, later ones only the updated customers
+        updated_ids = updates.select("customer_id")
+        customers = spark.table(STATIC_CUSTOMERS)
+        if not full:
+            customers = customers.join(updated_ids, "customer_id", "left_semi")
+        customers.createOrReplaceTempView("src_customers")
+        for statement in self.profile_statements:
+            spark.sql(statement.sql)
+        profiles = spark.table(EXPORT_TABLE).withColumn(BATCH_COLUMN, lit(batch_id))
+        write_single_file(profiles, "parquet", delta_path(self.snapshot_dir, batch_id))
+        updates.unpersist()
+        compacted = not full and len(written) >= self.compact_every
+        if compacted:
+            self.compact(spark, batch_id)
+        print(f"   ✓ batch {batch_id}: {updated} customers updated, "
+              f"{'snapshot created' if full else 'snapshot compacted' if compacted else 'delta written'} "
+              f"in {time.perf_counter() - started:.1f}s")
+
+    def start(self, trigger_seconds: float = 10, available_now: bool = False) -> StreamingQuery:
+        writer = self.events() \
+            .groupBy("customer_id") \
+            .applyInPandasWithState(update_profile, OUTPUT_SCHEMA, STATE_SCHEMA, "update",
+                                    GroupStateTimeout.NoTimeout) \
+            .writeStream \
+            .queryName("c360_streaming_profile") \
+            .outputMode("update") \
+            .option("checkpointLocation", str(self.checkpoint_dir)) \
+            .foreachBatch(self.write_batch)
+        if available_now:
+            writer = writer.trigger(availableNow=True)
+        else:
+            writer = writer.trigger(processingTime=f"{trigger_seconds} seconds")
+        return writer.start()
+
+
+def seed_landing(landing_dir: Path, data_dir: Path) -> List[Path]:
+    """Land the mock CSV history of the streamed sources, unless files already landed"""
+    seeded = []
+    for name in STREAMED_SOURCES:
+        target_dir = landing_dir / name
+        target_dir.mkdir(parents=True, exist_ok=True)
+        if any(target_dir.glob("*.csv")):
+            continue
+        target = target_dir / f"{name}-history.csv"
+        # Hidden while copying, so the file source never reads a partial file
+        staging = target_dir / f"_{target.name}.tmp"
+        shutil.copyfile(data_dir / RAW_SOURCES[name].csv_path, staging)
+        os.replace(staging, target)
+        seeded.append(target)
+    return seeded
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Stream landed transactions and app usage into the C360 profile snapshot")
+    parser.add_argument("--landing-dir", type=Path, default=DEFAULT_LANDING_DIR,
+                        help="Directory with transactions/ and app_usage/ landing folders")
+    parser.add_argument("--checkpoint-dir", type=Path, default=DEFAULT_CHECKPOINT_DIR,
+                        help="Streaming checkpoint and state directory")
+    parser.add_argument("--snapshot", type=Path, default=DEFAULT_SNAPSHOT_DIR,
+                        help="Snapshot directory of the data product, one delta file per micro-batch")
+    parser.add_argument("--compact-every", type=int, default=DEFAULT_COMPACT_EVERY,
+                        help="Merge the delta files once there are that many")
+    parser.add_argument("--data-dir", type=Path, default=DEFAULT_DATA_DIR,
+                        help="Mock CSV data directory for the static sources and --seed")
+    parser.add_argument("--skip-ingest", action="store_true", help="Do not refresh the Parquet sources first")
+    parser.add_argument("--seed", action="store_true",
+                        help="Land the CSV history of transactions and app usage if nothing has landed yet")
+    parser.add_argument("--trigger-seconds", type=float, default=10, help="Micro-batch interval")
+    parser.add_argument("--available-now", action="store_true",
+                        help="Process the files landed so far, then stop")
+    parser.add_argument("--shuffle-partitions", type=int, default=8,
+                        help="State partitions; fixed by the first run of a checkpoint")
+    args = parser.parse_args(argv)
+
+    data_dir = args.data_dir.resolve()
+    landing_dir = args.landing_dir.resolve()
+    checkpoint_dir = args.checkpoint_dir.resolve()
+    snapshot = args.snapshot.resolve()
+    # Relative data paths in the SQL files are relative to the script directory
+    os.chdir(SCRIPT_DIR)
+
+    if args.seed:
+        for path in seed_landing(landing_dir, data_dir):
+            print(f"   ✓ landed {path}")
+
+    spark = create_spark_session("C360_Streaming_Profile", {
+        "spark.sql.shuffle.partitions": str(args.shuffle_partitions),
+        "spark.sql.streaming.stateStore.providerClass": ROCKSDB_PROVIDER,
+    })
+    try:
+        if not args.skip_ingest:
+            for result in ParquetIngest(data_dir).run(lambda: spark):
+                print(f"   ✓ ingested {result['name']}: {result['rows']} rows in {result['seconds']}s")
+        pipeline = StreamingProfilePipeline(spark, landing_dir, checkpoint_dir, snapshot,
+                                            compact_every=args.compact_every)
+        query = pipeline.start(args.trigger_seconds, args.available_now)
+        print(f"🚀 Streaming {landing_dir} into {snapshot}")
+        try:
+            # Poll instead of awaitTermination so Ctrl-C lands between calls to the JVM
+            while query.isActive:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            query.stop()
+        if query.exception():
+            print(f"❌ Streaming query failed: {query.exception()}")
+            return 1
+    finally:
+        spark.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
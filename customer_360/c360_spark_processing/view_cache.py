@@ -0,0 +1,237 @@
+"""
+Customer Analytics C360 - Automatic View Caching
+Caches the views that more than one executed step reads, so each is computed
+once from the Parquet sources instead of once per reader. A cached view is
+unpersisted as soon as the last step reading it has run.
+
+Views are lazy: a view is only computed by the steps that read it. A use of
+a view is a query, table, insert or the export reading it, directly or
+through uncached views; reads through a cached view hit that view's cache
+instead. Row counts are not uses: Spark prunes a count down to the columns
+and joins it needs, which costs far less than caching the whole view. Views
+read straight from files are never cached: re-reading the Parquet is as fast
+as reading the cache.
+
+A view defined in SQL is analyzed again each time a step reads it, and the
+CTEs of a WITH clause get new ids each time, so Spark never matches it
+against a cached plan. Its name is therefore first re-registered over its
+analyzed DataFrame, which fixes those ids, and the view is persisted as
+read by name: the later steps then read the stored rows.
+
+Caching is off by default: on the mock data it costs about as much as it
+saves. Whether it pays off is measured, not estimated: measure_saving()
+compares the steps that define or read the cached views, the export
+included, with the same steps of an uncached run of the same pipeline.
+"""
+
+import argparse
+import json
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Set, Iterable, Union
+
+from sql_script import SqlStatement
+
+STORAGE_LEVELS = ["MEMORY_AND_DISK", "MEMORY_AND_DISK_DESER", "MEMORY_ONLY", "DISK_ONLY", "NONE"]
+# Caching stays opt-in until measure_saving() shows a net saving for a pipeline
+DEFAULT_STORAGE_LEVEL = "NONE"
+# Consumer key of the export, which reads the data product after the last step
+EXPORT_CONSUMER = "export"
+EXECUTING_KINDS = {"query", "table", "insert"}
+
+
+@dataclass
+class CachedView:
+    """A view chosen for caching and the steps still to read it"""
+    name: str
+    defined_at: int
+    uses: int
+    consumers: Set[Union[int, str]] = field(default_factory=set)
+    pending: Set[Union[int, str]] = field(default_factory=set)
+    materialize_seconds: Optional[float] = None
+    unpersisted_after: Optional[Union[int, str]] = None
+    # Persisted DataFrame of the view, while cached
+    cached: Any = None
+
+
+def plan_view_cache(statements: List[SqlStatement], final_reads: Iterable[str] = (),
+                    min_uses: int = 2) -> Dict[str, CachedView]:
+    """
+    Choose the views to cache and the consumers each one waits for
+
+    Views are considered from the last defined to the first, so the uses of
+    a view already account for the downstream views chosen for caching.
+    """
+    definitions = {s.target: s for s in statements if s.kind == "view"}
+    chosen: Dict[str, CachedView] = {}
+
+    def executes(statement: SqlStatement) -> bool:
+        return statement.kind in EXECUTING_KINDS or statement.target in chosen
+
+    def reads(references: Iterable[str], name: str, before: int) -> bool:
+        """Whether computing these references computes the view, stopping at cached views"""
+        stack, seen = list(references), set()
+        while stack:
+            ref = stack.pop()
+            if ref == name:
+                return True
+            if ref in seen or ref in chosen:
+                continue
+            seen.add(ref)
+            definition = definitions.get(ref)
+            if definition is not None and definition.index < before:
+                stack.extend(definition.references)
+        return False
+
+    for definition in sorted(definitions.values(), key=lambda s: s.index, reverse=True):
+        name = definition.target
+        if definition.source_path is not None:
+            continue
+        consumers: Set[Union[int, str]] = {
+            s.index for s in statements
+            if s.index > definition.index and executes(s) and reads(s.references, name, s.index)
+        }
+        if reads(final_reads, name, float("inf")):
+            consumers.add(EXPORT_CONSUMER)
+        if len(consumers) >= min_uses:
+            chosen[name] = CachedView(name, definition.index, len(consumers), consumers, set(consumers))
+    return chosen
+
+
+class ViewCache:
+    """
+    Caches the planned views as their steps run and releases them
+
+    materialize() is called after a view step defined its view, release()
+    after each step and after the export. Both are safe to call from the
+    concurrent steps of the DAG runner.
+    """
+
+    def __init__(self, spark, statements: List[SqlStatement], storage_level: str = "MEMORY_AND_DISK",
+                 final_reads: Iterable[str] = ()):
+        from pyspark import StorageLevel
+
+        self.spark = spark
+        self.storage_level = storage_level
+        self._level = getattr(StorageLevel, storage_level)
+        self.views = plan_view_cache(statements, final_reads)
+        self._lock = threading.Lock()
+        # Otherwise a cached view keeps one partition per shuffle partition, as
+        # adaptive execution may not coalesce the output of a cached plan
+        spark.conf.set("spark.sql.optimizer.canChangeCachedPlanOutputPartitioning", "true")
+
+    def materialize(self, statement: SqlStatement) -> Optional[Dict[str, Any]]:
+        """Compute the view of a planned step once and store it; returns its row count"""
+        view = self.views.get(statement.target) if statement.kind == "view" else None
+        if view is None:
+            return None
+        started = time.perf_counter()
+        self.spark.table(view.name).createOrReplaceTempView(view.name)
+        view.cached = self.spark.table(view.name).persist(self._level)
+        rows = view.cached.count()
+        view.materialize_seconds = round(time.perf_counter() - started, 3)
+        return {"storage_level": self.storage_level, "uses": view.uses, "rows": rows,
+                "materialize_seconds": view.materialize_seconds}
+
+    def _unpersist(self, view: CachedView):
+        # The name keeps its plan: a late reader recomputes the view instead of failing
+        view.cached.unpersist()
+        view.cached = None
+
+    def release(self, consumer: Union[int, str]) -> List[str]:
+        """Unpersist the cached views this consumer was the last to read"""
+        released = []
+        with self._lock:
+            for view in self.views.values():
+                if consumer not in view.pending:
+                    continue
+                view.pending.discard(consumer)
+                if not view.pending and view.materialize_seconds is not None:
+                    self._unpersist(view)
+                    view.unpersisted_after = consumer
+                    released.append(view.name)
+        return released
+
+    def release_all(self):
+        """Unpersist what a failed or shortened run left cached"""
+        with self._lock:
+            for view in self.views.values():
+                if view.pending and view.materialize_seconds is not None:
+                    self._unpersist(view)
+                    view.pending.clear()
+                    view.unpersisted_after = "end"
+
+    def report(self) -> Dict[str, Any]:
+        """Cached views and what computing and storing them cost"""
+        views = [{
+            "name": view.name,
+            "defined_at": view.defined_at,
+            "uses": view.uses,
+            "consumers": sorted(view.consumers, key=str),
+            "materialize_seconds": view.materialize_seconds,
+            "unpersisted_after": view.unpersisted_after,
+        } for view in sorted(self.views.values(), key=lambda v: v.defined_at)]
+        return {
+            "storage_level": self.storage_level,
+            "views": views,
+            "materialize_seconds": round(sum(v["materialize_seconds"] or 0.0 for v in views), 3),
+        }
+
+
+def _affected_seconds(report: Dict[str, Any], indexes: Set[int], export: bool) -> float:
+    seconds = sum(step["wall_seconds"] for step in report["steps"] if step["index"] in indexes)
+    if export:
+        seconds += (report.get("export") or {}).get("seconds") or 0.0
+    return seconds
+
+
+def measure_saving(report: Dict[str, Any], baseline: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Time caching saved in a run, measured against an uncached baseline run
+
+    Only the steps that define or read a cached view differ between the two
+    runs: the defining steps pay for computing and storing the views, the
+    readers read them back. The saving is what those steps took in the
+    baseline minus what they took with the cache, so it is net of the
+    materialization and negative when caching made the run slower.
+    """
+    cached = [view for view in report["cache"]["views"] if view["materialize_seconds"] is not None]
+    indexes = {view["defined_at"] for view in cached}
+    indexes.update(c for view in cached for c in view["consumers"] if c != EXPORT_CONSUMER)
+    export = any(EXPORT_CONSUMER in view["consumers"] for view in cached)
+    cached_seconds = _affected_seconds(report, indexes, export)
+    baseline_seconds = _affected_seconds(baseline, indexes, export)
+    return {
+        "baseline_run_id": baseline["run_id"],
+        "steps": sorted(indexes) + ([EXPORT_CONSUMER] if export else []),
+        "baseline_seconds": round(baseline_seconds, 3),
+        "cached_seconds": round(cached_seconds, 3),
+        "saved_seconds": round(baseline_seconds - cached_seconds, 3),
+    }
+
+
+def find_baseline(report_dir: Path, report: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """The latest successful uncached run of the same pipeline, with the same row counting"""
+    for path in sorted(Path(report_dir).glob("pipeline_run_*.json"), reverse=True):
+        with open(path) as f:
+            candidate = json.load(f)
+        if candidate.get("cache") is None and candidate.get("status") == "success" \
+                and candidate.get("pipeline") == report.get("pipeline") \
+                and candidate.get("count_rows") == report.get("count_rows"):
+            return candidate
+    return None
+
+
+def add_cache_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--cache-level", choices=STORAGE_LEVELS, default=DEFAULT_STORAGE_LEVEL,
+                        help="Storage level of the views read by several steps (default NONE: no caching)")
+
+
+def view_cache_from_args(spark, statements: List[SqlStatement], args: argparse.Namespace,
+                         final_reads: Iterable[str] = ()) -> Optional[ViewCache]:
+    """The ViewCache of a runner, or None with --cache-level NONE"""
+    if args.cache_level == "NONE":
+        return None
+    return ViewCache(spark, statements, args.cache_level, final_reads=final_reads)
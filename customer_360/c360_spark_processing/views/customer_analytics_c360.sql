@@ -104,8 +104,8 @@ WHERE customer_id IS NOT NULL
   AND email IS NOT NULL
   AND email != '';
 
--- Add comment for data product metadata
-COMMENT ON customer_analytics_c360 IS '
+-- Data product metadata (temporary views cannot carry a COMMENT ON TABLE)
+/*
 Customer 360 Data Product (customer.analytics.C360)
 ==================================================
 
@@ -128,4 +128,4 @@ Access Control: Row-level security based on customer consent flags
 
 Contact: Customer Domain Team (customer-data-team@company.com)
 Last Updated: 2024-06-20
-';
+*/
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Dedup Strategy Benchmark
+
+Compares the dedup() macro with sort-free candidates on generated CDC rows:
+1. row_number: the macro, a window sorting every key's changes, then keeping the first
+2. max_by: one aggregation per key keeping the latest change as a struct
+3. hash_join: a hash aggregation of a fixed-width ordering key per key,
+   joined back to the changes with a shuffled hash join
+
+The candidates live here rather than in macros/dedup.sql until one of them
+beats the macro. The CDC rows are generated once to Parquet, then each
+strategy runs several times, writing to the noop sink so only the dedup is
+timed. Each candidate's output is then compared row by row with the macro's.
+
+Usage:
+    python benchmark_dedup.py [--rows 10000000] [--changes-per-key 5] [--runs 3]
+"""
+
+import argparse
+import json
+import os
+import re
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+try:
+    from pyspark.sql import SparkSession, functions as F
+except ImportError:
+    print("ERROR: PySpark not installed. Please run: pip install pyspark")
+    sys.exit(1)
+
+from sql_compiler import SqlCompiler
+
+STRATEGIES = ["row_number", "max_by", "hash_join"]
+CDC_VIEW = "src_cdc_sys_user"
+PRIMARY_KEY = "user_id"
+BASE_TS_MS = 1_700_000_000_000
+
+# Rank of a change's operation; on a timestamp tie the macro keeps c, then d, then u
+OP_RANK = "case when __op = 'c' then 4 when __op = 'd' then 3 when __op = 'u' then 2 else 1 end"
+
+# __source_ts_ms, __ts_ms and the operation rank packed into one decimal, so
+# that its max is a hash aggregation. A null timestamp packs as 0 and sorts
+# last; both timestamps must lie between 0 and 10^14 - 2 ms.
+ORDER_KEY = ("cast(coalesce(__source_ts_ms + 1, 0) as decimal(20, 0)) * 1000000000000000"
+             " + cast(coalesce(__ts_ms + 1, 0) as decimal(20, 0)) * 10"
+             f" + {OP_RANK}")
+
+
+def create_spark_session(driver_memory: str) -> SparkSession:
+    """Local session using every core: the test session is tuned for a few rows"""
+    spark = SparkSession.builder \
+        .appName("DedupBenchmark") \
+        .master("local[*]") \
+        .config("spark.driver.memory", driver_memory) \
+        .config("spark.sql.adaptive.enabled", "true") \
+        .config("spark.sql.catalogImplementation", "in-memory") \
+        .config("spark.ui.enabled", "false") \
+        .config("spark.ui.showConsoleProgress", "false") \
+        .config("spark.driver.bindAddress", "127.0.0.1") \
+        .config("spark.driver.host", "127.0.0.1") \
+        .getOrCreate()
+    spark.sparkContext.setLogLevel("ERROR")
+    return spark
+
+
+def generate_cdc(spark: SparkSession, rows: int, changes_per_key: int, tenants: int, path: Path):
+    """
+    Write CDC rows of a sys_user-like table to Parquet
+
+    Each key gets about changes_per_key changes. Pairs of changes share their
+    __source_ts_ms and differ by __ts_ms, and no two changes of a key share
+    both, so the latest change of every key is unique and both strategies
+    must keep the same row.
+    """
+    keys = max(rows // changes_per_key, 1)
+    version = F.floor(F.col("id") / keys)
+    op_bucket = F.pmod(F.xxhash64("id"), F.lit(10))
+    spark.range(rows).select(
+        F.concat(F.lit("tenant_"), (F.col("id") % keys % tenants).cast("string")).alias("__db"),
+        (F.col("id") % keys).alias(PRIMARY_KEY),
+        F.concat(F.lit("user_"), (F.col("id") % keys).cast("string")).alias("user_name"),
+        F.concat(F.lit("user_"), F.col("id").cast("string"), F.lit("@example.com")).alias("email"),
+        F.when(op_bucket < 7, "active").otherwise("locked").alias("status"),
+        (F.lit(BASE_TS_MS) + F.floor(version / 2) * 1000).cast("bigint").alias("__source_ts_ms"),
+        (F.lit(BASE_TS_MS) + version * 1000 + 500).cast("bigint").alias("__ts_ms"),
+        F.when(version == 0, "c").when(op_bucket == 0, "d").otherwise("u").alias("__op"),
+    ).write.mode("overwrite").parquet(str(path))
+
+
+def strategy_sql(compiler: SqlCompiler, strategy: str, table: str, primary_key: str) -> str:
+    """SQL keeping the latest change of each __db and primary key, with dedup()'s output columns"""
+    if strategy == "row_number":
+        return compiler.render(f"{{{{ dedup('{table}', '{primary_key}') }}}}").sql
+    keys = ["__db"] + [column.strip() for column in primary_key.split(",") if column.strip()]
+    if strategy == "max_by":
+        # The struct compares field by field, like the window ordering of the macro
+        return f"""
+            with latest as (
+                select max_by(struct(*), struct(__source_ts_ms, __ts_ms, {OP_RANK})) as row
+                from {table}
+                group by {', '.join(keys)}
+            )
+            select 1 as row_num, row.* from latest where row.__op <> 'd'
+        """
+    if strategy == "hash_join":
+        # Keys whose latest changes tie on all three fields keep every tied row
+        on = " and ".join([f"changes.{key} <=> latest.{key}" for key in keys]
+                          + ["changes.__order = latest.__order"])
+        return f"""
+            with changes as (
+                select *, {ORDER_KEY} as __order from {table}
+            )
+            ,latest as (
+                select {', '.join(keys)}, max(__order) as __order from changes group by {', '.join(keys)}
+            )
+            select /*+ SHUFFLE_HASH(latest) */ 1 as row_num, changes.* except (__order)
+            from changes join latest on {on}
+            where changes.__op <> 'd'
+        """
+    raise ValueError(f"Unknown strategy '{strategy}', expected one of {', '.join(STRATEGIES)}")
+
+
+def plan_operators(spark: SparkSession, sql: str) -> List[str]:
+    """Aggregates, joins and sorts of a strategy's physical plan, for the report"""
+    plan = spark.sql(sql)._jdf.queryExecution().executedPlan().toString()
+    operators = ["ObjectHashAggregate", "SortAggregate", "HashAggregate", "ShuffledHashJoin",
+                 "SortMergeJoin", "BroadcastHashJoin", "Window", "Sort"]
+    return [operator for operator in operators if re.search(rf"\b{operator}\b", plan)]
+
+
+def time_strategy(spark: SparkSession, sql: str, runs: int) -> Dict[str, Any]:
+    """Run a strategy to the noop sink; the first run also warms the Parquet reads"""
+    seconds = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        spark.sql(sql).write.format("noop").mode("overwrite").save()
+        seconds.append(round(time.perf_counter() - started, 3))
+    return {"runs": seconds, "min_seconds": min(seconds), "median_seconds": round(statistics.median(seconds), 3)}
+
+
+def compare_outputs(spark: SparkSession, sqls: Dict[str, str]) -> Dict[str, Any]:
+    """Rows each candidate and the macro keep that the other does not, with duplicates counted"""
+    baseline = spark.sql(sqls[STRATEGIES[0]])
+    comparison: Dict[str, Any] = {"rows": {s: spark.sql(sqls[s]).count() for s in STRATEGIES}}
+    for strategy in STRATEGIES[1:]:
+        other = spark.sql(sqls[strategy])
+        comparison[strategy] = {
+            f"only_in_{STRATEGIES[0]}": baseline.exceptAll(other).count(),
+            f"only_in_{strategy}": other.exceptAll(baseline).count(),
+        }
+    return comparison
+
+
+def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    spark = create_spark_session(args.driver_memory)
+    compiler = SqlCompiler()
+    work_dir = Path(tempfile.mkdtemp(prefix="dedup-benchmark-", dir=args.work_dir))
+    try:
+        print(f"🔧 Generating {args.rows:,} CDC rows, {args.changes_per_key} changes per key")
+        started = time.perf_counter()
+        generate_cdc(spark, args.rows, args.changes_per_key, args.tenants, work_dir / "cdc")
+        print(f"   ✓ {time.perf_counter() - started:.1f}s")
+        spark.read.parquet(str(work_dir / "cdc")).createOrReplaceTempView(CDC_VIEW)
+
+        sqls = {strategy: strategy_sql(compiler, strategy, CDC_VIEW, PRIMARY_KEY) for strategy in STRATEGIES}
+        results: Dict[str, Any] = {"rows": args.rows, "changes_per_key": args.changes_per_key,
+                                   "cores": os.cpu_count(), "strategies": {}}
+        for strategy in STRATEGIES:
+            print(f"⏱️  {strategy}: {args.runs} runs")
+            results["strategies"][strategy] = time_strategy(spark, sqls[strategy], args.runs)
+            results["strategies"][strategy]["operators"] = plan_operators(spark, sqls[strategy])
+            print(f"   ✓ min {results['strategies'][strategy]['min_seconds']}s, "
+                  f"median {results['strategies'][strategy]['median_seconds']}s")
+
+        if not args.skip_check:
+            print("🔍 Comparing outputs")
+            results["comparison"] = compare_outputs(spark, sqls)
+            results["identical"] = not any(count for strategy in STRATEGIES[1:]
+                                           for count in results["comparison"][strategy].values())
+        return results
+    finally:
+        spark.stop()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def print_summary(results: Dict[str, Any]):
+    baseline = results["strategies"][STRATEGIES[0]]["median_seconds"]
+    print("\n" + "=" * 60)
+    print("📊 DEDUP BENCHMARK")
+    print("=" * 60)
+    print(f"Rows: {results['rows']:,} ({results['changes_per_key']} changes per key), {results['cores']} cores")
+    for strategy in STRATEGIES:
+        timing = results["strategies"][strategy]
+        speedup = f", {baseline / timing['median_seconds']:.2f}x" if timing["median_seconds"] else ""
+        print(f"{strategy + ' median:':19}{timing['median_seconds']}s{speedup} ({', '.join(timing['operators'])})")
+    if "comparison" in results:
+        status = "✅ identical" if results["identical"] else "❌ different"
+        print(f"Outputs:           {status} ({results['comparison']['rows'][STRATEGIES[0]]:,} rows)")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Compare the dedup() macro with sort-free candidates")
+    parser.add_argument("--rows", type=int, default=10_000_000, help="Generated CDC rows")
+    parser.add_argument("--changes-per-key", type=int, default=5, help="Average changes of each key")
+    parser.add_argument("--tenants", type=int, default=10, help="Distinct __db values")
+    parser.add_argument("--runs", type=int, default=3, help="Timed runs of each strategy")
+    parser.add_argument("--driver-memory", default="4g")
+    parser.add_argument("--work-dir", type=Path, default=None, help="Where the generated Parquet goes")
+    parser.add_argument("--skip-check", action="store_true", help="Do not compare the outputs")
+    parser.add_argument("--output", type=Path, help="Write the results as JSON")
+    args = parser.parse_args(argv)
+
+    results = run_benchmark(args)
+    print_summary(results)
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0 if results.get("identical", True) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+Fact Model Performance Gate
+
+Runs each fact model of the spark-project on generated inputs at fixed
+scales, and compares what it cost against a stored baseline:
+1. The inputs a model reads are loaded from the Parquet-cached fixtures,
+   scaled, so they are generated once and not timed
+2. Each model runs a warm-up and then several timed runs to the noop sink,
+   in its own job group
+3. Wall time comes from the driver. Shuffle read and write, spilled bytes,
+   peak execution memory and peak JVM heap come from the stages of the job
+   group, as recorded by Spark's status listener and served by its REST API
+4. The medians are compared with benchmarks/fact_models_baseline.json: the
+   run fails when a metric regressed by more than its threshold
+
+The models read their direct inputs only: fct_user_role gets generated
+int_*_deduped tables, as int_sys_user_deduped uses QUALIFY, which Spark 4.0
+does not support.
+
+Usage:
+    python benchmark_facts.py                       # compare with the baseline
+    python benchmark_facts.py --update-baseline     # record a new baseline
+    python benchmark_facts.py --models fct_users --scales 10000
+"""
+
+import argparse
+import json
+import os
+import platform
+import re
+import statistics
+import sys
+import time
+import urllib.request
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+try:
+    from pyspark import __version__ as spark_version
+    from pyspark.sql import SparkSession
+except ImportError:
+    print("ERROR: PySpark not installed. Please run: pip install pyspark")
+    sys.exit(1)
+
+from fixtures import load_fixtures
+from spark_session import TEST_SPARK_CONF
+from sql_compiler import PROJECT_DIR, SqlCompiler, is_template
+from units import format_bytes
+
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "benchmarks" / "fact_models_baseline.json"
+DEFAULT_SCALES = [100_000, 1_000_000]
+
+# Bumped whenever the layout of the baseline file changes
+BASELINE_SCHEMA_VERSION = 1
+
+
+@dataclass(frozen=True)
+class FactModel:
+    path: str
+    inputs: List[str]
+
+
+FACT_MODELS: Dict[str, FactModel] = {
+    "fct_customer_metrics": FactModel("facts/cj/fct_customer_metrics.sql",
+                                      ["src_web_events", "src_customer_profiles", "src_purchases"]),
+    "fct_users": FactModel("facts/p5/fct_users.sql", ["dim_user_groups", "raw_active_users"]),
+    "fct_user_role": FactModel("facts/p7/fct_user_role.sql",
+                               ["int_sys_user_deduped", "int_portal_role_member_deduped", "int_portal_role_deduped"]),
+}
+
+
+@dataclass(frozen=True)
+class Threshold:
+    """Largest accepted growth of a metric, relative and absolute"""
+    ratio: float
+    min_delta: float
+
+
+# Wall time on a shared machine is noisy, hence the wider margin; the bytes
+# a plan shuffles are nearly deterministic. Peak JVM heap follows the
+# garbage collector and is recorded without being gated.
+DEFAULT_THRESHOLDS: Dict[str, Threshold] = {
+    "wall_seconds": Threshold(0.5, 1.0),
+    "shuffle_read_bytes": Threshold(0.2, 64 * 1024),
+    "shuffle_write_bytes": Threshold(0.2, 64 * 1024),
+    "spilled_bytes": Threshold(0.2, 1024 * 1024),
+    "peak_execution_memory_bytes": Threshold(0.5, 8 * 1024 * 1024),
+}
+RECORDED_METRICS = list(DEFAULT_THRESHOLDS) + ["peak_jvm_heap_bytes"]
+
+
+def model_sql(compiler: SqlCompiler, model: FactModel) -> str:
+    """The query of a model: compiled if it is a template, without its INSERT INTO target"""
+    path = PROJECT_DIR / model.path
+    text = path.read_text(encoding="utf-8")
+    sql = compiler.render(text).sql if is_template(text) else text
+    sql = "\n".join(line for line in sql.splitlines() if not line.strip().startswith("--"))
+    sql = re.sub(r"^\s*insert\s+into\s+\S+\s*", "", sql, flags=re.IGNORECASE)
+    return sql.strip().rstrip(";")
+
+
+def create_spark_session() -> SparkSession:
+    """The test configuration, with the UI on so the status REST API serves the stage metrics"""
+    builder = SparkSession.builder.appName("FactModelBenchmark")
+    for key, value in TEST_SPARK_CONF.items():
+        builder = builder.config(key, value)
+    spark = builder \
+        .config("spark.ui.enabled", "true") \
+        .config("spark.ui.port", "0") \
+        .config("spark.executor.metrics.pollingInterval", "100ms") \
+        .getOrCreate()
+    spark.sparkContext.setLogLevel("ERROR")
+    return spark
+
+
+class StageMetrics:
+    """Reads the stage metrics of a job group from the Spark status REST API"""
+
+    def __init__(self, spark: SparkSession, timeout: float = 30):
+        sc = spark.sparkContext
+        self.base_url = f"{sc.uiWebUrl}/api/v1/applications/{sc.applicationId}"
+        self.timeout = timeout
+
+    def _get(self, path: str):
+        with urllib.request.urlopen(f"{self.base_url}{path}", timeout=self.timeout) as response:
+            return json.load(response)
+
+    def collect(self, job_group: str) -> Dict[str, Any]:
+        # Listener events are delivered asynchronously: wait until every stage
+        # of the group is recorded as complete
+        deadline = time.monotonic() + self.timeout
+        while True:
+            stage_ids = {s for job in self._get("/jobs") if job.get("jobGroup") == job_group
+                         for s in job["stageIds"]}
+            stages = [s for s in self._get("/stages") if s["stageId"] in stage_ids]
+            # Stages skipped because their shuffle output was reused never run
+            done = all(s["status"] in ("COMPLETE", "SKIPPED") for s in stages)
+            if stage_ids and done or time.monotonic() > deadline:
+                break
+            time.sleep(0.1)
+        ran = [s for s in stages if s["status"] == "COMPLETE"]
+        heaps = [(s.get("peakExecutorMetrics") or {}).get("JVMHeapMemory") for s in ran]
+        return {
+            "stages": len(ran),
+            "shuffle_read_bytes": sum(s["shuffleReadBytes"] for s in ran),
+            "shuffle_write_bytes": sum(s["shuffleWriteBytes"] for s in ran),
+            "spilled_bytes": sum(s["memoryBytesSpilled"] + s["diskBytesSpilled"] for s in ran),
+            "peak_execution_memory_bytes": max((s["peakExecutionMemory"] for s in ran), default=0),
+            "peak_jvm_heap_bytes": max((h for h in heaps if h is not None), default=None),
+        }
+
+
+class FactBenchmark:
+    """Runs the models at each scale and collects the median of their metrics"""
+
+    def __init__(self, spark: SparkSession, runs: int = 3, warmup: int = 1):
+        self.spark = spark
+        self.runs = runs
+        self.warmup = warmup
+        self.compiler = SqlCompiler()
+        self.metrics = StageMetrics(spark)
+
+    def _run_once(self, sql: str, job_group: str) -> Dict[str, Any]:
+        sc = self.spark.sparkContext
+        sc.setJobGroup(job_group, job_group)
+        try:
+            started = time.perf_counter()
+            self.spark.sql(sql).write.format("noop").mode("overwrite").save()
+            wall_seconds = time.perf_counter() - started
+        finally:
+            sc.setLocalProperty("spark.jobGroup.id", None)
+        return {"wall_seconds": round(wall_seconds, 3), **self.metrics.collect(job_group)}
+
+    def run_model(self, name: str, scale: int) -> Dict[str, Any]:
+        model = FACT_MODELS[name]
+        inputs = load_fixtures(self.spark, *model.inputs, scale=scale)
+        sql = model_sql(self.compiler, model)
+        for i in range(self.warmup):
+            self._run_once(sql, f"{name}-{scale}-warmup-{i}")
+        runs = [self._run_once(sql, f"{name}-{scale}-run-{i}") for i in range(self.runs)]
+        result: Dict[str, Any] = {
+            "input_rows": {table: df.count() for table, df in inputs.items()},
+            "runs": runs,
+        }
+        for metric in RECORDED_METRICS:
+            values = [r[metric] for r in runs if r[metric] is not None]
+            result[metric] = round(statistics.median(values), 3) if values else None
+        return result
+
+    def run(self, models: List[str], scales: List[int]) -> Dict[str, Dict[str, Any]]:
+        results: Dict[str, Dict[str, Any]] = {}
+        for name in models:
+            for scale in scales:
+                print(f"⏱️  {name} at scale {scale:,}")
+                result = self.run_model(name, scale)
+                results.setdefault(name, {})[str(scale)] = result
+                print(f"   ✓ {result['wall_seconds']}s, shuffle {format_bytes(result['shuffle_read_bytes'])} read / "
+                      f"{format_bytes(result['shuffle_write_bytes'])} written, "
+                      f"peak execution memory {format_bytes(result['peak_execution_memory_bytes'])}")
+        return results
+
+
+def compare_to_baseline(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Any],
+                        thresholds: Dict[str, Threshold] = DEFAULT_THRESHOLDS) -> List[Dict[str, Any]]:
+    """
+    One entry per gated metric of every model and scale measured
+
+    A metric regresses when it grew by more than both its relative and its
+    absolute threshold, so tiny inputs do not fail on noise. Models or scales
+    missing from the baseline are reported as new.
+    """
+    comparisons = []
+    for name, scales in results.items():
+        for scale, result in scales.items():
+            expected = baseline.get("models", {}).get(name, {}).get(scale)
+            for metric, threshold in thresholds.items():
+                current = result.get(metric)
+                previous = expected.get(metric) if expected else None
+                entry = {"model": name, "scale": scale, "metric": metric,
+                         "baseline": previous, "current": current, "status": "ok"}
+                if previous is None or current is None:
+                    entry["status"] = "new"
+                else:
+                    limit = max(previous * (1 + threshold.ratio), previous + threshold.min_delta)
+                    entry["ratio"] = round(current / previous, 3) if previous else None
+                    if current > limit:
+                        entry["status"] = "regression"
+                comparisons.append(entry)
+    return comparisons
+
+
+def _format_metric(metric: str, value: Optional[float]) -> str:
+    return f"{value}s" if metric == "wall_seconds" and value is not None else format_bytes(value)
+
+
+def _host_info() -> Dict[str, Any]:
+    return {"platform": platform.platform(), "python": platform.python_version(),
+            "spark": spark_version, "cpus": os.cpu_count()}
+
+
+def read_baseline(path: Path) -> Dict[str, Any]:
+    if not path.exists():
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def write_baseline(path: Path, results: Dict[str, Dict[str, Any]], previous: Dict[str, Any]):
+    """Merge the measured models and scales into the baseline, keeping the others"""
+    models = previous.get("models", {})
+    for name, scales in results.items():
+        for scale, result in scales.items():
+            models.setdefault(name, {})[scale] = {
+                "input_rows": result["input_rows"],
+                **{metric: result[metric] for metric in RECORDED_METRICS},
+            }
+    baseline = {
+        "schema_version": BASELINE_SCHEMA_VERSION,
+        "recorded_at": datetime.now().isoformat(timespec="seconds"),
+        "host": _host_info(),
+        "spark_conf": {k: v for k, v in TEST_SPARK_CONF.items() if k.startswith("spark.sql") or k == "spark.master"},
+        "models": models,
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(baseline, f, indent=2)
+        f.write("\n")
+
+
+def print_comparison(comparisons: List[Dict[str, Any]], baseline: Dict[str, Any]):
+    print("\n" + "=" * 60)
+    print("📊 FACT MODEL PERFORMANCE GATE")
+    print("=" * 60)
+    host = baseline.get("host", {})
+    if host and (host.get("cpus"), host.get("spark")) != (os.cpu_count(), spark_version):
+        print(f"⚠️  Baseline recorded with {host.get('cpus')} CPUs and Spark {host.get('spark')}, "
+              f"running with {os.cpu_count()} CPUs and Spark {spark_version}")
+    icons = {"ok": "✓", "new": "•", "regression": "❌"}
+    for entry in comparisons:
+        ratio = f" ({entry['ratio']}x)" if entry.get("ratio") is not None else ""
+        print(f"  {icons[entry['status']]} {entry['model']:<22} {entry['scale']:>8} {entry['metric']:<28} "
+              f"{_format_metric(entry['metric'], entry['baseline']):>10} -> "
+              f"{_format_metric(entry['metric'], entry['current']):>10}{ratio}")
+    regressions = [e for e in comparisons if e["status"] == "regression"]
+    print(f"\n{'❌' if regressions else '✅'} {len(regressions)} regressions")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the fact models and compare them with a baseline")
+    parser.add_argument("--models", nargs="+", choices=list(FACT_MODELS), default=list(FACT_MODELS))
+    parser.add_argument("--scales", nargs="+", type=int, default=DEFAULT_SCALES,
+                        help="Fixture scales: generated events or users")
+    parser.add_argument("--runs", type=int, default=3, help="Timed runs of each model, the median is kept")
+    parser.add_argument("--warmup", type=int, default=1, help="Untimed runs before the timed ones")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--update-baseline", action="store_true", help="Record the results as the new baseline")
+    parser.add_argument("--max-time-regression", type=float, default=DEFAULT_THRESHOLDS["wall_seconds"].ratio,
+                        help="Accepted relative growth of the wall time (0.5 = 50%%)")
+    parser.add_argument("--max-bytes-regression", type=float,
+                        default=DEFAULT_THRESHOLDS["shuffle_read_bytes"].ratio,
+                        help="Accepted relative growth of the shuffled and spilled bytes")
+    parser.add_argument("--output", type=Path, help="Write the results and the comparison as JSON")
+    args = parser.parse_args(argv)
+
+    thresholds = dict(DEFAULT_THRESHOLDS)
+    thresholds["wall_seconds"] = Threshold(args.max_time_regression, thresholds["wall_seconds"].min_delta)
+    for metric in ["shuffle_read_bytes", "shuffle_write_bytes", "spilled_bytes"]:
+        thresholds[metric] = Threshold(args.max_bytes_regression, thresholds[metric].min_delta)
+
+    spark = create_spark_session()
+    try:
+        results = FactBenchmark(spark, args.runs, args.warmup).run(args.models, args.scales)
+    finally:
+        spark.stop()
+
+    baseline = read_baseline(args.baseline)
+    if args.update_baseline:
+        write_baseline(args.baseline, results, baseline)
+        print(f"✅ Baseline written to {args.baseline}")
+        return 0
+
+    comparisons = compare_to_baseline(results, baseline, thresholds)
+    print_comparison(comparisons, baseline)
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump({"results": results, "comparison": comparisons}, f, indent=2)
+    return 1 if any(e["status"] == "regression" for e in comparisons) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,699 @@
+"""
+Parquet-cached test fixtures
+
+Each test dataset is declared once, with its schema and a generator. The
+first time a test loads it, the generator runs and its rows are written to
+Parquet under target/fixtures/, in a directory named after a content hash of
+the fixture: its schema, version and generator source, the reference date and
+the scale. Later loads only read that Parquet back and register it as a
+temporary view, whatever the number of rows, so fixtures can hold millions
+of rows generated with spark.range() instead of tuples sent through Py4J.
+Hand-written rows are written with pyarrow, without Spark, so the DuckDB
+fast path of sql_executor.py can read them on a fresh checkout.
+
+A changed generator or schema hashes to a new directory, and the older
+copies of the fixture at the same scale are removed when it is written.
+Only the generator's own source is hashed: bump the fixture's version when
+a helper it calls changes. The test data is dated relative to today, so the
+reference date is part of the hash and the fixtures are regenerated once a
+day.
+
+Usage:
+    from fixtures import load_fixtures
+    load_fixtures(self.spark, "src_web_events", "src_purchases")
+"""
+
+import hashlib
+import inspect
+import shutil
+import sys
+import threading
+import uuid
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Union
+
+try:
+    from pyspark.sql import DataFrame, SparkSession, functions as F
+    from pyspark.sql.types import (
+        StructType,
+        StructField,
+        StringType,
+        TimestampType,
+        DateType,
+        DoubleType,
+        IntegerType,
+        LongType,
+        DecimalType,
+        BooleanType,
+        ArrayType,
+        MapType
+    )
+except ImportError:
+    print("ERROR: PySpark not installed. Please run: pip install pyspark")
+    sys.exit(1)
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    from pyspark.sql.pandas.types import to_arrow_schema
+except ImportError:
+    # Without it Spark writes the hand-written rows too
+    pa = None
+
+DEFAULT_FIXTURE_DIR = Path(__file__).resolve().parent.parent / "target" / "fixtures"
+
+# Part of every fixture hash: bump it when the storage below changes
+FIXTURE_FORMAT_VERSION = 1
+
+
+@dataclass(frozen=True)
+class FixtureContext:
+    """What a generator may depend on besides its own code"""
+    today: date
+    # Generated rows added to the hand-written ones, 0 for the small test data
+    scale: int = 0
+
+    @property
+    def base_time(self) -> datetime:
+        """Today at 10:00, the anchor of the relative test timestamps"""
+        return datetime.combine(self.today, datetime.min.time()).replace(hour=10)
+
+
+# Called without a session (None) when the rows are written without Spark
+Generator = Callable[[Optional[SparkSession], FixtureContext], Union[DataFrame, Iterable[tuple]]]
+
+
+@dataclass(frozen=True)
+class Fixture:
+    """A dataset declared once: its view name, schema and generator"""
+    name: str
+    schema: StructType
+    generator: Generator
+    version: int = 1
+    # Generated with spark.range() at any scale, rather than written by hand
+    spark_generated: bool = False
+
+    def needs_spark(self, context: FixtureContext) -> bool:
+        """Whether the generator needs a session: scaled fixtures add rows generated by Spark"""
+        return self.spark_generated or context.scale > 0
+
+
+FIXTURES: Dict[str, Fixture] = {}
+
+
+def fixture(name: str, schema: StructType, version: int = 1, spark_generated: bool = False):
+    """Register the decorated generator as the fixture of a view"""
+    def register(generator: Generator) -> Generator:
+        if name in FIXTURES:
+            raise ValueError(f"Fixture '{name}' is already declared")
+        FIXTURES[name] = Fixture(name, schema, generator, version, spark_generated)
+        return generator
+    return register
+
+
+def _same_columns(actual: StructType, expected: StructType) -> bool:
+    # Parquet files make every column nullable, so only names and types count,
+    # down to the elements of arrays and maps
+    return [(f.name, f.dataType.simpleString()) for f in actual] == \
+        [(f.name, f.dataType.simpleString()) for f in expected]
+
+
+def _arrow_table(fixture: Fixture, rows: List[tuple]) -> "pa.Table":
+    """The hand-written rows as an Arrow table of the declared schema"""
+    schema = to_arrow_schema(fixture.schema)
+    columns = [list(column) for column in zip(*rows)] if rows else [[] for _ in schema]
+    for i, field in enumerate(fixture.schema):
+        if isinstance(field.dataType, TimestampType):
+            # Naive datetimes are local times, as when Spark creates the DataFrame
+            columns[i] = [v.astimezone(timezone.utc) if v is not None else None for v in columns[i]]
+    return pa.Table.from_arrays([pa.array(c, type=f.type) for c, f in zip(columns, schema)], schema=schema)
+
+
+class FixtureStore:
+    """Materializes fixtures to Parquet once and registers them as views"""
+
+    def __init__(self, root: Path = DEFAULT_FIXTURE_DIR):
+        self.root = Path(root)
+        # The parallel validator may load fixtures from several threads
+        self._lock = threading.Lock()
+
+    def content_hash(self, fixture: Fixture, context: FixtureContext) -> str:
+        digest = hashlib.sha256()
+        digest.update(f"{FIXTURE_FORMAT_VERSION}\n{fixture.name}\n{fixture.version}\n".encode())
+        digest.update(fixture.schema.json().encode())
+        digest.update(inspect.getsource(fixture.generator).encode())
+        digest.update(f"\n{context.today.isoformat()}\n{context.scale}".encode())
+        return digest.hexdigest()[:16]
+
+    def path(self, fixture: Fixture, context: FixtureContext) -> Path:
+        return self.root / f"{fixture.name}-s{context.scale}-{self.content_hash(fixture, context)}"
+
+    def _write(self, spark: Optional[SparkSession], fixture: Fixture, context: FixtureContext,
+               staging: Path):
+        data = fixture.generator(spark, context)
+        if not isinstance(data, DataFrame):
+            if pa is not None:
+                # Hand-written rows: a handful, so one file is enough
+                staging.mkdir(parents=True)
+                pq.write_table(_arrow_table(fixture, list(data)), staging / "part-00000.parquet")
+                (staging / "_SUCCESS").touch()
+                return
+            data = spark.createDataFrame(list(data), fixture.schema).coalesce(1)
+        if not _same_columns(data.schema, fixture.schema):
+            raise ValueError(f"Fixture '{fixture.name}' generated {data.schema.simpleString()}, "
+                             f"declared {fixture.schema.simpleString()}")
+        data.write.parquet(str(staging))
+
+    def cached(self, fixture: Fixture, context: FixtureContext) -> Optional[Path]:
+        """Parquet directory of the fixture if it was already generated, without Spark"""
+        path = self.path(fixture, context)
+        return path if (path / "_SUCCESS").exists() else None
+
+    def materialize_rows(self, fixture: Fixture, context: FixtureContext) -> Optional[Path]:
+        """
+        Parquet directory of a fixture of hand-written rows, written without
+        Spark if not there yet. None when the fixture needs a session, or
+        when pyarrow is not installed
+        """
+        if pa is None or fixture.needs_spark(context):
+            return None
+        return self.materialize(None, fixture, context)
+
+    def materialize(self, spark: Optional[SparkSession], fixture: Fixture, context: FixtureContext) -> Path:
+        """Parquet directory of the fixture, generated if not there yet"""
+        path = self.path(fixture, context)
+        with self._lock:
+            if self.cached(fixture, context):
+                return path
+            # Written aside then renamed, so an interrupted run never leaves a partial fixture
+            staging = self.root / f".{path.name}-{uuid.uuid4().hex[:8]}"
+            self._write(spark, fixture, context, staging)
+            for stale in self.root.glob(f"{fixture.name}-s{context.scale}-*"):
+                shutil.rmtree(stale, ignore_errors=True)
+            staging.rename(path)
+        return path
+
+    def load(self, spark: SparkSession, fixture: Union[str, Fixture], scale: int = 0,
+             today: Optional[date] = None, view_name: Optional[str] = None) -> DataFrame:
+        """Register a fixture as a temporary view, by default named after it"""
+        fixture = FIXTURES[fixture] if isinstance(fixture, str) else fixture
+        context = FixtureContext(today or date.today(), scale)
+        df = spark.read.schema(fixture.schema).parquet(str(self.materialize(spark, fixture, context)))
+        df.createOrReplaceTempView(view_name or fixture.name)
+        return df
+
+
+_store = FixtureStore()
+
+
+def fixture_store() -> FixtureStore:
+    """The store behind load_fixture(), for readers of the Parquet files other than Spark"""
+    return _store
+
+
+def load_fixture(spark: SparkSession, name: str, scale: int = 0) -> DataFrame:
+    """Register one declared fixture as a view of the same name"""
+    return _store.load(spark, name, scale)
+
+
+def load_fixtures(spark: SparkSession, *names: str, scale: int = 0) -> Dict[str, DataFrame]:
+    """Register declared fixtures as views of the same names"""
+    return {name: _store.load(spark, name, scale) for name in names}
+
+
+# ---------------------------------------------------------------------------
+# Sources of fct_customer_metrics (test_fct_customer_metrics.py)
+#
+# Customers 1001-1005 are hand-written for the assertions of the tests. With
+# a scale, generated customers from 10000 on are added, one per 20 events.
+# ---------------------------------------------------------------------------
+
+SRC_WEB_EVENTS_SCHEMA = StructType([
+    StructField("event_id", LongType(), False),
+    StructField("customer_id", LongType(), False),
+    StructField("session_id", StringType(), False),
+    StructField("event_timestamp", TimestampType(), False),
+    StructField("event_type", StringType(), False),
+    StructField("page_url", StringType(), True),
+    StructField("page_title", StringType(), True),
+    StructField("device_type", StringType(), True),
+    StructField("browser", StringType(), True),
+    StructField("country", StringType(), True),
+    StructField("region", StringType(), True),
+    StructField("city", StringType(), True)
+])
+
+SRC_CUSTOMER_PROFILES_SCHEMA = StructType([
+    StructField("customer_id", LongType(), False),
+    StructField("first_name", StringType(), True),
+    StructField("last_name", StringType(), True),
+    StructField("email", StringType(), False),
+    StructField("age_group", StringType(), True),
+    StructField("gender", StringType(), True),
+    StructField("location", StringType(), True),
+    StructField("membership_tier", StringType(), True),
+    StructField("registration_date", DateType(), False),
+    StructField("email_verified", BooleanType(), True),
+    StructField("account_status", StringType(), True)
+])
+
+SRC_PURCHASES_SCHEMA = StructType([
+    StructField("purchase_id", LongType(), False),
+    StructField("customer_id", LongType(), False),
+    StructField("order_id", StringType(), False),
+    StructField("product_id", StringType(), True),
+    StructField("product_name", StringType(), True),
+    StructField("category", StringType(), True),
+    StructField("quantity", IntegerType(), True),
+    StructField("unit_price", DecimalType(10, 2), True),
+    StructField("amount", DecimalType(10, 2), False),
+    StructField("currency_code", StringType(), True),
+    StructField("payment_method", StringType(), True),
+    StructField("payment_status", StringType(), True),
+    StructField("purchase_date", DateType(), False),
+    StructField("purchase_timestamp", TimestampType(), False)
+])
+
+GENERATED_CUSTOMER_ID = 10_000
+EVENTS_PER_GENERATED_CUSTOMER = 20
+
+
+def _generated_customers(context: FixtureContext) -> int:
+    return max(context.scale // EVENTS_PER_GENERATED_CUSTOMER, 1)
+
+
+def pick(values: list, index) -> "F.Column":
+    """One of the literal values, chosen by a long column"""
+    return F.element_at(F.array(*[F.lit(v) for v in values]), (index % len(values) + 1).cast("int"))
+
+
+def _with_generated(spark: SparkSession, context: FixtureContext, rows: list, schema: StructType,
+                    generated: Callable[[DataFrame], DataFrame], count: int) -> Union[DataFrame, list]:
+    """Hand-written rows, plus count generated rows when the fixture is scaled"""
+    if not context.scale:
+        return rows
+    generated_df = generated(spark.range(count))
+    return spark.createDataFrame(rows, schema).unionByName(generated_df.select(*[f.name for f in schema]))
+
+
+@fixture("src_web_events", SRC_WEB_EVENTS_SCHEMA)
+def src_web_events(spark: SparkSession, context: FixtureContext):
+    # Timestamps within the last 7 days, as used in the fact table filter
+    base_time = context.base_time
+    rows = [
+        # Customer 1001 - Active session with purchase
+        (100001, 1001, "sess_1001_001", base_time - timedelta(days=1), "page_view", "/home", "Homepage", "desktop", "Chrome", "US", "CA", "San Francisco"),
+        (100002, 1001, "sess_1001_001", base_time - timedelta(days=1) + timedelta(minutes=5), "page_view", "/products", "Products", "desktop", "Chrome", "US", "CA", "San Francisco"),
+        (100003, 1001, "sess_1001_001", base_time - timedelta(days=1) + timedelta(minutes=10), "search", "/search", "Search", "desktop", "Chrome", "US", "CA", "San Francisco"),
+        (100004, 1001, "sess_1001_001", base_time - timedelta(days=1) + timedelta(minutes=15), "purchase", "/checkout", "Checkout", "desktop", "Chrome", "US", "CA", "San Francisco"),
+
+        # Customer 1001 - Second session (different day)
+        (100005, 1001, "sess_1001_002", base_time - timedelta(days=2), "page_view", "/home", "Homepage", "mobile", "Safari", "US", "CA", "San Francisco"),
+        (100006, 1001, "sess_1001_002", base_time - timedelta(days=2) + timedelta(minutes=3), "page_view", "/categories", "Categories", "mobile", "Safari", "US", "CA", "San Francisco"),
+
+        # Customer 1002 - Session with no purchase
+        (100007, 1002, "sess_1002_001", base_time - timedelta(days=1), "page_view", "/home", "Homepage", "desktop", "Firefox", "US", "NY", "New York"),
+        (100008, 1002, "sess_1002_001", base_time - timedelta(days=1) + timedelta(minutes=2), "page_view", "/about", "About", "desktop", "Firefox", "US", "NY", "New York"),
+        (100009, 1002, "sess_1002_001", base_time - timedelta(days=1) + timedelta(minutes=5), "page_view", "/contact", "Contact", "desktop", "Firefox", "US", "NY", "New York"),
+
+        # Customer 1003 - Multiple sessions with purchases
+        (100010, 1003, "sess_1003_001", base_time - timedelta(days=3), "page_view", "/home", "Homepage", "desktop", "Chrome", "UK", "London", "London"),
+        (100011, 1003, "sess_1003_001", base_time - timedelta(days=3) + timedelta(minutes=8), "purchase", "/checkout", "Checkout", "desktop", "Chrome", "UK", "London", "London"),
+        (100012, 1003, "sess_1003_002", base_time - timedelta(days=5), "page_view", "/products", "Products", "desktop", "Chrome", "UK", "London", "London"),
+        (100013, 1003, "sess_1003_002", base_time - timedelta(days=5) + timedelta(minutes=12), "purchase", "/checkout", "Checkout", "desktop", "Chrome", "UK", "London", "London"),
+
+        # Customer 1004 - Browsing only, no purchases
+        (100014, 1004, "sess_1004_001", base_time - timedelta(days=6), "page_view", "/home", "Homepage", "mobile", "Chrome", "CA", "ON", "Toronto"),
+        (100015, 1004, "sess_1004_001", base_time - timedelta(days=6) + timedelta(minutes=1), "page_view", "/products", "Products", "mobile", "Chrome", "CA", "ON", "Toronto"),
+        (100016, 1004, "sess_1004_001", base_time - timedelta(days=6) + timedelta(minutes=3), "page_view", "/categories", "Categories", "mobile", "Chrome", "CA", "ON", "Toronto"),
+
+        # Events older than 7 days (should be filtered out)
+        (100017, 1001, "sess_1001_old", base_time - timedelta(days=10), "page_view", "/home", "Homepage", "desktop", "Chrome", "US", "CA", "San Francisco"),
+    ]
+
+    def generated(ids: DataFrame) -> DataFrame:
+        customer = F.col("id") % _generated_customers(context)
+        return ids.select(
+            (F.col("id") + 1_000_000).alias("event_id"),
+            (customer + GENERATED_CUSTOMER_ID).alias("customer_id"),
+            F.concat(F.lit("sess_gen_"), customer.cast("string"), F.lit("_"), (F.col("id") % 3).cast("string")).alias("session_id"),
+            (F.lit(base_time) - F.make_dt_interval((F.col("id") % 9).cast("int"), F.lit(0), (F.col("id") % 60).cast("int"))).alias("event_timestamp"),
+            F.when(F.col("id") % 10 == 0, "purchase").otherwise("page_view").alias("event_type"),
+            pick(["/home", "/products", "/categories", "/checkout"], F.col("id")).alias("page_url"),
+            pick(["Homepage", "Products", "Categories", "Checkout"], F.col("id")).alias("page_title"),
+            pick(["desktop", "mobile", "tablet"], F.col("id")).alias("device_type"),
+            pick(["Chrome", "Safari", "Firefox"], F.col("id")).alias("browser"),
+            pick(["US", "UK", "CA"], customer).alias("country"),
+            pick(["CA", "London", "ON"], customer).alias("region"),
+            pick(["San Francisco", "London", "Toronto"], customer).alias("city"),
+        )
+
+    return _with_generated(spark, context, rows, SRC_WEB_EVENTS_SCHEMA, generated, context.scale)
+
+
+@fixture("src_customer_profiles", SRC_CUSTOMER_PROFILES_SCHEMA)
+def src_customer_profiles(spark: SparkSession, context: FixtureContext):
+    rows = [
+        (1001, "John", "Smith", "john.smith@email.com", "25-34", "M", "San Francisco, CA", "platinum", date(2022, 1, 15), True, "active"),
+        (1002, "Jane", "Doe", "jane.doe@email.com", "35-44", "F", "New York, NY", "gold", date(2023, 6, 20), True, "active"),
+        (1003, "Bob", "Johnson", "bob.johnson@email.com", "25-34", "M", "London, UK", "silver", date(2021, 3, 10), True, "active"),
+        (1004, "Alice", "Brown", "alice.brown@email.com", "18-24", "F", "Toronto, ON", "bronze", date(2023, 11, 1), True, "active"),
+        (1005, "Charlie", "Wilson", "charlie.wilson@email.com", "45-54", "M", "Berlin, DE", "diamond", date(2020, 8, 5), True, "active"),
+    ]
+
+    def generated(ids: DataFrame) -> DataFrame:
+        customer_id = F.col("id") + GENERATED_CUSTOMER_ID
+        return ids.select(
+            customer_id.alias("customer_id"),
+            F.lit("Generated").alias("first_name"),
+            F.concat(F.lit("Customer"), customer_id.cast("string")).alias("last_name"),
+            F.concat(F.lit("customer"), customer_id.cast("string"), F.lit("@email.com")).alias("email"),
+            pick(["18-24", "25-34", "35-44", "45-54"], F.col("id")).alias("age_group"),
+            pick(["F", "M"], F.col("id")).alias("gender"),
+            pick(["San Francisco, CA", "London, UK", "Toronto, ON"], F.col("id")).alias("location"),
+            pick(["bronze", "silver", "gold", "platinum", "diamond"], F.col("id")).alias("membership_tier"),
+            F.date_sub(F.lit(context.today), (F.col("id") % 1500).cast("int")).alias("registration_date"),
+            (F.col("id") % 5 != 0).alias("email_verified"),
+            F.lit("active").alias("account_status"),
+        )
+
+    return _with_generated(spark, context, rows, SRC_CUSTOMER_PROFILES_SCHEMA, generated,
+                           _generated_customers(context))
+
+
+@fixture("src_purchases", SRC_PURCHASES_SCHEMA)
+def src_purchases(spark: SparkSession, context: FixtureContext):
+    # Purchases of the last 90 days, as used in the fact table
+    base_date, now = context.today, context.base_time
+    rows = [
+        # Customer 1001 purchases
+        (200001, 1001, "ORD-001", "PROD_123", "Winter Jacket", "clothing", 1, Decimal("299.99"), Decimal("299.99"), "USD", "credit_card", "completed", base_date - timedelta(days=2), now - timedelta(days=2)),
+        (200002, 1001, "ORD-002", "PROD_456", "Smart Watch", "electronics", 1, Decimal("199.99"), Decimal("199.99"), "USD", "paypal", "completed", base_date - timedelta(days=15), now - timedelta(days=15)),
+        (200003, 1001, "ORD-003", "PROD_789", "Headphones", "electronics", 2, Decimal("89.99"), Decimal("179.98"), "USD", "credit_card", "completed", base_date - timedelta(days=30), now - timedelta(days=30)),
+
+        # Customer 1002 purchases
+        (200004, 1002, "ORD-004", "PROD_321", "Programming Book", "books", 1, Decimal("49.99"), Decimal("49.99"), "USD", "credit_card", "completed", base_date - timedelta(days=5), now - timedelta(days=5)),
+        (200005, 1002, "ORD-005", "PROD_654", "Phone Case", "accessories", 1, Decimal("29.99"), Decimal("29.99"), "USD", "apple_pay", "completed", base_date - timedelta(days=20), now - timedelta(days=20)),
+
+        # Customer 1003 purchases
+        (200006, 1003, "ORD-006", "PROD_111", "Gaming Laptop", "electronics", 1, Decimal("1299.99"), Decimal("1299.99"), "GBP", "credit_card", "completed", base_date - timedelta(days=1), now - timedelta(days=1)),
+        (200007, 1003, "ORD-007", "PROD_222", "Keyboard", "electronics", 1, Decimal("149.99"), Decimal("149.99"), "GBP", "paypal", "completed", base_date - timedelta(days=10), now - timedelta(days=10)),
+        (200008, 1003, "ORD-008", "PROD_333", "Mouse", "electronics", 1, Decimal("79.99"), Decimal("79.99"), "GBP", "credit_card", "completed", base_date - timedelta(days=25), now - timedelta(days=25)),
+
+        # Customer 1005 purchases (no recent web events, but has purchase history)
+        (200009, 1005, "ORD-009", "PROD_777", "Luxury Watch", "accessories", 1, Decimal("899.99"), Decimal("899.99"), "EUR", "bank_transfer", "completed", base_date - timedelta(days=45), now - timedelta(days=45)),
+
+        # Purchases older than 90 days (should be filtered out)
+        (200010, 1001, "ORD-010", "PROD_OLD", "Old Product", "misc", 1, Decimal("99.99"), Decimal("99.99"), "USD", "credit_card", "completed", base_date - timedelta(days=120), now - timedelta(days=120)),
+    ]
+
+    def generated(ids: DataFrame) -> DataFrame:
+        days_ago = (F.col("id") % 120).cast("int")
+        quantity = (F.col("id") % 3 + 1).cast("int")
+        unit_price = (F.col("id") % 50000 / 100 + 5).cast(DecimalType(10, 2))
+        return ids.select(
+            (F.col("id") + 1_000_000).alias("purchase_id"),
+            (F.col("id") % _generated_customers(context) + GENERATED_CUSTOMER_ID).alias("customer_id"),
+            F.concat(F.lit("ORD-GEN-"), F.col("id").cast("string")).alias("order_id"),
+            F.concat(F.lit("PROD_"), (F.col("id") % 500).cast("string")).alias("product_id"),
+            F.concat(F.lit("Product "), (F.col("id") % 500).cast("string")).alias("product_name"),
+            pick(["clothing", "electronics", "books", "accessories"], F.col("id")).alias("category"),
+            quantity.alias("quantity"),
+            unit_price.alias("unit_price"),
+            (unit_price * quantity).cast(DecimalType(10, 2)).alias("amount"),
+            pick(["USD", "GBP", "EUR"], F.col("id")).alias("currency_code"),
+            pick(["credit_card", "paypal", "apple_pay", "bank_transfer"], F.col("id")).alias("payment_method"),
+            F.lit("completed").alias("payment_status"),
+            F.date_sub(F.lit(base_date), days_ago).alias("purchase_date"),
+            (F.lit(now) - F.make_dt_interval(days_ago)).alias("purchase_timestamp"),
+        )
+
+    # One purchase per 4 generated events
+    return _with_generated(spark, context, rows, SRC_PURCHASES_SCHEMA, generated,
+                           max(context.scale // 4, 1))
+
+
+# ---------------------------------------------------------------------------
+# Sample tables of the source scripts (test_spark_scripts.py and the validator)
+# ---------------------------------------------------------------------------
+
+WEB_EVENTS_SCHEMA = StructType([
+    StructField("customer_id", StringType(), True),
+    StructField("session_id", StringType(), True),
+    StructField("event_timestamp", TimestampType(), True),
+    StructField("event_type", StringType(), True),
+    StructField("page_url", StringType(), True)
+])
+
+CUSTOMER_PROFILES_SCHEMA = StructType([
+    StructField("customer_id", StringType(), True),
+    StructField("age_group", StringType(), True),
+    StructField("location", StringType(), True),
+    StructField("membership_tier", StringType(), True),
+    StructField("registration_date", DateType(), True)
+])
+
+PURCHASES_SCHEMA = StructType([
+    StructField("customer_id", StringType(), True),
+    StructField("amount", DoubleType(), True),
+    StructField("purchase_date", DateType(), True)
+])
+
+RAW_EVENTS_SCHEMA = StructType([
+    StructField("event_id", StringType(), True),
+    StructField("user_id", StringType(), True),
+    StructField("event_timestamp", TimestampType(), True),
+    StructField("event_type", StringType(), True),
+    StructField("event_properties", StructType([
+        StructField("tags", ArrayType(StringType()), True),
+        StructField("custom_fields", MapType(StringType(), StringType()), True)
+    ]), True),
+    StructField("event_metadata", MapType(StringType(), MapType(StringType(), StringType())), True),
+    StructField("event_properties_json", StringType(), True)
+])
+
+
+@fixture("web_events", WEB_EVENTS_SCHEMA)
+def web_events(spark: SparkSession, context: FixtureContext):
+    # Events spanning 2 hours from 2 days ago at 10:00, at 30-minute intervals
+    start_time = context.base_time - timedelta(days=2)
+    mid_time = start_time + timedelta(minutes=30)
+    end_time = start_time + timedelta(hours=2)
+    return [
+        ("user_001", "session_001", start_time, "page_view", "/home"),
+        ("user_001", "session_001", mid_time, "page_view", "/products"),
+        ("user_001", "session_001", end_time, "purchase", "/checkout"),
+        ("user_002", "session_002", start_time, "page_view", "/home"),
+        ("user_002", "session_002", end_time, "purchase", "/checkout"),
+        ("user_003", "session_003", start_time, "page_view", "/home"),
+        ("user_003", "session_003", mid_time, "page_view", "/products"),
+        ("user_003", "session_003", end_time, "purchase", "/checkout"),
+    ]
+
+
+@fixture("customer_profiles", CUSTOMER_PROFILES_SCHEMA)
+def customer_profiles(spark: SparkSession, context: FixtureContext):
+    base_date = context.today - timedelta(days=2)
+    return [
+        ("user_001", "25-34", "US", "premium", base_date - timedelta(days=25)),
+        ("user_002", "35-44", "UK", "basic", date(2023, 6, 20)),
+        ("user_003", "18-24", "CA", "premium", base_date - timedelta(days=60)),
+    ]
+
+
+@fixture("purchases", PURCHASES_SCHEMA)
+def purchases(spark: SparkSession, context: FixtureContext):
+    base_date = context.today - timedelta(days=2)
+    return [
+        ("user_001", 299.99, base_date - timedelta(days=25)),
+        ("user_001", 149.99, base_date - timedelta(days=20)),
+        ("user_002", 79.99, base_date - timedelta(days=40)),
+        ("user_003", 24.99, base_date - timedelta(days=10)),
+    ]
+
+
+@fixture("raw_events", RAW_EVENTS_SCHEMA)
+def raw_events(spark: SparkSession, context: FixtureContext):
+    return [
+        ("evt_001", "user_001", context.base_time - timedelta(days=2), "click",
+         {"tags": ["premium", "mobile"],
+          "custom_fields": {"campaign_id": "camp_001", "source": "organic"}},
+         {"device_info": {"os": "iOS", "browser": "Safari"},
+          "location": {"country": "US", "city": "New York"}},
+         '{"user": {"preferences": {"language": "en"}},"session": {"duration": "300"}}'),
+    ]
+
+
+# ---------------------------------------------------------------------------
+# Inputs of the p5 and p7 fact models (benchmark_facts.py)
+#
+# Fully generated: the scale is the number of users, with at least 10.
+# ---------------------------------------------------------------------------
+
+DIM_USER_GROUPS_SCHEMA = StructType([
+    StructField("group_id", LongType(), False),
+    StructField("group_name", StringType(), False),
+    StructField("group_type", StringType(), False),
+    StructField("created_date", DateType(), False),
+    StructField("is_active", BooleanType(), False),
+    StructField("description", StringType(), True),
+    StructField("max_members", IntegerType(), True),
+    StructField("permissions", ArrayType(StringType()), True),
+    StructField("created_by", StringType(), True),
+    StructField("updated_date", TimestampType(), True),
+    StructField("updated_by", StringType(), True)
+])
+
+RAW_ACTIVE_USERS_SCHEMA = StructType([
+    StructField("user_id", LongType(), False),
+    StructField("username", StringType(), False),
+    StructField("email", StringType(), False),
+    StructField("group_id", LongType(), False),
+    StructField("last_login_date", DateType(), False),
+    StructField("first_name", StringType(), True),
+    StructField("last_name", StringType(), True),
+    StructField("registration_date", DateType(), True),
+    StructField("phone_number", StringType(), True),
+    StructField("country_code", StringType(), True),
+    StructField("timezone", StringType(), True),
+    StructField("preferred_language", StringType(), True),
+    StructField("account_status", StringType(), True),
+    StructField("login_count", LongType(), True),
+    StructField("session_duration_minutes", IntegerType(), True),
+    StructField("last_ip_address", StringType(), True),
+    StructField("user_agent", StringType(), True),
+    StructField("created_date", TimestampType(), True),
+    StructField("updated_date", TimestampType(), True)
+])
+
+CDC_COLUMNS = [
+    StructField("__db", StringType(), True),
+    StructField("__op", StringType(), True),
+    StructField("__source_ts_ms", LongType(), True),
+    StructField("__ts_ms", LongType(), True),
+    StructField("dl_landed_at", TimestampType(), True),
+]
+
+INT_SYS_USER_DEDUPED_SCHEMA = StructType([
+    StructField("row_num", IntegerType(), True),
+    StructField("user_id", LongType(), True),
+    StructField("user_name", StringType(), True),
+] + CDC_COLUMNS)
+
+INT_PORTAL_ROLE_DEDUPED_SCHEMA = StructType([
+    StructField("row_num", IntegerType(), True),
+    StructField("role_id", LongType(), True),
+    StructField("role_name", StringType(), True),
+    StructField("role_description", StringType(), True),
+] + CDC_COLUMNS)
+
+INT_PORTAL_ROLE_MEMBER_DEDUPED_SCHEMA = StructType([
+    StructField("row_num", IntegerType(), True),
+    StructField("role_id", LongType(), True),
+    StructField("member_id", LongType(), True),
+] + CDC_COLUMNS)
+
+USERS_PER_GROUP = 100
+USERS_PER_ROLE = 50
+TENANTS = 10
+
+
+def _users(context: FixtureContext) -> int:
+    return max(context.scale, 10)
+
+
+@fixture("dim_user_groups", DIM_USER_GROUPS_SCHEMA, spark_generated=True)
+def dim_user_groups(spark: SparkSession, context: FixtureContext):
+    groups = max(_users(context) // USERS_PER_GROUP, 6)
+    return spark.range(groups).select(
+        (F.col("id") + 1).alias("group_id"),
+        F.concat(F.lit("Group "), (F.col("id") + 1).cast("string")).alias("group_name"),
+        pick(["ADMIN", "POWER_USER", "STANDARD", "GUEST", "BETA", "LEGACY"], F.col("id")).alias("group_type"),
+        F.date_sub(F.lit(context.today), (F.col("id") % 1000).cast("int")).alias("created_date"),
+        (F.col("id") % 6 != 5).alias("is_active"),
+        F.lit("Generated user group").alias("description"),
+        (F.col("id") % 1000).cast("int").alias("max_members"),
+        F.array(F.lit("READ"), F.lit("WRITE")).alias("permissions"),
+        F.lit("system").alias("created_by"),
+        F.lit(context.base_time).alias("updated_date"),
+        F.lit("system").alias("updated_by"),
+    )
+
+
+@fixture("raw_active_users", RAW_ACTIVE_USERS_SCHEMA, spark_generated=True)
+def raw_active_users(spark: SparkSession, context: FixtureContext):
+    groups = max(_users(context) // USERS_PER_GROUP, 6)
+    user_id = F.col("id") + 1000
+    return spark.range(_users(context)).select(
+        user_id.alias("user_id"),
+        F.concat(F.lit("user."), user_id.cast("string")).alias("username"),
+        F.concat(F.lit("user."), user_id.cast("string"), F.lit("@company.com")).alias("email"),
+        (F.col("id") % groups + 1).alias("group_id"),
+        # Half logged in within the last 30 days, half before
+        F.date_sub(F.lit(context.today), (F.col("id") % 60).cast("int")).alias("last_login_date"),
+        F.lit("First").alias("first_name"),
+        F.concat(F.lit("Last"), user_id.cast("string")).alias("last_name"),
+        F.date_sub(F.lit(context.today), (F.col("id") % 1500 + 60).cast("int")).alias("registration_date"),
+        F.lit("+1-555-0100").alias("phone_number"),
+        pick(["US", "CA", "UK", "DE", "JP"], F.col("id")).alias("country_code"),
+        pick(["America/New_York", "America/Toronto", "Europe/London", "Europe/Berlin", "Asia/Tokyo"],
+              F.col("id")).alias("timezone"),
+        pick(["en-US", "en-CA", "en-GB", "de-DE", "ja-JP"], F.col("id")).alias("preferred_language"),
+        F.lit("ACTIVE").alias("account_status"),
+        (F.col("id") % 300).alias("login_count"),
+        (F.col("id") % 200).cast("int").alias("session_duration_minutes"),
+        F.lit("192.168.1.10").alias("last_ip_address"),
+        pick(["Chrome/120.0", "Firefox/119.0", "Safari/17.0"], F.col("id")).alias("user_agent"),
+        F.lit(context.base_time).alias("created_date"),
+        F.lit(context.base_time).alias("updated_date"),
+    )
+
+
+def _cdc_columns(context: FixtureContext) -> list:
+    """Columns of a row the dedup macro kept: its latest change, not a delete"""
+    ts_ms = F.lit(int(context.base_time.timestamp() * 1000)) - F.col("id") * 1000
+    return [
+        F.concat(F.lit("tenant_"), (F.col("id") % TENANTS).cast("string")).alias("__db"),
+        F.lit("u").alias("__op"),
+        ts_ms.alias("__source_ts_ms"),
+        ts_ms.alias("__ts_ms"),
+        F.lit(context.base_time).alias("dl_landed_at"),
+    ]
+
+
+@fixture("int_sys_user_deduped", INT_SYS_USER_DEDUPED_SCHEMA, spark_generated=True)
+def int_sys_user_deduped(spark: SparkSession, context: FixtureContext):
+    return spark.range(_users(context)).select(
+        F.lit(1).alias("row_num"),
+        (F.col("id") + 1000).alias("user_id"),
+        F.concat(F.lit("user."), (F.col("id") + 1000).cast("string")).alias("user_name"),
+        *_cdc_columns(context),
+    )
+
+
+@fixture("int_portal_role_deduped", INT_PORTAL_ROLE_DEDUPED_SCHEMA, spark_generated=True)
+def int_portal_role_deduped(spark: SparkSession, context: FixtureContext):
+    # One role in five has no member, for the roles_wo_users branch
+    roles = max(_users(context) // USERS_PER_ROLE, 1) * 5 // 4 + 1
+    return spark.range(roles).select(
+        F.lit(1).alias("row_num"),
+        (F.col("id") + 1).alias("role_id"),
+        F.concat(F.lit("Role "), (F.col("id") + 1).cast("string")).alias("role_name"),
+        F.lit("Generated portal role").alias("role_description"),
+        *_cdc_columns(context),
+    )
+
+
+@fixture("int_portal_role_member_deduped", INT_PORTAL_ROLE_MEMBER_DEDUPED_SCHEMA, spark_generated=True)
+def int_portal_role_member_deduped(spark: SparkSession, context: FixtureContext):
+    # Each user is a member of one role
+    roles = max(_users(context) // USERS_PER_ROLE, 1)
+    return spark.range(_users(context)).select(
+        F.lit(1).alias("row_num"),
+        (F.col("id") % roles + 1).alias("role_id"),
+        (F.col("id") + 1000).alias("member_id"),
+        *_cdc_columns(context),
+    )
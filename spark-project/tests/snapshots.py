@@ -0,0 +1,224 @@
+"""
+Hash-based golden snapshots of fact table outputs
+
+A snapshot records a fingerprint of a DataFrame instead of its rows, so a
+regression check on millions of rows only brings a few numbers per partition
+back to the driver:
+1. Every row is hashed inside Spark, over all its columns, with doubles
+   rounded so that a different summation order does not change the hash
+2. The row hashes are summed per partition (a group of the partition_by
+   columns): a sum does not depend on the row order, so two runs with
+   different shuffles or file splits give the same fingerprint
+3. The table fingerprint is a hash of the partition fingerprints
+
+The golden files live in tests/snapshots/<name>.json. On a mismatch only the
+partitions whose fingerprint changed are reported, and the rows of those
+partitions alone can be shown to find what changed.
+
+Usage:
+    class MyTest(SnapshotAssertions, SparkTestCase):
+        def test_fact(self):
+            self.assertMatchesSnapshot(df, "fct_customer_metrics", ["customer_segment"])
+
+    UPDATE_SNAPSHOTS=1 python -m pytest -q     # write or refresh the golden files
+"""
+
+import hashlib
+import json
+import os
+import sys
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+try:
+    from pyspark.sql import DataFrame, functions as F
+    from pyspark.sql.types import DoubleType, FloatType
+except ImportError:
+    print("ERROR: PySpark not installed. Please run: pip install pyspark")
+    sys.exit(1)
+
+SNAPSHOT_DIR = Path(__file__).resolve().parent / "snapshots"
+UPDATE_ENV_VAR = "UPDATE_SNAPSHOTS"
+
+# Part of every golden file: bump it when the hashing below changes
+SNAPSHOT_VERSION = 1
+DEFAULT_FLOAT_DIGITS = 6
+
+
+@dataclass
+class PartitionFingerprint:
+    rows: int
+    hash: str
+
+
+@dataclass
+class TableFingerprint:
+    """Order-independent fingerprint of a DataFrame, per partition and overall"""
+    partition_by: List[str]
+    columns: List[str]
+    float_digits: int
+    rows: int
+    table_hash: str
+    partitions: Dict[str, PartitionFingerprint] = field(default_factory=dict)
+    version: int = SNAPSHOT_VERSION
+
+    def to_json(self) -> Dict:
+        return asdict(self)
+
+    @classmethod
+    def from_json(cls, data: Dict) -> "TableFingerprint":
+        partitions = {key: PartitionFingerprint(**value) for key, value in data.pop("partitions").items()}
+        return cls(partitions=partitions, **data)
+
+
+def _row_hash_columns(df: DataFrame, float_digits: int) -> list:
+    """Every column, doubles rounded, each followed by its null flag"""
+    columns = []
+    for f in df.schema:
+        column = F.col(f"`{f.name}`")
+        if isinstance(f.dataType, (DoubleType, FloatType)):
+            column = F.round(column, float_digits)
+        # Spark skips nulls when hashing, so (x, null) and (null, x) would
+        # hash alike without the flags
+        columns += [column, column.isNull()]
+    return columns
+
+
+def fingerprint(df: DataFrame, partition_by: Sequence[str] = (),
+                float_digits: int = DEFAULT_FLOAT_DIGITS) -> TableFingerprint:
+    """
+    Fingerprint a DataFrame inside Spark
+
+    Each partition gets its row count and the sums of two independent row
+    hashes (xxhash64 and murmur3), summed as decimals so they never overflow.
+    Only one row per partition is collected.
+    """
+    hash_columns = _row_hash_columns(df, float_digits)
+    key = F.to_json(F.struct(*[F.col(f"`{c}`") for c in partition_by])) if partition_by else F.lit("{}")
+    partitions = df.select(
+        key.alias("partition_key"),
+        F.xxhash64(*hash_columns).cast("decimal(38,0)").alias("xxhash64"),
+        F.hash(*hash_columns).cast("decimal(38,0)").alias("murmur3"),
+    ).groupBy("partition_key").agg(
+        F.count(F.lit(1)).alias("rows"),
+        F.sum("xxhash64").alias("xxhash64"),
+        F.sum("murmur3").alias("murmur3"),
+    ).collect()
+
+    fingerprints = {
+        row.partition_key: PartitionFingerprint(
+            row.rows, hashlib.sha256(f"{row.rows}:{row.xxhash64}:{row.murmur3}".encode()).hexdigest()[:32])
+        for row in partitions
+    }
+    table_digest = hashlib.sha256()
+    for partition_key in sorted(fingerprints):
+        table_digest.update(f"{partition_key}={fingerprints[partition_key].hash}\n".encode())
+    return TableFingerprint(
+        partition_by=list(partition_by),
+        columns=[f"{f.name}:{f.dataType.simpleString()}" for f in df.schema],
+        float_digits=float_digits,
+        rows=sum(p.rows for p in fingerprints.values()),
+        table_hash=table_digest.hexdigest(),
+        partitions=dict(sorted(fingerprints.items())),
+    )
+
+
+@dataclass
+class SnapshotDiff:
+    """What differs between a golden fingerprint and the current one"""
+    columns_changed: bool = False
+    missing_partitions: List[str] = field(default_factory=list)
+    extra_partitions: List[str] = field(default_factory=list)
+    changed_partitions: List[str] = field(default_factory=list)
+
+    @property
+    def matches(self) -> bool:
+        return not (self.columns_changed or self.missing_partitions or self.extra_partitions
+                    or self.changed_partitions)
+
+    @property
+    def mismatching_partitions(self) -> List[str]:
+        return self.missing_partitions + self.extra_partitions + self.changed_partitions
+
+
+def diff_fingerprints(golden: TableFingerprint, current: TableFingerprint) -> SnapshotDiff:
+    diff = SnapshotDiff(columns_changed=golden.columns != current.columns)
+    if golden.table_hash == current.table_hash and not diff.columns_changed:
+        return diff
+    diff.missing_partitions = sorted(set(golden.partitions) - set(current.partitions))
+    diff.extra_partitions = sorted(set(current.partitions) - set(golden.partitions))
+    diff.changed_partitions = sorted(
+        key for key in set(golden.partitions) & set(current.partitions)
+        if golden.partitions[key] != current.partitions[key])
+    return diff
+
+
+def snapshot_path(name: str, snapshot_dir: Path = SNAPSHOT_DIR) -> Path:
+    return snapshot_dir / f"{name}.json"
+
+
+def read_snapshot(name: str, snapshot_dir: Path = SNAPSHOT_DIR) -> Optional[TableFingerprint]:
+    path = snapshot_path(name, snapshot_dir)
+    if not path.exists():
+        return None
+    with open(path) as f:
+        return TableFingerprint.from_json(json.load(f))
+
+
+def write_snapshot(name: str, fingerprint_: TableFingerprint, snapshot_dir: Path = SNAPSHOT_DIR) -> Path:
+    path = snapshot_path(name, snapshot_dir)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(fingerprint_.to_json(), f, indent=2)
+        f.write("\n")
+    return path
+
+
+def partition_rows(df: DataFrame, partition_by: Sequence[str], keys: Sequence[str]) -> DataFrame:
+    """The rows of the given partitions only, to inspect a mismatch"""
+    if not partition_by:
+        return df
+    key = F.to_json(F.struct(*[F.col(f"`{c}`") for c in partition_by]))
+    return df.where(key.isin(list(keys)))
+
+
+class SnapshotAssertions:
+    """unittest mixin comparing DataFrames against their golden snapshot"""
+
+    snapshot_dir = SNAPSHOT_DIR
+    # Rows of the mismatching partitions printed on a failure
+    snapshot_rows_shown = 20
+
+    def assertMatchesSnapshot(self, df: DataFrame, name: str, partition_by: Sequence[str] = (),
+                              float_digits: int = DEFAULT_FLOAT_DIGITS):
+        current = fingerprint(df, partition_by, float_digits)
+        golden = read_snapshot(name, self.snapshot_dir)
+        if os.environ.get(UPDATE_ENV_VAR) == "1":
+            path = write_snapshot(name, current, self.snapshot_dir)
+            print(f"✓ Snapshot {name} written to {path}")
+            return
+        if golden is None:
+            self.fail(f"No snapshot {snapshot_path(name, self.snapshot_dir)}: "
+                      f"run with {UPDATE_ENV_VAR}=1 to create it")
+        if golden.version != current.version or golden.partition_by != current.partition_by \
+                or golden.float_digits != current.float_digits:
+            self.fail(f"Snapshot {name} was taken with other settings: run with {UPDATE_ENV_VAR}=1 to refresh it")
+
+        diff = diff_fingerprints(golden, current)
+        if diff.matches:
+            return
+        lines = [f"Snapshot {name} differs ({golden.rows} rows expected, {current.rows} found)"]
+        if diff.columns_changed:
+            lines.append(f"  columns: {golden.columns} -> {current.columns}")
+        for label, keys in [("missing", diff.missing_partitions), ("extra", diff.extra_partitions),
+                            ("changed", diff.changed_partitions)]:
+            for key in keys:
+                expected = golden.partitions.get(key)
+                found = current.partitions.get(key)
+                lines.append(f"  {label} partition {key}: "
+                             f"{expected.rows if expected else 0} rows expected, {found.rows if found else 0} found")
+        if diff.mismatching_partitions and not diff.columns_changed:
+            print("\n".join(lines))
+            partition_rows(df, partition_by, diff.mismatching_partitions).show(self.snapshot_rows_shown, truncate=False)
+        self.fail("\n".join(lines))
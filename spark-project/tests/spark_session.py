@@ -0,0 +1,94 @@
+"""
+Shared SparkSession for the spark-project tests
+
+Every test class and the validator get the same local SparkSession, built on
+first use with a configuration tuned for small test data, so a whole run
+pays the JVM startup once. SparkTestCase gives each test its own child
+session: it shares the SparkContext but has its own temporary views and SQL
+settings, so the views a test creates never leak into the next one.
+
+Usage:
+    from spark_session import SparkTestCase, get_spark_session
+"""
+
+import atexit
+import shutil
+import sys
+import tempfile
+import unittest
+from typing import Optional
+
+try:
+    from pyspark.sql import SparkSession
+except ImportError:
+    print("ERROR: PySpark not installed. Please run: pip install pyspark")
+    sys.exit(1)
+
+# Test data holds a handful of rows: two cores and two shuffle partitions are
+# plenty, the UI and the Hive metastore only add startup time
+TEST_SPARK_CONF = {
+    "spark.master": "local[2]",
+    "spark.default.parallelism": "2",
+    "spark.sql.shuffle.partitions": "2",
+    "spark.sql.adaptive.enabled": "true",
+    "spark.sql.adaptive.coalescePartitions.enabled": "true",
+    "spark.sql.catalogImplementation": "in-memory",
+    "spark.ui.enabled": "false",
+    "spark.ui.showConsoleProgress": "false",
+    "spark.driver.bindAddress": "127.0.0.1",
+    # Advertise the address bound above, or large task results and broadcasts
+    # are fetched from the host name's address and refused
+    "spark.driver.host": "127.0.0.1",
+    # Lets the validator give each concurrently running script its own pool
+    "spark.scheduler.mode": "FAIR",
+}
+
+_session: Optional[SparkSession] = None
+_warehouse_dir: Optional[str] = None
+
+
+def get_spark_session(master: Optional[str] = None) -> SparkSession:
+    """
+    The shared test SparkSession, created on the first call
+
+    master replaces the spark.master of TEST_SPARK_CONF; it only applies
+    when this call creates the session.
+    """
+    global _session, _warehouse_dir
+    if _session is not None and not _session.sparkContext._jsc.sc().isStopped():
+        return _session
+    if _warehouse_dir is None:
+        # Tables a test creates go to a throwaway warehouse, removed at exit
+        _warehouse_dir = tempfile.mkdtemp(prefix="spark-project-tests-")
+        atexit.register(shutil.rmtree, _warehouse_dir, True)
+    builder = SparkSession.builder.appName("SparkProjectTests")
+    for key, value in TEST_SPARK_CONF.items():
+        builder = builder.config(key, value)
+    if master:
+        builder = builder.master(master)
+    _session = builder.config("spark.sql.warehouse.dir", _warehouse_dir).getOrCreate()
+    _session.sparkContext.setLogLevel("ERROR")
+    return _session
+
+
+def stop_spark_session():
+    """Stop the shared session; the next get_spark_session() starts a new one"""
+    global _session
+    if _session is not None:
+        _session.stop()
+        _session = None
+
+
+atexit.register(stop_spark_session)
+
+
+class SparkTestCase(unittest.TestCase):
+    """Test case running each test in its own session of the shared SparkContext"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.spark = get_spark_session()
+
+    def setUp(self):
+        # Temporary views and SQL conf changes stay within this test
+        self.spark = get_spark_session().newSession()
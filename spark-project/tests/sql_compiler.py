@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+dbt-style SQL Compiler
+
+Renders the Jinja templates of the spark-project models into plain Spark SQL,
+so the validators and the tests can run them:
+1. The macros of macros/*.sql are available to every model, as in dbt
+2. ref('model') and source('name', 'table') render to local relation names
+   and are recorded as the model's dependencies
+3. The compiled SQL is cached under target/compiled/, keyed by a content hash
+   of the model and of all macro files: a model is only rendered again when
+   it or a macro changed
+
+Usage:
+    python sql_compiler.py [intermediates/p7/int_sys_user_deduped.sql ...] [--force]
+
+Requirements:
+    pip install jinja2
+"""
+
+import argparse
+import hashlib
+import json
+import sys
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Any
+
+try:
+    from jinja2 import Environment, StrictUndefined, TemplateError
+    from jinja2.runtime import Macro
+except ImportError:
+    print("ERROR: Jinja2 not installed. Please run: pip install jinja2")
+    sys.exit(1)
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_TARGET_DIR = PROJECT_DIR / "target" / "compiled"
+MANIFEST_NAME = "manifest.json"
+MODEL_LAYERS = ["sources", "dimensions", "intermediates", "facts"]
+
+# Part of every cache key: bump it when the rendering below changes
+COMPILER_VERSION = 1
+
+
+def is_template(sql: str) -> bool:
+    """Whether a SQL file uses Jinja and must be compiled first"""
+    return "{{" in sql or "{%" in sql
+
+
+def relation_name(*parts: str) -> str:
+    """
+    Local Spark name of a ref() or source() relation
+
+    Spark temporary views live outside any database, so the parts are joined
+    into one identifier: source('p7', 'cdc.users_db.sys_user') becomes
+    p7_cdc_users_db_sys_user.
+    """
+    return "_".join(parts).replace(".", "_")
+
+
+class DbtUtils:
+    """The dbt_utils macros the models call, in Spark SQL"""
+
+    @staticmethod
+    def surrogate_key(field_list: List[str]) -> str:
+        """md5 of the fields cast to strings, nulls as '', joined with '-'"""
+        fields = ", '-', ".join(f"coalesce(cast({f} as string), '')" for f in field_list)
+        return f"md5(cast(concat({fields}) as string))"
+
+
+def _no_filter() -> str:
+    # limit_tenants() and limit_ts_ms() filter the CDC sources by tenant and
+    # by change timestamp in the warehouse; locally every row is kept
+    return ""
+
+
+@dataclass
+class CompiledModel:
+    """The compiled SQL of a model and what it reads"""
+    path: str
+    sql: str
+    content_hash: str
+    refs: List[str] = field(default_factory=list)
+    sources: List[str] = field(default_factory=list)
+    cached: bool = False
+
+
+class SqlCompiler:
+    """
+    Compiles the Jinja models of a project, with a content-hash cache
+
+    The cache manifest maps each model path to the hash it was compiled
+    from, its dependencies and the compiled file, so that an unchanged model
+    is read back without rendering.
+    """
+
+    def __init__(self, project_dir: Path = PROJECT_DIR, target_dir: Optional[Path] = None):
+        self.project_dir = Path(project_dir)
+        self.target_dir = Path(target_dir) if target_dir else self.project_dir / "target" / "compiled"
+        self.manifest_path = self.target_dir / MANIFEST_NAME
+        self.manifest: Dict[str, Dict[str, Any]] = self._load_manifest()
+        self.env = Environment(undefined=StrictUndefined, keep_trailing_newline=True)
+        # The parallel validator compiles from several threads
+        self._lock = threading.Lock()
+        self._macros: Optional[str] = None
+        self._macros_hash: Optional[str] = None
+
+    def _load_manifest(self) -> Dict[str, Dict[str, Any]]:
+        if not self.manifest_path.exists():
+            return {}
+        with open(self.manifest_path) as f:
+            return json.load(f)
+
+    def _save_manifest(self):
+        self.target_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.manifest_path.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(self.manifest, f, indent=2, sort_keys=True)
+        tmp_path.replace(self.manifest_path)
+
+    def _load_macros(self):
+        """Concatenate the macro files and hash them, once per compiler"""
+        with self._lock:
+            if self._macros is None:
+                self._read_macros()
+
+    def _read_macros(self):
+        digest = hashlib.sha256()
+        sources = []
+        for path in sorted((self.project_dir / "macros").rglob("*.sql")):
+            text = path.read_text(encoding="utf-8")
+            digest.update(str(path.relative_to(self.project_dir)).encode())
+            digest.update(text.encode())
+            sources.append(text)
+        self._macros = "\n".join(sources)
+        self._macros_hash = digest.hexdigest()
+
+    def content_hash(self, relative_path: str, template: str) -> str:
+        """Cache key of a model: compiler version, macro files and model text"""
+        self._load_macros()
+        digest = hashlib.sha256()
+        digest.update(f"{COMPILER_VERSION}\n{self._macros_hash}\n{relative_path}\n".encode())
+        digest.update(template.encode())
+        return digest.hexdigest()
+
+    def render(self, template: str) -> CompiledModel:
+        """Render a template with the project macros, without caching"""
+        self._load_macros()
+        refs: List[str] = []
+        sources: List[str] = []
+
+        def ref(name: str) -> str:
+            refs.append(name)
+            return relation_name(name)
+
+        def source(source_name: str, table_name: str) -> str:
+            sources.append(f"{source_name}.{table_name}")
+            return relation_name(source_name, table_name)
+
+        context = {
+            "ref": ref,
+            "source": source,
+            "config": lambda **kwargs: "",
+            "dbt_utils": DbtUtils,
+            "limit_tenants": _no_filter,
+            "limit_ts_ms": _no_filter,
+        }
+        # The project macros are globals of every model, like in dbt, and see
+        # the same ref() and source(); text outside the macros is dropped
+        macros = self.env.from_string(self._macros).make_module(context)
+        context.update({name: value for name, value in vars(macros).items() if isinstance(value, Macro)})
+        sql = self.env.from_string(template).render(context)
+        return CompiledModel(path="", sql=sql.strip() + "\n", content_hash="",
+                             refs=sorted(set(refs)), sources=sorted(set(sources)))
+
+    def compile(self, model_path: Path, force: bool = False) -> CompiledModel:
+        """Compile a model, reusing the cached output when its hash is unchanged"""
+        model_path = Path(model_path).resolve()
+        relative_path = str(model_path.relative_to(self.project_dir))
+        template = model_path.read_text(encoding="utf-8")
+        content_hash = self.content_hash(relative_path, template)
+        output_path = self.target_dir / relative_path
+
+        entry = self.manifest.get(relative_path)
+        if not force and entry and entry["hash"] == content_hash and output_path.exists():
+            return CompiledModel(relative_path, output_path.read_text(encoding="utf-8"), content_hash,
+                                 entry["refs"], entry["sources"], cached=True)
+
+        compiled = self.render(template)
+        compiled.path, compiled.content_hash = relative_path, content_hash
+        with self._lock:
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+            output_path.write_text(compiled.sql, encoding="utf-8")
+            self.manifest[relative_path] = {"hash": content_hash, "refs": compiled.refs, "sources": compiled.sources}
+            self._save_manifest()
+        return compiled
+
+    def compile_sql(self, model_path: Path) -> str:
+        """SQL ready for Spark: compiled if the file is a template, as is otherwise"""
+        text = Path(model_path).read_text(encoding="utf-8")
+        return self.compile(model_path).sql if is_template(text) else text
+
+    def discover_models(self, layers: List[str] = MODEL_LAYERS) -> List[Path]:
+        """The template models of the layer folders"""
+        models = []
+        for layer in layers:
+            for path in sorted((self.project_dir / layer).rglob("*.sql")):
+                if is_template(path.read_text(encoding="utf-8")):
+                    models.append(path)
+        return models
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile the dbt-style spark-project models to Spark SQL")
+    parser.add_argument("models", nargs="*", type=Path, help="Models to compile (default: every template model)")
+    parser.add_argument("--target-dir", type=Path, default=DEFAULT_TARGET_DIR, help="Compiled SQL and cache manifest")
+    parser.add_argument("--force", action="store_true", help="Compile again even when the cache is up to date")
+    args = parser.parse_args()
+
+    compiler = SqlCompiler(PROJECT_DIR, args.target_dir)
+    models = args.models or compiler.discover_models()
+    failed = 0
+    for model in models:
+        try:
+            compiled = compiler.compile(model, force=args.force)
+        except (TemplateError, OSError, ValueError) as e:
+            failed += 1
+            print(f"  ✗ {model}: {e}")
+            continue
+        status = "cached" if compiled.cached else "compiled"
+        depends = ", ".join(compiled.refs + compiled.sources) or "-"
+        print(f"  ✓ {compiled.path:<55} {status:<9} reads: {depends}")
+    print(f"\n{len(models) - failed}/{len(models)} models compiled to {compiler.target_dir}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
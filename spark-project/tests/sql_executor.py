@@ -0,0 +1,288 @@
+"""
+DuckDB fast path for the spark-project SQL unit tests
+
+Most logic tests run a query over a few dozen fixture rows, and Spark spends
+far longer starting its JVM and planning than running them. SqlExecutor runs
+the same Spark SQL in-process on DuckDB instead:
+1. The query is transpiled from the Spark dialect to DuckDB with sqlglot
+2. The fixtures it reads are the Parquet files cached by fixtures.py, read
+   by DuckDB directly. Hand-written fixtures are written with pyarrow when
+   missing, so only the scaled ones, generated with spark.range(), need a
+   Spark session, and only the first time
+3. When sqlglot cannot translate a construct, when DuckDB rejects the
+   result, or when the query uses an approximate aggregate whose value
+   depends on the engine's algorithm, the query runs on Spark instead.
+   The Spark session is only started on the first fallback
+
+The SQL_ENGINE variable selects the engine:
+    duckdb    DuckDB, falling back to Spark (default)
+    spark     Spark only, as before
+    compare   both engines, failing when their results differ
+
+Usage:
+    class MyTest(SqlTestCase):
+        def test_query(self):
+            self.load_fixtures("src_purchases")
+            rows = self.sql("SELECT customer_id, SUM(amount) AS spent FROM src_purchases GROUP BY 1").rows
+
+    SQL_ENGINE=compare python -m pytest -q     # check DuckDB against Spark
+"""
+
+import os
+import sys
+import unittest
+from collections import Counter
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal
+from functools import lru_cache
+from typing import Any, Callable, List, Optional, Tuple
+
+try:
+    from pyspark.sql import Row, SparkSession
+except ImportError:
+    print("ERROR: PySpark not installed. Please run: pip install pyspark")
+    sys.exit(1)
+
+try:
+    import duckdb
+    import sqlglot
+    from sqlglot import exp
+    from sqlglot.errors import SqlglotError
+except ImportError:
+    # Without them every query runs on Spark
+    duckdb = None
+
+from fixtures import FIXTURES, FixtureContext, FixtureStore, fixture_store
+from spark_session import get_spark_session
+
+ENGINE_ENV_VAR = "SQL_ENGINE"
+ENGINES = ("duckdb", "spark", "compare")
+DEFAULT_ENGINE = "duckdb"
+DEFAULT_FLOAT_DIGITS = 6
+
+# Approximate aggregates give engine-specific answers: they run on Spark,
+# the engine the models are written for
+_APPROXIMATE = tuple(getattr(exp, name) for name in ("ApproxQuantile", "ApproxDistinct", "ApproxTopK")
+                     if duckdb is not None and hasattr(exp, name))
+
+
+class UnsupportedSql(Exception):
+    """A query the DuckDB fast path does not run"""
+
+
+class SqlEngineMismatch(AssertionError):
+    """DuckDB and Spark returned different rows for the same query"""
+
+
+@dataclass
+class QueryResult:
+    columns: List[str]
+    rows: List[Row]
+    # Engine the rows come from, and why DuckDB was not used if it was not
+    engine: str
+    fallback_reason: Optional[str] = None
+
+    def collect(self) -> List[Row]:
+        return self.rows
+
+    def show(self, n: int = 20):
+        print(" | ".join(self.columns))
+        for row in self.rows[:n]:
+            print(" | ".join(str(value) for value in row))
+        if len(self.rows) > n:
+            print(f"... {len(self.rows) - n} more rows")
+
+
+@dataclass(frozen=True)
+class Translation:
+    sql: str
+    # False for statements such as CREATE VIEW, which Spark must run too
+    returns_rows: bool
+
+
+@lru_cache(maxsize=256)
+def to_duckdb(sql: str) -> Translation:
+    """The DuckDB version of a Spark SQL statement, or UnsupportedSql"""
+    if duckdb is None:
+        raise UnsupportedSql("duckdb and sqlglot are not installed")
+    try:
+        statements = sqlglot.parse(sql, read="spark")
+        if len(statements) != 1 or statements[0] is None:
+            raise UnsupportedSql(f"{len(statements)} statements, one expected")
+        statement = statements[0]
+        approximate = next(statement.find_all(*_APPROXIMATE), None) if _APPROXIMATE else None
+        if approximate is not None:
+            raise UnsupportedSql(f"approximate aggregate {approximate.sql(dialect='spark')}")
+        return Translation(statement.sql(dialect="duckdb", unsupported_level=sqlglot.ErrorLevel.RAISE),
+                           isinstance(statement, exp.Query))
+    except SqlglotError as e:
+        raise UnsupportedSql(f"sqlglot: {e}") from e
+
+
+def _normalize(value: Any, float_digits: int) -> Any:
+    """A hashable value equal across engines for the same SQL value"""
+    if isinstance(value, bool) or value is None:
+        return value
+    if isinstance(value, (int, float, Decimal)):
+        # Spark averages a decimal to a decimal, DuckDB to a double
+        return round(float(value), float_digits)
+    if isinstance(value, Row):
+        value = value.asDict()
+    if isinstance(value, dict):
+        # Structs come back as Rows from Spark and as dicts from DuckDB
+        return tuple(sorted((k, _normalize(v, float_digits)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_normalize(v, float_digits) for v in value)
+    return value
+
+
+def compare_results(expected: QueryResult, actual: QueryResult,
+                    float_digits: int = DEFAULT_FLOAT_DIGITS, shown: int = 5) -> Optional[str]:
+    """
+    Why two results differ, or None when they hold the same rows
+
+    Rows are compared as multisets, as ties in an ORDER BY may come back in
+    a different order, and columns by position, as engines name unaliased
+    expressions differently.
+    """
+    if len(expected.columns) != len(actual.columns):
+        return f"columns {expected.columns} ({expected.engine}) != {actual.columns} ({actual.engine})"
+    expected_rows = Counter(tuple(_normalize(v, float_digits) for v in row) for row in expected.rows)
+    actual_rows = Counter(tuple(_normalize(v, float_digits) for v in row) for row in actual.rows)
+    if expected_rows == actual_rows:
+        return None
+    lines = [f"{sum(expected_rows.values())} rows from {expected.engine}, {sum(actual_rows.values())} from {actual.engine}"]
+    for label, engine, rows in [("only", expected.engine, expected_rows - actual_rows),
+                                ("only", actual.engine, actual_rows - expected_rows)]:
+        for row in sorted(rows.elements(), key=repr)[:shown]:
+            lines.append(f"  {label} in {engine}: {row}")
+    return "\n".join(lines)
+
+
+@dataclass
+class _Fallback:
+    sql: str
+    reason: str
+
+
+class SqlExecutor:
+    """Runs Spark SQL on DuckDB when it can, and on Spark otherwise"""
+
+    def __init__(self, engine: Optional[str] = None,
+                 spark_factory: Optional[Callable[[], SparkSession]] = None,
+                 float_digits: int = DEFAULT_FLOAT_DIGITS, store: Optional[FixtureStore] = None):
+        engine = engine or os.environ.get(ENGINE_ENV_VAR) or DEFAULT_ENGINE
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown SQL engine '{engine}', expected one of {', '.join(ENGINES)}")
+        if duckdb is None and engine != "spark":
+            print("⚠️  duckdb or sqlglot not installed, running the SQL on Spark")
+            engine = "spark"
+        self.engine = engine
+        self.float_digits = float_digits
+        self.fallbacks: List[_Fallback] = []
+        self._spark_factory = spark_factory or (lambda: get_spark_session().newSession())
+        self._spark: Optional[SparkSession] = None
+        self._store = store or fixture_store()
+        self._duckdb = duckdb.connect() if engine != "spark" else None
+        # Replayed on the Spark session when it starts after them
+        self._fixtures: List[Tuple[str, int]] = []
+        self._views: List[str] = []
+
+    @property
+    def spark(self) -> SparkSession:
+        """The Spark session, started on first use with the fixtures and views loaded so far"""
+        if self._spark is None:
+            self._spark = self._spark_factory()
+            for name, scale in self._fixtures:
+                self._store.load(self._spark, name, scale)
+            for sql in self._views:
+                self._spark.sql(sql)
+        return self._spark
+
+    def load_fixtures(self, *names: str, scale: int = 0):
+        """Register declared fixtures as views of the same names, on each engine in use"""
+        for name in names:
+            self._fixtures.append((name, scale))
+            if self._spark is not None or self.engine != "duckdb":
+                self._store.load(self.spark, name, scale)
+            if self._duckdb is not None:
+                self._register_parquet(name, scale)
+
+    def _register_parquet(self, name: str, scale: int):
+        fixture = FIXTURES[name]
+        context = FixtureContext(date.today(), scale)
+        store = self._store
+        # Only a scaled fixture generated for the first time needs Spark
+        path = (store.cached(fixture, context) or store.materialize_rows(fixture, context)
+                or store.materialize(self.spark, fixture, context))
+        columns = self._duckdb.execute(f"DESCRIBE SELECT * FROM read_parquet('{path}/*.parquet')").fetchall()
+        # Timestamps are stored as UTC instants: shown in the local time zone,
+        # as Spark does
+        timestamps = [c[0] for c in columns if c[1] in ("TIMESTAMP", "TIMESTAMP WITH TIME ZONE")]
+        replace = ", ".join(f"timezone(current_setting('TimeZone'), CAST(\"{c}\" AS TIMESTAMPTZ)) AS \"{c}\""
+                            for c in timestamps)
+        select = f"* REPLACE ({replace})" if replace else "*"
+        self._duckdb.execute(f"CREATE OR REPLACE VIEW \"{name}\" AS "
+                             f"SELECT {select} FROM read_parquet('{path}/*.parquet')")
+
+    def _run_spark(self, sql: str) -> QueryResult:
+        df = self.spark.sql(sql)
+        return QueryResult(df.columns, df.collect(), "spark")
+
+    def _run_duckdb(self, sql: str) -> QueryResult:
+        translation = to_duckdb(sql)
+        try:
+            cursor = self._duckdb.execute(translation.sql)
+        except duckdb.Error as e:
+            raise UnsupportedSql(f"DuckDB: {str(e).splitlines()[0]}") from e
+        if not translation.returns_rows:
+            return QueryResult([], [], "duckdb")
+        columns = [d[0] for d in cursor.description]
+        row = Row(*columns)
+        return QueryResult(columns, [row(*values) for values in cursor.fetchall()], "duckdb")
+
+    def sql(self, sql: str) -> QueryResult:
+        """Run one statement and collect its rows"""
+        if self.engine == "spark":
+            return self._run_spark(sql)
+        try:
+            fast = self._run_duckdb(sql)
+        except UnsupportedSql as e:
+            self.fallbacks.append(_Fallback(sql, str(e)))
+            result = self._run_spark(sql)
+            result.fallback_reason = str(e)
+            return result
+        if not fast.columns:
+            # A statement without rows, such as CREATE VIEW: Spark needs it too
+            self._views.append(sql)
+            if self._spark is not None or self.engine == "compare":
+                self.spark.sql(sql)
+            return fast
+        if self.engine == "compare":
+            reference = self._run_spark(sql)
+            difference = compare_results(reference, fast, self.float_digits)
+            if difference:
+                raise SqlEngineMismatch(f"DuckDB and Spark disagree on\n{sql}\n{difference}")
+            return reference
+        return fast
+
+    def close(self):
+        if self._duckdb is not None:
+            self._duckdb.close()
+
+
+class SqlTestCase(unittest.TestCase):
+    """Test case running its queries through a SqlExecutor, starting Spark only if a query needs it"""
+
+    def setUp(self):
+        self.executor = SqlExecutor()
+
+    def tearDown(self):
+        self.executor.close()
+
+    def load_fixtures(self, *names: str, scale: int = 0):
+        self.executor.load_fixtures(*names, scale=scale)
+
+    def sql(self, sql: str) -> QueryResult:
+        return self.executor.sql(sql)
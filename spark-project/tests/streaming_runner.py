@@ -0,0 +1,426 @@
+#!/usr/bin/env python3
+"""
+Structured Streaming Runner
+
+Runs the windowed aggregations of sources/src_streaming_aggregations.sql and
+sources/src_temporal_analytics.sql as Structured Streaming queries, and
+measures what production streaming jobs need to be sized on:
+1. Events are generated from a local source: the rate source, at a fixed
+   number of events per second, or Parquet files generated once and read
+   one file per micro-batch, as fast as the query keeps up
+2. The events get a watermark on event_timestamp and are registered under
+   the view names of the batch scripts, so each workload is the script's
+   aggregation written for a stream
+3. Each workload runs on its own to the noop sink, and its progress reports
+   give the throughput, the end-to-end latency and the state store size
+
+A stream cannot run the batch scripts as they are. COUNT(DISTINCT) becomes
+APPROX_COUNT_DISTINCT. Window functions over the aggregates (rolling
+averages, LAG, ranks), ORDER BY and the CURRENT_TIMESTAMP filters are left
+out: the watermark bounds the state instead. DATE_TRUNC buckets become
+tumbling windows of the same length, as state is only evicted for windows
+of the watermarked column.
+
+Usage:
+    python streaming_runner.py                                    # rate source, every workload
+    python streaming_runner.py --rows-per-second 20000 --duration 120
+    python streaming_runner.py --source files --rows 2000000 --files 20
+    python streaming_runner.py --workloads temporal_hourly --state-store rocksdb --output streaming.json
+"""
+
+import argparse
+import json
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+try:
+    from pyspark.sql import DataFrame, SparkSession, functions as F
+    from pyspark.sql.streaming import StreamingQuery
+except ImportError:
+    print("ERROR: PySpark not installed. Please run: pip install pyspark")
+    sys.exit(1)
+
+from fixtures import pick
+from spark_session import TEST_SPARK_CONF
+from units import format_bytes
+
+STATE_STORES = {
+    "hdfs": "org.apache.spark.sql.execution.streaming.state.HDFSBackedStateStoreProvider",
+    "rocksdb": "org.apache.spark.sql.execution.streaming.state.RocksDBStateStoreProvider",
+}
+
+USER_SEGMENTS = ["premium", "basic", "trial"]
+EVENT_TYPES = ["page_view", "page_view", "page_view", "add_to_cart", "purchase"]
+SOURCE_SYSTEMS = ["web", "mobile", "api"]
+DEVICE_TYPES = ["mobile", "desktop", "tablet"]
+TRAFFIC_SOURCES = ["organic", "paid", "social", "direct"]
+CITIES = [("US", "New York"), ("US", "San Francisco"), ("UK", "London"), ("CA", "Toronto"), ("DE", "Berlin")]
+USERS = 100_000
+EVENTS_PER_SESSION = 20
+
+
+@dataclass(frozen=True)
+class StreamingWorkload:
+    # Batch script the aggregation comes from
+    source: str
+    sql: str
+
+
+# Columns of the 5-minute windows in src_streaming_aggregations.sql that a
+# stream can maintain; the anomaly indicator compares consecutive windows
+# with a window function and is left out
+STREAMING_AGGREGATIONS_SQL = """
+SELECT
+    WINDOW(event_timestamp, '5 minutes') as time_window,
+    user_segment,
+    event_type,
+    source_system,
+    COUNT(*) as event_count,
+    APPROX_COUNT_DISTINCT(user_id) as unique_users,
+    APPROX_COUNT_DISTINCT(session_id) as unique_sessions,
+    SUM(CASE WHEN event_type = 'purchase' THEN revenue_amount ELSE 0 END) as total_revenue,
+    AVG(CASE WHEN event_type = 'purchase' THEN revenue_amount ELSE NULL END) as avg_purchase_amount,
+    MAX(CASE WHEN event_type = 'purchase' THEN revenue_amount ELSE NULL END) as max_purchase_amount,
+    SUM(CASE WHEN event_type = 'page_view' THEN 1 ELSE 0 END) as page_views,
+    SUM(CASE WHEN event_type = 'add_to_cart' THEN 1 ELSE 0 END) as add_to_cart_events,
+    SUM(CASE WHEN event_type = 'purchase' THEN 1 ELSE 0 END) as purchase_events,
+    SUM(CASE WHEN status_code >= 400 THEN 1 ELSE 0 END) as error_count,
+    (SUM(CASE WHEN status_code >= 400 THEN 1 ELSE 0 END) * 100.0) / COUNT(*) as error_rate_percent,
+    AVG(response_time_ms) as avg_response_time,
+    PERCENTILE_APPROX(response_time_ms, 0.5) as median_response_time,
+    PERCENTILE_APPROX(response_time_ms, 0.95) as p95_response_time,
+    PERCENTILE_APPROX(response_time_ms, 0.99) as p99_response_time,
+    APPROX_COUNT_DISTINCT(geo_country) as unique_countries,
+    APPROX_COUNT_DISTINCT(geo_city) as unique_cities,
+    SUM(CASE WHEN device_type = 'mobile' THEN 1 ELSE 0 END) as mobile_events,
+    SUM(CASE WHEN device_type = 'desktop' THEN 1 ELSE 0 END) as desktop_events,
+    SUM(CASE WHEN device_type = 'tablet' THEN 1 ELSE 0 END) as tablet_events,
+    APPROX_COUNT_DISTINCT(traffic_source) as unique_traffic_sources,
+    SUM(CASE WHEN traffic_source = 'organic' THEN 1 ELSE 0 END) as organic_traffic,
+    SUM(CASE WHEN traffic_source = 'paid' THEN 1 ELSE 0 END) as paid_traffic,
+    SUM(CASE WHEN traffic_source = 'social' THEN 1 ELSE 0 END) as social_traffic
+FROM streaming_events
+GROUP BY
+    WINDOW(event_timestamp, '5 minutes'),
+    user_segment,
+    event_type,
+    source_system
+"""
+
+# The hourly_patterns and daily_trends CTEs of src_temporal_analytics.sql,
+# bucketed by tumbling windows instead of DATE_TRUNC('hour') and event_date
+TEMPORAL_BASE_SQL = """
+SELECT
+    user_id,
+    event_timestamp,
+    event_type,
+    revenue_amount,
+    CASE
+        WHEN DAYOFWEEK(event_timestamp) IN (1, 7) THEN 'weekend'
+        WHEN HOUR(event_timestamp) BETWEEN 9 AND 17 THEN 'business_hours'
+        ELSE 'after_hours'
+    END as time_category,
+    CASE
+        WHEN MONTH(event_timestamp) IN (12, 1, 2) THEN 'winter'
+        WHEN MONTH(event_timestamp) IN (3, 4, 5) THEN 'spring'
+        WHEN MONTH(event_timestamp) IN (6, 7, 8) THEN 'summer'
+        ELSE 'fall'
+    END as season
+FROM user_events
+"""
+
+TEMPORAL_HOURLY_SQL = f"""
+SELECT
+    WINDOW(event_timestamp, '1 hour') as hour_bucket,
+    time_category,
+    COUNT(*) as event_count,
+    APPROX_COUNT_DISTINCT(user_id) as unique_users,
+    SUM(CASE WHEN event_type = 'purchase' THEN revenue_amount ELSE 0 END) as hourly_revenue,
+    AVG(CASE WHEN event_type = 'purchase' THEN revenue_amount ELSE NULL END) as avg_purchase_amount,
+    SUM(CASE WHEN event_type = 'page_view' THEN 1 ELSE 0 END) as page_views,
+    SUM(CASE WHEN event_type = 'purchase' THEN 1 ELSE 0 END) as purchases,
+    CASE
+        WHEN SUM(CASE WHEN event_type = 'page_view' THEN 1 ELSE 0 END) > 0
+        THEN (SUM(CASE WHEN event_type = 'purchase' THEN 1 ELSE 0 END) * 100.0) /
+             SUM(CASE WHEN event_type = 'page_view' THEN 1 ELSE 0 END)
+        ELSE 0
+    END as conversion_rate
+FROM ({TEMPORAL_BASE_SQL}) time_series_base
+GROUP BY WINDOW(event_timestamp, '1 hour'), time_category
+"""
+
+TEMPORAL_DAILY_SQL = f"""
+SELECT
+    WINDOW(event_timestamp, '1 day') as day_bucket,
+    season,
+    COUNT(*) as daily_events,
+    APPROX_COUNT_DISTINCT(user_id) as daily_active_users,
+    SUM(CASE WHEN event_type = 'purchase' THEN revenue_amount ELSE 0 END) as daily_revenue
+FROM ({TEMPORAL_BASE_SQL}) time_series_base
+GROUP BY WINDOW(event_timestamp, '1 day'), season
+"""
+
+WORKLOADS: Dict[str, StreamingWorkload] = {
+    "streaming_aggregations": StreamingWorkload("src_streaming_aggregations.sql", STREAMING_AGGREGATIONS_SQL),
+    "temporal_hourly": StreamingWorkload("src_temporal_analytics.sql", TEMPORAL_HOURLY_SQL),
+    "temporal_daily": StreamingWorkload("src_temporal_analytics.sql", TEMPORAL_DAILY_SQL),
+}
+
+
+def create_spark_session(state_store: str, shuffle_partitions: int) -> SparkSession:
+    """The test configuration, with the state store provider under test"""
+    builder = SparkSession.builder.appName("StreamingRunner")
+    for key, value in TEST_SPARK_CONF.items():
+        builder = builder.config(key, value)
+    spark = builder \
+        .config("spark.sql.shuffle.partitions", str(shuffle_partitions)) \
+        .config("spark.sql.streaming.stateStore.providerClass", STATE_STORES[state_store]) \
+        .getOrCreate()
+    spark.sparkContext.setLogLevel("ERROR")
+    return spark
+
+
+def with_event_columns(df: DataFrame, max_delay_seconds: int = 0) -> DataFrame:
+    """
+    The columns of streaming_events and user_events, derived from the
+    sequence number and timestamp of the rate source
+
+    With max_delay_seconds, events are backdated by up to that many seconds,
+    so they arrive out of order as they do from real producers.
+    """
+    value = F.col("value")
+    user = F.xxhash64(value) % USERS
+    delay = (F.abs(F.xxhash64(value, F.lit("delay"))) % (max_delay_seconds + 1)).cast("int")
+    city = F.abs(F.xxhash64(user)) % len(CITIES)
+    purchase_amount = F.round((F.abs(F.xxhash64(value, F.lit("amount"))) % 50_000) / 100.0 + 5, 2)
+    event_type = pick(EVENT_TYPES, F.abs(F.xxhash64(value, F.lit("type"))))
+    return df.select(
+        (F.col("timestamp") - F.make_interval(secs=delay)).alias("event_timestamp"),
+        pick(USER_SEGMENTS, F.abs(user)).alias("user_segment"),
+        event_type.alias("event_type"),
+        pick(SOURCE_SYSTEMS, value).alias("source_system"),
+        F.format_string("user_%06d", F.abs(user)).alias("user_id"),
+        F.format_string("sess_%06d_%d", F.abs(user), (value / (USERS * EVENTS_PER_SESSION)).cast("long")).alias("session_id"),
+        F.when(event_type == "purchase", purchase_amount).otherwise(F.lit(0.0)).alias("revenue_amount"),
+        F.when(value % 50 == 0, F.lit(500)).when(value % 20 == 0, F.lit(404)).otherwise(F.lit(200))
+            .alias("status_code"),
+        (F.abs(F.xxhash64(value, F.lit("latency"))) % 2_000 / 10.0 + 20).alias("response_time_ms"),
+        pick([c[0] for c in CITIES], city).alias("geo_country"),
+        pick([c[1] for c in CITIES], city).alias("geo_city"),
+        pick(DEVICE_TYPES, F.abs(user)).alias("device_type"),
+        pick(TRAFFIC_SOURCES, F.abs(F.xxhash64(value, F.lit("traffic")))).alias("traffic_source"),
+    )
+
+
+def generate_event_files(spark: SparkSession, rows: int, files: int, hours: int, path: Path):
+    """Write events spread over the last hours to Parquet, one file after the other in time order"""
+    end = int(time.time())
+    step = hours * 3600 / rows
+    # The file source reads the oldest files first: written in turn, each
+    # file holds later events than the previous one, as a producer would
+    for i in range(files):
+        ids = spark.range(rows * i // files, rows * (i + 1) // files, numPartitions=1)
+        df = ids.select(
+            F.col("id").alias("value"),
+            F.timestamp_seconds(F.lit(end - hours * 3600) + F.col("id") * F.lit(step)).alias("timestamp"),
+        )
+        with_event_columns(df).write.mode("append").parquet(str(path))
+
+
+def _parse_time(value: str) -> datetime:
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def _percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def summarize_progress(progress: List[Dict[str, Any]], warmup_batches: int = 1,
+                       measure_latency: bool = True) -> Dict[str, Any]:
+    """
+    Throughput, latency and state size from the progress reports of a query
+
+    The end-to-end latency of a micro-batch is the time from the oldest event
+    time it read to the end of the batch, when its updated rows are written
+    to the sink. The first batches pay for planning and are skipped.
+    """
+    batches = [p for p in progress if p.get("numInputRows", 0) > 0][warmup_batches:]
+    if not batches:
+        return {"batches": 0}
+    durations = [p["durationMs"]["triggerExecution"] for p in batches]
+    rows = sum(p["numInputRows"] for p in batches)
+    latencies = []
+    if measure_latency:
+        for p in batches:
+            event_time = p.get("eventTime", {})
+            if "min" in event_time:
+                end = _parse_time(p["timestamp"]).timestamp() + p["durationMs"]["triggerExecution"] / 1000
+                latencies.append((end - _parse_time(event_time["min"]).timestamp()) * 1000)
+    state = [op for p in batches for op in p.get("stateOperators", [])]
+    last_state = batches[-1].get("stateOperators", [])
+    return {
+        "batches": len(batches),
+        "input_rows": rows,
+        "input_rows_per_second": round(statistics.mean(p.get("inputRowsPerSecond", 0) for p in batches), 1),
+        # Rows over the time spent processing them, the rate the query can sustain
+        "processed_rows_per_second": round(rows / (sum(durations) / 1000), 1) if sum(durations) else None,
+        "batch_duration_ms_p50": _percentile(durations, 0.5),
+        "batch_duration_ms_p95": _percentile(durations, 0.95),
+        "latency_ms_p50": round(_percentile(latencies, 0.5)) if latencies else None,
+        "latency_ms_p95": round(_percentile(latencies, 0.95)) if latencies else None,
+        "latency_ms_max": round(max(latencies)) if latencies else None,
+        "state_rows": sum(op.get("numRowsTotal", 0) for op in last_state),
+        "state_memory_bytes_peak": max((op.get("memoryUsedBytes", 0) for op in state), default=0),
+        "state_memory_bytes_last": sum(op.get("memoryUsedBytes", 0) for op in last_state),
+        "rows_dropped_by_watermark": sum(op.get("numRowsDroppedByWatermark", 0) for op in state),
+        # Provider-specific sizes, such as the checkpointed bytes of the HDFS
+        # store or the SST files of RocksDB
+        "state_custom_metrics": {k: sum(op.get("customMetrics", {}).get(k, 0) for op in last_state)
+                                 for op in last_state for k in op.get("customMetrics", {})},
+    }
+
+
+class StreamingRunner:
+    """Runs each workload on its own stream of generated events"""
+
+    def __init__(self, spark: SparkSession, args: argparse.Namespace):
+        self.spark = spark
+        self.args = args
+        self.work_dir = Path(args.work_dir or tempfile.mkdtemp(prefix="streaming-runner-"))
+
+    def _events(self) -> DataFrame:
+        if self.args.source == "rate":
+            stream = self.spark.readStream.format("rate") \
+                .option("rowsPerSecond", self.args.rows_per_second) \
+                .option("numPartitions", self.args.source_partitions) \
+                .load()
+            events = with_event_columns(stream, self.args.max_delay_seconds)
+        else:
+            path = self.work_dir / "events"
+            if not path.exists():
+                print(f"Generating {self.args.rows:,} events in {self.args.files} files...")
+                generate_event_files(self.spark, self.args.rows, self.args.files, self.args.hours, path)
+            schema = self.spark.read.parquet(str(path)).schema
+            events = self.spark.readStream.schema(schema).option("maxFilesPerTrigger", 1).parquet(str(path))
+        return events.withWatermark("event_timestamp", self.args.watermark)
+
+    def _await(self, query: StreamingQuery):
+        if self.args.source != "rate":
+            query.processAllAvailable()
+            return
+        query.awaitTermination(self.args.duration)
+        # Stopped between two batches rather than in the middle of one
+        deadline = time.time() + 60
+        while query.status["isTriggerActive"] and time.time() < deadline:
+            time.sleep(0.1)
+
+    def run_workload(self, name: str) -> Dict[str, Any]:
+        workload = WORKLOADS[name]
+        events = self._events()
+        for view in ("streaming_events", "user_events"):
+            events.createOrReplaceTempView(view)
+        checkpoint = self.work_dir / "checkpoints" / name
+        shutil.rmtree(checkpoint, ignore_errors=True)
+        query = self.spark.sql(workload.sql).writeStream \
+            .format("noop") \
+            .outputMode(self.args.output_mode) \
+            .option("checkpointLocation", str(checkpoint)) \
+            .trigger(processingTime=self.args.trigger) \
+            .queryName(name) \
+            .start()
+        try:
+            self._await(query)
+            if query.exception():
+                raise RuntimeError(f"{name} failed: {query.exception()}")
+            progress = query.recentProgress
+        finally:
+            query.stop()
+        # Generated files hold past events, and in append mode a window is only
+        # written once the watermark passes its end, its length plus the delay later
+        summary = summarize_progress(progress, self.args.warmup_batches,
+                                     measure_latency=self.args.source == "rate" and self.args.output_mode == "update")
+        return {"source": workload.source, **summary}
+
+    def run(self) -> Dict[str, Dict[str, Any]]:
+        results = {}
+        try:
+            for name in self.args.workloads:
+                print(f"▶ {name}: {self.args.source} source, {self.args.output_mode} mode, "
+                      f"trigger {self.args.trigger}, watermark {self.args.watermark}")
+                results[name] = self.run_workload(name)
+                _print_result(name, results[name])
+        finally:
+            if not self.args.work_dir:
+                shutil.rmtree(self.work_dir, ignore_errors=True)
+        return results
+
+
+def _print_result(name: str, result: Dict[str, Any]):
+    if not result.get("batches"):
+        print(f"  ⚠️  {name}: no micro-batch with input after the warm-up, run longer")
+        return
+    print(f"  {result['batches']} batches, {result['input_rows']:,} rows, "
+          f"{result['processed_rows_per_second']:,} rows/s processed "
+          f"({result['input_rows_per_second']:,} rows/s in)")
+    print(f"  batch duration p50 {result['batch_duration_ms_p50']} ms, p95 {result['batch_duration_ms_p95']} ms")
+    if result["latency_ms_p50"] is not None:
+        print(f"  end-to-end latency p50 {result['latency_ms_p50']} ms, p95 {result['latency_ms_p95']} ms, "
+              f"max {result['latency_ms_max']} ms")
+    print(f"  state: {result['state_rows']:,} rows, {format_bytes(result['state_memory_bytes_last'])} "
+          f"(peak {format_bytes(result['state_memory_bytes_peak'])}), "
+          f"{result['rows_dropped_by_watermark']:,} late rows dropped")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Run the windowed aggregations as Structured Streaming queries")
+    parser.add_argument("--workloads", nargs="+", choices=list(WORKLOADS), default=list(WORKLOADS))
+    parser.add_argument("--source", choices=["rate", "files"], default="rate")
+    parser.add_argument("--rows-per-second", type=int, default=5_000, help="Rate source: events per second")
+    parser.add_argument("--source-partitions", type=int, default=2, help="Rate source: partitions")
+    parser.add_argument("--duration", type=int, default=60, help="Rate source: seconds each workload runs")
+    parser.add_argument("--max-delay-seconds", type=int, default=0,
+                        help="Rate source: backdate events by up to that many seconds")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="File source: generated events")
+    parser.add_argument("--files", type=int, default=20, help="File source: files, one per micro-batch")
+    parser.add_argument("--hours", type=int, default=24, help="File source: hours the events span")
+    parser.add_argument("--watermark", default="1 minute", help="Delay of the watermark on event_timestamp")
+    parser.add_argument("--trigger", default="5 seconds", help="Processing-time trigger interval")
+    parser.add_argument("--output-mode", choices=["update", "append"], default="update")
+    parser.add_argument("--state-store", choices=list(STATE_STORES), default="hdfs")
+    parser.add_argument("--shuffle-partitions", type=int, default=2, help="Also the number of state store partitions")
+    parser.add_argument("--warmup-batches", type=int, default=1, help="Batches with input left out of the results")
+    parser.add_argument("--work-dir", type=Path, default=None, help="Checkpoints and generated files, kept if given")
+    parser.add_argument("--output", type=Path, help="Write the results as JSON")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+
+    spark = create_spark_session(args.state_store, args.shuffle_partitions)
+    try:
+        results = StreamingRunner(spark, args).run()
+
+        if args.output:
+            settings = {k: v for k, v in vars(args).items() if k not in ("output", "work_dir")}
+            with open(args.output, "w") as f:
+                json.dump({"settings": settings, "spark": spark.version, "workloads": results}, f, indent=2)
+                f.write("\n")
+            print(f"\nResults written to {args.output}")
+    finally:
+        spark.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,54 @@
+"""
+Tests of the dedup benchmark's strategies
+
+Each sort-free candidate must keep exactly the rows of the dedup() macro,
+ties and null timestamps included, or its timings mean nothing.
+"""
+
+import unittest
+
+from benchmark_dedup import STRATEGIES, strategy_sql
+from spark_session import SparkTestCase
+from sql_compiler import SqlCompiler
+
+
+class TestDedupStrategies(SparkTestCase):
+
+    def _create_src_portal_role(self):
+        # Ties on __source_ts_ms are broken by __ts_ms, then by the operation;
+        # a null __source_ts_ms sorts last, and role 4 ends with a delete
+        self.spark.createDataFrame([
+            ("t1", 1, "admin", "tie, older", 500, 500, "u"),
+            ("t1", 1, "admin", "tie, newer", 500, 600, "u"),
+            ("t1", 2, "viewer", "created", 700, 700, "c"),
+            ("t1", 2, "viewer", "updated", 700, 700, "u"),
+            ("t1", 3, "viewer", "no source ts", None, 900, "u"),
+            ("t1", 3, "viewer", "with source ts", 100, 100, "u"),
+            ("t1", 4, "viewer", "gone", 100, 100, "c"),
+            ("t1", 4, "viewer", "gone", 400, 400, "d"),
+            ("t2", 1, "admin", "other tenant", 150, 150, "c"),
+        ], "__db STRING, role_id INT, role_name STRING, role_description STRING, "
+           "__source_ts_ms BIGINT, __ts_ms BIGINT, __op STRING").createOrReplaceTempView("src_portal_role")
+
+    def test_strategies_keep_the_rows_of_the_macro(self):
+        self._create_src_portal_role()
+        compiler = SqlCompiler()
+
+        results = {}
+        for strategy in STRATEGIES:
+            df = self.spark.sql(strategy_sql(compiler, strategy, "src_portal_role", "role_id"))
+            results[strategy] = (df.columns, sorted(df.collect()))
+
+        for strategy in STRATEGIES[1:]:
+            self.assertEqual(results[strategy], results["row_number"], strategy)
+        self.assertEqual({(r["__db"], r["role_id"]): r["role_description"] for r in results["row_number"][1]},
+                         {("t1", 1): "tie, newer", ("t1", 2): "created", ("t1", 3): "with source ts",
+                          ("t2", 1): "other tenant"})
+
+    def test_unknown_strategy_is_rejected(self):
+        with self.assertRaisesRegex(ValueError, "Unknown strategy 'hash'"):
+            strategy_sql(SqlCompiler(), "hash", "src_portal_role", "role_id")
+
+
+if __name__ == "__main__":
+    unittest.main()
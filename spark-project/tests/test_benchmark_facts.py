@@ -0,0 +1,68 @@
+"""
+Tests of the fact model performance gate
+
+Checks the comparison with the baseline, which must only fail when a metric
+grew beyond both its relative and absolute thresholds, and the SQL the
+benchmark runs for each model.
+"""
+
+import unittest
+
+from benchmark_facts import FACT_MODELS, Threshold, compare_to_baseline, model_sql
+from sql_compiler import SqlCompiler
+
+THRESHOLDS = {
+    "wall_seconds": Threshold(0.5, 1.0),
+    "shuffle_read_bytes": Threshold(0.2, 1000),
+}
+BASELINE = {"models": {"fct_users": {"100000": {"wall_seconds": 4.0, "shuffle_read_bytes": 100_000}}}}
+
+
+def _statuses(results):
+    return {(e["model"], e["scale"], e["metric"]): e["status"]
+            for e in compare_to_baseline(results, BASELINE, THRESHOLDS)}
+
+
+class TestCompareToBaseline(unittest.TestCase):
+
+    def test_within_thresholds_is_ok(self):
+        statuses = _statuses({"fct_users": {"100000": {"wall_seconds": 5.9, "shuffle_read_bytes": 119_000}}})
+        self.assertEqual(set(statuses.values()), {"ok"})
+
+    def test_growth_beyond_both_thresholds_is_a_regression(self):
+        statuses = _statuses({"fct_users": {"100000": {"wall_seconds": 6.1, "shuffle_read_bytes": 121_000}}})
+        self.assertEqual(statuses[("fct_users", "100000", "wall_seconds")], "regression")
+        self.assertEqual(statuses[("fct_users", "100000", "shuffle_read_bytes")], "regression")
+
+    def test_small_values_need_the_absolute_delta(self):
+        baseline = {"models": {"fct_users": {"10": {"wall_seconds": 0.2, "shuffle_read_bytes": 0}}}}
+        comparisons = compare_to_baseline(
+            {"fct_users": {"10": {"wall_seconds": 1.1, "shuffle_read_bytes": 900}}}, baseline, THRESHOLDS)
+        self.assertEqual([e["status"] for e in comparisons], ["ok", "ok"])
+
+    def test_models_and_scales_missing_from_the_baseline_are_new(self):
+        statuses = _statuses({"fct_users": {"1000000": {"wall_seconds": 9.0, "shuffle_read_bytes": 1}},
+                              "fct_user_role": {"100000": {"wall_seconds": 1.0, "shuffle_read_bytes": 1}}})
+        self.assertEqual(set(statuses.values()), {"new"})
+
+
+class TestModelSql(unittest.TestCase):
+
+    def setUp(self):
+        self.compiler = SqlCompiler()
+
+    def test_insert_into_target_is_dropped(self):
+        sql = model_sql(self.compiler, FACT_MODELS["fct_users"])
+        self.assertRegex(sql, r"^(?i:with|select)\b")
+        self.assertNotRegex(sql.lower(), r"insert\s+into")
+        self.assertFalse(sql.endswith(";"))
+
+    def test_templates_are_compiled_against_the_benchmark_inputs(self):
+        sql = model_sql(self.compiler, FACT_MODELS["fct_user_role"])
+        self.assertNotIn("{{", sql)
+        for table in FACT_MODELS["fct_user_role"].inputs:
+            self.assertIn(table, sql)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,126 @@
+"""
+Tests of the Parquet-cached test fixtures
+
+Checks that a fixture is generated once and read back from Parquet, that its
+content hash follows the generator, the reference date and the scale, and
+that the fct_customer_metrics sources scale up with generated rows.
+"""
+
+import shutil
+import tempfile
+import unittest
+from datetime import date
+from pathlib import Path
+
+from pyspark.sql.types import StructType, StructField, LongType, StringType
+
+from fixtures import Fixture, FixtureContext, FixtureStore, FIXTURES
+from spark_session import SparkTestCase
+
+COLORS_SCHEMA = StructType([
+    StructField("id", LongType(), False),
+    StructField("color", StringType(), True),
+])
+
+
+class TestFixtureStore(SparkTestCase):
+    """Materialization and caching of a fixture declared by the test"""
+
+    def setUp(self):
+        super().setUp()
+        self.root = Path(tempfile.mkdtemp(prefix="fixtures-"))
+        self.store = FixtureStore(self.root)
+        self.calls = 0
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def _colors(self, spark, context):
+        self.calls += 1
+        return [(1, "red"), (2, "green"), (3, None)]
+
+    def test_generated_once_then_read_from_parquet(self):
+        colors = Fixture("colors", COLORS_SCHEMA, self._colors)
+
+        first = self.store.load(self.spark, colors)
+        second = self.store.load(self.spark, colors)
+
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(sorted(first.collect()), sorted(second.collect()))
+        self.assertEqual(self.spark.table("colors").count(), 3)
+        self.assertEqual(len(list(self.root.glob("colors-*"))), 1)
+
+    def test_view_name_can_differ_from_the_fixture(self):
+        self.store.load(self.spark, Fixture("colors", COLORS_SCHEMA, self._colors), view_name="palette")
+        self.assertEqual(self.spark.table("palette").count(), 3)
+
+    def test_hash_follows_version_date_and_scale(self):
+        colors = Fixture("colors", COLORS_SCHEMA, self._colors)
+        context = FixtureContext(date(2025, 1, 1))
+        baseline = self.store.content_hash(colors, context)
+
+        self.assertEqual(baseline, self.store.content_hash(colors, FixtureContext(date(2025, 1, 1))))
+        self.assertNotEqual(baseline, self.store.content_hash(colors, FixtureContext(date(2025, 1, 2))))
+        self.assertNotEqual(baseline, self.store.content_hash(colors, FixtureContext(date(2025, 1, 1), 10)))
+        self.assertNotEqual(baseline, self.store.content_hash(
+            Fixture("colors", COLORS_SCHEMA, self._colors, version=2), context))
+
+    def test_new_version_replaces_the_stale_copy(self):
+        self.store.load(self.spark, Fixture("colors", COLORS_SCHEMA, self._colors))
+        self.store.load(self.spark, Fixture("colors", COLORS_SCHEMA, self._colors, version=2))
+
+        self.assertEqual(self.calls, 2)
+        self.assertEqual(len(list(self.root.glob("colors-*"))), 1)
+
+    def test_hand_written_rows_are_written_without_spark(self):
+        colors = Fixture("colors", COLORS_SCHEMA, self._colors)
+
+        path = self.store.materialize_rows(colors, FixtureContext(date.today()))
+
+        self.assertTrue((path / "_SUCCESS").exists())
+        self.assertEqual(sorted(self.store.load(self.spark, colors).collect()),
+                         sorted(self.spark.createDataFrame(self._colors(None, None), COLORS_SCHEMA).collect()))
+        self.assertEqual(self.calls, 2)
+        self.assertIsNone(self.store.materialize_rows(colors, FixtureContext(date.today(), scale=10)))
+
+    def test_generated_schema_must_match_the_declared_one(self):
+        wrong = Fixture("colors", COLORS_SCHEMA, lambda spark, context: spark.range(3))
+        with self.assertRaisesRegex(ValueError, "declared"):
+            self.store.load(self.spark, wrong)
+        self.assertEqual(list(self.root.glob("colors-*")), [])
+
+
+class TestDeclaredFixtures(SparkTestCase):
+    """The fixtures declared for the spark-project tests"""
+
+    def setUp(self):
+        super().setUp()
+        self.root = Path(tempfile.mkdtemp(prefix="fixtures-"))
+        self.store = FixtureStore(self.root)
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_every_fixture_matches_its_schema(self):
+        for name, fixture in FIXTURES.items():
+            with self.subTest(fixture=name):
+                df = self.store.load(self.spark, name)
+                self.assertGreater(df.count(), 0)
+                self.assertEqual(df.columns, fixture.schema.fieldNames())
+
+    def test_scaled_sources_add_generated_customers(self):
+        scale = 20_000
+        events = self.store.load(self.spark, "src_web_events", scale=scale)
+        profiles = self.store.load(self.spark, "src_customer_profiles", scale=scale)
+        purchases = self.store.load(self.spark, "src_purchases", scale=scale)
+
+        self.assertEqual(events.count(), 17 + scale)
+        self.assertEqual(profiles.count(), 5 + scale // 20)
+        self.assertEqual(purchases.count(), 10 + scale // 4)
+        # Every generated event and purchase belongs to a generated profile
+        for df in (events, purchases):
+            self.assertEqual(df.join(profiles, "customer_id", "left_anti").count(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,101 @@
+"""
+Tests of the hash-based golden snapshots
+
+Checks that fingerprints do not depend on row order or on the summation
+order of doubles, and that a change is reported in its partition only.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from snapshots import (
+    SnapshotAssertions, UPDATE_ENV_VAR, diff_fingerprints, fingerprint, partition_rows, read_snapshot
+)
+from spark_session import SparkTestCase
+
+ROWS = [
+    ("new", "gold", 2, 10.5),
+    ("new", "silver", 1, None),
+    ("veteran", "gold", 4, 0.1 + 0.2),
+    ("veteran", "gold", 3, 7.25),
+]
+SCHEMA = "segment STRING, tier STRING, customers INT, avg_spent DOUBLE"
+
+
+class TestFingerprint(SparkTestCase):
+
+    def _df(self, rows=ROWS):
+        return self.spark.createDataFrame(rows, SCHEMA)
+
+    def test_row_order_and_partitioning_do_not_matter(self):
+        baseline = fingerprint(self._df(), ["segment"])
+        shuffled = fingerprint(self._df(list(reversed(ROWS))).repartition(3), ["segment"])
+
+        self.assertEqual(baseline, shuffled)
+        self.assertEqual(baseline.rows, 4)
+        self.assertEqual(sorted(baseline.partitions), ['{"segment":"new"}', '{"segment":"veteran"}'])
+
+    def test_doubles_are_rounded(self):
+        rows = [r if r[3] != 0.1 + 0.2 else r[:3] + (0.3,) for r in ROWS]
+        self.assertEqual(fingerprint(self._df(), ["segment"]).table_hash,
+                         fingerprint(self._df(rows), ["segment"]).table_hash)
+
+    def test_null_position_is_part_of_the_hash(self):
+        self.assertNotEqual(fingerprint(self._df([("new", None, 1, None)])).table_hash,
+                            fingerprint(self._df([(None, "new", 1, None)])).table_hash)
+
+    def test_duplicate_rows_are_counted(self):
+        self.assertNotEqual(fingerprint(self._df()).table_hash,
+                            fingerprint(self._df(ROWS + ROWS[:1])).table_hash)
+
+    def test_diff_reports_only_the_changed_partitions(self):
+        changed = [r if r[1] != "silver" else ("new", "silver", 5, None) for r in ROWS]
+        changed.append(("regular", "bronze", 1, 3.0))
+        golden = fingerprint(self._df(), ["segment", "tier"])
+        current = fingerprint(self._df(changed), ["segment", "tier"])
+
+        diff = diff_fingerprints(golden, current)
+
+        self.assertFalse(diff.matches)
+        self.assertEqual(diff.changed_partitions, ['{"segment":"new","tier":"silver"}'])
+        self.assertEqual(diff.extra_partitions, ['{"segment":"regular","tier":"bronze"}'])
+        self.assertEqual(diff.missing_partitions, [])
+        rows = partition_rows(self._df(changed), ["segment", "tier"], diff.mismatching_partitions).collect()
+        self.assertEqual(sorted(r.tier for r in rows), ["bronze", "silver"])
+
+    def test_column_type_change_is_reported(self):
+        df = self._df()
+        golden = fingerprint(df)
+        current = fingerprint(df.withColumn("customers", df.customers.cast("long")))
+        self.assertTrue(diff_fingerprints(golden, current).columns_changed)
+
+
+class TestSnapshotAssertions(SnapshotAssertions, SparkTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.snapshot_dir = Path(tempfile.mkdtemp(prefix="snapshots-"))
+
+    def tearDown(self):
+        shutil.rmtree(self.snapshot_dir, ignore_errors=True)
+
+    def test_write_then_match_then_fail(self):
+        df = self.spark.createDataFrame(ROWS, SCHEMA)
+        with self.assertRaisesRegex(AssertionError, "No snapshot"):
+            self.assertMatchesSnapshot(df, "metrics", ["segment"])
+
+        with mock.patch.dict(os.environ, {UPDATE_ENV_VAR: "1"}):
+            self.assertMatchesSnapshot(df, "metrics", ["segment"])
+        self.assertEqual(read_snapshot("metrics", self.snapshot_dir).rows, 4)
+
+        self.assertMatchesSnapshot(df.repartition(2), "metrics", ["segment"])
+        with self.assertRaisesRegex(AssertionError, r'changed partition \{"segment":"veteran"\}'):
+            self.assertMatchesSnapshot(df.where("customers != 3"), "metrics", ["segment"])
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,120 @@
+"""
+Tests of the dbt-style SQL compiler
+
+Compiles the p7 dedup models with the project macros and runs them on CDC
+sample rows, and checks that the compiled output cache only renders models
+whose template or macros changed.
+"""
+
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from spark_session import SparkTestCase
+from sql_compiler import SqlCompiler, PROJECT_DIR, relation_name
+
+
+class TestSqlCompiler(unittest.TestCase):
+    """Rendering and caching, without Spark"""
+
+    def setUp(self):
+        self.work_dir = Path(tempfile.mkdtemp(prefix="sql-compiler-"))
+        self.project_dir = self.work_dir / "project"
+        shutil.copytree(PROJECT_DIR / "macros", self.project_dir / "macros")
+        shutil.copytree(PROJECT_DIR / "intermediates" / "p7", self.project_dir / "intermediates" / "p7")
+        self.model = self.project_dir / "intermediates" / "p7" / "int_portal_role_deduped.sql"
+
+    def tearDown(self):
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def _compiler(self) -> SqlCompiler:
+        return SqlCompiler(self.project_dir, self.work_dir / "target")
+
+    def test_dedup_macro_and_ref_render_to_spark_sql(self):
+        compiled = self._compiler().compile(self.model)
+
+        self.assertNotIn("{{", compiled.sql)
+        self.assertNotIn("macros/dedup.sql", compiled.sql, "Text outside the macros should not be rendered")
+        self.assertIn("partition by __db, role_id", compiled.sql)
+        self.assertIn("from src_portal_role", compiled.sql)
+        self.assertEqual(compiled.refs, ["src_portal_role"])
+        self.assertFalse(compiled.cached)
+
+    def test_source_and_dbt_utils_render(self):
+        compiled = self._compiler().render(
+            "select {{ dbt_utils.surrogate_key(['a', 'b']) }} as sid from {{ source('p7', 'cdc.users_db.sys_user') }} {{ limit_tenants() }}")
+
+        self.assertEqual(compiled.sources, ["p7.cdc.users_db.sys_user"])
+        self.assertIn(f"from {relation_name('p7', 'cdc.users_db.sys_user')}", compiled.sql)
+        self.assertIn("md5(cast(concat(coalesce(cast(a as string), ''), '-', coalesce(cast(b as string), '')) as string))",
+                      compiled.sql)
+
+    def test_unchanged_model_is_read_from_cache(self):
+        first = self._compiler().compile(self.model)
+        second = self._compiler().compile(self.model)
+
+        self.assertTrue(second.cached)
+        self.assertEqual(first.sql, second.sql)
+        self.assertEqual(first.content_hash, second.content_hash)
+
+    def test_changed_model_or_macro_is_compiled_again(self):
+        first = self._compiler().compile(self.model)
+
+        self.model.write_text(self.model.read_text() + "\n-- reviewed\n")
+        changed_model = self._compiler().compile(self.model)
+        self.assertFalse(changed_model.cached)
+        self.assertNotEqual(first.content_hash, changed_model.content_hash)
+
+        macro = self.project_dir / "macros" / "dedup.sql"
+        macro.write_text(macro.read_text().replace("__ts_ms desc", "__ts_ms desc nulls last"))
+        changed_macro = self._compiler().compile(self.model)
+        self.assertFalse(changed_macro.cached)
+        self.assertIn("__ts_ms desc nulls last", changed_macro.sql)
+
+    def test_force_compiles_again(self):
+        self._compiler().compile(self.model)
+        self.assertFalse(self._compiler().compile(self.model, force=True).cached)
+
+
+class TestDedupModels(SparkTestCase):
+    """The compiled p7 dedup models on CDC rows"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.target_dir = Path(tempfile.mkdtemp(prefix="sql-compiler-target-"))
+        cls.compiler = SqlCompiler(PROJECT_DIR, cls.target_dir)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.target_dir, ignore_errors=True)
+
+    def _create_src_portal_role(self):
+        # Two tenants; role 1 of t1 is updated twice, role 2 of t1 is deleted
+        rows = [
+            ("t1", 1, "admin", "first", 100, 100, "c"),
+            ("t1", 1, "admin", "second", 200, 200, "u"),
+            ("t1", 1, "admin", "latest", 300, 300, "u"),
+            ("t1", 2, "viewer", "gone", 100, 100, "c"),
+            ("t1", 2, "viewer", "gone", 400, 400, "d"),
+            ("t2", 1, "admin", "other tenant", 150, 150, "c"),
+        ]
+        self.spark.createDataFrame(
+            rows, "__db STRING, role_id INT, role_name STRING, role_description STRING, "
+                  "__source_ts_ms BIGINT, __ts_ms BIGINT, __op STRING"
+        ).createOrReplaceTempView("src_portal_role")
+
+    def test_int_portal_role_deduped_keeps_latest_change_per_key(self):
+        self._create_src_portal_role()
+        sql = self.compiler.compile(PROJECT_DIR / "intermediates" / "p7" / "int_portal_role_deduped.sql").sql
+
+        rows = self.spark.sql(sql).orderBy("__db", "role_id").collect()
+
+        self.assertEqual([(r["__db"], r["role_id"], r["role_description"]) for r in rows],
+                         [("t1", 1, "latest"), ("t2", 1, "other tenant")])
+        self.assertTrue(all(r.row_num == 1 for r in rows))
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,122 @@
+"""
+Tests of the DuckDB fast path
+
+Checks the translation of the Spark dialect, that supported queries never
+start Spark, that the others fall back to it with the fixtures and views
+loaded so far, and that the comparison of both engines ignores what only
+differs in representation.
+"""
+
+import shutil
+import tempfile
+import unittest
+from decimal import Decimal
+from pathlib import Path
+
+from pyspark.sql import Row
+
+from fixtures import FixtureStore
+from spark_session import get_spark_session
+from sql_executor import (
+    QueryResult, SqlEngineMismatch, SqlExecutor, UnsupportedSql, compare_results, to_duckdb
+)
+
+SESSIONS_SQL = """
+SELECT customer_id, session_id, MIN(event_timestamp) AS session_start, COUNT(*) AS total_events
+FROM src_web_events
+WHERE event_timestamp >= CURRENT_DATE - INTERVAL 7 DAYS
+GROUP BY customer_id, session_id
+"""
+
+
+def _no_spark():
+    raise AssertionError("Spark was started")
+
+
+class TestTranslation(unittest.TestCase):
+
+    def test_spark_functions_are_translated(self):
+        translation = to_duckdb("SELECT DATEDIFF(CURRENT_DATE, d) FROM t")
+        self.assertIn("DATE_DIFF('DAY'", translation.sql)
+        self.assertTrue(translation.returns_rows)
+        self.assertFalse(to_duckdb("CREATE TEMPORARY VIEW v AS SELECT 1").returns_rows)
+
+    def test_approximate_aggregates_are_not(self):
+        with self.assertRaisesRegex(UnsupportedSql, "approximate"):
+            to_duckdb("SELECT PERCENTILE_APPROX(x, 0.5) FROM t")
+
+    def test_one_statement_at_a_time(self):
+        with self.assertRaisesRegex(UnsupportedSql, "2 statements"):
+            to_duckdb("SELECT 1; SELECT 2")
+
+
+class TestCompareResults(unittest.TestCase):
+
+    def _result(self, engine, *rows):
+        return QueryResult(["id", "value"], [Row(id=i, value=v) for i, v in rows], engine)
+
+    def test_order_and_numeric_types_do_not_matter(self):
+        spark = self._result("spark", (1, Decimal("226.653333")), (2, Row(a=1, b="x")))
+        duck = self._result("duckdb", (2, {"b": "x", "a": 1}), (1, 226.65333333333334))
+        self.assertIsNone(compare_results(spark, duck))
+
+    def test_differences_are_listed_per_engine(self):
+        spark = self._result("spark", (1, 10.0), (2, 20.0))
+        duck = self._result("duckdb", (1, 10.0), (2, 21.0))
+        difference = compare_results(spark, duck)
+        self.assertIn("only in spark: (2.0, 20.0)", difference)
+        self.assertIn("only in duckdb: (2.0, 21.0)", difference)
+
+
+class TestSqlExecutor(unittest.TestCase):
+
+    def test_supported_queries_never_start_spark(self):
+        # An empty fixture cache, as on a fresh checkout
+        root = Path(tempfile.mkdtemp(prefix="fixtures-"))
+        self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        executor = SqlExecutor("duckdb", spark_factory=_no_spark, store=FixtureStore(root))
+        executor.load_fixtures("src_web_events", "raw_events")
+
+        result = executor.sql(SESSIONS_SQL)
+
+        self.assertEqual(result.engine, "duckdb")
+        self.assertTrue(any(row.customer_id == 1001 for row in result.rows))
+        tags = executor.sql("SELECT event_properties.tags FROM raw_events").rows[0][0]
+        self.assertEqual(tags, ["premium", "mobile"])
+        self.assertEqual(executor.fallbacks, [])
+        executor.close()
+
+    def test_unsupported_queries_fall_back_with_the_views_so_far(self):
+        executor = SqlExecutor("duckdb", spark_factory=lambda: get_spark_session().newSession())
+        executor.load_fixtures("src_web_events")
+        executor.sql("CREATE OR REPLACE TEMPORARY VIEW events_1001 AS "
+                     "SELECT * FROM src_web_events WHERE customer_id = 1001")
+
+        result = executor.sql("SELECT WINDOW(event_timestamp, '5 minutes') AS w, COUNT(*) AS n "
+                              "FROM events_1001 GROUP BY 1")
+
+        self.assertEqual(result.engine, "spark")
+        self.assertIn("DuckDB", result.fallback_reason)
+        self.assertEqual(sum(row.n for row in result.rows),
+                         executor.sql("SELECT COUNT(*) AS n FROM events_1001").rows[0].n)
+        executor.close()
+
+    def test_compare_mode_checks_duckdb_against_spark(self):
+        executor = SqlExecutor("compare")
+        executor.load_fixtures("src_web_events")
+
+        result = executor.sql(SESSIONS_SQL)
+
+        self.assertEqual(result.engine, "spark")
+        executor._duckdb.execute("CREATE OR REPLACE VIEW src_web_events AS SELECT 1 AS customer_id")
+        with self.assertRaises(SqlEngineMismatch):
+            executor.sql("SELECT DISTINCT customer_id FROM src_web_events")
+        executor.close()
+
+    def test_unknown_engine(self):
+        with self.assertRaisesRegex(ValueError, "Unknown SQL engine"):
+            SqlExecutor("postgres")
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,99 @@
+"""
+Tests of the Structured Streaming runner
+
+Checks the metrics read from the progress reports, that every workload runs
+as a streaming query, and that the tumbling windows replacing DATE_TRUNC
+give the same hourly buckets as the batch aggregation.
+"""
+
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from spark_session import SparkTestCase
+from streaming_runner import (
+    TEMPORAL_HOURLY_SQL, WORKLOADS, StreamingRunner, build_parser, generate_event_files, summarize_progress
+)
+
+
+def _progress(rows, duration_ms, start, min_event_time, state_rows=0, memory=0, dropped=0):
+    return {
+        "timestamp": start,
+        "numInputRows": rows,
+        "inputRowsPerSecond": rows / 5,
+        "durationMs": {"triggerExecution": duration_ms},
+        "eventTime": {"min": min_event_time} if min_event_time else {},
+        "stateOperators": [{"numRowsTotal": state_rows, "memoryUsedBytes": memory,
+                            "numRowsDroppedByWatermark": dropped}],
+    }
+
+
+class TestSummarizeProgress(unittest.TestCase):
+
+    def test_metrics_skip_the_warmup_and_empty_batches(self):
+        progress = [
+            _progress(100, 9_000, "2026-01-01T10:00:00.000Z", "2026-01-01T09:59:55.000Z"),
+            _progress(0, 10, "2026-01-01T10:00:05.000Z", None),
+            _progress(1_000, 500, "2026-01-01T10:00:10.000Z", "2026-01-01T10:00:05.000Z", 10, 2048),
+            _progress(1_000, 1_500, "2026-01-01T10:00:15.000Z", "2026-01-01T10:00:10.000Z", 12, 4096, 3),
+        ]
+
+        summary = summarize_progress(progress)
+
+        self.assertEqual(summary["batches"], 2)
+        self.assertEqual(summary["input_rows"], 2_000)
+        self.assertEqual(summary["processed_rows_per_second"], 1_000.0)
+        self.assertEqual(summary["latency_ms_p50"], 5_500)
+        self.assertEqual(summary["latency_ms_max"], 6_500)
+        self.assertEqual(summary["state_rows"], 12)
+        self.assertEqual(summary["state_memory_bytes_peak"], 4096)
+        self.assertEqual(summary["rows_dropped_by_watermark"], 3)
+
+    def test_no_batch_after_the_warmup(self):
+        self.assertEqual(summarize_progress([_progress(10, 100, "2026-01-01T10:00:00Z", None)]), {"batches": 0})
+
+
+class TestStreamingWorkloads(SparkTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.work_dir = Path(tempfile.mkdtemp(prefix="streaming-"))
+
+    def tearDown(self):
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def test_every_workload_runs_as_a_stream(self):
+        args = build_parser().parse_args(["--source", "files", "--rows", "4000", "--files", "2",
+                                          "--trigger", "0 seconds", "--work-dir", str(self.work_dir)])
+        runner = StreamingRunner(self.spark, args)
+        for name in WORKLOADS:
+            with self.subTest(workload=name):
+                result = runner.run_workload(name)
+                self.assertEqual(result["input_rows"], 2000)
+                self.assertGreater(result["state_rows"], 0)
+                self.assertIsNone(result["latency_ms_p50"])
+
+    def test_hourly_windows_match_the_date_trunc_buckets(self):
+        path = self.work_dir / "events"
+        generate_event_files(self.spark, 5000, 2, 6, path)
+        events = self.spark.read.parquet(str(path))
+        stream = self.spark.readStream.schema(events.schema).parquet(str(path))
+        stream.withWatermark("event_timestamp", "1 minute").createOrReplaceTempView("user_events")
+        query = self.spark.sql(TEMPORAL_HOURLY_SQL).writeStream.format("memory").queryName("hourly") \
+            .outputMode("complete").option("checkpointLocation", str(self.work_dir / "checkpoint")).start()
+        try:
+            query.processAllAvailable()
+        finally:
+            query.stop()
+
+        events.createOrReplaceTempView("batch_events")
+        batch = self.spark.sql("SELECT DATE_TRUNC('hour', event_timestamp) AS hour, COUNT(*) AS event_count "
+                               "FROM batch_events GROUP BY 1").collect()
+        streamed = self.spark.sql("SELECT hour_bucket.start AS hour, SUM(event_count) AS event_count "
+                                  "FROM hourly GROUP BY 1").collect()
+        self.assertEqual(sorted(batch), sorted(streamed))
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
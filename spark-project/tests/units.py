@@ -0,0 +1,15 @@
+"""
+Human-readable units for the reports of the benchmarks and runners
+
+Kept apart from benchmark_facts.py, so a runner printing bytes does not
+import the fact models' compiler and its jinja2 dependency.
+"""
+
+from typing import Optional
+
+
+def format_bytes(value: Optional[float]) -> str:
+    """A byte count in KB under 1 MB, in MB above, or n/a when unknown"""
+    if value is None:
+        return "n/a"
+    return f"{value / 1024:,.0f} KB" if value < 1 << 20 else f"{value / (1 << 20):,.1f} MB"
@@ -5,23 +5,34 @@ Spark SQL Script Validator
 This script validates all the Spark SQL examples by:
 1. Setting up a local Spark session
 2. Creating sample data for all referenced tables
-3. Executing each SQL script as a Spark job
-4. Reporting success/failure for each script
+3. Executing each SQL script of sources/, dimensions/, intermediates/ and
+   facts/ as a Spark job, one after another or concurrently
+4. Reporting success/failure and timings for each script
+
+With --plan-only, the tables are registered empty from their schemas and each
+script is only parsed, analyzed and optimized (EXPLAIN), without running a job.
 
 Usage:
-    python validate_spark_scripts.py
+    python validate_spark_scripts.py [--plan-only] [--parallel] [--max-workers 8] [--master local[4]]
     
 Requirements:
     pip install pyspark
 """
 
+import argparse
 import os
+import re
 import sys
+import time
 import traceback
-from datetime import datetime, timedelta, date
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, date
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
+from fixtures import FIXTURES
 from test_spark_scripts import TestSparkScripts
+from spark_session import get_spark_session, stop_spark_session
+from sql_compiler import SqlCompiler, is_template
 try:
     from pyspark.sql import SparkSession
     from pyspark.sql.types import (
@@ -37,23 +48,128 @@ except ImportError:
     print("ERROR: PySpark not installed. Please run: pip install pyspark")
     sys.exit(1)
 
+# Layers holding SQL scripts, in the order they are validated sequentially
+SCRIPT_LAYERS = ["sources", "dimensions", "intermediates", "facts"]
+
+# The tests' two local cores would cap --parallel at two running tasks
+PARALLEL_SPARK_MASTER = "local[*]"
+
+
+# Schemas of the validator's own sample tables. Full validation fills them
+# with rows; --plan-only registers them empty, along with every table
+# fixtures.FIXTURES declares.
+SAMPLE_SCHEMAS: Dict[str, StructType] = {
+    "raw_product_events": StructType([
+        StructField("product_id", StringType(), True),
+        StructField("category", StringType(), True),
+        StructField("event_timestamp", TimestampType(), True),
+        StructField("user_id", StringType(), True),
+        StructField("event_type", StringType(), True),
+        StructField("revenue", DoubleType(), True)
+    ]),
+    "raw_events": StructType([
+        StructField("event_id", StringType(), True),
+        StructField("user_id", StringType(), True),
+        StructField("event_timestamp", TimestampType(), True),
+        StructField("event_type", StringType(), True)
+    ]),
+    "sales_data": StructType([
+        StructField("product_category", StringType(), True),
+        StructField("region", StringType(), True),
+        StructField("sale_amount", DoubleType(), True),
+        StructField("sale_date", DateType(), True)
+    ]),
+    "streaming_events": StructType([
+        StructField("event_timestamp", TimestampType(), True),
+        StructField("user_segment", StringType(), True),
+        StructField("event_type", StringType(), True),
+        StructField("source_system", StringType(), True),
+        StructField("user_id", StringType(), True),
+        StructField("session_id", StringType(), True),
+        StructField("revenue_amount", DoubleType(), True),
+        StructField("status_code", IntegerType(), True),
+        StructField("response_time_ms", DoubleType(), True),
+        StructField("geo_country", StringType(), True),
+        StructField("geo_city", StringType(), True),
+        StructField("device_type", StringType(), True)
+    ]),
+    "user_activities": StructType([
+        StructField("user_id", StringType(), True),
+        StructField("email", StringType(), True),
+        StructField("registration_date", DateType(), True),
+        StructField("last_activity_date", DateType(), True),
+        StructField("feature_used", StringType(), True)
+    ]),
+    "feature_usage": StructType([
+        StructField("feature_name", StringType(), True),
+        StructField("user_id", StringType(), True)
+    ]),
+    "user_events": StructType([
+        StructField("user_id", StringType(), True),
+        StructField("event_timestamp", TimestampType(), True),
+        StructField("event_type", StringType(), True),
+        StructField("revenue_amount", DoubleType(), True)
+    ]),
+    "raw_transactions": StructType([
+        StructField("transaction_id", StringType(), True),
+        StructField("user_id", StringType(), True),
+        StructField("product_id", StringType(), True),
+        StructField("transaction_timestamp", TimestampType(), True),
+        StructField("amount", DoubleType(), True),
+        StructField("currency", StringType(), True),
+        StructField("merchant_category", StringType(), True),
+        StructField("payment_method", StringType(), True),
+        StructField("transaction_metadata", StringType(), True)
+    ]),
+}
+
+
+# How EXPLAIN reports a statement it could not analyze or plan, instead of raising
+EXPLAIN_ERROR = re.compile(r"^(org\.apache\.spark\.\S*Exception: .*|Error occurred during query planning: ?.*)$", re.MULTILINE)
+
+
+def plan_schemas() -> Dict[str, StructType]:
+    """
+    Schemas of the tables the scripts read, for --plan-only
+
+    The fixtures' schemas win over the validator's simpler samples. The
+    dedup() inputs of the p7 intermediates are the deduplicated fixtures
+    without the row_num column the macro adds.
+    """
+    schemas = dict(SAMPLE_SCHEMAS)
+    for name, fixture in FIXTURES.items():
+        schemas[name] = fixture.schema
+        deduped = re.fullmatch(r"int_(\w+)_deduped", name)
+        if deduped:
+            source = f"src_{deduped.group(1)}"
+            schemas.setdefault(source, StructType([f for f in fixture.schema if f.name != "row_num"]))
+    return schemas
+
+
+def discover_scripts(project_dir: Path, layers: List[str] = SCRIPT_LAYERS) -> List[Path]:
+    """All .sql files of the layer folders, subfolders included"""
+    scripts = []
+    for layer in layers:
+        layer_dir = project_dir / layer
+        if layer_dir.exists():
+            scripts.extend(sorted(layer_dir.rglob("*.sql")))
+    return scripts
+
 
 class SparkSQLValidator:
     
-    def __init__(self):
+    def __init__(self, plan_only: bool = False, master: Optional[str] = None):
         """Initialize Spark session and setup"""
+        self.master = master
         self.spark = self._create_spark_session()
+        self.plan_only = plan_only
+        self.compiler = SqlCompiler()
         self.results = []
+        self.total_seconds = 0.0
         
     def _create_spark_session(self) -> SparkSession:
-        """Create a local Spark session for testing"""
-        return SparkSession.builder \
-            .appName("SparkSQLValidator") \
-            .master("local[*]") \
-            .config("spark.sql.adaptive.enabled", "true") \
-            .config("spark.sql.adaptive.coalescePartitions.enabled", "true") \
-            .config("spark.sql.warehouse.dir", "/tmp/spark-warehouse") \
-            .getOrCreate()
+        """Get the shared local Spark session of the tests, on its own master if given"""
+        return get_spark_session(self.master)
     
     def _create_sample_data(self):
         """Create sample data for all tables referenced in the SQL scripts"""
@@ -71,23 +187,9 @@ class SparkSQLValidator:
             ("prod_003", "books", datetime.strptime("2024-01-15 14:20:00", "%Y-%m-%d %H:%M:%S"), "user_003", "purchase", 24.99),
         ]
         
-        product_events_schema = StructType([
-            StructField("product_id", StringType(), True),
-            StructField("category", StringType(), True),
-            StructField("event_timestamp", TimestampType(), True),
-            StructField("user_id", StringType(), True),
-            StructField("event_type", StringType(), True),
-            StructField("revenue", DoubleType(), True)
-        ])
-        
-        raw_product_events = self.spark.createDataFrame(product_events_data, product_events_schema)
+        raw_product_events = self.spark.createDataFrame(product_events_data, SAMPLE_SCHEMAS["raw_product_events"])
         raw_product_events.createOrReplaceTempView("raw_product_events")
         
-    
-        
-        
-    
-        
         # Sample data for event processing (with nested structures)
         raw_events_data = [
             ("evt_001", "user_001", "2024-01-15 10:00:00", "click", 
@@ -107,14 +209,7 @@ class SparkSQLValidator:
             ("evt_003", "user_003", datetime.strptime("2024-01-15 12:00:00", "%Y-%m-%d %H:%M:%S"), "page_view"),
         ]
         
-        raw_events_schema = StructType([
-            StructField("event_id", StringType(), True),
-            StructField("user_id", StringType(), True),
-            StructField("event_timestamp", TimestampType(), True),
-            StructField("event_type", StringType(), True)
-        ])
-        
-        raw_events = self.spark.createDataFrame(raw_events_simple_data, raw_events_schema)
+        raw_events = self.spark.createDataFrame(raw_events_simple_data, SAMPLE_SCHEMAS["raw_events"])
         raw_events.createOrReplaceTempView("raw_events")
         
         # Sales data
@@ -126,14 +221,7 @@ class SparkSQLValidator:
             ("clothing", "north", 950.00, date(2024, 1, 14)),
         ]
         
-        sales_schema = StructType([
-            StructField("product_category", StringType(), True),
-            StructField("region", StringType(), True),
-            StructField("sale_amount", DoubleType(), True),
-            StructField("sale_date", DateType(), True)
-        ])
-        
-        sales_data_df = self.spark.createDataFrame(sales_data, sales_schema)
+        sales_data_df = self.spark.createDataFrame(sales_data, SAMPLE_SCHEMAS["sales_data"])
         sales_data_df.createOrReplaceTempView("sales_data")
         
         # Streaming events
@@ -143,22 +231,7 @@ class SparkSQLValidator:
             (datetime.strptime("2024-01-15 10:10:00", "%Y-%m-%d %H:%M:%S"), "premium", "add_to_cart", "web", "user_003", "session_003", 0.0, 200, 180.2, "CA", "Toronto", "tablet"),
         ]
         
-        streaming_events_schema = StructType([
-            StructField("event_timestamp", TimestampType(), True),
-            StructField("user_segment", StringType(), True),
-            StructField("event_type", StringType(), True),
-            StructField("source_system", StringType(), True),
-            StructField("user_id", StringType(), True),
-            StructField("session_id", StringType(), True),
-            StructField("revenue_amount", DoubleType(), True),
-            StructField("status_code", IntegerType(), True),
-            StructField("response_time_ms", DoubleType(), True),
-            StructField("geo_country", StringType(), True),
-            StructField("geo_city", StringType(), True),
-            StructField("device_type", StringType(), True)
-        ])
-        
-        streaming_events = self.spark.createDataFrame(streaming_events_data, streaming_events_schema)
+        streaming_events = self.spark.createDataFrame(streaming_events_data, SAMPLE_SCHEMAS["streaming_events"])
         streaming_events.createOrReplaceTempView("streaming_events")
         
         # User activities
@@ -168,15 +241,7 @@ class SparkSQLValidator:
             ("user_003", "user003@email.com", date(2024, 1, 1), date(2024, 1, 14), "premium_feature"),
         ]
         
-        user_activities_schema = StructType([
-            StructField("user_id", StringType(), True),
-            StructField("email", StringType(), True),
-            StructField("registration_date", DateType(), True),
-            StructField("last_activity_date", DateType(), True),
-            StructField("feature_used", StringType(), True)
-        ])
-        
-        user_activities = self.spark.createDataFrame(user_activities_data, user_activities_schema)
+        user_activities = self.spark.createDataFrame(user_activities_data, SAMPLE_SCHEMAS["user_activities"])
         user_activities.createOrReplaceTempView("user_activities")
         
         # Feature usage
@@ -186,12 +251,7 @@ class SparkSQLValidator:
             ("premium_feature", "user_003"),
         ]
         
-        feature_usage_schema = StructType([
-            StructField("feature_name", StringType(), True),
-            StructField("user_id", StringType(), True)
-        ])
-        
-        feature_usage = self.spark.createDataFrame(feature_usage_data, feature_usage_schema)
+        feature_usage = self.spark.createDataFrame(feature_usage_data, SAMPLE_SCHEMAS["feature_usage"])
         feature_usage.createOrReplaceTempView("feature_usage")
         
         # User events for temporal analytics
@@ -202,14 +262,7 @@ class SparkSQLValidator:
             ("user_003", datetime.strptime("2024-01-13 09:15:00", "%Y-%m-%d %H:%M:%S"), "add_to_cart", 0.0),
         ]
         
-        user_events_schema = StructType([
-            StructField("user_id", StringType(), True),
-            StructField("event_timestamp", TimestampType(), True),
-            StructField("event_type", StringType(), True),
-            StructField("revenue_amount", DoubleType(), True)
-        ])
-        
-        user_events = self.spark.createDataFrame(user_events_data, user_events_schema)
+        user_events = self.spark.createDataFrame(user_events_data, SAMPLE_SCHEMAS["user_events"])
         user_events.createOrReplaceTempView("user_events")
         
         # Raw transactions for advanced transformations
@@ -222,37 +275,67 @@ class SparkSQLValidator:
              '{"device": {"fingerprint": "fp003"}, "location": {"ip_address": "192.168.1.3"}, "risk_scores": {"fraud_score": "0.9"}}'),
         ]
         
-        raw_transactions_schema = StructType([
-            StructField("transaction_id", StringType(), True),
-            StructField("user_id", StringType(), True),
-            StructField("product_id", StringType(), True),
-            StructField("transaction_timestamp", TimestampType(), True),
-            StructField("amount", DoubleType(), True),
-            StructField("currency", StringType(), True),
-            StructField("merchant_category", StringType(), True),
-            StructField("payment_method", StringType(), True),
-            StructField("transaction_metadata", StringType(), True)
-        ])
-        
-        raw_transactions = self.spark.createDataFrame(raw_transactions_data, raw_transactions_schema)
+        raw_transactions = self.spark.createDataFrame(raw_transactions_data, SAMPLE_SCHEMAS["raw_transactions"])
         raw_transactions.createOrReplaceTempView("raw_transactions")
         
         print("✓ Sample data created successfully")
     
+    def _register_empty_tables(self):
+        """Register every table the scripts read from its schema alone, for planning"""
+        print("Registering empty tables...")
+        schemas = plan_schemas()
+        for table, schema in schemas.items():
+            self.spark.createDataFrame([], schema).createOrReplaceTempView(table)
+        print(f"✓ {len(schemas)} empty tables registered")
+    
     def _read_sql_file(self, file_path: Path) -> str:
-        """Read SQL content from file"""
+        """Read SQL content from file, compiling dbt-style templates first"""
         try:
             with open(file_path, 'r', encoding='utf-8') as f:
-                return f.read().strip()
+                sql_content = f.read().strip()
         except Exception as e:
             raise Exception(f"Failed to read file {file_path}: {e}")
+        if is_template(sql_content):
+            sql_content = self.compiler.compile(file_path).sql.strip()
+        return sql_content
+    
+    def _clean_sql(self, sql_content: str) -> str:
+        """Remove comment lines and empty lines"""
+        sql_lines = [line.strip() for line in sql_content.split('\n') if line.strip() and not line.strip().startswith('--')]
+        return '\n'.join(sql_lines)
     
-    def _execute_sql_script(self, script_name: str, sql_content: str) -> Tuple[bool, str, int]:
+    def _plan_sql_script(self, script_name: str, sql_content: str) -> Tuple[bool, str, int]:
+        """
+        Parse, analyze and optimize a SQL script without running it
+
+        EXPLAIN plans queries and commands alike without executing them, so a
+        CREATE TABLE or INSERT script leaves the catalog untouched.
+        """
+        try:
+            cleaned_sql = self._clean_sql(sql_content)
+            
+            if not cleaned_sql:
+                return False, "Empty SQL content after cleaning", 0
+            
+            print(f"  Planning: {script_name}")
+            plan = self.spark.sql(f"EXPLAIN EXTENDED {cleaned_sql}").first()[0]
+            error = EXPLAIN_ERROR.search(plan)
+            if error:
+                raise Exception(error.group(0))
+            
+            print(f"    ✓ Query planned successfully")
+            return True, "Success: planned", 0
+            
+        except Exception as e:
+            error_msg = f"Failed to plan SQL: {str(e)}"
+            print(f"    ✗ {error_msg}")
+            return False, error_msg, 0
+    
+    def _execute_sql_script(self, script_name: str, sql_content: str, show_rows: bool = True) -> Tuple[bool, str, int]:
         """Execute a SQL script and return success status, message, and row count"""
         try:
             # Clean up the SQL (remove comments, empty lines)
-            sql_lines = [line.strip() for line in sql_content.split('\n') if line.strip() and not line.strip().startswith('--')]
-            cleaned_sql = '\n'.join(sql_lines)
+            cleaned_sql = self._clean_sql(sql_content)
             
             if not cleaned_sql:
                 return False, "Empty SQL content after cleaning", 0
@@ -267,8 +350,12 @@ class SparkSQLValidator:
             # Show a few sample rows for debugging (optional)
             if row_count > 0:
                 print(f"    ✓ Query executed successfully, returned {row_count} rows")
-                # Uncomment the next line to see sample data:
-                result_df.show(5, truncate=False)
+                # Concurrent scripts would interleave their sample rows, but
+                # the rows are still computed: count() skips unused columns
+                if show_rows:
+                    result_df.show(5, truncate=False)
+                else:
+                    result_df.take(5)
             else:
                 print(f"    ✓ Query executed successfully, returned 0 row")
             
@@ -281,65 +368,90 @@ class SparkSQLValidator:
             print(f"    Error details: {traceback.format_exc()}")
             return False, error_msg, 0
     
-    def validate_script(self, script_path: Path) -> Dict:
-        """Validate a single SQL script"""
+    def validate_script(self, script_path: Path, pool: Optional[str] = None, started_at: Optional[float] = None) -> Dict:
+        """
+        Validate a single SQL script
+
+        With a pool, the script's jobs run in that FAIR scheduler pool and job
+        group. Both are thread-local, so scripts validated from different
+        threads are scheduled side by side.
+        """
         script_name = script_path.name
         print(f"\n🔍 Validating: {script_name}")
+        context = self.spark.sparkContext
+        if pool:
+            context.setLocalProperty("spark.scheduler.pool", pool)
+            context.setJobGroup(pool, f"validate {script_name}")
+        started = time.perf_counter()
         
         try:
             sql_content = self._read_sql_file(script_path)
-            success, message, row_count = self._execute_sql_script(script_name, sql_content)
-            
-            result = {
-                'script': script_name,
-                'path': str(script_path),
-                'success': success,
-                'message': message,
-                'row_count': row_count,
-                'timestamp': datetime.now().isoformat()
-            }
-            
-            self.results.append(result)
-            return result
-            
+            if self.plan_only:
+                success, message, row_count = self._plan_sql_script(script_name, sql_content)
+            else:
+                success, message, row_count = self._execute_sql_script(script_name, sql_content, show_rows=pool is None)
         except Exception as e:
-            error_msg = f"Validation failed: {str(e)}"
-            print(f"  ✗ {error_msg}")
-            
-            result = {
-                'script': script_name,
-                'path': str(script_path),
-                'success': False,
-                'message': error_msg,
-                'row_count': 0,
-                'timestamp': datetime.now().isoformat()
-            }
-            
-            self.results.append(result)
-            return result
+            success, message, row_count = False, f"Validation failed: {str(e)}", 0
+            print(f"  ✗ {message}")
+        finally:
+            if pool:
+                context.setLocalProperty("spark.scheduler.pool", None)
+                context.setJobGroup("", "")
+        
+        finished = time.perf_counter()
+        result = {
+            'script': script_name,
+            'path': str(script_path),
+            'success': success,
+            'message': message,
+            'row_count': row_count,
+            'seconds': round(finished - started, 3),
+            'timestamp': datetime.now().isoformat()
+        }
+        if started_at is not None:
+            result['start_offset'] = round(started - started_at, 3)
+            result['end_offset'] = round(finished - started_at, 3)
+        return result
     
-    def validate_all_scripts(self, sources_dir: Path) -> List[Dict]:
-        """Validate all SQL scripts in the sources directory"""
+    def validate_all_scripts(self, project_dir: Path, parallel: bool = False, max_workers: int = 8) -> List[Dict]:
+        """
+        Validate all SQL scripts of the project's layer folders
+
+        In parallel mode each script is submitted from its own thread of a
+        pool sharing this session, in a FAIR scheduler pool named after the
+        script, so the total time follows the slowest script rather than
+        the sum of them.
+        """
         print("🚀 Starting Spark SQL Script Validation")
         print("=" * 50)
         
-        # Create sample data first
-        self._create_sample_data()
+        # Create sample data first, or only its schemas to plan the scripts
+        if self.plan_only:
+            self._register_empty_tables()
+        else:
+            self._create_sample_data()
         
         # Find all SQL files
-        sql_files = list(sources_dir.glob("src_*.sql"))
+        sql_files = discover_scripts(project_dir)
         
         if not sql_files:
-            print(f"No SQL files found in {sources_dir}")
+            print(f"No SQL files found in {project_dir}")
             return []
         
         print(f"\nFound {len(sql_files)} SQL scripts to validate:")
         for sql_file in sql_files:
-            print(f"  - {sql_file.name}")
-        
-        # Validate each script
-        for sql_file in sql_files:
-            self.validate_script(sql_file)
+            print(f"  - {sql_file.relative_to(project_dir)}")
+        
+        started = time.perf_counter()
+        if parallel:
+            pools = [str(sql_file.relative_to(project_dir).with_suffix("")).replace(os.sep, ".") for sql_file in sql_files]
+            with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="sql-validator") as executor:
+                futures = [executor.submit(self.validate_script, sql_file, pool, started)
+                           for sql_file, pool in zip(sql_files, pools)]
+                self.results = [future.result() for future in futures]
+        else:
+            self.results = [self.validate_script(sql_file) for sql_file in sql_files]
+        self.total_seconds = round(time.perf_counter() - started, 3)
         
         return self.results
     
@@ -353,44 +465,63 @@ class SparkSQLValidator:
         successful_scripts = len([r for r in self.results if r['success']])
         failed_scripts = total_scripts - successful_scripts
         
+        print(f"Spark master: {self.spark.sparkContext.master}")
         print(f"Total Scripts: {total_scripts}")
         print(f"✅ Successful: {successful_scripts}")
         print(f"❌ Failed: {failed_scripts}")
         print(f"Success Rate: {(successful_scripts/total_scripts)*100:.1f}%" if total_scripts > 0 else "N/A")
+        if total_scripts > 0:
+            slowest = max(self.results, key=lambda r: r['seconds'])
+            print(f"⏱️  Total: {self.total_seconds:.2f}s, sum of scripts: {sum(r['seconds'] for r in self.results):.2f}s, "
+                  f"slowest: {slowest['script']} ({slowest['seconds']:.2f}s)")
         
         if failed_scripts > 0:
             print(f"\n❌ FAILED SCRIPTS:")
             for result in self.results:
                 if not result['success']:
-                    print(f"  - {result['script']}: {result['message']}")
+                    print(f"  - {result['script']} ({result['seconds']:.2f}s): {result['message']}")
         
         if successful_scripts > 0:
             print(f"\n✅ SUCCESSFUL SCRIPTS:")
             for result in self.results:
-                if result['success']:
-                    print(f"  - {result['script']}: {result['row_count']} rows")
+                if result['success'] and self.plan_only:
+                    print(f"  - {result['script']}: planned in {result['seconds']:.2f}s")
+                elif result['success']:
+                    print(f"  - {result['script']}: {result['row_count']} rows in {result['seconds']:.2f}s")
     
     def cleanup(self):
         """Clean up Spark session"""
         if self.spark:
-            self.spark.stop()
+            stop_spark_session()
 
 
 def main():
     """Main execution function"""
-    # Get the directory containing the SQL scripts
-    current_dir = Path(__file__).parent
-    sources_dir = current_dir / "sources"
+    parser = argparse.ArgumentParser(description="Validate the spark-project SQL scripts")
+    parser.add_argument("--plan-only", action="store_true",
+                        help="Only parse, analyze and optimize the scripts against empty tables")
+    parser.add_argument("--parallel", action="store_true",
+                        help="Run the scripts as concurrent Spark jobs, one scheduler pool each")
+    parser.add_argument("--max-workers", type=int, default=8,
+                        help="Scripts validated at the same time with --parallel")
+    parser.add_argument("--master", default=None,
+                        help=f"Spark master URL (default: {PARALLEL_SPARK_MASTER} with --parallel, "
+                             "the tests' local[2] otherwise)")
+    args = parser.parse_args()
+    
+    # Get the directory containing the SQL layer folders
+    project_dir = Path(__file__).resolve().parent.parent
     
-    if not sources_dir.exists():
-        print(f"ERROR: Sources directory not found: {sources_dir}")
+    if not (project_dir / "sources").exists():
+        print(f"ERROR: Sources directory not found: {project_dir / 'sources'}")
         sys.exit(1)
     
-    validator = SparkSQLValidator()
+    master = args.master or (PARALLEL_SPARK_MASTER if args.parallel else None)
+    validator = SparkSQLValidator(plan_only=args.plan_only, master=master)
     
     try:
         # Run validation
-        results = validator.validate_all_scripts(sources_dir)
+        results = validator.validate_all_scripts(project_dir, parallel=args.parallel, max_workers=args.max_workers)
         
         # Print summary
         validator.print_summary()